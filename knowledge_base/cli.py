@@ -90,6 +90,11 @@ def main():
         help="Privacy level for the session"
     )
     
+    # Embeddings migration command
+    subparsers.add_parser(
+        "migrate-embeddings", help="Move a legacy JSON embeddings index into the vector store"
+    )
+    
     # Process command-line arguments
     args = parser.parse_args()
     
@@ -121,6 +126,13 @@ def main():
             "message": f"Created new privacy session: {session_id}"
         }, indent=2))
         
+    elif args.command == "migrate-embeddings":
+        count = kb.semantic_search_engine.migrate_legacy_index()
+        print(json.dumps({
+            "migrated": count,
+            "message": f"Migrated {count} embeddings"
+        }, indent=2))
+        
     elif args.command == "chat":
         print("Starting interactive chat mode (type 'exit' to quit)")
         print(f"Privacy level: {args.privacy_level}\n")
@@ -0,0 +1,276 @@
+"""
+ANN Index
+Inverted-file (IVF) approximate nearest-neighbour index over a vector store.
+"""
+
+import os
+import logging
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Any, Tuple
+
+import numpy as np
+
+from knowledge_base.core.vector_store import VectorStore
+from knowledge_base.utils.helpers import StorageError
+
+logger = logging.getLogger(__name__)
+
+
+class IVFIndex:
+    """
+    Approximate nearest-neighbour index using k-means coarse quantisation.
+
+    The unit vectors of a VectorStore are clustered into ``nlist`` cells with
+    spherical k-means. Each row is assigned to the cell with the closest
+    centroid, and a query only scores the rows in its ``nprobe`` closest
+    cells. Raising ``nprobe`` trades latency for recall; ``nprobe >= nlist``
+    is exact.
+
+    Collections smaller than ``min_train_size`` are searched exactly. The
+    index trains itself once the store reaches that size, and retrains when
+    the store has grown well past the size it was trained on. Centroids are
+    persisted; cell assignments are recomputed when the index is loaded.
+    """
+
+    # Retrain once the store is this many times larger than at training time
+    RETRAIN_GROWTH = 4
+    KMEANS_ITERATIONS = 10
+    SAMPLE_PER_LIST = 64
+
+    def __init__(
+        self,
+        store: VectorStore,
+        centroids_path: Optional[Path] = None,
+        nprobe: int = 8,
+        min_train_size: int = 2048,
+        nlist: Optional[int] = None,
+        seed: int = 0
+    ):
+        """
+        Initialize the index for a vector store.
+
+        Args:
+            store: Vector store holding the vectors
+            centroids_path: Optional .npy file to persist centroids in
+            nprobe: Number of cells to scan per query
+            min_train_size: Store size below which searches are exact
+            nlist: Number of cells; defaults to the square root of the store size
+            seed: Seed for centroid initialisation and sampling
+        """
+        self.store = store
+        self.centroids_path = Path(centroids_path) if centroids_path else None
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+        self.nlist = nlist
+        self._rng = np.random.default_rng(seed)
+
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[Set[int]] = []
+        self._assignments: Dict[int, int] = {}
+        self._trained_size = 0
+        self._centroids_signature: Optional[Tuple[int, int]] = None
+
+        self._load_centroids()
+        self.rebuild()
+
+    @property
+    def trained(self) -> bool:
+        """Whether the index has centroids to route queries with."""
+        return self._centroids is not None
+
+    def rebuild(self) -> None:
+        """Reassign every row of the store, training first if needed."""
+        if self._centroids is not None and self._centroids.shape[1] != self.store.dimension:
+            logger.warning("Discarding ANN centroids with a mismatched dimension")
+            self._centroids = None
+
+        if self._centroids is None:
+            if len(self.store) >= self.min_train_size:
+                self.train()
+            return
+        self._assign_all()
+
+    def refresh(self) -> bool:
+        """
+        Reload the centroids if another process retrained the index.
+
+        Returns:
+            True if the index was rebuilt
+        """
+        if self.centroids_path is None or self._file_signature() == self._centroids_signature:
+            return False
+        self._load_centroids()
+        self.rebuild()
+        return True
+
+    def train(self, nlist: Optional[int] = None) -> None:
+        """
+        Cluster the store's vectors and assign every row to a cell.
+
+        Args:
+            nlist: Number of cells; defaults to the configured or derived value
+        """
+        rows = self._live_rows()
+        if rows.size == 0:
+            return
+
+        nlist = nlist or self.nlist or int(math.sqrt(rows.size))
+        nlist = max(1, min(nlist, rows.size))
+        sample_size = min(rows.size, nlist * self.SAMPLE_PER_LIST)
+        sample = self._rng.choice(rows, sample_size, replace=False) if sample_size < rows.size else rows
+
+        self._centroids = self._kmeans(np.asarray(self.store.matrix[np.sort(sample)]), nlist)
+        self._trained_size = rows.size
+        self._save_centroids()
+        self._assign_all()
+        logger.info(f"Trained ANN index with {nlist} cells on {sample_size} vectors")
+
+    def add(self, row: int) -> None:
+        """
+        Assign a newly written row to its cell.
+
+        Args:
+            row: Row of the vector in the store matrix
+        """
+        if self._centroids is None:
+            if len(self.store) >= self.min_train_size:
+                self.train()
+            return
+        if len(self.store) > self.RETRAIN_GROWTH * self._trained_size:
+            self.train()
+            return
+
+        self.remove(row)
+        cell = int(np.argmax(self._centroids @ self.store.matrix[row]))
+        self._lists[cell].add(row)
+        self._assignments[row] = cell
+
+    def remove(self, row: int) -> None:
+        """
+        Remove a row from its cell.
+
+        Args:
+            row: Row of the vector in the store matrix
+        """
+        cell = self._assignments.pop(row, None)
+        if cell is not None:
+            self._lists[cell].discard(row)
+
+    def search(
+        self,
+        query_vector: Any,
+        top_k: int = 10,
+        mask: Optional[np.ndarray] = None,
+        min_similarity: float = 0.0,
+        exclude: Optional[Set[str]] = None,
+        nprobe: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Find approximately the most similar rows to a query vector.
+
+        Args:
+            query_vector: Query embedding
+            top_k: Number of results to return
+            mask: Optional boolean row mask from VectorStore.filter_mask
+            min_similarity: Minimum similarity score (0.0 - 1.0)
+            exclude: Content IDs to leave out of the results
+            nprobe: Cells to scan for this query, overriding the default
+
+        Returns:
+            List of (content_id, similarity) pairs, most similar first
+        """
+        nprobe = nprobe or self.nprobe
+        exact = (
+            self._centroids is None
+            or len(self.store) < self.min_train_size
+            or nprobe >= len(self._lists)
+            # A selective filter leaves few enough rows to score them all
+            or (mask is not None and int(mask.sum()) <= self.min_train_size)
+        )
+        if exact:
+            return self.store.search(query_vector, top_k, mask=mask, min_similarity=min_similarity, exclude=exclude)
+
+        query = self.store.normalize(query_vector)
+        cell_scores = self._centroids @ query
+        probes = np.argpartition(-cell_scores, nprobe - 1)[:nprobe]
+        size = sum(len(self._lists[cell]) for cell in probes)
+        rows = np.fromiter(
+            (row for cell in probes for row in self._lists[cell]), dtype=np.int64, count=size
+        )
+        return self.store.search(
+            query, top_k, mask=mask, min_similarity=min_similarity, exclude=exclude, rows=rows
+        )
+
+    def _live_rows(self) -> np.ndarray:
+        """Get the rows of the store that hold a vector."""
+        return np.fromiter(
+            (self.store.get_row(content_id) for content_id in self.store.ids()),
+            dtype=np.int64,
+            count=len(self.store)
+        )
+
+    def _assign_all(self, chunk_size: int = 65536) -> None:
+        """Assign every live row to the cell of its closest centroid."""
+        self._lists = [set() for _ in range(self._centroids.shape[0])]
+        self._assignments = {}
+        rows = self._live_rows()
+        for start in range(0, rows.size, chunk_size):
+            chunk = rows[start:start + chunk_size]
+            cells = np.argmax(self.store.matrix[chunk] @ self._centroids.T, axis=1)
+            for row, cell in zip(chunk.tolist(), cells.tolist()):
+                self._lists[cell].add(row)
+                self._assignments[row] = cell
+        self._trained_size = max(self._trained_size, rows.size)
+
+    def _kmeans(self, data: np.ndarray, k: int) -> np.ndarray:
+        """Run spherical k-means and return unit-length centroids."""
+        centroids = data[self._rng.choice(data.shape[0], k, replace=False)].copy()
+        for _ in range(self.KMEANS_ITERATIONS):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, data)
+            norms = np.linalg.norm(sums, axis=1)
+
+            empty = norms == 0
+            if empty.any():
+                # Reseed empty cells with random points
+                sums[empty] = data[self._rng.choice(data.shape[0], int(empty.sum()))]
+                norms[empty] = np.linalg.norm(sums[empty], axis=1)
+            centroids = (sums / np.maximum(norms, 1e-12)[:, None]).astype(np.float32)
+        return centroids
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        """Get a (size, mtime) signature of the centroids file."""
+        try:
+            stat = self.centroids_path.stat()
+            return stat.st_size, stat.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _load_centroids(self) -> None:
+        """Load persisted centroids, if any."""
+        self._centroids = None
+        if self.centroids_path is None:
+            return
+        self._centroids_signature = self._file_signature()
+        if self._centroids_signature is None:
+            return
+        try:
+            self._centroids = np.load(self.centroids_path).astype(np.float32)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable ANN centroids {self.centroids_path}: {e}")
+
+    def _save_centroids(self) -> None:
+        """Persist the centroids atomically."""
+        if self.centroids_path is None:
+            return
+        tmp_path = self.centroids_path.with_name(self.centroids_path.name + ".tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, self._centroids)
+            os.replace(tmp_path, self.centroids_path)
+            self._centroids_signature = self._file_signature()
+        except Exception as e:
+            logger.error(f"Error saving ANN centroids: {e}")
+            raise StorageError(f"Failed to save ANN centroids: {e}")
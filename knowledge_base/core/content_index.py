@@ -0,0 +1,371 @@
+"""
+Content Index
+Persistent ID lookup index for content files in the knowledge base.
+"""
+
+import os
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple, Iterator
+
+from knowledge_base.utils.helpers import StorageError
+
+logger = logging.getLogger(__name__)
+
+# Content files are named "<type>-<timestamp>-<id>.json" or "folder-<id>.json"
+_FILENAME_RE = re.compile(r'^[a-z]+-(?:\d{4}-\d{2}-\d{2}-\d{6}-)?(?P<id>.+)\.json$')
+
+
+class ContentIndex:
+    """
+    Maps content IDs to their content type, file and modification time.
+
+    The index is held in memory and persisted as an append-only JSON lines
+    log, so recording a write costs one appended line rather than a rewrite
+    of the whole index. The log is compacted once it accumulates enough
+    superseded records.
+
+    Each record also carries the modification time of the content directory
+    it touched, provided the directory was up to date before the write. When
+    a lookup misses, directories whose modification time no longer matches
+    are rescanned, which picks up files that were added or removed outside
+    of the ContentManager.
+    """
+
+    def __init__(self, data_dir: Path, content_dirs: Dict[str, Path]):
+        """
+        Initialize the content index.
+
+        Args:
+            data_dir: Root data directory of the knowledge base
+            content_dirs: Mapping of content type to content directory
+        """
+        self.content_dirs = content_dirs
+        self.index_dir = Path(data_dir) / "index"
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.index_dir / "content_index.jsonl"
+
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dir_mtimes: Dict[str, int] = {}
+        self._log_records = 0
+        self._log_signature: Optional[Tuple[int, int]] = None
+        self._lock = threading.RLock()
+
+        self._load()
+        self.refresh()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, content_id: str) -> bool:
+        return self.lookup(content_id) is not None
+
+    def lookup(self, content_id: str) -> Optional[Tuple[str, Path]]:
+        """
+        Look up the location of a content item.
+
+        Args:
+            content_id: ID of the content
+
+        Returns:
+            Tuple of (content_type, filepath) or None if the ID is unknown
+        """
+        with self._lock:
+            self._reload_if_changed()
+            entry = self._entries.get(content_id)
+            if entry is None and self.refresh():
+                entry = self._entries.get(content_id)
+            if entry is None:
+                return None
+            return entry["type"], self.content_dirs[entry["type"]] / entry["file"]
+
+    def get_entry(self, content_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the index entry for a content item.
+
+        Args:
+            content_id: ID of the content
+
+        Returns:
+            Dictionary with type, filepath and mtime, or None if unknown
+        """
+        location = self.lookup(content_id)
+        if location is None:
+            return None
+        content_type, filepath = location
+        return {
+            "type": content_type,
+            "filepath": filepath,
+            "mtime": self._entries[content_id]["mtime"]
+        }
+
+    def ids(self, content_type: Optional[str] = None) -> List[str]:
+        """
+        List indexed content IDs.
+
+        Args:
+            content_type: Optional filter by content type
+
+        Returns:
+            List of content IDs
+        """
+        with self._lock:
+            self._reload_if_changed()
+            if content_type is None:
+                return list(self._entries)
+            return [cid for cid, entry in self._entries.items() if entry["type"] == content_type]
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Iterate over (content_id, entry) pairs of a snapshot of the index."""
+        with self._lock:
+            self._reload_if_changed()
+            snapshot = list(self._entries.items())
+        for content_id, entry in snapshot:
+            yield content_id, {
+                "type": entry["type"],
+                "filepath": self.content_dirs[entry["type"]] / entry["file"],
+                "mtime": entry["mtime"]
+            }
+
+    def dir_mtime(self, content_type: str) -> int:
+        """
+        Get the current modification time of a content directory.
+
+        Writers take it before changing the directory and pass it to
+        record() or remove().
+
+        Args:
+            content_type: Type of content
+
+        Returns:
+            Modification time in nanoseconds, or 0 if the directory is missing
+        """
+        return self._stat_dir(content_type)
+
+    def record(
+        self,
+        content_id: str,
+        content_type: str,
+        filepath: Path,
+        dir_mtime_before: Optional[int] = None
+    ) -> None:
+        """
+        Record that a content item was written to a file.
+
+        Args:
+            content_id: ID of the content
+            content_type: Type of content
+            filepath: File the content was written to
+            dir_mtime_before: Directory modification time taken before the
+                write; the directory is only marked as up to date if the
+                index matched it
+        """
+        filepath = Path(filepath)
+        with self._lock:
+            self._reload_if_changed()
+            entry = {
+                "type": content_type,
+                "file": filepath.name,
+                "mtime": self._stat_mtime(filepath)
+            }
+            self._entries[content_id] = entry
+            record = {"op": "put", "id": content_id, **entry}
+            self._advance_dir(content_type, dir_mtime_before, record)
+            self._append(record)
+
+    def remove(self, content_id: str, dir_mtime_before: Optional[int] = None) -> bool:
+        """
+        Remove a content item from the index.
+
+        Args:
+            content_id: ID of the content
+            dir_mtime_before: Directory modification time taken before the
+                file was deleted; without it the directory is left to be
+                rescanned
+
+        Returns:
+            True if the item was indexed, False otherwise
+        """
+        with self._lock:
+            self._reload_if_changed()
+            entry = self._entries.pop(content_id, None)
+            if entry is None:
+                return False
+            record = {"op": "del", "id": content_id, "type": entry["type"]}
+            self._advance_dir(entry["type"], dir_mtime_before, record)
+            self._append(record)
+            return True
+
+    def _advance_dir(self, content_type: str, dir_mtime_before: Optional[int], record: Dict[str, Any]) -> None:
+        """
+        Mark a directory as up to date after a write that was recorded.
+
+        Only a directory that was up to date before the write is advanced;
+        otherwise files added or renamed by others since it was last scanned
+        would never be found. A stale directory is rescanned on the next miss.
+        """
+        dir_mtime = self._stat_dir(content_type)
+        stored = self._dir_mtimes.get(content_type)
+        if stored == dir_mtime or (dir_mtime_before is not None and stored == dir_mtime_before):
+            self._dir_mtimes[content_type] = dir_mtime
+            record["dir_mtime"] = dir_mtime
+
+    def refresh(self) -> bool:
+        """
+        Rescan content directories that changed since they were last indexed.
+
+        Returns:
+            True if any directory was rescanned
+        """
+        with self._lock:
+            stale = [
+                content_type for content_type in self.content_dirs
+                if self._dir_mtimes.get(content_type) != self._stat_dir(content_type)
+            ]
+            if not stale:
+                return False
+            for content_type in stale:
+                self._scan_dir(content_type)
+            self._compact()
+            return True
+
+    def rebuild(self) -> None:
+        """Rebuild the whole index from the content directories."""
+        with self._lock:
+            self._entries.clear()
+            self._dir_mtimes.clear()
+            for content_type in self.content_dirs:
+                self._scan_dir(content_type)
+            self._compact()
+
+    def _scan_dir(self, content_type: str) -> None:
+        """Replace the entries of one content type with a scan of its directory."""
+        content_dir = self.content_dirs[content_type]
+        dir_mtime = self._stat_dir(content_type)
+
+        for content_id in [cid for cid, e in self._entries.items() if e["type"] == content_type]:
+            del self._entries[content_id]
+
+        try:
+            with os.scandir(content_dir) as it:
+                dir_entries = sorted(it, key=lambda e: e.name)
+        except FileNotFoundError:
+            dir_entries = []
+
+        for dir_entry in dir_entries:
+            match = _FILENAME_RE.match(dir_entry.name)
+            if not match or not dir_entry.is_file():
+                continue
+            self._entries[match.group("id")] = {
+                "type": content_type,
+                "file": dir_entry.name,
+                "mtime": dir_entry.stat().st_mtime
+            }
+
+        self._dir_mtimes[content_type] = dir_mtime
+
+    def _stat_dir(self, content_type: str) -> int:
+        """Get the modification time of a content directory in nanoseconds."""
+        try:
+            return self.content_dirs[content_type].stat().st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    @staticmethod
+    def _stat_mtime(filepath: Path) -> float:
+        """Get the modification time of a file."""
+        try:
+            return filepath.stat().st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    def _log_stat(self) -> Optional[Tuple[int, int]]:
+        """Get a (size, mtime) signature of the index log."""
+        try:
+            stat = self.index_path.stat()
+            return stat.st_size, stat.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _reload_if_changed(self) -> None:
+        """Reload the index if another process wrote to the log."""
+        if self._log_stat() != self._log_signature:
+            self._load()
+
+    def _load(self) -> None:
+        """Load the index by replaying the log."""
+        self._entries.clear()
+        self._dir_mtimes.clear()
+        self._log_records = 0
+
+        try:
+            with open(self.index_path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from an interrupted append
+                        logger.warning(f"Skipping invalid content index record in {self.index_path}")
+                        continue
+                    self._apply(record)
+                    self._log_records += 1
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error loading content index: {e}")
+            raise StorageError(f"Failed to load content index: {e}")
+
+        self._log_signature = self._log_stat()
+
+    def _apply(self, record: Dict[str, Any]) -> None:
+        """Apply one log record to the in-memory index."""
+        op = record.get("op")
+        if op == "put":
+            self._entries[record["id"]] = {
+                "type": record["type"],
+                "file": record["file"],
+                "mtime": record.get("mtime", 0.0)
+            }
+        elif op == "del":
+            self._entries.pop(record["id"], None)
+        elif op == "dirs":
+            self._dir_mtimes.update(record["dirs"])
+            return
+
+        if "dir_mtime" in record and record.get("type") in self.content_dirs:
+            self._dir_mtimes[record["type"]] = record["dir_mtime"]
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        """Append a record to the log, compacting it when it grows too large."""
+        try:
+            with open(self.index_path, 'a') as f:
+                f.write(json.dumps(record, separators=(',', ':')) + "\n")
+            self._log_records += 1
+            self._log_signature = self._log_stat()
+        except Exception as e:
+            logger.error(f"Error writing content index: {e}")
+            raise StorageError(f"Failed to write content index: {e}")
+
+        if self._log_records > 2 * len(self._entries) + 1000:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the log so that it only holds the current entries."""
+        tmp_path = self.index_path.with_suffix(".jsonl.tmp")
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(json.dumps({"op": "dirs", "dirs": self._dir_mtimes}, separators=(',', ':')) + "\n")
+                for content_id, entry in self._entries.items():
+                    f.write(json.dumps({"op": "put", "id": content_id, **entry}, separators=(',', ':')) + "\n")
+            os.replace(tmp_path, self.index_path)
+            self._log_records = len(self._entries) + 1
+            self._log_signature = self._log_stat()
+        except Exception as e:
+            logger.error(f"Error compacting content index: {e}")
+            raise StorageError(f"Failed to compact content index: {e}")
@@ -6,7 +6,7 @@ Manages content items with hierarchical organization and relationships.
 import json
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Any, Tuple, Union
+from typing import Dict, List, Optional, Set, Any, Tuple, Union, Iterator
 from datetime import datetime, timezone
 
 from knowledge_base.content_types import (
@@ -19,6 +19,8 @@ from knowledge_base.utils.helpers import (
 )
 from knowledge_base.core.relationship_manager import RelationshipManager
 from knowledge_base.core.hierarchy_manager import HierarchyManager
+from knowledge_base.core.content_index import ContentIndex
+from knowledge_base.core.search_index import SearchIndex
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +40,8 @@ class ContentManager:
         self, 
         base_path: str = ".",
         relationship_manager: Optional[RelationshipManager] = None,
-        hierarchy_manager: Optional[HierarchyManager] = None
+        hierarchy_manager: Optional[HierarchyManager] = None,
+        search_index: Optional[SearchIndex] = None
     ):
         """
         Initialize the content manager.
@@ -47,6 +50,7 @@ class ContentManager:
             base_path: Root path of the knowledge base
             relationship_manager: Optional relationship manager instance
             hierarchy_manager: Optional hierarchy manager instance
+            search_index: Optional full-text index to push content changes to
         """
         self.base_path = Path(base_path)
         self.data_dir = self.base_path / "data"
@@ -72,6 +76,10 @@ class ContentManager:
         # Create content directories
         for content_dir in self.content_dirs.values():
             content_dir.mkdir(parents=True, exist_ok=True)
+        
+        # ID -> file lookup index
+        self.content_index = ContentIndex(self.data_dir, self.content_dirs)
+        self.search_index = search_index
     
     def create_content(
         self, 
@@ -121,7 +129,7 @@ class ContentManager:
         # Add to hierarchy if parent is specified
         if parent_id:
             # Add content to folder
-            path = self.hierarchy_manager.add_content_to_folder(content.id, parent_id)
+            path = self.hierarchy_manager.add_content_to_folder(content.id, parent_id, content_type)
             content.path = path
             
             # Update path with actual title
@@ -160,9 +168,13 @@ class ContentManager:
         
         try:
             # Write content to file
+            dir_mtime = self.content_index.dir_mtime(content_type)
             with open(filepath, 'w') as f:
                 json.dump(content_dict, f, indent=2)
             
+            self.content_index.record(content.id, content_type, filepath, dir_mtime)
+            self._update_search_index(filepath)
+            
             logger.info(f"Content saved: {filepath}")
             
             # Add filepath to the returned dictionary
@@ -173,6 +185,27 @@ class ContentManager:
             logger.error(f"Error saving content: {e}")
             raise StorageError(f"Failed to save content: {e}")
     
+    def _update_search_index(self, filepath: Path, removed: bool = False) -> None:
+        """
+        Push a written or deleted file to the search index.
+        
+        A failure here only delays the change until the index's next
+        refresh, so it is logged rather than raised.
+        
+        Args:
+            filepath: Path of the content file
+            removed: Whether the file was deleted
+        """
+        if self.search_index is None:
+            return
+        try:
+            if removed:
+                self.search_index.remove_file(filepath)
+            else:
+                self.search_index.update_file(filepath)
+        except Exception as e:
+            logger.warning(f"Failed to update search index for {filepath}: {e}")
+    
     def get_content(self, content_id: str, include_relationships: bool = False) -> Dict[str, Any]:
         """
         Get content by ID.
@@ -187,40 +220,114 @@ class ContentManager:
         Raises:
             NotFoundError: If the content doesn't exist
         """
-        # Check all content directories
-        for content_type, content_dir in self.content_dirs.items():
-            for filepath in content_dir.glob(f"*-{content_id}.json"):
-                try:
-                    # Read content from file
-                    with open(filepath, 'r') as f:
-                        content = json.load(f)
-                    
-                    # Add filepath to the returned dictionary
-                    content["_filepath"] = str(filepath)
-                    content["_content_type"] = content_type
-                    
-                    # Include relationships if requested
-                    if include_relationships:
-                        relationships = self.relationship_manager.get_relationships(content_id)
-                        content["_relationships"] = [rel.to_dict() for rel in relationships]
-                    
-                    # Include hierarchy information
-                    path = self.hierarchy_manager.get_path(content_id)
-                    if path:
-                        content["path"] = path
-                    
-                    parent_id = self.hierarchy_manager.get_parent_id(content_id)
-                    if parent_id:
-                        content["parent_id"] = parent_id
-                    
-                    # Add breadcrumb if in hierarchy
-                    if path:
-                        content["_breadcrumb"] = self.hierarchy_manager.get_breadcrumb(content_id)
-                    
-                    return content
-                except Exception as e:
-                    logger.error(f"Error reading content {content_id}: {e}")
-                    continue
+        content, content_type, filepath = self._read_content_file(content_id)
+        
+        # Add filepath to the returned dictionary
+        content["_filepath"] = str(filepath)
+        content["_content_type"] = content_type
+        
+        # Include relationships if requested
+        if include_relationships:
+            relationships = self.relationship_manager.get_relationships(content_id)
+            content["_relationships"] = [rel.to_dict() for rel in relationships]
+        
+        # Include hierarchy information
+        path = self.hierarchy_manager.get_path(content_id)
+        if path:
+            content["path"] = path
+        
+        parent_id = self.hierarchy_manager.get_parent_id(content_id)
+        if parent_id:
+            content["parent_id"] = parent_id
+        
+        # Add breadcrumb if in hierarchy
+        if path:
+            content["_breadcrumb"] = self.hierarchy_manager.get_breadcrumb(content_id)
+        
+        return content
+    
+    def get_contents(self, content_ids: List[str], fields: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Get several content items by ID.
+        
+        The hierarchy index is read once for the whole batch, and only for
+        the hierarchy fields that are asked for.
+        
+        Args:
+            content_ids: IDs of the content items
+            fields: Optional fields to return; "id" is always included.
+                "path", "parent_id" and "_breadcrumb" are taken from the
+                hierarchy, "_filepath" and "_content_type" from the content
+                index. All fields are returned by default
+            
+        Returns:
+            Dictionary mapping each found content ID to its content data;
+            IDs that don't exist are left out
+        """
+        wanted = set(fields) if fields is not None else None
+        contents = {}
+        for content_id in content_ids:
+            try:
+                content, content_type, filepath = self._read_content_file(content_id)
+            except NotFoundError:
+                continue
+            content["_filepath"] = str(filepath)
+            content["_content_type"] = content_type
+            contents[content_id] = content
+        
+        hierarchy_fields = {"path", "parent_id", "_breadcrumb"}
+        if contents and (wanted is None or wanted & hierarchy_fields):
+            breadcrumbs = wanted is None or "_breadcrumb" in wanted
+            placements = self.hierarchy_manager.get_placements(list(contents), breadcrumbs)
+            for content_id, placement in placements.items():
+                content = contents[content_id]
+                # Same rules as get_content: items outside the hierarchy keep
+                # the fields stored in their files
+                if placement["path"]:
+                    content["path"] = placement["path"]
+                    if breadcrumbs:
+                        content["_breadcrumb"] = placement["breadcrumb"]
+                if placement["parent_id"]:
+                    content["parent_id"] = placement["parent_id"]
+        
+        if wanted is not None:
+            wanted.add("id")
+            contents = {
+                content_id: {key: value for key, value in content.items() if key in wanted}
+                for content_id, content in contents.items()
+            }
+        return contents
+    
+    def _read_content_file(self, content_id: str) -> Tuple[Dict[str, Any], str, Path]:
+        """
+        Read the stored file for a content item using the content index.
+        
+        Args:
+            content_id: ID of the content
+            
+        Returns:
+            Tuple of (content data, content type, filepath)
+            
+        Raises:
+            NotFoundError: If the content doesn't exist
+        """
+        # A second attempt covers files that were moved or deleted behind
+        # the index's back; the failed read drops the stale entry, leaving
+        # its directory stale, so the next lookup rescans it.
+        for _ in range(2):
+            location = self.content_index.lookup(content_id)
+            if location is None:
+                break
+            
+            content_type, filepath = location
+            try:
+                with open(filepath, 'r') as f:
+                    return json.load(f), content_type, filepath
+            except FileNotFoundError:
+                self.content_index.remove(content_id)
+            except Exception as e:
+                logger.error(f"Error reading content {content_id}: {e}")
+                break
         
         # Content not found
         raise NotFoundError(f"Content not found: {content_id}")
@@ -263,6 +370,9 @@ class ContentManager:
                 clean_content = {k: v for k, v in content.items() if not k.startswith("_")}
                 json.dump(clean_content, f, indent=2)
             
+            self.content_index.record(content_id, content["_content_type"], Path(filepath))
+            self._update_search_index(Path(filepath))
+            
             # Update path in hierarchy if title changed
             if "title" in updates and content.get("path"):
                 self.hierarchy_manager.update_content_path(content_id, updates["title"])
@@ -291,40 +401,63 @@ class ContentManager:
         Returns:
             True if content was deleted, False otherwise
         """
-        try:
-            # Get content first to check if it exists and get the filepath
-            content = self.get_content(content_id)
-            filepath = content.get("_filepath")
-            
-            if filepath and Path(filepath).exists():
-                # Delete the file
-                Path(filepath).unlink()
-                
-                # Clean up relationships
-                self.relationship_manager.delete_all_relationships(content_id)
-                
-                # Remove from hierarchy
-                parent_id = self.hierarchy_manager.get_parent_id(content_id)
-                if parent_id:
-                    # If it's a folder, delete from hierarchy
-                    if content.get("_content_type") == "folder":
-                        self.hierarchy_manager.delete_folder(content_id)
-                    else:
-                        # For regular content, just remove from parent's children
-                        hierarchy = self.hierarchy_manager._load_hierarchy_index()
-                        if parent_id in hierarchy and hierarchy[parent_id].get("children"):
-                            if content_id in hierarchy[parent_id]["children"]:
-                                hierarchy[parent_id]["children"].remove(content_id)
-                                self.hierarchy_manager._save_hierarchy_index(hierarchy)
-                
-                return True
+        deleted, errors = self.delete_contents([content_id])
+        error = errors.get(content_id)
+        if error is not None and not isinstance(error, NotFoundError):
+            raise StorageError(f"Failed to delete content: {error}")
+        return bool(deleted)
+    
+    def delete_contents(self, content_ids: List[str]) -> Tuple[List[str], Dict[str, KnowledgeBaseError]]:
+        """
+        Delete several content items.
+        
+        Folders are only deleted when empty or when all their children are
+        deleted with them. The hierarchy and relationship indexes are each
+        written once for the whole batch.
+        
+        Args:
+            content_ids: IDs of the content items
             
-            return False
-        except NotFoundError:
-            return False
-        except Exception as e:
-            logger.error(f"Error deleting content {content_id}: {e}")
-            raise StorageError(f"Failed to delete content: {e}")
+        Returns:
+            Tuple of (IDs deleted, error of each item that was not deleted)
+        """
+        content_ids = list(dict.fromkeys(content_ids))
+        errors: Dict[str, KnowledgeBaseError] = {}
+        locations = {}
+        for content_id in content_ids:
+            location = self.content_index.lookup(content_id)
+            if location is None:
+                errors[content_id] = NotFoundError(f"Content not found: {content_id}")
+            else:
+                locations[content_id] = location
+        
+        # Remove from the hierarchy first, so that non-empty folders are
+        # refused before their files are touched. Items outside the
+        # hierarchy are reported as not found there, which is fine.
+        _, hierarchy_errors = self.hierarchy_manager.delete_many(list(locations))
+        for content_id, error in hierarchy_errors.items():
+            if isinstance(error, ValidationError):
+                errors[content_id] = error
+                del locations[content_id]
+        
+        deleted = []
+        for content_id in locations:
+            try:
+                filepath = self._unlink_content_file(content_id)
+            except Exception as e:
+                logger.error(f"Error deleting content {content_id}: {e}")
+                errors[content_id] = StorageError(f"Failed to delete content: {e}")
+                continue
+            if filepath is None:
+                errors[content_id] = NotFoundError(f"Content not found: {content_id}")
+            else:
+                self._update_search_index(filepath, removed=True)
+                deleted.append(content_id)
+        
+        # Clean up relationships
+        self.relationship_manager.delete_all_relationships_for(deleted)
+        
+        return deleted, errors
     
     def create_relationship(
         self,
@@ -487,6 +620,75 @@ class ContentManager:
         
         return content
     
+    def _unlink_content_file(self, content_id: str) -> Optional[Path]:
+        """
+        Delete the stored file of a content item and forget its location.
+        
+        Returns:
+            Path of the deleted file, or None if there was none
+        """
+        # As in _read_content_file, a second attempt covers files moved
+        # behind the index's back
+        for _ in range(2):
+            location = self.content_index.lookup(content_id)
+            if location is None:
+                break
+            content_type, filepath = location[0], Path(location[1])
+            dir_mtime = self.content_index.dir_mtime(content_type)
+            try:
+                filepath.unlink()
+            except FileNotFoundError:
+                self.content_index.remove(content_id)
+                continue
+            self.content_index.remove(content_id, dir_mtime)
+            return filepath
+        return None
+    
+    def move_contents_to_folder(
+        self,
+        content_ids: List[str],
+        folder_id: str
+    ) -> Tuple[Dict[str, str], Dict[str, KnowledgeBaseError]]:
+        """
+        Move several content items, with anything below them, to a folder.
+        
+        Args:
+            content_ids: IDs of the content items
+            folder_id: ID of the destination folder
+            
+        Returns:
+            Tuple of (new path of each moved item, error of each item that
+            was not moved)
+            
+        Raises:
+            NotFoundError: If the folder doesn't exist
+            ValidationError: If the destination is not a folder
+        """
+        folder = self.get_content(folder_id)
+        if folder.get("_content_type") != "folder":
+            raise ValidationError(f"Destination is not a folder: {folder_id}")
+        
+        content_ids = list(dict.fromkeys(content_ids))
+        errors: Dict[str, KnowledgeBaseError] = {
+            content_id: NotFoundError(f"Content not found: {content_id}")
+            for content_id in content_ids
+            if self.content_index.lookup(content_id) is None
+        }
+        moved, move_errors = self.hierarchy_manager.move_many(
+            [content_id for content_id in content_ids if content_id not in errors], folder_id
+        )
+        errors.update(move_errors)
+        
+        # Only the moved items' own files record their placement; paths
+        # below them are read from the hierarchy
+        for content_id, new_path in moved.items():
+            try:
+                self.update_content(content_id, {"path": new_path, "parent_id": folder_id})
+            except KnowledgeBaseError as e:
+                logger.error(f"Error saving moved content {content_id}: {e}")
+        
+        return moved, errors
+    
     def get_content_by_path(self, path: str) -> Dict[str, Any]:
         """
         Get content by path.
@@ -556,6 +758,42 @@ class ContentManager:
         """
         return self.hierarchy_manager.build_folder_tree(folder_id, max_depth)
     
+    def get_folder_tree_page(
+        self,
+        folder_id: Optional[str] = None,
+        depth: int = 1,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        max_nodes: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Get part of the folder tree for lazy expansion.
+        
+        Args:
+            folder_id: ID of the folder (None for the root)
+            depth: Number of levels to list
+            limit: Maximum number of children listed per folder
+            cursor: A next_cursor or expand token from an earlier page
+            max_nodes: Maximum number of items listed in total
+            
+        Returns:
+            Dictionary representing the folder and its listed descendants
+        """
+        return self.hierarchy_manager.get_tree_page(folder_id, depth, limit, cursor, max_nodes)
+    
+    def iter_folder_tree(self, folder_id: Optional[str] = None, max_depth: int = -1) -> Iterator[Dict[str, Any]]:
+        """
+        Walk the folder tree one item at a time.
+        
+        Args:
+            folder_id: ID of the folder to start from (None for the root)
+            max_depth: Maximum depth below the folder (-1 for unlimited)
+            
+        Returns:
+            Iterator of flat item summaries, parents before children
+        """
+        return self.hierarchy_manager.iter_tree(folder_id, max_depth)
+    
     def create_folder(
         self, 
         title: str, 
@@ -0,0 +1,349 @@
+"""
+Embedding Store
+Memory-mapped on-disk storage for embedding vectors.
+"""
+
+import os
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple, Iterable
+
+import numpy as np
+
+from knowledge_base.core.vector_store import VectorStore
+from knowledge_base.utils.helpers import StorageError, atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+
+class EmbeddingStore(VectorStore):
+    """
+    Vector store persisted as a raw float32 matrix plus a metadata log.
+
+    The embeddings directory holds three files:
+
+    - ``vectors.f32``: normalised vectors as consecutive float32 rows, opened
+      with ``np.memmap`` so that startup maps the file instead of parsing it
+    - ``metadata.jsonl``: append-only log of ``put`` records (ID, row and
+      metadata) and ``del`` tombstones
+    - ``manifest.json``: format version, dimension and creation time
+
+    Adding an embedding writes one row of ``dimension * 4`` bytes and appends
+    one metadata line. The vector is written before its metadata record, so
+    an interrupted add leaves at most an unreferenced row behind. Rows freed
+    by deletes are reused, and the metadata log is compacted once it holds
+    enough superseded records.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    METADATA_FILE = "metadata.jsonl"
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, directory: Path, dimension: int, initial_capacity: int = 64):
+        """
+        Open or create the embedding store in a directory.
+
+        Args:
+            directory: Directory holding the store files
+            dimension: Dimension for a new store; an existing store keeps the
+                dimension recorded in its manifest
+            initial_capacity: Number of rows to preallocate for a new store
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.directory / self.VECTORS_FILE
+        self.metadata_path = self.directory / self.METADATA_FILE
+        self.manifest_path = self.directory / self.MANIFEST_FILE
+
+        self.manifest = self._load_manifest(dimension)
+        if self.manifest["embedding_dimension"] != dimension:
+            logger.warning(
+                f"Embedding store dimension {self.manifest['embedding_dimension']} "
+                f"differs from requested dimension {dimension}; using the stored dimension"
+            )
+
+        self._initial_capacity = max(initial_capacity, 1)
+        self._pending_rows: List[Tuple[int, np.ndarray]] = []
+        self._pending_records: List[Dict[str, Any]] = []
+        self._batch_depth = 0
+        self._log_records = 0
+        self._log_signature: Optional[Tuple[int, int]] = None
+        self._lock = threading.RLock()
+
+        self._load()
+
+    @property
+    def signature(self) -> Optional[Tuple[int, int]]:
+        """(size, mtime) signature of the metadata log as last seen by this store."""
+        return self._log_signature
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload the store if another process changed the metadata log.
+
+        Returns:
+            True if the store was reloaded
+        """
+        with self._lock:
+            if self._log_stat() == self._log_signature:
+                return False
+            self._load()
+            return True
+
+    def add(self, content_id: str, vector: Any, metadata: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Add or replace the vector for a content ID and persist it.
+
+        Args:
+            content_id: ID of the content item
+            vector: Embedding vector
+            metadata: Metadata used for filtering and results
+
+        Returns:
+            Row of the vector in the matrix
+        """
+        with self._lock:
+            row = super().add(content_id, vector, metadata)
+            self._pending_records.append(
+                {"op": "put", "id": content_id, "row": row, "metadata": self._metadata[row]}
+            )
+            self._commit()
+            return row
+
+    def add_many(self, entries: Iterable[Tuple[str, Any, Optional[Dict[str, Any]]]]) -> List[int]:
+        """
+        Add several vectors, writing them with one open of each file.
+
+        Args:
+            entries: Iterable of (content_id, vector, metadata) tuples
+
+        Returns:
+            Rows of the added vectors, in order
+        """
+        rows = []
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                for content_id, vector, metadata in entries:
+                    rows.append(self.add(content_id, vector, metadata))
+            finally:
+                self._batch_depth -= 1
+                self._commit()
+        return rows
+
+    def remove(self, content_id: str) -> bool:
+        """
+        Remove the vector for a content ID and record a tombstone.
+
+        Args:
+            content_id: ID of the content item
+
+        Returns:
+            True if the ID was present, False otherwise
+        """
+        with self._lock:
+            if not super().remove(content_id):
+                return False
+            self._pending_records.append({"op": "del", "id": content_id})
+            self._commit()
+            return True
+
+    def info(self) -> Dict[str, Any]:
+        """
+        Describe the store for statistics.
+
+        Returns:
+            Dictionary with the manifest fields, count and last update time
+        """
+        info = dict(self.manifest)
+        info["count"] = len(self)
+        try:
+            info["last_updated"] = datetime.fromtimestamp(
+                self.metadata_path.stat().st_mtime, timezone.utc
+            ).isoformat()
+        except FileNotFoundError:
+            pass
+        return info
+
+    def _allocate_matrix(self, capacity: int) -> np.ndarray:
+        """Size the vectors file to the capacity and map it read-only."""
+        row_bytes = self.dimension * 4
+        try:
+            if not self.vectors_path.exists():
+                self.vectors_path.touch()
+            size = self.vectors_path.stat().st_size
+            if size < capacity * row_bytes:
+                # Extending with truncate leaves a sparse, zero-filled tail
+                with open(self.vectors_path, 'r+b') as f:
+                    f.truncate(capacity * row_bytes)
+            rows = max(size // row_bytes, capacity)
+            return np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(rows, self.dimension))
+        except Exception as e:
+            logger.error(f"Error mapping embedding vectors: {e}")
+            raise StorageError(f"Failed to map embedding vectors: {e}")
+
+    def _grow_matrix(self, capacity: int) -> np.ndarray:
+        """Extend the vectors file and map it again; existing rows stay in place."""
+        return self._allocate_matrix(capacity)
+
+    def _write_row(self, row: int, array: np.ndarray) -> None:
+        """Queue a row write for the next commit."""
+        self._pending_rows.append((row, array))
+
+    def _commit(self) -> None:
+        """Write queued vectors, then append their metadata records."""
+        if self._batch_depth or not (self._pending_rows or self._pending_records):
+            return
+        rows, records = self._pending_rows, self._pending_records
+        self._pending_rows, self._pending_records = [], []
+
+        try:
+            if rows:
+                row_bytes = self.dimension * 4
+                with open(self.vectors_path, 'r+b') as f:
+                    for row, array in rows:
+                        f.seek(row * row_bytes)
+                        f.write(array.astype(np.float32).tobytes())
+            with open(self.metadata_path, 'a') as f:
+                f.write("".join(json.dumps(r, separators=(',', ':')) + "\n" for r in records))
+            self._log_records += len(records)
+            self._log_signature = self._log_stat()
+        except Exception as e:
+            logger.error(f"Error writing embedding store: {e}")
+            # Drop the in-memory changes that did not reach the disk
+            self._load()
+            raise StorageError(f"Failed to write embedding store: {e}")
+
+        if self._log_records > 2 * len(self) + 1000:
+            self._compact()
+
+    def _load(self) -> None:
+        """Replay the metadata log and map the vectors file."""
+        latest: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        records = 0
+        try:
+            with open(self.metadata_path, 'r') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from an interrupted append
+                        logger.warning(f"Skipping invalid embedding record in {self.metadata_path}")
+                        continue
+                    records += 1
+                    if record.get("op") == "put":
+                        latest.pop(record["id"], None)
+                        latest[record["id"]] = (record["row"], record.get("metadata") or {})
+                    elif record.get("op") == "del":
+                        latest.pop(record["id"], None)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error loading embedding store: {e}")
+            raise StorageError(f"Failed to load embedding store: {e}")
+
+        used = max((row for row, _ in latest.values()), default=-1) + 1
+        super().__init__(self.manifest["embedding_dimension"], max(used, self._initial_capacity))
+
+        self._size = used
+        for content_id, (row, metadata) in latest.items():
+            self._rows[content_id] = row
+            self._place(row, content_id, metadata)
+        self._free_rows = [row for row in range(used - 1, -1, -1) if not self._live[row]]
+
+        self._log_records = records
+        self._log_signature = self._log_stat()
+
+    def _compact(self) -> None:
+        """Rewrite the metadata log so that it only holds live records."""
+        tmp_path = self.metadata_path.with_suffix(".jsonl.tmp")
+        try:
+            with open(tmp_path, 'w') as f:
+                for content_id, row in self._rows.items():
+                    record = {"op": "put", "id": content_id, "row": row, "metadata": self._metadata[row]}
+                    f.write(json.dumps(record, separators=(',', ':')) + "\n")
+            os.replace(tmp_path, self.metadata_path)
+            self._log_records = len(self)
+            self._log_signature = self._log_stat()
+        except Exception as e:
+            logger.error(f"Error compacting embedding store: {e}")
+            raise StorageError(f"Failed to compact embedding store: {e}")
+
+    def _load_manifest(self, dimension: int) -> Dict[str, Any]:
+        """Read the manifest, creating it for a new store."""
+        try:
+            with open(self.manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = {
+                "format": "float32-rows",
+                "version": FORMAT_VERSION,
+                "created": datetime.now(timezone.utc).isoformat(),
+                "embedding_dimension": dimension
+            }
+            atomic_write_json(self.manifest_path, manifest, indent=2)
+            return manifest
+        except Exception as e:
+            logger.error(f"Error loading embedding store manifest: {e}")
+            raise StorageError(f"Failed to load embedding store manifest: {e}")
+
+        if manifest.get("version", FORMAT_VERSION) > FORMAT_VERSION:
+            raise StorageError(f"Unsupported embedding store version: {manifest.get('version')}")
+        return manifest
+
+    def _log_stat(self) -> Optional[Tuple[int, int]]:
+        """Get a (size, mtime) signature of the metadata log."""
+        try:
+            stat = self.metadata_path.stat()
+            return stat.st_size, stat.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+
+def migrate_json_index(json_path: Path, store: EmbeddingStore) -> int:
+    """
+    Move embeddings from a legacy ``embeddings_index.json`` into a store.
+
+    The JSON file is renamed to ``<name>.migrated`` afterwards so that the
+    migration only runs once. A file that cannot be parsed is renamed to
+    ``<name>.bak`` instead.
+
+    Args:
+        json_path: Path of the legacy JSON index
+        store: Store to add the embeddings to
+
+    Returns:
+        Number of embeddings migrated
+    """
+    json_path = Path(json_path)
+    try:
+        with open(json_path, 'r') as f:
+            index = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except json.JSONDecodeError as e:
+        backup_path = json_path.with_suffix('.json.bak')
+        json_path.rename(backup_path)
+        logger.error(f"Invalid embeddings index JSON, backed up to {backup_path}: {e}")
+        return 0
+
+    embeddings = index.get("embeddings", {})
+    count = len(store.add_many(
+        (content_id, data["vector"], data.get("metadata", {}))
+        for content_id, data in embeddings.items()
+        if len(data.get("vector", [])) == store.dimension
+    ))
+    if count != len(embeddings):
+        logger.warning(f"Skipped {len(embeddings) - count} embeddings with a mismatched dimension")
+
+    json_path.rename(json_path.with_name(json_path.name + ".migrated"))
+    logger.info(f"Migrated {count} embeddings from {json_path}")
+    return count
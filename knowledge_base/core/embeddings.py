@@ -0,0 +1,365 @@
+"""
+Embeddings
+Embedding backends and a persistent cache of generated embeddings.
+"""
+
+import math
+import random
+import re
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Protocol
+
+import numpy as np
+
+from knowledge_base.utils.helpers import StorageError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class EmbeddingBackend(Protocol):
+    """Interface for anything that turns texts into embedding vectors."""
+
+    name: str
+    dimension: int
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embedding vectors for a batch of texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            One vector of length ``dimension`` per text, in order
+        """
+        ...
+
+
+class MockEmbeddingBackend:
+    """
+    Deterministic pseudo-random embeddings for tests.
+
+    Each text seeds a random generator with its MD5 digest, so equal texts
+    get equal vectors but similar texts are not close to each other.
+    """
+
+    name = "mock"
+
+    def __init__(self, dimension: int):
+        """
+        Initialize the backend.
+
+        Args:
+            dimension: Dimension of the embedding vectors
+        """
+        self.dimension = dimension
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Generate a mock embedding for each text."""
+        return [self._embed_one(text) for text in texts]
+
+    def _embed_one(self, text: str) -> List[float]:
+        """Generate a unit-length vector seeded by the text's hash."""
+        # A private generator keeps this safe on pipeline worker threads
+        rng = random.Random(hashlib.md5(text.encode()).digest())
+        vector = [rng.uniform(-1, 1) for _ in range(self.dimension)]
+
+        norm = math.sqrt(sum(x * x for x in vector))
+        if norm > 0:
+            vector = [x / norm for x in vector]
+        return vector
+
+
+class HashingEmbeddingBackend:
+    """
+    Offline embeddings from hashed word and bigram features.
+
+    Tokens and adjacent token pairs are hashed into ``dimension`` buckets
+    with a hash-derived sign (the hashing trick), weighted by sublinear term
+    frequency, and the result is L2-normalised. Texts that share vocabulary
+    get similar vectors, so this behaves like a TF projection without a
+    fitted vocabulary or any external service.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dimension: int, use_bigrams: bool = True):
+        """
+        Initialize the backend.
+
+        Args:
+            dimension: Dimension of the embedding vectors
+            use_bigrams: Also hash pairs of adjacent tokens
+        """
+        self.dimension = dimension
+        self.use_bigrams = use_bigrams
+        self._buckets: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Generate a hashed feature embedding for each text."""
+        return [self._embed_one(text).tolist() for text in texts]
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        """Build the normalised feature vector of one text."""
+        tokens = _TOKEN_RE.findall(text.lower())
+        features = list(tokens)
+        if self.use_bigrams:
+            features.extend(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+
+        counts: Dict[str, int] = {}
+        for feature in features:
+            counts[feature] = counts.get(feature, 0) + 1
+
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for feature, count in counts.items():
+            bucket, sign = self._bucket(feature)
+            vector[bucket] += sign * (1.0 + math.log(count))
+
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def _bucket(self, feature: str) -> tuple:
+        """Map a feature to its (bucket, sign), memoising the hash."""
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            bucket = (value % self.dimension, 1.0 if value >> 63 else -1.0)
+            with self._lock:
+                if len(self._buckets) < 1_000_000:
+                    self._buckets[feature] = bucket
+        return bucket
+
+
+BACKENDS = {
+    MockEmbeddingBackend.name: MockEmbeddingBackend,
+    HashingEmbeddingBackend.name: HashingEmbeddingBackend
+}
+
+
+class EmbeddingCache:
+    """
+    Persistent text-hash to vector cache with least-recently-used eviction.
+
+    Entries live in an SQLite database keyed by a hash of the backend name,
+    dimension and text, so switching backends never returns stale vectors.
+    Each entry carries a use counter; once the cache grows past
+    ``max_entries`` the least recently used tenth is evicted.
+
+    Lookups only bump the counters in memory. They are written back in one
+    transaction with the next put_many(), once RECENCY_FLUSH_ENTRIES entries
+    are pending, or on flush() and close(), so cache hits do not commit.
+    """
+
+    # Pending use counters written back without waiting for a put_many()
+    RECENCY_FLUSH_ENTRIES = 1000
+
+    def __init__(self, path: Path, max_entries: int = 100000):
+        """
+        Open or create the cache.
+
+        Args:
+            path: SQLite database file
+            max_entries: Number of entries to keep
+        """
+        self.path = Path(path)
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Use counters of cache hits not yet written to the database
+        self._recent: Dict[str, int] = {}
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, used INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used)")
+            self._conn.commit()
+            self._clock = self._conn.execute("SELECT COALESCE(MAX(used), 0) FROM embeddings").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.error(f"Error opening embedding cache: {e}")
+            raise StorageError(f"Failed to open embedding cache: {e}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def key(backend: EmbeddingBackend, text: str) -> str:
+        """Build the cache key of a text for a backend."""
+        return hashlib.sha256(f"{backend.name}:{backend.dimension}:{text}".encode()).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up cached vectors and mark them as used.
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Dictionary of the keys that were found and their vectors
+        """
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            try:
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                    ).fetchall()
+                    for key, blob in rows:
+                        found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+                if found:
+                    self._clock += 1
+                    for key in found:
+                        self._recent[key] = self._clock
+                    if len(self._recent) >= self.RECENCY_FLUSH_ENTRIES:
+                        self._write_recent()
+                        self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache lookup failed: {e}")
+                return {}
+            self.hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        """
+        Store vectors, evicting least recently used entries if needed.
+
+        Args:
+            items: Dictionary of cache key to vector
+        """
+        if not items:
+            return
+        with self._lock:
+            try:
+                # Eviction below has to see the recency of recent hits
+                self._write_recent()
+                self._clock += 1
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector, used) VALUES (?, ?, ?)",
+                    [
+                        (key, np.asarray(vector, dtype=np.float32).tobytes(), self._clock)
+                        for key, vector in items.items()
+                    ]
+                )
+                count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                if count > self.max_entries:
+                    evict = count - self.max_entries + self.max_entries // 10
+                    self._conn.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY used LIMIT ?)",
+                        (evict,)
+                    )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+    def flush(self) -> None:
+        """Write the use counters of recent cache hits to the database."""
+        with self._lock:
+            try:
+                self._write_recent()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+    def _write_recent(self) -> None:
+        """Stage the pending use counters in the current transaction."""
+        if not self._recent:
+            return
+        self._conn.executemany(
+            "UPDATE embeddings SET used = ? WHERE key = ?",
+            [(used, key) for key, used in self._recent.items()]
+        )
+        self._recent = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit and miss counters and the number of entries."""
+        return {"entries": len(self), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        """Write back pending use counters and close the database connection."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddingBackend:
+    """Backend wrapper that serves repeated texts from an EmbeddingCache."""
+
+    def __init__(self, backend: EmbeddingBackend, cache: EmbeddingCache):
+        """
+        Initialize the wrapper.
+
+        Args:
+            backend: Backend that generates cache misses
+            cache: Cache to consult and fill
+        """
+        self.backend = backend
+        self.cache = cache
+        self.name = backend.name
+        self.dimension = backend.dimension
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings, computing only the texts that are not cached."""
+        keys = [EmbeddingCache.key(self.backend, text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.backend.embed(list(missing.values()))
+            generated = dict(zip(missing, vectors))
+            self.cache.put_many(generated)
+            cached.update(generated)
+
+        return [cached[key] for key in keys]
+
+
+def create_embedding_backend(
+    settings: Optional[Dict[str, Any]],
+    dimension: int,
+    cache_path: Optional[Path] = None
+) -> EmbeddingBackend:
+    """
+    Create the embedding backend described by the ``embeddings`` config section.
+
+    Args:
+        settings: The ``embeddings`` section of the configuration
+        dimension: Dimension of the embedding vectors
+        cache_path: SQLite file for the embedding cache, or None for no cache
+
+    Returns:
+        The configured backend, wrapped in a cache when enabled
+
+    Raises:
+        ValidationError: If the configured backend is unknown
+    """
+    settings = settings or {}
+    name = settings.get("backend", HashingEmbeddingBackend.name)
+    if name not in BACKENDS:
+        raise ValidationError(f"Unknown embedding backend: {name}. Available: {', '.join(BACKENDS)}")
+    backend = BACKENDS[name](dimension)
+
+    cache_size = int(settings.get("cache_size", 100000))
+    if cache_path is None or cache_size <= 0:
+        return backend
+    return CachedEmbeddingBackend(backend, EmbeddingCache(cache_path, cache_size))
@@ -0,0 +1,230 @@
+"""
+Fuzzy Index
+Trigram index for finding vocabulary terms within a small edit distance.
+"""
+
+import logging
+from typing import Dict, List, Optional, Iterable, Tuple, Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Trigrams lost per edit: a substitution, insertion or deletion touches at
+# most three of a word's padded trigrams, an adjacent transposition four
+_GRAMS_PER_EDIT = 4
+
+
+def default_max_distance(word: str) -> int:
+    """Get the number of typos tolerated in a word of this length."""
+    if len(word) <= 3:
+        return 0
+    if len(word) <= 7:
+        return 1
+    return 2
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> Optional[int]:
+    """
+    Get the Damerau-Levenshtein (optimal string alignment) distance of two words.
+
+    Counts insertions, deletions, substitutions and transpositions of
+    adjacent characters, and gives up as soon as the distance must exceed
+    ``max_distance``.
+
+    Args:
+        a: First word
+        b: Second word
+        max_distance: Largest distance of interest
+
+    Returns:
+        The distance, or None if it is greater than max_distance
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    if a == b:
+        return 0
+
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        if min(current) > max_distance:
+            return None
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+def trigrams(word: str) -> List[str]:
+    """Get the distinct trigrams of a word padded with two markers on each side."""
+    padded = f"\x02\x02{word}\x03\x03"
+    return list(dict.fromkeys(padded[i:i + 3] for i in range(len(padded) - 2)))
+
+
+class TrigramIndex:
+    """
+    Trigram index over a vocabulary for typo-tolerant lookups.
+
+    Each term is listed under the trigrams of its padded form. A lookup
+    counts, for every term of a compatible length, how many of the word's
+    trigrams it shares; k edits can destroy at most 4k of them, so only terms
+    sharing enough trigrams are verified with a bounded edit distance. The
+    cost follows the sizes of the word's trigram lists, not the vocabulary.
+
+    The same lists answer substring lookups: every term containing a
+    fragment of three or more characters is listed under each of the
+    fragment's trigrams, so only the shortest of those lists is verified.
+
+    Terms can be added at any time but are never removed; callers pass an
+    ``exists`` check to skip terms that have left the vocabulary.
+    """
+
+    def __init__(self, terms: Iterable[str] = ()):
+        """
+        Build the index.
+
+        Args:
+            terms: Initial vocabulary
+        """
+        self._terms: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._lengths = np.zeros(0, dtype=np.int32)
+        self._grams: Dict[str, List[int]] = {}
+        for term in terms:
+            self.add(term)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._ids
+
+    def add(self, term: str) -> None:
+        """
+        Add a term to the vocabulary.
+
+        Args:
+            term: Term to add
+        """
+        if term in self._ids:
+            return
+        term_id = len(self._terms)
+        self._ids[term] = term_id
+        self._terms.append(term)
+        if term_id >= self._lengths.size:
+            grown = np.zeros(max(64, 2 * self._lengths.size), dtype=np.int32)
+            grown[:self._lengths.size] = self._lengths
+            self._lengths = grown
+        self._lengths[term_id] = len(term)
+        for gram in trigrams(term):
+            postings = self._grams.get(gram)
+            if postings is None:
+                self._grams[gram] = [term_id]
+            else:
+                postings.append(term_id)
+
+    def lookup(
+        self,
+        word: str,
+        max_distance: Optional[int] = None,
+        exists: Optional[Callable[[str], bool]] = None
+    ) -> List[Tuple[str, int]]:
+        """
+        Find the terms within an edit distance of a word.
+
+        Args:
+            word: Word to look up, lower-cased
+            max_distance: Largest edit distance; by default it depends on
+                the word's length (see default_max_distance). The lookup is
+                exact while the padded word has more than 4 trigrams per
+                edit, which the default guarantees; beyond that, terms
+                sharing no trigram with the word are missed
+            exists: Optional check that a term is still in the vocabulary
+
+        Returns:
+            List of (term, distance) pairs, closest first, including the
+            word itself if it is a term
+        """
+        if max_distance is None:
+            max_distance = default_max_distance(word)
+
+        matches = []
+        if word in self._ids and (exists is None or exists(word)):
+            matches.append((word, 0))
+        if max_distance <= 0 or not self._terms:
+            return matches
+
+        grams = trigrams(word)
+        lists = [self._grams[gram] for gram in grams if gram in self._grams]
+        if not lists:
+            return matches
+        # Terms sharing no trigram at all are never candidates
+        required = max(1, len(grams) - _GRAMS_PER_EDIT * max_distance)
+
+        shared = np.fromiter(
+            (i for postings in lists for i in postings), dtype=np.int64, count=sum(map(len, lists))
+        )
+        candidates, counts = np.unique(shared, return_counts=True)
+        keep = (counts >= required) & (np.abs(self._lengths[candidates] - len(word)) <= max_distance)
+        candidates, counts = candidates[keep], counts[keep]
+        # Most shared trigrams first, so the likeliest terms are verified first
+        for term_id in candidates[np.argsort(-counts, kind="stable")].tolist():
+            term = self._terms[term_id]
+            if term == word:
+                continue
+            distance = edit_distance(word, term, max_distance)
+            if distance is not None and (exists is None or exists(term)):
+                matches.append((term, distance))
+
+        matches.sort(key=lambda match: match[1])
+        return matches
+
+    def containing(
+        self,
+        fragment: str,
+        suffix: bool = False,
+        exists: Optional[Callable[[str], bool]] = None
+    ) -> List[str]:
+        """
+        Find the terms containing a fragment, or ending with it.
+
+        The candidates are the terms listed under the fragment's rarest
+        trigram, counting the end markers of a suffix. A fragment of one or
+        two characters has no trigram of its own when it may occur anywhere,
+        so the terms under every trigram containing it are verified instead;
+        that costs a pass over the distinct trigrams, not over the terms.
+
+        Args:
+            fragment: Non-empty lower-cased fragment
+            suffix: Only find terms ending with the fragment
+            exists: Optional check that a term is still in the vocabulary
+
+        Returns:
+            List of matching terms, in the order they were added
+        """
+        padded = f"{fragment}\x03\x03" if suffix else fragment
+        if len(padded) >= 3:
+            lists = []
+            for i in range(len(padded) - 2):
+                postings = self._grams.get(padded[i:i + 3])
+                if postings is None:
+                    return []
+                lists.append(postings)
+            candidates: Iterable[int] = min(lists, key=len)
+        else:
+            candidates = sorted({
+                term_id for gram, postings in self._grams.items() if fragment in gram for term_id in postings
+            })
+
+        matches = []
+        for term_id in candidates:
+            term = self._terms[term_id]
+            if (term.endswith(fragment) if suffix else fragment in term) and (exists is None or exists(term)):
+                matches.append(term)
+        return matches
@@ -0,0 +1,325 @@
+"""
+Graph Communities
+Whole-graph connected components and communities of related content.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+import numpy as np
+
+from knowledge_base.core.graph_engine import GraphEngine
+from knowledge_base.core.graph_snapshot_index import GraphSnapshotIndex
+from knowledge_base.utils.helpers import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+COMMUNITIES_VERSION = 1
+
+
+def connected_components(node_count: int, src: np.ndarray, dst: np.ndarray) -> np.ndarray:
+    """
+    Label connected components with a union-find over edge arrays.
+
+    Each round hooks the root of every edge's larger end under the root of
+    its smaller end, then compresses all parent chains, until every edge
+    joins two nodes with the same root.
+
+    Args:
+        node_count: Number of nodes
+        src: Source node of each edge
+        dst: Target node of each edge
+
+    Returns:
+        Array with the smallest node number of each node's component
+    """
+    parent = np.arange(node_count, dtype=np.int64)
+    while True:
+        roots_src, roots_dst = parent[src], parent[dst]
+        split = roots_src != roots_dst
+        if not split.any():
+            return parent
+        low = np.minimum(roots_src[split], roots_dst[split])
+        high = np.maximum(roots_src[split], roots_dst[split])
+        np.minimum.at(parent, high, low)
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+
+def label_propagation(
+    node_count: int,
+    src: np.ndarray,
+    dst: np.ndarray,
+    weights: np.ndarray,
+    max_iterations: int = 20,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Find communities by label propagation.
+
+    Every node starts in its own community and repeatedly joins the one its
+    neighbours pull hardest towards, each edge pulling with the inverse of
+    its cost. Only a random half of the nodes moves in each round, which
+    stops neighbouring nodes from swapping labels forever, and rounds stop
+    once fewer than one node in a thousand would move. The random choices
+    are seeded, so results are reproducible.
+
+    Args:
+        node_count: Number of nodes
+        src: Source node of each edge
+        dst: Target node of each edge
+        weights: Cost of each edge, as from edge_weight
+        max_iterations: Maximum number of rounds
+        seed: Seed for choosing the nodes that move
+
+    Returns:
+        Array with a community number per node, numbered from 0
+    """
+    labels = np.arange(node_count, dtype=np.int64)
+    loops = src == dst
+    ends = np.concatenate([src[~loops], dst[~loops]]).astype(np.int64)
+    others = np.concatenate([dst[~loops], src[~loops]]).astype(np.int64)
+    pulls = np.tile(1.0 / weights[~loops], 2)
+    rng = np.random.default_rng(seed)
+
+    for _ in range(max_iterations):
+        if not len(ends):
+            break
+        candidate = labels[others]
+
+        # Total pull towards each (node, label) pair
+        order = np.argsort(ends * node_count + candidate)
+        nodes, cands, sorted_pulls = ends[order], candidate[order], pulls[order]
+        starts = np.flatnonzero(np.r_[True, (nodes[1:] != nodes[:-1]) | (cands[1:] != cands[:-1])])
+        totals = np.add.reduceat(sorted_pulls, starts)
+        group_nodes, group_labels = nodes[starts], cands[starts]
+
+        # Strongest labels per node; a node stays put if its own label is
+        # among them, otherwise one of them is picked at random
+        node_starts = np.flatnonzero(np.r_[True, group_nodes[1:] != group_nodes[:-1]])
+        sizes = np.diff(np.r_[node_starts, len(totals)])
+        strongest = totals >= np.repeat(np.maximum.reduceat(totals, node_starts), sizes)
+        staying = np.logical_or.reduceat(strongest & (group_labels == labels[group_nodes]), node_starts)
+        draws = np.where(strongest, rng.random(len(totals)), -1.0)
+        picked = np.flatnonzero(draws == np.repeat(np.maximum.reduceat(draws, node_starts), sizes))
+        picked = picked[np.r_[True, group_nodes[picked][1:] != group_nodes[picked][:-1]]]
+        movers, targets = group_nodes[node_starts], group_labels[picked]
+
+        changing = ~staying & (labels[movers] != targets)
+        if np.count_nonzero(changing) <= node_count // 1000:
+            break
+        moving = changing & (rng.random(len(movers)) < 0.5)
+        labels[movers[moving]] = targets[moving]
+
+    return np.unique(labels, return_inverse=True)[1]
+
+
+class CommunityIndex(GraphSnapshotIndex):
+    """
+    Community and component labels for every content item in the graph.
+
+    Labels are computed over the whole graph from a GraphEngine snapshot,
+    saved next to the other indexes and looked up from dictionaries.
+    Relationship changes made since are applied as they are seen: new edges
+    join components in a union-find over component labels, and new items
+    join the community of the item they were linked to. Removed edges are
+    only counted, since splitting a component needs a full pass, and the
+    labels are recomputed once enough changes pile up (see
+    GraphSnapshotIndex).
+    """
+
+    NAME = "graph communities"
+
+    def __init__(
+        self,
+        engine: GraphEngine,
+        path: Optional[Path] = None,
+        recompute_ratio: float = 0.05
+    ):
+        """
+        Initialize the community index.
+
+        Labels are loaded or computed on first use.
+
+        Args:
+            engine: Graph engine to compute from
+            path: Optional file to persist labels in
+            recompute_ratio: Share of changed edges that triggers a recomputation
+        """
+        super().__init__(engine, path, recompute_ratio)
+        self._component: Dict[str, int] = {}
+        self._community: Dict[str, int] = {}
+        # Community -> insertion-ordered set of member IDs
+        self._members: Dict[int, Dict[str, None]] = {}
+        # Union-find over component labels for components joined since
+        self._component_parent: Dict[int, int] = {}
+        self._next_label = 0
+
+    # Lookups
+
+    def community_of(self, content_id: str) -> Optional[int]:
+        """
+        Get the community of a content item.
+
+        Args:
+            content_id: ID of the content item
+
+        Returns:
+            Community number, or None if the item has no relationships
+        """
+        self._ensure_loaded()
+        with self._lock:
+            self._apply_changes()
+            return self._community.get(content_id)
+
+    def communities_of(self, content_ids: Iterable[str]) -> Dict[str, Optional[int]]:
+        """
+        Get the communities of several content items.
+
+        Args:
+            content_ids: IDs of the content items
+
+        Returns:
+            Dictionary mapping each ID to its community number or None
+        """
+        self._ensure_loaded()
+        with self._lock:
+            self._apply_changes()
+            return {content_id: self._community.get(content_id) for content_id in content_ids}
+
+    def component_of(self, content_id: str) -> Optional[int]:
+        """
+        Get the connected component of a content item.
+
+        Args:
+            content_id: ID of the content item
+
+        Returns:
+            Component number, or None if the item has no relationships
+        """
+        self._ensure_loaded()
+        with self._lock:
+            self._apply_changes()
+            label = self._component.get(content_id)
+            return None if label is None else self._find(label)
+
+    def members(self, community_id: int) -> List[str]:
+        """
+        Get the members of a community.
+
+        Args:
+            community_id: Community number
+
+        Returns:
+            IDs of the content items in the community
+        """
+        self._ensure_loaded()
+        with self._lock:
+            self._apply_changes()
+            return list(self._members.get(community_id, {}))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get summary statistics of the labels.
+
+        Returns:
+            Dictionary with node, community and component counts and the
+            number of changes not yet folded into a full computation
+        """
+        self._ensure_loaded()
+        with self._lock:
+            self._apply_changes()
+            return {
+                "nodes": len(self._community),
+                "communities": len(self._members),
+                "components": len({self._find(label) for label in self._component.values()}),
+                "pending_changes": self._pending
+            }
+
+    # Computation
+
+    def _compute(self, ids: List[str], src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> Tuple:
+        """Label the components and communities of a snapshot."""
+        components = connected_components(len(ids), src, dst)
+        communities = label_propagation(len(ids), src, dst, weights)
+
+        # Only nodes with live edges are labelled
+        linked = np.zeros(len(ids), dtype=bool)
+        linked[src] = True
+        linked[dst] = True
+        nodes = np.flatnonzero(linked).tolist()
+        return [ids[node] for node in nodes], components[nodes].tolist(), communities[nodes].tolist()
+
+    def _install(self, state: Tuple) -> None:
+        """Replace all labels."""
+        ids, components, communities = state
+        self._component = dict(zip(ids, components))
+        self._community = dict(zip(ids, communities))
+        self._members = {}
+        for content_id, community in self._community.items():
+            self._members.setdefault(community, {})[content_id] = None
+        self._component_parent = {}
+        self._next_label = max(max(components, default=-1), max(communities, default=-1)) + 1
+
+    def _apply_change(self, op: str, edge: Tuple[str, str, str]) -> None:
+        """Update labels for an added edge; removals wait for a recomputation."""
+        if op == "add":
+            self._link(edge[0], edge[1])
+
+    def _link(self, source_id: str, target_id: str) -> None:
+        """Update labels for a new edge."""
+        for content_id, other_id in ((source_id, target_id), (target_id, source_id)):
+            if content_id in self._community:
+                continue
+            if other_id in self._community:
+                community, component = self._community[other_id], self._component[other_id]
+            else:
+                community = component = self._next_label
+                self._next_label += 1
+            self._community[content_id] = community
+            self._component[content_id] = component
+            self._members.setdefault(community, {})[content_id] = None
+
+        # Join the two components, keeping the smaller label as root
+        source_root = self._find(self._component[source_id])
+        target_root = self._find(self._component[target_id])
+        if source_root != target_root:
+            self._component_parent[max(source_root, target_root)] = min(source_root, target_root)
+
+    def _find(self, label: int) -> int:
+        """Find the root of a component label, halving the path on the way."""
+        parent = self._component_parent
+        while label in parent:
+            up = parent[label]
+            parent[label] = parent.get(up, up)
+            label = parent[label]
+        return label
+
+    # Persistence
+
+    def _serialize(self, state: Tuple, signature: Optional[List[int]]) -> None:
+        """Write labels as JSON."""
+        ids, components, communities = state
+        atomic_write_json(self.path, {
+            "version": COMMUNITIES_VERSION,
+            "signature": signature,
+            "ids": ids,
+            "components": components,
+            "communities": communities
+        })
+
+    def _deserialize(self) -> Optional[Tuple[Tuple, Optional[List[int]]]]:
+        """Read labels saved as JSON."""
+        with open(self.path, 'r') as f:
+            data = json.load(f)
+        if data.get("version") != COMMUNITIES_VERSION:
+            return None
+        ids, components, communities = data["ids"], data["components"], data["communities"]
+        if not len(ids) == len(components) == len(communities):
+            raise ValueError("label columns differ in length")
+        return (ids, components, communities), data.get("signature")
@@ -0,0 +1,912 @@
+"""
+Graph Engine
+Keeps content relationships in memory as a compressed sparse row graph for fast traversal.
+"""
+
+import heapq
+import logging
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Iterable, Set, Tuple, Union
+
+import numpy as np
+
+from knowledge_base.content_types import RelationshipType
+from knowledge_base.core.relationship_manager import RelationshipManager
+
+logger = logging.getLogger(__name__)
+
+# Bit of each relationship type in edge filter masks
+TYPE_CODES: Dict[str, int] = {rel_type.value: code for code, rel_type in enumerate(RelationshipType)}
+TYPE_VALUES: List[str] = [rel_type.value for rel_type in RelationshipType]
+ALL_TYPES = (1 << len(TYPE_VALUES)) - 1
+
+# Default cost of following each relationship type in weighted searches;
+# closer relationships are cheaper. A positive "weight" in a relationship's
+# metadata overrides these.
+TYPE_WEIGHTS: Dict[str, float] = {
+    RelationshipType.CONTINUATION.value: 0.5,
+    RelationshipType.DEPENDENCY.value: 0.75,
+    RelationshipType.PARENT_CHILD.value: 1.0,
+    RelationshipType.REFERENCE.value: 1.0,
+    RelationshipType.RELATED.value: 1.5,
+}
+
+# Edge directions for traversals
+OUT = "out"
+IN = "in"
+BOTH = "both"
+
+# Edges added or removed since the last compaction that are needed before the
+# CSR arrays are rebuilt, however small the graph
+MIN_COMPACTION = 1024
+
+
+def type_mask(relationship_types: Optional[Iterable[Union[RelationshipType, str]]] = None) -> int:
+    """
+    Build an edge filter mask from relationship types.
+
+    Invalid types are skipped with a warning. As with the graph filters that
+    take type lists, a filter without any valid type accepts every type.
+
+    Args:
+        relationship_types: Types to accept (None for all)
+
+    Returns:
+        Bitmask with the bit of each accepted type set
+    """
+    mask = 0
+    for rel_type in relationship_types or []:
+        value = rel_type.value if isinstance(rel_type, RelationshipType) else rel_type
+        code = TYPE_CODES.get(value)
+        if code is None:
+            logger.warning(f"Invalid relationship type: {rel_type}")
+            continue
+        mask |= 1 << code
+    return mask or ALL_TYPES
+
+
+def edge_weight(rel_type: str, weight=None) -> float:
+    """
+    Get the cost of following a relationship.
+
+    Args:
+        rel_type: Relationship type value
+        weight: Optional weight from the relationship's metadata
+
+    Returns:
+        The weight if it is a positive number, else the type's default
+    """
+    if isinstance(weight, (int, float)) and not isinstance(weight, bool) and 0 < weight < math.inf:
+        return float(weight)
+    return TYPE_WEIGHTS.get(rel_type, TYPE_WEIGHTS[RelationshipType.RELATED.value])
+
+
+class GraphEngine:
+    """
+    In-memory relationship graph with integer node IDs.
+
+    Edges live in a table numbered in insertion order. The edges present at
+    the last compaction are indexed in compressed sparse row (CSR) form in
+    both directions; edges added since are kept in small per-node lists and
+    removed edges are flagged dead, so changes reported by the relationship
+    manager are applied without a rebuild. Once pending changes reach
+    ``compact_ratio`` of the graph, the CSR arrays are rebuilt from the edge
+    table in memory.
+
+    Traversals expand whole frontiers at once with array operations, and
+    relationship types are filtered with bitmasks built by ``type_mask``.
+    """
+
+    def __init__(self, relationship_manager: RelationshipManager, compact_ratio: float = 0.25):
+        """
+        Initialize the graph engine.
+
+        The graph is loaded from the relationship manager on first use.
+
+        Args:
+            relationship_manager: Relationship manager to follow
+            compact_ratio: Share of pending changes that triggers a compaction
+        """
+        self.relationship_manager = relationship_manager
+        self.compact_ratio = compact_ratio
+        self._lock = threading.RLock()
+        self._generation: Optional[int] = None
+
+        # Content IDs interned to dense integers
+        self._ids: List[str] = []
+        self._node_of: Dict[str, int] = {}
+
+        # Edge table; rows past _edge_count are spare capacity
+        self._src = np.zeros(0, dtype=np.int32)
+        self._dst = np.zeros(0, dtype=np.int32)
+        self._codes = np.zeros(0, dtype=np.uint8)
+        self._weights = np.zeros(0, dtype=np.float64)
+        self._alive = np.zeros(0, dtype=bool)
+        self._keys: List[str] = []
+        self._edge_of: Dict[str, int] = {}
+        self._edge_count = 0
+        self._dead = 0
+
+        # CSR index over the first _csr_edges edges and _csr_nodes nodes
+        self._csr_nodes = 0
+        self._csr_edges = 0
+        self._out_offsets = np.zeros(1, dtype=np.int64)
+        self._out_edges = np.zeros(0, dtype=np.int32)
+        self._out_targets = np.zeros(0, dtype=np.int32)
+        self._in_offsets = np.zeros(1, dtype=np.int64)
+        self._in_edges = np.zeros(0, dtype=np.int32)
+        self._in_targets = np.zeros(0, dtype=np.int32)
+
+        # Edges added since the last compaction, by node
+        self._delta_out: Dict[int, List[int]] = {}
+        self._delta_in: Dict[int, List[int]] = {}
+
+    # Synchronisation
+
+    def refresh(self) -> None:
+        """Bring the graph up to date with the relationship manager."""
+        with self._lock:
+            if self._generation is not None:
+                generation, changes = self.relationship_manager.changes_since(self._generation)
+                if changes is not None:
+                    for op, key, edge in changes:
+                        if op == "add":
+                            self._add_edge(key, *edge)
+                        else:
+                            self._remove_edge(key)
+                    self._generation = generation
+
+                    pending = self._dead + self._edge_count - self._csr_edges
+                    if pending >= max(MIN_COMPACTION, self.compact_ratio * self._csr_edges):
+                        self._compact()
+                    return
+
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Load every edge from a snapshot of the relationship manager."""
+        generation, edges = self.relationship_manager.edge_snapshot()
+
+        # setdefault numbers each ID by its first appearance
+        node_of: Dict[str, int] = {}
+        src = [node_of.setdefault(edge[1], len(node_of)) for edge in edges]
+        dst = [node_of.setdefault(edge[2], len(node_of)) for edge in edges]
+        related = TYPE_CODES[RelationshipType.RELATED.value]
+        codes = [TYPE_CODES.get(edge[3], related) for edge in edges]
+        weights = [edge_weight(edge[3], edge[4]) for edge in edges]
+
+        self._node_of = node_of
+        self._ids = list(node_of)
+        self._keys = [edge[0] for edge in edges]
+        self._src = np.asarray(src, dtype=np.int32)
+        self._dst = np.asarray(dst, dtype=np.int32)
+        self._codes = np.asarray(codes, dtype=np.uint8)
+        self._weights = np.asarray(weights, dtype=np.float64)
+        self._alive = np.ones(len(edges), dtype=bool)
+        self._edge_count = len(edges)
+        self._generation = generation
+        self._compact()
+        logger.debug(f"Loaded relationship graph with {len(self._ids)} nodes and {self._edge_count} edges")
+
+    def _compact(self) -> None:
+        """Drop dead edges and rebuild the CSR index over all live edges."""
+        live = np.flatnonzero(self._alive[:self._edge_count])
+        self._src = self._src[live]
+        self._dst = self._dst[live]
+        self._codes = self._codes[live]
+        self._weights = self._weights[live]
+        self._alive = np.ones(len(live), dtype=bool)
+        if len(live) != len(self._keys):
+            self._keys = [self._keys[edge] for edge in live]
+        self._edge_of = dict(zip(self._keys, range(len(self._keys))))
+        self._edge_count = len(live)
+        self._dead = 0
+
+        node_count = len(self._ids)
+        self._out_offsets, self._out_edges = self._csr(self._src, node_count)
+        self._in_offsets, self._in_edges = self._csr(self._dst, node_count)
+        self._out_targets = self._dst[self._out_edges]
+        self._in_targets = self._src[self._in_edges]
+        self._csr_nodes = node_count
+        self._csr_edges = self._edge_count
+        self._delta_out = {}
+        self._delta_in = {}
+
+    @staticmethod
+    def _csr(keys: np.ndarray, node_count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Group edge numbers by node into (offsets, edges) arrays."""
+        edges = np.argsort(keys, kind="stable").astype(np.int32)
+        offsets = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=node_count), out=offsets[1:])
+        return offsets, edges
+
+    def _intern(self, content_id: str) -> int:
+        """Get the node number of a content ID, adding it if new."""
+        node = self._node_of.get(content_id)
+        if node is None:
+            node = self._node_of[content_id] = len(self._ids)
+            self._ids.append(content_id)
+        return node
+
+    @staticmethod
+    def _type_code(value: str) -> int:
+        """Get the code of a relationship type value."""
+        # Unknown types are read back as RELATED elsewhere too
+        return TYPE_CODES.get(value, TYPE_CODES[RelationshipType.RELATED.value])
+
+    def _add_edge(self, key: str, source_id: str, target_id: str, rel_type: str, weight=None) -> None:
+        """Append an edge to the table and the pending per-node lists."""
+        self._remove_edge(key)
+        if self._edge_count == len(self._src):
+            capacity = max(16, 2 * len(self._src))
+            self._src = np.resize(self._src, capacity)
+            self._dst = np.resize(self._dst, capacity)
+            self._codes = np.resize(self._codes, capacity)
+            self._weights = np.resize(self._weights, capacity)
+            self._alive = np.resize(self._alive, capacity)
+
+        edge = self._edge_count
+        source, target = self._intern(source_id), self._intern(target_id)
+        self._src[edge] = source
+        self._dst[edge] = target
+        self._codes[edge] = self._type_code(rel_type)
+        self._weights[edge] = edge_weight(rel_type, weight)
+        self._alive[edge] = True
+        self._keys.append(key)
+        self._edge_of[key] = edge
+        self._edge_count += 1
+        self._delta_out.setdefault(source, []).append(edge)
+        self._delta_in.setdefault(target, []).append(edge)
+
+    def _remove_edge(self, key: str) -> None:
+        """Flag an edge as dead."""
+        edge = self._edge_of.pop(key, None)
+        if edge is not None:
+            self._alive[edge] = False
+            self._dead += 1
+
+    # Low-level traversal on node numbers; callers hold the lock
+
+    def _expand(
+        self,
+        frontier: np.ndarray,
+        mask: int = ALL_TYPES,
+        direction: str = BOTH
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the live edges leaving a set of nodes.
+
+        Args:
+            frontier: Node numbers to expand
+            mask: Relationship type mask
+            direction: OUT, IN or BOTH
+
+        Returns:
+            Arrays of (frontier node, neighbour node, edge number), one
+            entry per edge end; edges between two frontier nodes appear once
+            from each side with BOTH
+        """
+        parts = []
+        if direction in (OUT, BOTH):
+            parts.append(self._gather(frontier, self._out_offsets, self._out_edges, self._out_targets,
+                                      self._delta_out, self._dst))
+        if direction in (IN, BOTH):
+            parts.append(self._gather(frontier, self._in_offsets, self._in_edges, self._in_targets,
+                                      self._delta_in, self._src))
+        if not parts:
+            raise ValueError(f"Invalid direction: {direction}")
+
+        nodes = np.concatenate([part[0] for part in parts])
+        neighbours = np.concatenate([part[1] for part in parts])
+        edges = np.concatenate([part[2] for part in parts])
+
+        keep = self._alive[edges]
+        if mask != ALL_TYPES:
+            keep &= (np.left_shift(1, self._codes[edges].astype(np.int64)) & mask) != 0
+        return nodes[keep], neighbours[keep], edges[keep]
+
+    def _gather(
+        self,
+        frontier: np.ndarray,
+        offsets: np.ndarray,
+        csr_edges: np.ndarray,
+        csr_targets: np.ndarray,
+        delta: Dict[int, List[int]],
+        ends: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Collect one direction's edges of the frontier from the CSR index and pending lists."""
+        indexed = frontier[frontier < self._csr_nodes]
+        starts = offsets[indexed]
+        counts = offsets[indexed + 1] - starts
+        total = int(counts.sum())
+
+        # Slot numbers of every CSR run, laid end to end
+        slots = np.arange(total, dtype=np.int64) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        nodes = [np.repeat(indexed, counts)]
+        neighbours = [csr_targets[slots]]
+        edges = [csr_edges[slots]]
+
+        if delta:
+            if len(frontier) <= len(delta):
+                hits = [node for node in frontier.tolist() if node in delta]
+            else:
+                candidates = np.fromiter(delta, dtype=np.int32, count=len(delta))
+                hits = candidates[np.isin(candidates, frontier)].tolist()
+            pending_nodes = []
+            pending_edges = []
+            for node in hits:
+                pending_edges.extend(delta[node])
+                pending_nodes.extend([node] * len(delta[node]))
+            if pending_edges:
+                pending_edges = np.asarray(pending_edges, dtype=np.int32)
+                nodes.append(np.asarray(pending_nodes, dtype=np.int32))
+                neighbours.append(ends[pending_edges])
+                edges.append(pending_edges)
+
+        return np.concatenate(nodes), np.concatenate(neighbours), np.concatenate(edges)
+
+    def _frontier(self, content_ids: Iterable[str]) -> np.ndarray:
+        """Get the node numbers of the content IDs that are in the graph."""
+        nodes = [self._node_of[content_id] for content_id in content_ids if content_id in self._node_of]
+        return np.asarray(nodes, dtype=np.int32)
+
+    def _edge_tuple(self, edge: int) -> Tuple[str, str, str]:
+        """Get an edge as (source ID, target ID, type value)."""
+        return self._ids[self._src[edge]], self._ids[self._dst[edge]], TYPE_VALUES[self._codes[edge]]
+
+    # Queries
+
+    def node_ids(self) -> List[str]:
+        """
+        Get the IDs of all content items with at least one relationship.
+
+        Returns:
+            List of content IDs
+        """
+        with self._lock:
+            self.refresh()
+            live = self._alive[:self._edge_count]
+            nodes = np.union1d(self._src[:self._edge_count][live], self._dst[:self._edge_count][live])
+            return [self._ids[node] for node in nodes.tolist()]
+
+    def edge_count(self) -> int:
+        """
+        Get the number of relationships in the graph.
+
+        Returns:
+            Number of live edges
+        """
+        with self._lock:
+            self.refresh()
+            return self._edge_count - self._dead
+
+    def snapshot(self) -> Tuple[int, List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get a copy of the live edges for whole-graph computations.
+
+        Returns:
+            The relationship generation, the content ID of each node number,
+            and arrays of source node, target node and weight per edge
+        """
+        with self._lock:
+            self.refresh()
+            live = np.flatnonzero(self._alive[:self._edge_count])
+            return (
+                self._generation,
+                list(self._ids),
+                self._src[live],
+                self._dst[live],
+                self._weights[live]
+            )
+
+    def edge_arrays(
+        self,
+        relationship_types: Optional[Iterable[Union[RelationshipType, str]]] = None
+    ) -> Tuple[int, List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get a copy of the live edges of some types for whole-graph summaries.
+
+        Args:
+            relationship_types: Optional filter by relationship types
+
+        Returns:
+            The relationship generation, the content ID of each node number,
+            and arrays of source node, target node and type code per edge;
+            codes index TYPE_VALUES
+        """
+        mask = type_mask(relationship_types)
+        with self._lock:
+            self.refresh()
+            keep = self._alive[:self._edge_count].copy()
+            if mask != ALL_TYPES:
+                keep &= (np.left_shift(1, self._codes[:self._edge_count].astype(np.int64)) & mask) != 0
+            live = np.flatnonzero(keep)
+            return (
+                self._generation,
+                list(self._ids),
+                self._src[live],
+                self._dst[live],
+                self._codes[live]
+            )
+
+    def neighbors(
+        self,
+        content_id: str,
+        relationship_types: Optional[Iterable[Union[RelationshipType, str]]] = None,
+        direction: str = BOTH
+    ) -> List[str]:
+        """
+        Get the content items adjacent to a content item.
+
+        Args:
+            content_id: ID of the content item
+            relationship_types: Optional filter by relationship types
+            direction: OUT for targets, IN for sources, BOTH for either
+
+        Returns:
+            Adjacent content IDs, each once, in edge order
+        """
+        with self._lock:
+            self.refresh()
+            _, neighbours, _ = self._expand(self._frontier([content_id]), type_mask(relationship_types), direction)
+            return [self._ids[node] for node in dict.fromkeys(neighbours.tolist())]
+
+    def edges(
+        self,
+        content_ids: Iterable[str],
+        relationship_types: Optional[Iterable[Union[RelationshipType, str]]] = None,
+        direction: str = BOTH
+    ) -> List[Tuple[str, str, str]]:
+        """
+        Get the relationships touching any of several content items.
+
+        Args:
+            content_ids: IDs of the content items
+            relationship_types: Optional filter by relationship types
+            direction: OUT for outgoing, IN for incoming, BOTH for either
+
+        Returns:
+            (source ID, target ID, relationship type) tuples, each
+            relationship once, in order of the content IDs
+        """
+        with self._lock:
+            self.refresh()
+            _, _, edges = self._expand(self._frontier(content_ids), type_mask(relationship_types), direction)
+            return [self._edge_tuple(edge) for edge in dict.fromkeys(edges.tolist())]
+
+    def type_counts(self, content_id: str) -> Dict[str, int]:
+        """
+        Count the relationships of a content item by type.
+
+        Args:
+            content_id: ID of the content item
+
+        Returns:
+            Dictionary mapping relationship type values to counts
+        """
+        with self._lock:
+            self.refresh()
+            _, _, edges = self._expand(self._frontier([content_id]))
+            codes = np.bincount(self._codes[np.unique(edges)], minlength=len(TYPE_VALUES))
+            return {TYPE_VALUES[code]: int(count) for code, count in enumerate(codes) if count}
+
+    def bfs(
+        self,
+        source_ids: Iterable[str],
+        max_depth: int = -1,
+        relationship_types: Optional[Iterable[Union[RelationshipType, str]]] = None,
+        direction: str = BOTH
+    ) -> Dict[str, int]:
+        """
+        Find the content items reachable from some start items.
+
+        Args:
+            source_ids: IDs to start from
+            max_depth: Maximum number of hops (-1 for unlimited)
+            relationship_types: Optional filter by relationship types
+            direction: OUT to follow edges, IN to follow them backwards,
+                BOTH to ignore their direction
+
+        Returns:
+            Dictionary mapping each reachable ID to its distance in hops,
+            in breadth-first order; start items not in the graph are left out
+        """
+        with self._lock:
+            self.refresh()
+            mask = type_mask(relationship_types)
+            frontier = np.unique(self._frontier(source_ids))
+            visited = np.zeros(len(self._ids), dtype=bool)
+            visited[frontier] = True
+
+            depths = {}
+            depth = 0
+            while len(frontier):
+                depths.update((self._ids[node], depth) for node in frontier.tolist())
+                if depth == max_depth:
+                    break
+                frontier = self._next_frontier(frontier, visited, mask, direction)[0]
+                depth += 1
+            return depths
+
+    def shortest_path(
+        self,
+        source_id: str,
+        target_id: str,
+        max_depth: int = -1,
+        relationship_types: Optional[Iterable[Union[RelationshipType, str]]] = None,
+        direction: str = BOTH
+    ) -> Optional[List[str]]:
+        """
+        Find a path with the fewest hops between two content items.
+
+        Searches from both ends at once, always expanding the smaller
+        frontier, so only the neighbourhoods of the two items are explored
+        rather than everything within the path length of the source.
+
+        Args:
+            source_id: ID of the source content
+            target_id: ID of the target content
+            max_depth: Maximum number of hops (-1 for unlimited)
+            relationship_types: Optional filter by relationship types
+            direction: OUT to follow edges, IN to follow them backwards,
+                BOTH to ignore their direction
+
+        Returns:
+            Content IDs along the path from source to target, or None if
+            there is no such path
+        """
+        if source_id == target_id:
+            return [source_id]
+
+        with self._lock:
+            self.refresh()
+            source = self._node_of.get(source_id)
+            target = self._node_of.get(target_id)
+            if source is None or target is None:
+                return None
+
+            mask = type_mask(relationship_types)
+            directions = (direction, {OUT: IN, IN: OUT}.get(direction, direction))
+            frontiers = [np.asarray([source], dtype=np.int32), np.asarray([target], dtype=np.int32)]
+            parents = [np.full(len(self._ids), -1, dtype=np.int64) for _ in range(2)]
+            depths = [np.full(len(self._ids), -1, dtype=np.int64) for _ in range(2)]
+            visited = [np.zeros(len(self._ids), dtype=bool) for _ in range(2)]
+            for side, node in enumerate((source, target)):
+                visited[side][node] = True
+                depths[side][node] = 0
+
+            hops = 0
+            while len(frontiers[0]) and len(frontiers[1]) and hops != max_depth:
+                side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+                reached, from_nodes = self._next_frontier(frontiers[side], visited[side], mask, directions[side])
+                parents[side][reached] = from_nodes
+                depths[side][reached] = depths[side][from_nodes] + 1
+                frontiers[side] = reached
+                hops += 1
+
+                # Of the nodes both searches reached, the one closest to the
+                # other end lies on a shortest path
+                meet = reached[visited[1 - side][reached]]
+                if len(meet):
+                    middle = int(meet[np.argmin(depths[1 - side][meet])])
+                    path = self._follow(parents[0], middle)[::-1] + self._follow(parents[1], middle)[1:]
+                    return [self._ids[node] for node in path]
+            return None
+
+    def _next_frontier(
+        self,
+        frontier: np.ndarray,
+        visited: np.ndarray,
+        mask: int,
+        direction: str
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Advance a breadth-first search by one level.
+
+        Returns the newly reached nodes in order of first discovery, marked
+        as visited, and for each the frontier node it was reached from.
+        """
+        nodes, neighbours, _ = self._expand(frontier, mask, direction)
+        new = ~visited[neighbours]
+        neighbours, nodes = neighbours[new], nodes[new]
+        reached, first = np.unique(neighbours, return_index=True)
+        order = np.sort(first)
+        reached, from_nodes = neighbours[order], nodes[order]
+        visited[reached] = True
+        return reached, from_nodes
+
+    def weighted_path(
+        self,
+        source_id: str,
+        target_id: str,
+        relationship_types: Optional[Iterable[Union[RelationshipType, str]]] = None,
+        direction: str = BOTH,
+        heuristic: Optional[Callable[[str], float]] = None,
+        max_cost: float = math.inf
+    ) -> Optional[Tuple[List[str], float]]:
+        """
+        Find the cheapest path between two content items.
+
+        Edge costs come from ``edge_weight``. Without a heuristic this is
+        Dijkstra's algorithm; with one it is A*, which stays exact as long
+        as the heuristic never overestimates the remaining cost.
+
+        Args:
+            source_id: ID of the source content
+            target_id: ID of the target content
+            relationship_types: Optional filter by relationship types
+            direction: OUT to follow edges, IN to follow them backwards,
+                BOTH to ignore their direction
+            heuristic: Optional lower bound of the cost from a content ID to
+                the target
+            max_cost: Paths costing more than this are not considered
+
+        Returns:
+            Content IDs along the path and its total cost, or None if there
+            is no such path
+        """
+        with self._lock:
+            self.refresh()
+            source = self._node_of.get(source_id)
+            target = self._node_of.get(target_id)
+            if source is None or target is None:
+                return None
+
+            found = self._dijkstra(source, target, type_mask(relationship_types), direction,
+                                   heuristic=heuristic, max_cost=max_cost)
+            if found is None:
+                return None
+            path, cost = found
+            return [self._ids[node] for node in path], cost
+
+    def k_shortest_paths(
+        self,
+        source_id: str,
+        target_id: str,
+        k: int = 3,
+        relationship_types: Optional[Iterable[Union[RelationshipType, str]]] = None,
+        direction: str = BOTH,
+        weighted: bool = True,
+        heuristic: Optional[Callable[[str], float]] = None
+    ) -> List[Tuple[List[str], float]]:
+        """
+        Find the k cheapest paths without repeated items between two content items.
+
+        Uses Yen's algorithm: each further path branches off an earlier one
+        at some item, avoiding the steps the earlier paths took there.
+
+        Args:
+            source_id: ID of the source content
+            target_id: ID of the target content
+            k: Number of paths to find
+            relationship_types: Optional filter by relationship types
+            direction: OUT to follow edges, IN to follow them backwards,
+                BOTH to ignore their direction
+            weighted: Whether to use edge weights or count hops
+            heuristic: Optional lower bound of the cost from a content ID to
+                the target, as for weighted_path
+
+        Returns:
+            Up to k (content IDs, cost) pairs, cheapest first
+        """
+        with self._lock:
+            self.refresh()
+            source = self._node_of.get(source_id)
+            target = self._node_of.get(target_id)
+            if source is None or target is None or k < 1:
+                return []
+
+            mask = type_mask(relationship_types)
+            first = self._dijkstra(source, target, mask, direction, weighted, heuristic)
+            if first is None:
+                return []
+
+            paths = [first]
+            seen = {tuple(first[0])}
+            candidates: List[Tuple[float, List[int]]] = []
+            while len(paths) < k:
+                previous = paths[-1][0]
+                for i in range(len(previous) - 1):
+                    root = previous[:i + 1]
+                    banned_steps = {
+                        (path[i], path[i + 1]) for path, _ in paths
+                        if len(path) > i + 1 and path[:i + 1] == root
+                    }
+                    spur = self._dijkstra(root[-1], target, mask, direction, weighted, heuristic,
+                                          banned_nodes=set(root[:-1]), banned_steps=banned_steps)
+                    if spur is None:
+                        continue
+                    path = root[:-1] + spur[0]
+                    if tuple(path) not in seen:
+                        seen.add(tuple(path))
+                        heapq.heappush(candidates, (self._path_cost(path, mask, direction, weighted), path))
+                if not candidates:
+                    break
+                cost, path = heapq.heappop(candidates)
+                paths.append((path, cost))
+
+            return [([self._ids[node] for node in path], cost) for path, cost in paths]
+
+    def _dijkstra(
+        self,
+        source: int,
+        target: int,
+        mask: int,
+        direction: str,
+        weighted: bool = True,
+        heuristic: Optional[Callable[[str], float]] = None,
+        max_cost: float = math.inf,
+        banned_nodes: Set[int] = frozenset(),
+        banned_steps: Set[Tuple[int, int]] = frozenset()
+    ) -> Optional[Tuple[List[int], float]]:
+        """
+        Cheapest path on node numbers, avoiding banned nodes and steps.
+
+        Without a heuristic the search runs from both ends and stops once
+        the two cheapest open items together cost more than the best path
+        found. With one, it is a single A* search from the source.
+
+        Returns the node numbers along the path and its cost, or None.
+        """
+        if source == target:
+            return [source], 0.0
+        if heuristic is not None:
+            return self._astar(source, target, mask, direction, weighted, heuristic,
+                               max_cost, banned_nodes, banned_steps)
+
+        directions = (direction, {OUT: IN, IN: OUT}.get(direction, direction))
+        costs: Tuple[Dict[int, float], Dict[int, float]] = ({source: 0.0}, {target: 0.0})
+        parents: Tuple[Dict[int, int], Dict[int, int]] = ({source: -1}, {target: -1})
+        settled: Tuple[Set[int], Set[int]] = (set(), set())
+        heaps = ([(0.0, source)], [(0.0, target)])
+        best, middle = math.inf, -1
+
+        while heaps[0] and heaps[1]:
+            bound = heaps[0][0][0] + heaps[1][0][0]
+            if bound >= best or bound > max_cost:
+                break
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            cost, node = heapq.heappop(heaps[side])
+            if node in settled[side]:
+                continue
+            settled[side].add(node)
+
+            for neighbour, weight in zip(*self._adjacent(node, mask, directions[side], weighted)):
+                # Banned steps are stored source to target
+                step = (node, neighbour) if side == 0 else (neighbour, node)
+                if neighbour in banned_nodes or step in banned_steps or neighbour in settled[side]:
+                    continue
+                new_cost = cost + weight
+                if new_cost < costs[side].get(neighbour, math.inf):
+                    costs[side][neighbour] = new_cost
+                    parents[side][neighbour] = node
+                    heapq.heappush(heaps[side], (new_cost, neighbour))
+                other = costs[1 - side].get(neighbour)
+                if other is not None and costs[side][neighbour] + other < best:
+                    best, middle = costs[side][neighbour] + other, neighbour
+
+        if middle < 0 or best > max_cost:
+            return None
+        path = self._follow(parents[0], middle)[::-1] + self._follow(parents[1], middle)[1:]
+        return path, best
+
+    def _astar(
+        self,
+        source: int,
+        target: int,
+        mask: int,
+        direction: str,
+        weighted: bool,
+        heuristic: Callable[[str], float],
+        max_cost: float,
+        banned_nodes: Set[int],
+        banned_steps: Set[Tuple[int, int]]
+    ) -> Optional[Tuple[List[int], float]]:
+        """A* search from source to target; see _dijkstra."""
+        costs = {source: 0.0}
+        parents = {source: -1}
+        settled = set()
+        heap = [(heuristic(self._ids[source]), 0.0, source)]
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node in settled:
+                continue
+            if node == target:
+                return self._follow(parents, node)[::-1], cost
+            settled.add(node)
+
+            for neighbour, weight in zip(*self._adjacent(node, mask, direction, weighted)):
+                if neighbour in settled or neighbour in banned_nodes or (node, neighbour) in banned_steps:
+                    continue
+                new_cost = cost + weight
+                if new_cost <= max_cost and new_cost < costs.get(neighbour, math.inf):
+                    costs[neighbour] = new_cost
+                    parents[neighbour] = node
+                    heapq.heappush(heap, (new_cost + heuristic(self._ids[neighbour]), new_cost, neighbour))
+        return None
+
+    @staticmethod
+    def _follow(parents: Union[Dict[int, int], np.ndarray], node: int) -> List[int]:
+        """Follow parent links (-1 at the start) from a node back to the start of a search."""
+        path = [node]
+        while parents[path[-1]] >= 0:
+            path.append(int(parents[path[-1]]))
+        return path
+
+    def _adjacent(self, node: int, mask: int, direction: str, weighted: bool = True) -> Tuple[List[int], List[float]]:
+        """
+        Get the neighbours of one node and the weights of the edges to them.
+
+        A cheaper single-node form of _expand for searches that settle one
+        node at a time.
+        """
+        sides = []
+        if direction in (OUT, BOTH):
+            sides.append((self._out_offsets, self._out_edges, self._delta_out, self._dst))
+        if direction in (IN, BOTH):
+            sides.append((self._in_offsets, self._in_edges, self._delta_in, self._src))
+        if not sides:
+            raise ValueError(f"Invalid direction: {direction}")
+
+        neighbours: List[int] = []
+        weights: List[float] = []
+        for offsets, csr_edges, delta, ends in sides:
+            parts = []
+            if node < self._csr_nodes:
+                parts.append(csr_edges[offsets[node]:offsets[node + 1]])
+            if node in delta:
+                parts.append(np.asarray(delta[node], dtype=np.int32))
+            for edges in parts:
+                keep = self._alive[edges]
+                if mask != ALL_TYPES:
+                    keep &= (np.left_shift(1, self._codes[edges].astype(np.int64)) & mask) != 0
+                edges = edges[keep]
+                neighbours.extend(ends[edges].tolist())
+                weights.extend(self._weights[edges].tolist() if weighted else [1.0] * len(edges))
+        return neighbours, weights
+
+    def _path_cost(self, path: List[int], mask: int, direction: str, weighted: bool) -> float:
+        """Total cost of a path, taking the cheapest edge for each step."""
+        if not weighted:
+            return float(len(path) - 1)
+        return sum(self._step(a, b, mask, direction)[1] for a, b in zip(path, path[1:]))
+
+    def _step(self, source: int, target: int, mask: int, direction: str) -> Tuple[int, float]:
+        """Get the cheapest edge from one node to another and its weight, or (-1, inf)."""
+        _, neighbours, edges = self._expand(np.asarray([source], dtype=np.int32), mask, direction)
+        matches = edges[neighbours == target]
+        if not len(matches):
+            return -1, math.inf
+        best = int(matches[np.argmin(self._weights[matches])])
+        return best, float(self._weights[best])
+
+    def edge_between(
+        self,
+        source_id: str,
+        target_id: str,
+        relationship_types: Optional[Iterable[Union[RelationshipType, str]]] = None,
+        direction: str = BOTH
+    ) -> Optional[Tuple[str, str, str]]:
+        """
+        Find the cheapest relationship leading from one content item to another.
+
+        Args:
+            source_id: ID of the item to step from
+            target_id: ID of the item to step to
+            relationship_types: Optional filter by relationship types
+            direction: OUT for source to target relationships, IN for target
+                to source ones, BOTH for either
+
+        Returns:
+            (source ID, target ID, relationship type) of the relationship,
+            or None
+        """
+        with self._lock:
+            self.refresh()
+            source = self._node_of.get(source_id)
+            target = self._node_of.get(target_id)
+            if source is None or target is None:
+                return None
+            edge, _ = self._step(source, target, type_mask(relationship_types), direction)
+            return self._edge_tuple(edge) if edge >= 0 else None
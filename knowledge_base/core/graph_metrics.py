@@ -0,0 +1,498 @@
+"""
+Graph Metrics
+Precomputed centrality metrics for every content item in the graph.
+"""
+
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+import numpy as np
+
+from knowledge_base.core.graph_engine import GraphEngine
+from knowledge_base.core.graph_snapshot_index import GraphSnapshotIndex
+from knowledge_base.utils.helpers import ValidationError
+
+logger = logging.getLogger(__name__)
+
+METRICS_VERSION = 1
+
+# Columns of the metrics table
+STORED_METRICS: Dict[str, Any] = {
+    "in_degree": np.int64,
+    "out_degree": np.int64,
+    "pagerank": np.float64,
+    "betweenness": np.float64,
+    "ego_size": np.int64,
+}
+
+# Metrics that can be ranked by; degree is in_degree + out_degree
+METRICS = ("pagerank", "betweenness", "ego_size", "degree", "in_degree", "out_degree")
+
+# Ego networks of items with more two-hop paths than this are estimated
+EGO_EXACT_WORK = 1024
+
+# Random values per item for ego network estimates, which are off by
+# about one part in sqrt(EGO_SKETCHES)
+EGO_SKETCHES = 64
+
+# Most (item, neighbour) pairs held in memory at once when counting ego networks
+EGO_PAIR_BUDGET = 1 << 22
+
+
+def pagerank(
+    node_count: int,
+    src: np.ndarray,
+    dst: np.ndarray,
+    weights: np.ndarray,
+    damping: float = 0.85,
+    tolerance: float = 1e-6,
+    max_iterations: int = 100
+) -> np.ndarray:
+    """
+    Compute PageRank by power iteration over edge arrays.
+
+    Rank flows along edge direction, split between a node's outgoing edges
+    in proportion to the inverse of their cost, so closer relationships
+    pass on more of it. Nodes without outgoing edges spread their rank
+    evenly over all nodes.
+
+    Args:
+        node_count: Number of nodes
+        src: Source node of each edge
+        dst: Target node of each edge
+        weights: Cost of each edge, as from edge_weight
+        damping: Share of rank passed along edges in each round
+        tolerance: Stop once the total change in rank falls below this
+        max_iterations: Maximum number of rounds
+
+    Returns:
+        Array with the rank of each node; ranks sum to 1
+    """
+    if node_count == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    affinity = 1.0 / weights
+    out_total = np.bincount(src, weights=affinity, minlength=node_count)
+    share = affinity / out_total[src] if len(src) else affinity
+    dangling = out_total == 0
+    rank = np.full(node_count, 1.0 / node_count)
+
+    for _ in range(max_iterations):
+        base = (1.0 - damping + damping * rank[dangling].sum()) / node_count
+        updated = base + damping * np.bincount(dst, weights=rank[src] * share, minlength=node_count)
+        change = np.abs(updated - rank).sum()
+        rank = updated
+        if change < tolerance:
+            break
+    return rank
+
+
+def undirected_adjacency(node_count: int, src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build a CSR adjacency with each linked pair of nodes once per end.
+
+    Parallel edges and edges in both directions collapse into one link, and
+    self-loops are dropped.
+
+    Args:
+        node_count: Number of nodes
+        src: Source node of each edge
+        dst: Target node of each edge
+
+    Returns:
+        (offsets, neighbours) arrays; the neighbours of node v are
+        neighbours[offsets[v]:offsets[v + 1]]
+    """
+    keep = src != dst
+    low = np.minimum(src[keep], dst[keep]).astype(np.int64)
+    high = np.maximum(src[keep], dst[keep]).astype(np.int64)
+    pairs = np.unique(low * node_count + high)
+    low, high = pairs // node_count, pairs % node_count
+
+    ends = np.concatenate([low, high])
+    others = np.concatenate([high, low])
+    offsets = np.zeros(node_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(ends, minlength=node_count), out=offsets[1:])
+    return offsets, others[np.argsort(ends, kind="stable")]
+
+
+def _expand(frontier: np.ndarray, offsets: np.ndarray, neighbours: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Get (position in frontier, neighbour) for every neighbour of every frontier node."""
+    starts = offsets[frontier]
+    counts = offsets[frontier + 1] - starts
+    slots = np.arange(int(counts.sum()), dtype=np.int64) + np.repeat(starts - (np.cumsum(counts) - counts), counts)
+    return np.repeat(np.arange(len(frontier)), counts), neighbours[slots]
+
+
+def approximate_betweenness(
+    node_count: int,
+    offsets: np.ndarray,
+    neighbours: np.ndarray,
+    samples: int = 32,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Estimate betweenness centrality from a sample of source nodes.
+
+    Runs Brandes' dependency accumulation from ``samples`` randomly chosen
+    sources, each as a breadth-first search that expands a whole level at a
+    time, and scales the result up to all sources. Links are unweighted and
+    undirected.
+
+    Args:
+        node_count: Number of nodes
+        offsets: Adjacency offsets from undirected_adjacency
+        neighbours: Adjacency neighbours from undirected_adjacency
+        samples: Number of source nodes to search from
+        seed: Seed for choosing the sources
+
+    Returns:
+        Array with the estimated betweenness of each node, normalised to the
+        share of shortest paths between other pairs that pass through it
+    """
+    scores = np.zeros(node_count, dtype=np.float64)
+    if node_count < 3:
+        return scores
+
+    sources = np.random.default_rng(seed).choice(node_count, size=min(samples, node_count), replace=False)
+    for source in sources:
+        depth = np.full(node_count, -1, dtype=np.int64)
+        paths = np.zeros(node_count, dtype=np.float64)
+        depth[source] = 0
+        paths[source] = 1.0
+
+        # Shortest-path DAG edges level by level
+        levels = []
+        frontier = np.array([source], dtype=np.int64)
+        level = 0
+        while len(frontier):
+            positions, children = _expand(frontier, offsets, neighbours)
+            parents = frontier[positions]
+            depth[children[depth[children] == -1]] = level + 1
+            onward = depth[children] == level + 1
+            parents, children = parents[onward], children[onward]
+            np.add.at(paths, children, paths[parents])
+            levels.append((parents, children))
+            frontier = np.unique(children)
+            level += 1
+
+        dependency = np.zeros(node_count, dtype=np.float64)
+        for parents, children in reversed(levels):
+            np.add.at(dependency, parents, paths[parents] / paths[children] * (1.0 + dependency[children]))
+        dependency[source] = 0.0
+        scores += dependency
+
+    # Each pair is counted from both ends by the full algorithm
+    return scores * (node_count / len(sources)) / ((node_count - 1) * (node_count - 2))
+
+
+def ego_sizes(
+    node_count: int,
+    offsets: np.ndarray,
+    neighbours: np.ndarray,
+    exact_work: int = EGO_EXACT_WORK,
+    sketches: int = EGO_SKETCHES,
+    pair_budget: int = EGO_PAIR_BUDGET,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    Count the nodes within two links of each node.
+
+    Nodes with at most ``exact_work`` two-hop paths are counted exactly, in
+    chunks of at most ``pair_budget`` (node, neighbour) pairs. Around hubs
+    exact counts cost too much, so the other nodes are estimated from
+    min-hash sketches: every node draws ``sketches`` random values, two
+    rounds of taking neighbourhood minima give the smallest values within
+    two links, and the size follows from how small they are. Estimates are
+    kept between the node's degree and its number of two-hop paths.
+
+    Args:
+        node_count: Number of nodes
+        offsets: Adjacency offsets from undirected_adjacency
+        neighbours: Adjacency neighbours from undirected_adjacency
+        exact_work: Most two-hop paths of a node counted exactly
+        sketches: Number of random values per node for estimates
+        pair_budget: Most neighbour pairs to hold at once
+        seed: Seed for the sketch values
+
+    Returns:
+        Array with the ego network size of each node, not counting the node
+    """
+    degrees = np.diff(offsets)
+    owners = np.repeat(np.arange(node_count), degrees)
+    two_hop = np.bincount(owners, weights=degrees[neighbours], minlength=node_count).astype(np.int64)
+    work = degrees + two_hop
+    sizes = np.zeros(node_count, dtype=np.int64)
+
+    estimated = np.flatnonzero(work > exact_work)
+    if len(estimated):
+        reach = _estimate_reach(node_count, offsets, neighbours, sketches, seed)[estimated]
+        upper = np.minimum(two_hop[estimated], node_count - 1)
+        sizes[estimated] = np.clip(np.rint(reach).astype(np.int64) - 1, degrees[estimated], upper)
+
+    exact = np.flatnonzero(work <= exact_work)
+    chunk_of = np.cumsum(work[exact]) // max(pair_budget, 1)
+    bounds = np.flatnonzero(np.r_[True, chunk_of[1:] != chunk_of[:-1], True])
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        chunk = exact[start:end]
+        positions, first = _expand(chunk, offsets, neighbours)
+        hops, second = _expand(first, offsets, neighbours)
+        owner = np.concatenate([chunk[positions], chunk[positions[hops]]])
+        reached = np.concatenate([first, second])
+        keep = reached != owner
+        pairs = np.unique(owner[keep] * node_count + reached[keep])
+        sizes[chunk] = np.bincount(pairs // node_count, minlength=node_count)[chunk]
+    return sizes
+
+
+def _estimate_reach(
+    node_count: int,
+    offsets: np.ndarray,
+    neighbours: np.ndarray,
+    sketches: int,
+    seed: int
+) -> np.ndarray:
+    """Estimate the number of nodes within two links of each node, itself included."""
+    rng = np.random.default_rng(seed)
+    linked = np.flatnonzero(np.diff(offsets))
+    totals = np.zeros(node_count, dtype=np.float64)
+    for start in range(0, sketches, 8):
+        # The minimum of N exponential draws is exponential with rate N
+        minima = rng.exponential(size=(node_count, min(8, sketches - start))).astype(np.float32)
+        for _ in range(2):
+            spread = minima.copy()
+            if len(linked):
+                nearest = np.minimum.reduceat(minima[neighbours], offsets[linked], axis=0)
+                spread[linked] = np.minimum(minima[linked], nearest)
+            minima = spread
+        totals += minima.sum(axis=1)
+    return (sketches - 1) / totals
+
+
+class GraphMetrics(GraphSnapshotIndex):
+    """
+    Centrality metrics for every content item, kept as a columnar table.
+
+    The table holds one row per content item and one column per metric in
+    STORED_METRICS. It is computed over the whole graph from a GraphEngine
+    snapshot and saved as a NumPy archive next to the other indexes.
+    Relationship changes made since are applied as they are seen: degree
+    columns are updated exactly, while PageRank, betweenness and ego network
+    sizes keep their last computed values, with new items starting at zero,
+    until the table is recomputed (see GraphSnapshotIndex).
+    """
+
+    NAME = "graph metrics"
+
+    def __init__(
+        self,
+        engine: GraphEngine,
+        path: Optional[Path] = None,
+        recompute_ratio: float = 0.05,
+        betweenness_samples: int = 32
+    ):
+        """
+        Initialize the metrics table.
+
+        The table is loaded or computed on first use.
+
+        Args:
+            engine: Graph engine to compute from
+            path: Optional .npz file to persist the table in
+            recompute_ratio: Share of changed edges that triggers a recomputation
+            betweenness_samples: Number of sources betweenness is estimated from
+        """
+        super().__init__(engine, path, recompute_ratio)
+        self.betweenness_samples = betweenness_samples
+
+        # Rows past _rows are spare capacity
+        self._ids: List[str] = []
+        self._row_of: Dict[str, int] = {}
+        self._rows = 0
+        self._columns: Dict[str, np.ndarray] = {
+            name: np.zeros(0, dtype=dtype) for name, dtype in STORED_METRICS.items()
+        }
+
+    # Lookups
+
+    def get(self, content_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the metrics of a content item.
+
+        Args:
+            content_id: ID of the content item
+
+        Returns:
+            Dictionary with a value per metric in METRICS, or None if the
+            item has never had relationships
+        """
+        self._ensure_loaded()
+        with self._lock:
+            self._apply_changes()
+            row = self._row_of.get(content_id)
+            if row is None:
+                return None
+            values = {name: column[row].item() for name, column in self._columns.items()}
+            values["degree"] = values["in_degree"] + values["out_degree"]
+            return values
+
+    def scores(self, content_ids: Iterable[str], metric: str = "pagerank") -> Dict[str, float]:
+        """
+        Get one metric for several content items.
+
+        Args:
+            content_ids: IDs of the content items
+            metric: Metric name from METRICS
+
+        Returns:
+            Dictionary mapping each ID to its value, 0 for unknown items
+
+        Raises:
+            ValidationError: If the metric is unknown
+        """
+        self._ensure_loaded()
+        with self._lock:
+            self._apply_changes()
+            column = self._column(metric)
+            return {
+                content_id: column[self._row_of[content_id]].item() if content_id in self._row_of else 0
+                for content_id in content_ids
+            }
+
+    def top(
+        self,
+        metric: str = "pagerank",
+        limit: int = 10,
+        content_ids: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Get the content items ranking highest by a metric.
+
+        Args:
+            metric: Metric name from METRICS
+            limit: Maximum number of items to return
+            content_ids: Optional IDs to rank among instead of all items
+
+        Returns:
+            List of (content ID, value) pairs, highest first, ties in table order
+
+        Raises:
+            ValidationError: If the metric is unknown
+        """
+        self._ensure_loaded()
+        with self._lock:
+            self._apply_changes()
+            column = self._column(metric)
+            if content_ids is None:
+                rows = np.arange(self._rows)
+            else:
+                rows = np.array(sorted({self._row_of[content_id] for content_id in content_ids
+                                        if content_id in self._row_of}), dtype=np.int64)
+            if limit <= 0 or not len(rows):
+                return []
+
+            values = column[rows]
+            if limit < len(rows):
+                # Keep everything tied with the cut-off so order stays stable
+                cutoff = np.partition(values, len(values) - limit)[len(values) - limit]
+                keep = values >= cutoff
+                rows, values = rows[keep], values[keep]
+            order = np.argsort(-values, kind="stable")[:limit]
+            return [(self._ids[row], values[i].item()) for i, row in zip(order.tolist(), rows[order].tolist())]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get summary statistics of the table.
+
+        Returns:
+            Dictionary with the row count and the number of changes not yet
+            folded into a full computation
+        """
+        self._ensure_loaded()
+        with self._lock:
+            self._apply_changes()
+            return {"nodes": self._rows, "pending_changes": self._pending}
+
+    def _column(self, metric: str) -> np.ndarray:
+        """Get the live rows of a metric column."""
+        if metric == "degree":
+            return self._columns["in_degree"][:self._rows] + self._columns["out_degree"][:self._rows]
+        if metric not in STORED_METRICS:
+            raise ValidationError(f"Unknown graph metric: {metric}. Expected one of {', '.join(METRICS)}")
+        return self._columns[metric][:self._rows]
+
+    # Computation
+
+    def _compute(
+        self, ids: List[str], src: np.ndarray, dst: np.ndarray, weights: np.ndarray
+    ) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """Compute the metric columns of a snapshot."""
+        node_count = len(ids)
+        offsets, neighbours = undirected_adjacency(node_count, src, dst)
+        return ids, {
+            "in_degree": np.bincount(dst, minlength=node_count).astype(np.int64),
+            "out_degree": np.bincount(src, minlength=node_count).astype(np.int64),
+            "pagerank": pagerank(node_count, src, dst, weights),
+            "betweenness": approximate_betweenness(node_count, offsets, neighbours, self.betweenness_samples),
+            "ego_size": ego_sizes(node_count, offsets, neighbours),
+        }
+
+    def _install(self, state: Tuple[List[str], Dict[str, np.ndarray]]) -> None:
+        """Replace the whole table."""
+        ids, columns = state
+        self._ids = list(ids)
+        self._row_of = dict(zip(self._ids, range(len(self._ids))))
+        self._rows = len(self._ids)
+        self._columns = {name: np.array(columns[name], dtype=dtype) for name, dtype in STORED_METRICS.items()}
+
+    def _apply_change(self, op: str, edge: Tuple[str, str, str]) -> None:
+        """Update the degree columns for an added or removed edge."""
+        step = 1 if op == "add" else -1
+        source, target = self._row(edge[0]), self._row(edge[1])
+        self._columns["out_degree"][source] += step
+        self._columns["in_degree"][target] += step
+
+    def _row(self, content_id: str) -> int:
+        """Get the row of a content ID, adding a zeroed row if new."""
+        row = self._row_of.get(content_id)
+        if row is None:
+            if self._rows == len(self._columns["pagerank"]):
+                capacity = max(16, 2 * self._rows)
+                for name, column in self._columns.items():
+                    grown = np.zeros(capacity, dtype=column.dtype)
+                    grown[:self._rows] = column[:self._rows]
+                    self._columns[name] = grown
+            row = self._row_of[content_id] = self._rows
+            self._ids.append(content_id)
+            self._rows += 1
+        return row
+
+    # Persistence
+
+    def _serialize(self, state: Tuple[List[str], Dict[str, np.ndarray]], signature: Optional[List[int]]) -> None:
+        """Write the table as a NumPy archive."""
+        ids, columns = state
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                version=np.array(METRICS_VERSION),
+                signature=np.array(signature or [], dtype=np.int64),
+                ids=np.array(ids, dtype=str),
+                **columns
+            )
+        os.replace(tmp_path, self.path)
+
+    def _deserialize(self) -> Optional[Tuple[Tuple[List[str], Dict[str, np.ndarray]], Tuple[int, ...]]]:
+        """Read a table saved as a NumPy archive."""
+        with np.load(self.path, allow_pickle=False) as data:
+            if int(data["version"]) != METRICS_VERSION:
+                return None
+            ids = data["ids"].tolist()
+            columns = {name: data[name] for name in STORED_METRICS}
+            saved = tuple(data["signature"].tolist())
+        if any(len(column) != len(ids) for column in columns.values()):
+            raise ValueError("metric columns differ in length")
+        return (ids, columns), saved
@@ -0,0 +1,239 @@
+"""
+Graph Snapshot Index
+Base class for whole-graph results kept current between full computations.
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import List, Optional, Any, Tuple
+
+import numpy as np
+
+from knowledge_base.core.graph_engine import GraphEngine
+from knowledge_base.utils.helpers import StorageError
+
+logger = logging.getLogger(__name__)
+
+
+class GraphSnapshotIndex:
+    """
+    Results computed over the whole graph and patched up as it changes.
+
+    A full computation runs on a GraphEngine snapshot and is saved along
+    with the relationship index signature it was computed from, so another
+    process only reuses saved results while that signature still matches.
+    Results that cannot be trusted are used until a background computation
+    replaces them. Relationship changes made since the last computation are
+    applied through _apply_change() as they are seen and counted; once the
+    count passes ``recompute_ratio`` of the edges, and at least
+    MIN_RECOMPUTE, the results are recomputed on a background thread while
+    the old ones stay in use.
+
+    Subclasses provide the computation and the in-memory and on-disk forms
+    of the results:
+
+    - _compute(ids, src, dst, weights) returns the results of a snapshot
+    - _install(state) replaces the in-memory results
+    - _apply_change(op, edge) patches them for one relationship change
+    - _serialize(state, signature) and _deserialize() write and read them
+
+    Subclass methods that touch the results call _ensure_loaded() and then
+    _apply_changes() under ``_lock``.
+    """
+
+    # Short name used for the job thread and in log messages
+    NAME = "graph index"
+
+    # Pending changes needed before a recomputation is started, however
+    # small the graph
+    MIN_RECOMPUTE = 256
+
+    def __init__(self, engine: GraphEngine, path: Optional[Path] = None, recompute_ratio: float = 0.05):
+        """
+        Initialize the index.
+
+        Results are loaded or computed on first use.
+
+        Args:
+            engine: Graph engine to compute from
+            path: Optional file to persist the results in
+            recompute_ratio: Share of changed edges that triggers a recomputation
+        """
+        self.engine = engine
+        self.relationship_manager = engine.relationship_manager
+        self.path = Path(path) if path is not None else None
+        self.recompute_ratio = recompute_ratio
+        self._lock = threading.RLock()
+        self._job_lock = threading.Lock()
+        self._job_thread: Optional[threading.Thread] = None
+
+        self._loaded = False
+        # Relationship generation the results reflect; None if unknown
+        self._generation: Optional[int] = None
+        self._edge_count = 0
+        self._pending = 0
+        # Counts wholesale replacements of the results, for callers that cache them
+        self.revision = 0
+
+    # Subclass hooks
+
+    def _compute(self, ids: List[str], src: np.ndarray, dst: np.ndarray, weights: np.ndarray) -> Any:
+        """Compute the results of a graph snapshot; called without the lock held."""
+        raise NotImplementedError
+
+    def _install(self, state: Any) -> None:
+        """Replace the in-memory results with computed or loaded ones."""
+        raise NotImplementedError
+
+    def _apply_change(self, op: str, edge: Tuple[str, str, str]) -> None:
+        """Patch the results for one relationship change."""
+        raise NotImplementedError
+
+    def _serialize(self, state: Any, signature: Optional[List[int]]) -> None:
+        """Write computed results and their relationship index signature to ``path``."""
+        raise NotImplementedError
+
+    def _deserialize(self) -> Optional[Tuple[Any, Optional[Tuple[int, ...]]]]:
+        """
+        Read saved results from ``path``.
+
+        Returns:
+            Tuple of (results, saved signature), or None if the file has an
+            older format
+
+        Raises:
+            Exception: If the file cannot be read
+        """
+        raise NotImplementedError
+
+    # Maintenance
+
+    def recompute(self, background: bool = False) -> None:
+        """
+        Compute the results for the whole graph and save them.
+
+        Args:
+            background: Compute on a background thread; does nothing if a
+                computation is already running
+        """
+        if background:
+            if not self._job_lock.acquire(blocking=False):
+                return
+            try:
+                self._job_thread = threading.Thread(
+                    target=self._run_recompute, name=self.NAME.replace(" ", "-"), daemon=True
+                )
+                self._job_thread.start()
+            except BaseException:
+                self._job_lock.release()
+                raise
+            return
+
+        with self._job_lock:
+            self._recompute()
+
+    def _run_recompute(self) -> None:
+        """Recompute on the background thread."""
+        try:
+            self._recompute()
+        except Exception as e:
+            logger.error(f"Background {self.NAME} computation failed: {e}")
+        finally:
+            self._job_lock.release()
+
+    def _recompute(self) -> None:
+        """Compute the results from a snapshot and switch to them."""
+        generation, ids, src, dst, weights = self.engine.snapshot()
+        state = self._compute(ids, src, dst, weights)
+
+        with self._lock:
+            self._replace(state)
+            self._generation = generation
+            self._edge_count = len(src)
+            self._pending = 0
+            self._loaded = True
+            # Fold in changes made while computing
+            self._apply_changes(schedule=False)
+        self._save(generation, state)
+        logger.debug(f"Computed {self.NAME} for {len(ids)} items")
+
+    def _replace(self, state: Any) -> None:
+        """Install new results wholesale."""
+        self.revision += 1
+        self._install(state)
+
+    def _ensure_loaded(self) -> None:
+        """Load or compute the results on first use; called without the lock held."""
+        if self._loaded:
+            return
+        with self._job_lock:
+            if not self._loaded:
+                with self._lock:
+                    self._load()
+                if not self._loaded:
+                    self._recompute()
+
+    def _apply_changes(self, schedule: bool = True) -> None:
+        """
+        Apply relationship changes made since the results were computed.
+
+        Args:
+            schedule: Whether to start a background recomputation once
+                enough changes have built up
+        """
+        if self._generation is None:
+            # Results from an older state of the graph are used until replaced
+            if schedule:
+                self.recompute(background=True)
+            return
+
+        threshold = max(self.MIN_RECOMPUTE, self.recompute_ratio * self._edge_count)
+        generation, changes = self.relationship_manager.changes_since(self._generation)
+        if changes is None:
+            # Too far behind to tell what changed
+            self._pending = max(self._pending, threshold)
+        else:
+            for op, _, edge in changes:
+                self._apply_change(op, edge)
+                self._pending += 1
+        self._generation = generation
+
+        if schedule and self._pending >= threshold:
+            self.recompute(background=True)
+
+    # Persistence
+
+    def _save(self, generation: int, state: Any) -> None:
+        """Persist computed results with the relationship index signature they match."""
+        if self.path is None:
+            return
+        current, signature = self.relationship_manager.index_signature()
+        # Results computed while the index moved on match no saved file
+        trusted = list(signature) if current == generation and signature else None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._serialize(state, trusted)
+        except Exception as e:
+            logger.error(f"Error saving {self.NAME}: {e}")
+            raise StorageError(f"Failed to save {self.NAME}: {e}")
+
+    def _load(self) -> None:
+        """Load persisted results, if any."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            loaded = self._deserialize()
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable {self.NAME} {self.path}: {e}")
+            return
+        if loaded is None:
+            return
+
+        state, saved = loaded
+        self._replace(state)
+        self._loaded = True
+        self._pending = 0
+        generation, signature = self.relationship_manager.index_signature()
+        self._generation = generation if saved and tuple(saved) == signature else None
+        self._edge_count = self.engine.edge_count() if self._generation is not None else 0
@@ -0,0 +1,344 @@
+"""
+Graph Summary
+Level-of-detail summaries of the whole relationship graph for visualization.
+"""
+
+import logging
+from typing import Dict, List, Optional, Any, Iterable, Tuple, Union
+
+import numpy as np
+
+from knowledge_base.content_types import RelationshipType
+from knowledge_base.core.graph_engine import GraphEngine, TYPE_VALUES
+from knowledge_base.core.graph_communities import CommunityIndex, label_propagation
+from knowledge_base.core.graph_metrics import GraphMetrics
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_VERSION = 1
+
+# Kinds of summary nodes
+ITEM = 0
+CLUSTER = 1
+REST = 2
+GROUP = 3
+
+
+def bundle_edges(
+    sources: np.ndarray,
+    targets: np.ndarray,
+    codes: np.ndarray,
+    max_edges: int
+) -> Dict[str, np.ndarray]:
+    """
+    Bundle edges between the same two summary nodes into one.
+
+    Args:
+        sources: Source summary node of each edge
+        targets: Target summary node of each edge
+        codes: Relationship type code of each edge
+        max_edges: Maximum number of bundles to keep
+
+    Returns:
+        Dictionary of "source", "target", "count" and "type" arrays with a
+        bundle per directed pair of summary nodes, the largest first; type
+        is the most common type code in the bundle
+    """
+    if not len(sources):
+        empty = np.zeros(0, dtype=np.int64)
+        return {"source": empty, "target": empty, "count": empty, "type": empty}
+
+    width = int(max(sources.max(), targets.max())) + 1
+    type_count = len(TYPE_VALUES)
+    pairs, bundle_of, counts = np.unique(
+        sources.astype(np.int64) * width + targets, return_inverse=True, return_counts=True
+    )
+
+    # Most common type per bundle, the lowest code on ties
+    typed, typed_counts = np.unique(bundle_of.ravel() * type_count + codes, return_counts=True)
+    order = np.lexsort((-typed_counts, typed // type_count))
+    typed = typed[order]
+    firsts = np.r_[True, typed[1:] // type_count != typed[:-1] // type_count]
+    dominant = typed[firsts] % type_count
+
+    keep = np.argsort(-counts, kind="stable")[:max(max_edges, 0)]
+    return {
+        "source": pairs[keep] // width,
+        "target": pairs[keep] % width,
+        "count": counts[keep],
+        "type": dominant[keep]
+    }
+
+
+class GraphSummarizer:
+    """
+    Builds level-of-detail views of the whole relationship graph.
+
+    Communities are shown as single cluster nodes, except for the expanded
+    ones, whose most important members are shown individually with the rest
+    folded into one node. When there are too many communities to show,
+    linked communities are further merged into group nodes. Edges between
+    the same two shown nodes are bundled with a count. Everything is
+    returned as parallel columns that refer to nodes by position, so a view
+    of a large graph stays small no matter how many items and relationships
+    it stands for.
+    """
+
+    def __init__(self, engine: GraphEngine, communities: CommunityIndex, metrics: GraphMetrics):
+        """
+        Initialize the summarizer.
+
+        Args:
+            engine: Graph engine to read edges from
+            communities: Community labels to cluster by
+            metrics: Graph metrics to rank members by
+        """
+        self.engine = engine
+        self.communities = communities
+        self.metrics = metrics
+        # (key, labels, scores, groupings by limit) for the last graph state seen
+        self._cache: Optional[Tuple[Any, np.ndarray, np.ndarray, Dict[int, Tuple[np.ndarray, np.ndarray]]]] = None
+
+    def summarize(
+        self,
+        expanded: Optional[Iterable[int]] = None,
+        focus_ids: Optional[Iterable[str]] = None,
+        relationship_types: Optional[Iterable[Union[RelationshipType, str]]] = None,
+        max_nodes: int = 300,
+        max_members: int = 100,
+        max_edges: int = 1500,
+        expanded_groups: Optional[Iterable[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Summarize the graph.
+
+        Nodes are given out in order: focus items, members of expanded
+        communities, the rest of each expanded community, then the other
+        communities, largest first, until ``max_nodes`` is reached. If there
+        are more communities than room for them, communities are grouped by
+        how strongly they are linked and each group is shown as one node,
+        except for expanded groups, whose communities are listed first.
+        Whatever still does not fit, and edges touching it, is only counted.
+
+        Args:
+            expanded: Communities to show member by member
+            focus_ids: Content items to show individually wherever they are
+            relationship_types: Optional filter by relationship types
+            max_nodes: Maximum number of nodes, not counting rest nodes
+            max_members: Maximum members shown per expanded community
+            max_edges: Maximum number of edge bundles
+            expanded_groups: Groups to show community by community
+
+        Returns:
+            Dictionary with the relationship generation, "nodes" columns
+            (kind, content_id, community, size, score), "edges" columns
+            (source, target, count, type) and "statistics". community is the
+            group number for groups. Items have their own ID as content_id,
+            clusters and groups their most important member's and rest nodes
+            None; score is the summed PageRank of the members
+        """
+        generation, ids, src, dst, codes = self.engine.edge_arrays(relationship_types)
+        node_count = len(ids)
+
+        linked = np.zeros(node_count, dtype=bool)
+        linked[src] = True
+        linked[dst] = True
+        nodes = np.flatnonzero(linked)
+        linked_ids = [ids[node] for node in nodes.tolist()]
+
+        labels, scores = self._node_columns(generation, node_count, nodes, linked_ids)
+
+        unit = np.full(node_count, -1, dtype=np.int64)
+        columns: Dict[str, List[Any]] = {"kind": [], "content_id": [], "community": [], "size": [], "score": []}
+
+        def add(kind: int, members: np.ndarray, community: int, representative: Optional[int]) -> None:
+            unit[members] = len(columns["kind"])
+            columns["kind"].append(kind)
+            columns["content_id"].append(None if representative is None else ids[representative])
+            columns["community"].append(community)
+            columns["size"].append(len(members))
+            # Four significant digits are plenty for sizing nodes
+            columns["score"].append(float(f"{scores[members].sum():.4g}"))
+
+        # Focus items
+        node_of = dict(zip(linked_ids, nodes.tolist()))
+        for content_id in dict.fromkeys(focus_ids or []):
+            node = node_of.get(content_id)
+            if node is not None and len(columns["kind"]) < max_nodes:
+                add(ITEM, np.array([node]), int(labels[node]), node)
+
+        # Members of expanded communities, most important first
+        wanted = np.array(sorted(set(expanded or [])), dtype=np.int64)
+        if len(wanted):
+            budget = max(1, min(max_members, (max_nodes - len(columns["kind"])) // len(wanted)))
+            members = np.flatnonzero(linked & (unit < 0) & np.isin(labels, wanted))
+            members = members[np.lexsort((members, -scores[members], labels[members]))]
+            starts, sizes = _runs(labels[members])
+            ranks = np.arange(len(members)) - np.repeat(starts, sizes)
+            for node in members[ranks < budget].tolist():
+                if len(columns["kind"]) >= max_nodes:
+                    break
+                add(ITEM, np.array([node]), int(labels[node]), node)
+            for start, size in zip(starts.tolist(), sizes.tolist()):
+                rest = members[start:start + size]
+                rest = rest[unit[rest] < 0]
+                if len(rest):
+                    add(REST, rest, int(labels[rest[0]]), None)
+
+        # Everything else as communities, or groups of them if there are too many
+        remaining = np.flatnonzero(linked & (unit < 0) & (labels >= 0))
+        room = max(max_nodes - len(columns["kind"]) + columns["kind"].count(REST), 0)
+        if len(remaining) and room:
+            kinds = np.full(len(remaining), CLUSTER, dtype=np.int64)
+            keys = labels[remaining]
+            priority = np.zeros(len(remaining), dtype=np.int64)
+            if len(np.unique(keys)) > room:
+                community_ids, groups = self._community_groups(labels, src, dst, room)
+                group_of = groups[np.searchsorted(community_ids, keys)]
+                opened = np.isin(group_of, np.array(sorted(set(expanded_groups or [])), dtype=np.int64))
+                priority[opened] = -1
+
+                # Groups are shown as their communities while there is room,
+                # largest first; a group of one community always is
+                width = int(community_ids.max()) + 1
+                pairs = np.unique(group_of * width + keys)
+                group_ids, community_counts = np.unique(pairs // width, return_counts=True)
+                group_sizes = np.bincount(np.searchsorted(group_ids, group_of), minlength=len(group_ids))
+                spare = room - len(group_ids) - int((community_counts - 1)[np.isin(group_ids, group_of[opened])].sum())
+                for group in np.argsort(-group_sizes, kind="stable").tolist():
+                    extra = int(community_counts[group]) - 1
+                    if extra <= spare:
+                        spare -= extra
+                        community_counts[group] = 1
+                grouped = ~opened & (community_counts[np.searchsorted(group_ids, group_of)] > 1)
+                kinds[grouped] = GROUP
+                keys = np.where(grouped, group_of, keys)
+
+            # Units in priority order, then largest first; members best first
+            order = np.lexsort((remaining, -scores[remaining], keys, kinds))
+            remaining, kinds, keys, priority = remaining[order], kinds[order], keys[order], priority[order]
+            starts, sizes = _runs(kinds * (int(keys.max()) + 1) + keys)
+            runs = np.lexsort((kinds[starts], keys[starts], -sizes, priority[starts]))
+            # Expanded groups come first but leave the rest of the graph in view
+            opened_runs = priority[starts[runs]] < 0
+            quota = max(room - int((~opened_runs).sum()), room // 2)
+            for run in np.concatenate([runs[opened_runs][:quota], runs[~opened_runs]])[:room].tolist():
+                run_members = remaining[starts[run]:starts[run] + sizes[run]]
+                add(int(kinds[starts[run]]), run_members, int(keys[starts[run]]), int(run_members[0]))
+
+        # Bundle edges between shown nodes; edges inside one node are dropped
+        source_units, target_units = unit[src], unit[dst]
+        shown = (source_units >= 0) & (target_units >= 0)
+        between = shown & (source_units != target_units)
+        edges = bundle_edges(source_units[between], target_units[between], codes[between], max_edges)
+
+        statistics = {
+            "node_count": len(nodes),
+            "edge_count": len(src),
+            "shown_nodes": int((unit >= 0).sum()),
+            "shown_edges": int(edges["count"].sum()),
+            "hidden_nodes": int((linked & (unit < 0)).sum()),
+            "hidden_edges": int((~shown).sum()),
+            "internal_edges": int((shown & ~between).sum()),
+            "bundled_edges": int(between.sum())
+        }
+        return {
+            "generation": generation,
+            "nodes": columns,
+            "edges": {name: column.tolist() for name, column in edges.items()},
+            "statistics": statistics
+        }
+
+    def _node_columns(
+        self,
+        generation: int,
+        node_count: int,
+        nodes: np.ndarray,
+        linked_ids: List[str]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the community and PageRank of every node number.
+
+        Both are cached until the graph changes or communities or metrics
+        are recomputed.
+
+        Args:
+            generation: Relationship generation of the edges
+            node_count: Number of node numbers
+            nodes: Node numbers with edges
+            linked_ids: Content IDs of those nodes
+
+        Returns:
+            Arrays of community (-1 for none) and PageRank per node number
+        """
+        cached = self._cache
+        if cached is not None and cached[0] == (generation, self.communities.revision, self.metrics.revision):
+            return cached[1], cached[2]
+
+        labels = np.full(node_count, -1, dtype=np.int64)
+        labels[nodes] = [
+            -1 if community is None else community
+            for community in self.communities.communities_of(linked_ids).values()
+        ]
+        scores = np.zeros(node_count, dtype=np.float64)
+        scores[nodes] = list(self.metrics.scores(linked_ids, "pagerank").values())
+        # Replaced as a whole, so concurrent readers see one state or the other
+        self._cache = ((generation, self.communities.revision, self.metrics.revision), labels, scores, {})
+        return labels, scores
+
+    def _community_groups(
+        self,
+        labels: np.ndarray,
+        src: np.ndarray,
+        dst: np.ndarray,
+        limit: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Group communities by label propagation over the links between them.
+
+        Groups are grouped again in the same way while there are more than
+        ``limit`` of them and rounds still merge some. Results are cached
+        with the node columns they were computed from.
+
+        Args:
+            labels: Community of each node, -1 for none
+            src: Source node of each edge
+            dst: Target node of each edge
+            limit: Number of groups to stop at
+
+        Returns:
+            Sorted community IDs and the group number of each
+        """
+        cached = self._cache
+        groupings = cached[3] if cached is not None and cached[1] is labels else {}
+        if limit in groupings:
+            return groupings[limit]
+
+        community_ids = np.unique(labels[labels >= 0])
+        source_labels, target_labels = labels[src], labels[dst]
+        keep = (source_labels >= 0) & (target_labels >= 0) & (source_labels != target_labels)
+        sources = np.searchsorted(community_ids, source_labels[keep])
+        targets = np.searchsorted(community_ids, target_labels[keep])
+
+        groups = np.arange(len(community_ids))
+        group_count = len(community_ids)
+        while group_count > limit:
+            # More links between two groups pull them together harder
+            pairs, counts = np.unique(groups[sources] * group_count + groups[targets], return_counts=True)
+            between = pairs // group_count != pairs % group_count
+            pairs, counts = pairs[between], counts[between]
+            merged = label_propagation(group_count, pairs // group_count, pairs % group_count, 1.0 / counts)
+            if merged.max(initial=-1) + 1 >= group_count:
+                break
+            groups = merged[groups]
+            group_count = int(merged.max()) + 1
+        groupings[limit] = (community_ids, groups)
+        return community_ids, groups
+
+
+def _runs(keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Get the start and length of each run of equal keys in a sorted array."""
+    if not len(keys):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return starts, np.diff(np.r_[starts, len(keys)])
@@ -3,14 +3,18 @@ Hierarchy Manager
 Manages hierarchical organization of content in the knowledge base.
 """
 
+import base64
+import bisect
 import json
 import logging
+import threading
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Any, Tuple, Union
+from typing import Dict, List, Optional, Set, Any, Tuple, Union, Iterator
 
 from knowledge_base.content_types import Folder, BaseContent, RelationshipType
 from knowledge_base.utils.helpers import (
-    KnowledgeBaseError, NotFoundError, StorageError, ValidationError
+    KnowledgeBaseError, NotFoundError, StorageError, ValidationError, atomic_write_json
 )
 from knowledge_base.core.relationship_manager import RelationshipManager
 
@@ -47,6 +51,23 @@ class HierarchyManager:
         self.hierarchy_dir.mkdir(parents=True, exist_ok=True)
         self.hierarchy_index_path = self.hierarchy_dir / "hierarchy_index.json"
         
+        # Resident copy of the index, invalidated when the file changes on disk
+        self._index: Optional[Dict[str, Any]] = None
+        self._index_signature: Optional[Tuple[int, int]] = None
+        self._generation = 0
+        self._lock = threading.RLock()
+        
+        # Secondary indexes over the resident copy: path -> IDs (an
+        # insertion-ordered set, as titles need not be unique) and memoised
+        # breadcrumbs
+        self._path_ids: Dict[str, Dict[str, None]] = {}
+        self._breadcrumbs: Dict[str, List[Dict[str, str]]] = {}
+        
+        # Children of each listed folder as sorted (sort key, ID) pairs,
+        # valid for the generation they were built at
+        self._sorted_children: Dict[str, List[Tuple[str, str]]] = {}
+        self._sorted_generation = -1
+        
         # Ensure root folder exists
         self._ensure_root_folder()
     
@@ -57,67 +78,145 @@ class HierarchyManager:
         Returns:
             ID of the root folder
         """
-        # Load hierarchy index
-        hierarchy = self._load_hierarchy_index()
-        
-        # Check if root folder exists
-        if "root" not in hierarchy:
-            # Create root folder
-            root_folder = Folder(
-                title="Root",
-                description="Root folder",
-                path="/"
-            )
-            root_id = root_folder.id
-            
-            # Add to hierarchy
-            hierarchy["root"] = root_id
-            hierarchy[root_id] = {
-                "id": root_id,
-                "title": root_folder.title,
-                "path": "/",
-                "parent_id": None,
-                "children": []
-            }
+        with self._lock:
+            # Load hierarchy index
+            hierarchy = self._load_hierarchy_index()
+        
+            # Check if root folder exists
+            if "root" not in hierarchy:
+                # Create root folder
+                root_folder = Folder(
+                    title="Root",
+                    description="Root folder",
+                    path="/"
+                )
+                root_id = root_folder.id
             
-            # Save hierarchy index
-            self._save_hierarchy_index(hierarchy)
+                # Add to hierarchy
+                hierarchy["root"] = root_id
+                self._put_node(hierarchy, root_id, {
+                    "id": root_id,
+                    "title": root_folder.title,
+                    "path": "/",
+                    "parent_id": None,
+                    "type": "folder",
+                    "children": []
+                })
+            
+                # Save hierarchy index
+                self._save_hierarchy_index(hierarchy)
             
-            # Root folder will be saved by calling code
-            return root_id
+                # Root folder will be saved by calling code
+                return root_id
         
-        return hierarchy["root"]
+            return hierarchy["root"]
     
-    def _load_hierarchy_index(self) -> Dict[str, Any]:
-        """Load the hierarchy index."""
+    @property
+    def generation(self) -> int:
+        """Counter that changes whenever the hierarchy changes."""
+        return self._generation
+    
+    def _index_file_signature(self) -> Optional[Tuple[int, int]]:
+        """Get a (mtime, size) signature of the index file, or None if missing."""
         try:
-            if not self.hierarchy_index_path.exists():
-                return {}
-                
-            with open(self.hierarchy_index_path, 'r') as f:
-                return json.load(f)
+            stat = self.hierarchy_index_path.stat()
+            return stat.st_mtime_ns, stat.st_size
         except FileNotFoundError:
-            return {}
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid hierarchy index JSON: {e}")
-            # If corrupted, create a backup and start with empty index
-            if self.hierarchy_index_path.exists():
-                backup_path = self.hierarchy_index_path.with_suffix('.json.bak')
-                self.hierarchy_index_path.rename(backup_path)
-                logger.info(f"Corrupted index backed up to {backup_path}")
-            return {}
-        except Exception as e:
-            logger.error(f"Error loading hierarchy index: {e}")
-            raise StorageError(f"Failed to load hierarchy index: {e}")
+            return None
+    
+    def _load_hierarchy_index(self) -> Dict[str, Any]:
+        """
+        Load the hierarchy index.
+        
+        The parsed index is kept resident and only re-read when the file's
+        modification time or size changes. The returned dictionary is the
+        resident copy; callers that modify it must pass it to
+        _save_hierarchy_index.
+        """
+        with self._lock:
+            signature = self._index_file_signature()
+            if self._index is not None and signature == self._index_signature:
+                return self._index
+            
+            try:
+                with open(self.hierarchy_index_path, 'r') as f:
+                    hierarchy = json.load(f)
+            except FileNotFoundError:
+                hierarchy = {}
+            except json.JSONDecodeError as e:
+                logger.error(f"Invalid hierarchy index JSON: {e}")
+                # If corrupted, create a backup and start with empty index
+                if self.hierarchy_index_path.exists():
+                    backup_path = self.hierarchy_index_path.with_suffix('.json.bak')
+                    self.hierarchy_index_path.rename(backup_path)
+                    logger.info(f"Corrupted index backed up to {backup_path}")
+                hierarchy = {}
+                signature = self._index_file_signature()
+            except Exception as e:
+                logger.error(f"Error loading hierarchy index: {e}")
+                raise StorageError(f"Failed to load hierarchy index: {e}")
+            
+            self._index = hierarchy
+            self._index_signature = signature
+            self._build_path_index(hierarchy)
+            return hierarchy
     
     def _save_hierarchy_index(self, hierarchy: Dict[str, Any]) -> None:
-        """Save the hierarchy index."""
-        try:
-            with open(self.hierarchy_index_path, 'w') as f:
-                json.dump(hierarchy, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving hierarchy index: {e}")
-            raise StorageError(f"Failed to save hierarchy index: {e}")
+        """Write the hierarchy index through to disk atomically."""
+        with self._lock:
+            try:
+                atomic_write_json(self.hierarchy_index_path, hierarchy)
+            except Exception as e:
+                # The resident copy may no longer match the file
+                self._index = None
+                self._index_signature = None
+                logger.error(f"Error saving hierarchy index: {e}")
+                raise StorageError(f"Failed to save hierarchy index: {e}")
+            
+            if hierarchy is not self._index:
+                self._build_path_index(hierarchy)
+            else:
+                self._generation += 1
+            self._index = hierarchy
+            self._index_signature = self._index_file_signature()
+    
+    def _build_path_index(self, hierarchy: Dict[str, Any]) -> None:
+        """Rebuild the path index and drop memoised breadcrumbs."""
+        self._path_ids = {}
+        for node_id, node in hierarchy.items():
+            if isinstance(node, dict) and "path" in node:
+                self._path_ids.setdefault(node["path"], {})[node_id] = None
+        self._breadcrumbs = {}
+        self._generation += 1
+    
+    def _put_node(self, hierarchy: Dict[str, Any], node_id: str, node: Dict[str, Any]) -> None:
+        """Add or replace a node, keeping the path index in step."""
+        if node_id in hierarchy:
+            self._unindex_path(node_id, hierarchy[node_id].get("path"))
+        hierarchy[node_id] = node
+        if "path" in node:
+            self._path_ids.setdefault(node["path"], {})[node_id] = None
+    
+    def _set_path(self, hierarchy: Dict[str, Any], node_id: str, path: str) -> None:
+        """Change the path of a node, keeping the path index in step."""
+        node = hierarchy[node_id]
+        self._unindex_path(node_id, node.get("path"))
+        node["path"] = path
+        self._path_ids.setdefault(path, {})[node_id] = None
+    
+    def _drop_node(self, hierarchy: Dict[str, Any], node_id: str) -> None:
+        """Remove a node, keeping the path index in step."""
+        node = hierarchy.pop(node_id)
+        self._unindex_path(node_id, node.get("path"))
+        self._breadcrumbs.pop(node_id, None)
+    
+    def _unindex_path(self, node_id: str, path: Optional[str]) -> None:
+        """Remove a node from the path index."""
+        ids = self._path_ids.get(path)
+        if ids is not None:
+            ids.pop(node_id, None)
+            if not ids:
+                del self._path_ids[path]
     
     def create_folder(
         self, 
@@ -138,100 +237,105 @@ class HierarchyManager:
         Returns:
             The created Folder object
         """
-        hierarchy = self._load_hierarchy_index()
+        with self._lock:
+            hierarchy = self._load_hierarchy_index()
         
-        # If no parent specified, use root
-        if parent_id is None:
-            parent_id = hierarchy.get("root")
+            # If no parent specified, use root
             if parent_id is None:
-                parent_id = self._ensure_root_folder()
-        
-        # Validate parent exists
-        if parent_id not in hierarchy:
-            raise NotFoundError(f"Parent folder not found: {parent_id}")
-        
-        # Generate path
-        parent_path = hierarchy[parent_id]["path"]
-        path = f"{parent_path}/{title}" if parent_path != "/" else f"/{title}"
-        
-        # Create folder
-        folder = Folder(
-            title=title,
-            description=description,
-            icon=icon,
-            parent_id=parent_id,
-            path=path
-        )
-        
-        # Update hierarchy index
-        hierarchy[folder.id] = {
-            "id": folder.id,
-            "title": folder.title,
-            "path": path,
-            "parent_id": parent_id,
-            "children": []
-        }
+                parent_id = hierarchy.get("root")
+                if parent_id is None:
+                    parent_id = self._ensure_root_folder()
         
-        # Update parent's children
-        hierarchy[parent_id]["children"].append(folder.id)
+            # Validate parent exists
+            if parent_id not in hierarchy:
+                raise NotFoundError(f"Parent folder not found: {parent_id}")
         
-        # Create parent-child relationship
-        self.relationship_manager.create_relationship(
-            parent_id,
-            folder.id,
-            relationship_type=RelationshipType.PARENT_CHILD,
-            description="Parent folder relationship"
-        )
+            # Generate path
+            parent_path = hierarchy[parent_id]["path"]
+            path = f"{parent_path}/{title}" if parent_path != "/" else f"/{title}"
         
-        # Save hierarchy index
-        self._save_hierarchy_index(hierarchy)
+            # Create folder
+            folder = Folder(
+                title=title,
+                description=description,
+                icon=icon,
+                parent_id=parent_id,
+                path=path
+            )
         
-        return folder
+            # Update hierarchy index
+            self._put_node(hierarchy, folder.id, {
+                "id": folder.id,
+                "title": folder.title,
+                "path": path,
+                "parent_id": parent_id,
+                "type": "folder",
+                "children": []
+            })
+        
+            # Update parent's children
+            hierarchy[parent_id]["children"].append(folder.id)
+        
+            # Create parent-child relationship
+            self.relationship_manager.create_relationship(
+                parent_id,
+                folder.id,
+                relationship_type=RelationshipType.PARENT_CHILD,
+                description="Parent folder relationship"
+            )
+        
+            # Save hierarchy index
+            self._save_hierarchy_index(hierarchy)
+        
+            return folder
     
-    def add_content_to_folder(self, content_id: str, folder_id: str) -> str:
+    def add_content_to_folder(self, content_id: str, folder_id: str, content_type: Optional[str] = None) -> str:
         """
         Add content to a folder.
         
         Args:
             content_id: ID of the content to add
             folder_id: ID of the folder
+            content_type: Optional type of the content, shown in tree listings
             
         Returns:
             Path of the content in the hierarchy
         """
-        hierarchy = self._load_hierarchy_index()
-        
-        # Validate folder exists
-        if folder_id not in hierarchy:
-            raise NotFoundError(f"Folder not found: {folder_id}")
-        
-        # Update folder's children
-        if content_id not in hierarchy[folder_id]["children"]:
-            hierarchy[folder_id]["children"].append(content_id)
-        
-        # Add content to hierarchy index if not already there
-        if content_id not in hierarchy:
-            folder_path = hierarchy[folder_id]["path"]
-            # Note: We don't know the content title here, it will be updated later
-            hierarchy[content_id] = {
-                "id": content_id,
-                "path": f"{folder_path}/<item>",
-                "parent_id": folder_id,
-                "children": []
-            }
-        
-        # Create parent-child relationship
-        self.relationship_manager.create_relationship(
-            folder_id,
-            content_id,
-            relationship_type=RelationshipType.PARENT_CHILD,
-            description="Folder membership"
-        )
+        with self._lock:
+            hierarchy = self._load_hierarchy_index()
+        
+            # Validate folder exists
+            if folder_id not in hierarchy:
+                raise NotFoundError(f"Folder not found: {folder_id}")
+        
+            # Update folder's children
+            if content_id not in hierarchy[folder_id]["children"]:
+                hierarchy[folder_id]["children"].append(content_id)
+        
+            # Add content to hierarchy index if not already there
+            if content_id not in hierarchy:
+                folder_path = hierarchy[folder_id]["path"]
+                # Note: We don't know the content title here, it will be updated later
+                self._put_node(hierarchy, content_id, {
+                    "id": content_id,
+                    "path": f"{folder_path}/<item>",
+                    "parent_id": folder_id,
+                    "type": content_type or "content",
+                    "children": []
+                })
+        
+            # Create parent-child relationship
+            self.relationship_manager.create_relationship(
+                folder_id,
+                content_id,
+                relationship_type=RelationshipType.PARENT_CHILD,
+                description="Folder membership"
+            )
         
-        # Save hierarchy index
-        self._save_hierarchy_index(hierarchy)
+            # Save hierarchy index
+            self._save_hierarchy_index(hierarchy)
         
-        return hierarchy[content_id]["path"]
+            return hierarchy[content_id]["path"]
     
     def update_content_path(self, content_id: str, title: str) -> str:
         """
@@ -244,25 +348,31 @@ class HierarchyManager:
         Returns:
             Updated path
         """
-        hierarchy = self._load_hierarchy_index()
-        
-        # If content not in hierarchy, do nothing
-        if content_id not in hierarchy:
-            return ""
-        
-        # Update path with actual title
-        parent_id = hierarchy[content_id]["parent_id"]
-        if parent_id:
-            parent_path = hierarchy[parent_id]["path"]
-            path = f"{parent_path}/{title}" if parent_path != "/" else f"/{title}"
-            hierarchy[content_id]["path"] = path
-            hierarchy[content_id]["title"] = title
+        with self._lock:
+            hierarchy = self._load_hierarchy_index()
+        
+            # If content not in hierarchy, do nothing
+            if content_id not in hierarchy:
+                return ""
+        
+            # Update path with actual title
+            parent_id = hierarchy[content_id]["parent_id"]
+            if parent_id:
+                parent_path = hierarchy[parent_id]["path"]
+                path = f"{parent_path}/{title}" if parent_path != "/" else f"/{title}"
+                self._set_path(hierarchy, content_id, path)
+                hierarchy[content_id]["title"] = title
+                # The title shows in this item's breadcrumb and its descendants'
+                if hierarchy[content_id].get("children"):
+                    self._breadcrumbs.clear()
+                else:
+                    self._breadcrumbs.pop(content_id, None)
             
-            # Save hierarchy index
-            self._save_hierarchy_index(hierarchy)
-            return path
+                # Save hierarchy index
+                self._save_hierarchy_index(hierarchy)
+                return path
         
-        return ""
+            return ""
     
     def move_content(self, content_id: str, new_parent_id: str) -> str:
         """
@@ -274,47 +384,138 @@ class HierarchyManager:
             
         Returns:
             New path of the content
+            
+        Raises:
+            NotFoundError: If the content or the folder doesn't exist
+            ValidationError: If the folder is the content itself or inside it
         """
-        hierarchy = self._load_hierarchy_index()
+        moved, errors = self.move_many([content_id], new_parent_id)
+        if content_id in errors:
+            raise errors[content_id]
+        return moved[content_id]
+    
+    def move_many(
+        self,
+        content_ids: List[str],
+        new_parent_id: str
+    ) -> Tuple[Dict[str, str], Dict[str, KnowledgeBaseError]]:
+        """
+        Move several items, with their subtrees, to a folder.
         
-        # Validate content and new parent exist
-        if content_id not in hierarchy:
-            raise NotFoundError(f"Content not found: {content_id}")
-        if new_parent_id not in hierarchy:
-            raise NotFoundError(f"Parent folder not found: {new_parent_id}")
-        
-        # Remove from current parent's children
-        current_parent_id = hierarchy[content_id]["parent_id"]
-        if current_parent_id and current_parent_id in hierarchy:
-            if content_id in hierarchy[current_parent_id]["children"]:
-                hierarchy[current_parent_id]["children"].remove(content_id)
-        
-        # Add to new parent's children
-        if content_id not in hierarchy[new_parent_id]["children"]:
-            hierarchy[new_parent_id]["children"].append(content_id)
-        
-        # Update content's parent and path
-        hierarchy[content_id]["parent_id"] = new_parent_id
-        parent_path = hierarchy[new_parent_id]["path"]
-        title = hierarchy[content_id].get("title", "<item>")
-        path = f"{parent_path}/{title}" if parent_path != "/" else f"/{title}"
-        hierarchy[content_id]["path"] = path
-        
-        # Update relationships - replace old parent-child relationship
-        if current_parent_id:
-            self.relationship_manager.delete_relationship(current_parent_id, content_id)
-        
-        self.relationship_manager.create_relationship(
-            new_parent_id,
-            content_id,
-            relationship_type=RelationshipType.PARENT_CHILD,
-            description="Folder membership"
-        )
-        
-        # Save hierarchy index
-        self._save_hierarchy_index(hierarchy)
-        
-        return path
+        Each moved subtree has its paths rewritten in one pass, by replacing
+        the old path prefix, so the cost follows the number of descendants.
+        The index and the relationships are written once for the whole batch.
+        
+        Args:
+            content_ids: IDs of the items to move
+            new_parent_id: ID of the new parent folder
+            
+        Returns:
+            Tuple of (new path of each moved item, error of each item that
+            could not be moved)
+            
+        Raises:
+            NotFoundError: If the folder doesn't exist
+        """
+        with self._lock:
+            hierarchy = self._load_hierarchy_index()
+            
+            if not isinstance(hierarchy.get(new_parent_id), dict):
+                raise NotFoundError(f"Parent folder not found: {new_parent_id}")
+            
+            # Moving the folder or any folder above it inside it would make a cycle
+            ancestors = {entry["id"] for entry in self._breadcrumb(hierarchy, new_parent_id)}
+            
+            to_move = []
+            errors: Dict[str, KnowledgeBaseError] = {}
+            leaving: Dict[str, Set[str]] = {}
+            for content_id in dict.fromkeys(content_ids):
+                if not isinstance(hierarchy.get(content_id), dict):
+                    errors[content_id] = NotFoundError(f"Content not found: {content_id}")
+                    continue
+                if content_id in ancestors:
+                    errors[content_id] = ValidationError(f"Cannot move {content_id} into itself or its descendants")
+                    continue
+                to_move.append(content_id)
+                current_parent_id = hierarchy[content_id].get("parent_id")
+                if current_parent_id != new_parent_id:
+                    leaving.setdefault(current_parent_id, set()).add(content_id)
+            
+            # Detach from the current parents, one pass per parent
+            for parent_id, ids in leaving.items():
+                if isinstance(hierarchy.get(parent_id), dict):
+                    parent = hierarchy[parent_id]
+                    parent["children"] = [child for child in parent.get("children", []) if child not in ids]
+            
+            new_parent = hierarchy[new_parent_id]
+            siblings = set(new_parent["children"])
+            moved = {}
+            for content_id in to_move:
+                if content_id not in siblings:
+                    new_parent["children"].append(content_id)
+                hierarchy[content_id]["parent_id"] = new_parent_id
+                title = hierarchy[content_id].get("title", "<item>")
+                moved[content_id] = self._child_path(new_parent["path"], title)
+                self._rewrite_subtree(hierarchy, content_id, moved[content_id])
+            
+            if not moved:
+                return moved, errors
+            
+            # Every breadcrumb running through a moved item is stale
+            self._breadcrumbs.clear()
+            
+            # Update relationships - replace old parent-child relationships
+            self.relationship_manager.delete_relationships([
+                (parent_id, content_id)
+                for parent_id, ids in leaving.items() if parent_id
+                for content_id in ids
+            ])
+            self.relationship_manager.create_relationships(
+                [(new_parent_id, content_id) for content_id in moved],
+                relationship_type=RelationshipType.PARENT_CHILD,
+                description="Folder membership"
+            )
+            
+            # Save hierarchy index
+            self._save_hierarchy_index(hierarchy)
+            
+            return moved, errors
+    
+    @staticmethod
+    def _child_path(parent_path: str, title: str) -> str:
+        """Get the path of an item under a parent path."""
+        return f"{parent_path}/{title}" if parent_path != "/" else f"/{title}"
+    
+    def _rewrite_subtree(self, hierarchy: Dict[str, Any], node_id: str, path: str) -> None:
+        """
+        Give a node a new path and rewrite the paths of its descendants.
+        
+        Descendant paths start with the node's old path and only that
+        prefix is replaced; a descendant whose path does not (e.g. a
+        placeholder left by an interrupted write) is rebuilt from its
+        parent's path and its title.
+        """
+        old_path = hierarchy[node_id].get("path")
+        old_prefix = old_path + "/" if old_path else None
+        self._set_path(hierarchy, node_id, path)
+        
+        stack = list(hierarchy[node_id].get("children", []))
+        visited = {node_id}
+        while stack:
+            child_id = stack.pop()
+            child = hierarchy.get(child_id)
+            if child_id in visited or not isinstance(child, dict):
+                continue
+            visited.add(child_id)
+            
+            child_path = child.get("path", "")
+            if old_prefix and child_path.startswith(old_prefix):
+                child_path = path + child_path[len(old_prefix) - 1:]
+            else:
+                parent_path = hierarchy.get(child.get("parent_id"), {}).get("path", path)
+                child_path = self._child_path(parent_path, child.get("title", "<item>"))
+            self._set_path(hierarchy, child_id, child_path)
+            stack.extend(child.get("children", []))
     
     def get_children(self, folder_id: str) -> List[str]:
         """
@@ -332,7 +533,7 @@ class HierarchyManager:
         if folder_id not in hierarchy:
             raise NotFoundError(f"Folder not found: {folder_id}")
         
-        return hierarchy[folder_id].get("children", [])
+        return list(hierarchy[folder_id].get("children", []))
     
     def get_path(self, content_id: str) -> str:
         """
@@ -380,18 +581,15 @@ class HierarchyManager:
         Returns:
             ID of the folder or None if not found
         """
-        hierarchy = self._load_hierarchy_index()
-        
-        # Handle root path
-        if path == "/":
-            return hierarchy.get("root")
-        
-        # Look for the path in the hierarchy
-        for content_id, content_data in hierarchy.items():
-            if content_id != "root" and content_data.get("path") == path:
-                return content_id
-        
-        return None
+        with self._lock:
+            hierarchy = self._load_hierarchy_index()
+            
+            # Handle root path
+            if path == "/":
+                return hierarchy.get("root")
+            
+            # The first item registered under the path, as titles need not be unique
+            return next(iter(self._path_ids.get(path, ())), None)
     
     def get_content_by_path(self, path: str) -> Optional[str]:
         """
@@ -420,51 +618,108 @@ class HierarchyManager:
         Raises:
             ValidationError: If the folder has children and recursive is False
         """
-        hierarchy = self._load_hierarchy_index()
-        
-        # Validate folder exists
-        if folder_id not in hierarchy:
+        deleted, errors = self.delete_many([folder_id], recursive)
+        error = errors.get(folder_id)
+        if isinstance(error, NotFoundError):
             return False
+        if error is not None:
+            raise error
+        return True
+    
+    def delete_many(
+        self,
+        node_ids: List[str],
+        recursive: bool = False
+    ) -> Tuple[List[str], Dict[str, KnowledgeBaseError]]:
+        """
+        Remove several items from the hierarchy.
         
-        # Check for root folder
-        if hierarchy.get("root") == folder_id:
-            raise ValidationError("Cannot delete root folder")
-        
-        # Check for children
-        children = hierarchy[folder_id].get("children", [])
-        if children and not recursive:
-            raise ValidationError(f"Folder has {len(children)} children. Set recursive=True to delete.")
-        
-        # Recursively delete children if required
-        if recursive:
-            for child_id in list(children):  # Use list() to avoid modification during iteration
-                if child_id in hierarchy and len(hierarchy[child_id].get("children", [])) > 0:
-                    # It's a folder
-                    self.delete_folder(child_id, recursive=True)
-                else:
-                    # It's a content item - just remove from hierarchy
-                    if child_id in hierarchy:
-                        del hierarchy[child_id]
-                    
-                    # Delete relationship with parent
-                    self.relationship_manager.delete_relationship(folder_id, child_id)
-        
-        # Remove from parent's children
-        parent_id = hierarchy[folder_id].get("parent_id")
-        if parent_id and parent_id in hierarchy:
-            if folder_id in hierarchy[parent_id]["children"]:
-                hierarchy[parent_id]["children"].remove(folder_id)
-        
-        # Delete folder's relationships
-        self.relationship_manager.delete_all_relationships(folder_id)
-        
-        # Delete folder from hierarchy
-        del hierarchy[folder_id]
-        
-        # Save hierarchy index
-        self._save_hierarchy_index(hierarchy)
+        Items with children are only removed if recursive is True or all
+        their children are removed too. The index and the relationships are
+        written once for the whole batch.
         
-        return True
+        Args:
+            node_ids: IDs of the items to remove
+            recursive: If True, also remove everything below the items
+            
+        Returns:
+            Tuple of (IDs removed, including descendants, error of each item
+            that could not be removed)
+        """
+        with self._lock:
+            hierarchy = self._load_hierarchy_index()
+            
+            targets = {}
+            errors: Dict[str, KnowledgeBaseError] = {}
+            for node_id in dict.fromkeys(node_ids):
+                if not isinstance(hierarchy.get(node_id), dict):
+                    errors[node_id] = NotFoundError(f"Folder not found: {node_id}")
+                elif hierarchy.get("root") == node_id:
+                    errors[node_id] = ValidationError("Cannot delete root folder")
+                else:
+                    targets[node_id] = None
+            
+            if not recursive:
+                for node_id in list(targets):
+                    kept = [child for child in hierarchy[node_id].get("children", []) if child not in targets]
+                    if kept:
+                        errors[node_id] = ValidationError(
+                            f"Folder has {len(kept)} children. Set recursive=True to delete."
+                        )
+                        del targets[node_id]
+                # A refused item keeps its ancestors in the batch from being removed
+                refused = [node_id for node_id, error in errors.items() if isinstance(error, ValidationError)]
+                for node_id in refused:
+                    for entry in self._breadcrumb(hierarchy, node_id)[:-1]:
+                        if entry["id"] in targets:
+                            del targets[entry["id"]]
+                            errors[entry["id"]] = ValidationError(f"Folder still has children: {entry['id']}")
+            
+            # Collect the subtrees, one visit per node
+            removed: Dict[str, None] = {}
+            stack = list(targets)
+            while stack:
+                node_id = stack.pop()
+                node = hierarchy.get(node_id)
+                if node_id in removed or not isinstance(node, dict):
+                    continue
+                removed[node_id] = None
+                stack.extend(node.get("children", []))
+            
+            if not removed:
+                return [], errors
+            
+            # Detach the top of each subtree from its surviving parent
+            leaving: Dict[str, Set[str]] = {}
+            for node_id in removed:
+                parent_id = hierarchy[node_id].get("parent_id")
+                if parent_id not in removed:
+                    leaving.setdefault(parent_id, set()).add(node_id)
+            for parent_id, ids in leaving.items():
+                if isinstance(hierarchy.get(parent_id), dict):
+                    parent = hierarchy[parent_id]
+                    parent["children"] = [child for child in parent.get("children", []) if child not in ids]
+            
+            # Folders lose all their relationships, other items their folder membership
+            folders = [
+                node_id for node_id in removed
+                if node_id in targets or hierarchy[node_id].get("children")
+            ]
+            memberships = [
+                (hierarchy[node_id].get("parent_id"), node_id)
+                for node_id in removed
+                if hierarchy[node_id].get("parent_id")
+            ]
+            self.relationship_manager.delete_relationships(memberships)
+            self.relationship_manager.delete_all_relationships_for(folders)
+            
+            for node_id in removed:
+                self._drop_node(hierarchy, node_id)
+            
+            # Save hierarchy index
+            self._save_hierarchy_index(hierarchy)
+            
+            return list(removed), errors
     
     def get_breadcrumb(self, content_id: str) -> List[Dict[str, str]]:
         """
@@ -476,39 +731,256 @@ class HierarchyManager:
         Returns:
             List of dictionaries with id, title, path for each level in the hierarchy
         """
-        hierarchy = self._load_hierarchy_index()
-        
-        # Validate content exists in hierarchy
-        if content_id not in hierarchy:
-            return []
-        
-        breadcrumb = []
-        current_id = content_id
+        with self._lock:
+            hierarchy = self._load_hierarchy_index()
+            
+            # Validate content exists in hierarchy
+            if content_id not in hierarchy:
+                return []
+            
+            return [dict(crumb) for crumb in self._breadcrumb(hierarchy, content_id)]
+    
+    def _breadcrumb(self, hierarchy: Dict[str, Any], content_id: str) -> List[Dict[str, str]]:
+        """
+        Get the memoised breadcrumb of an item in the resident index.
         
-        # Prevent infinite loops
+        Walks up only to the nearest ancestor with a memoised breadcrumb and
+        memoises every node on the way. The returned list is shared and must
+        not be modified.
+        """
+        chain = []
+        prefix: List[Dict[str, str]] = []
         visited = set()
+        current_id = content_id
         
-        while current_id and current_id not in visited:
+        # Stop at the root, at a memoised ancestor or at a cycle
+        while current_id and current_id not in visited and current_id in hierarchy:
+            cached = self._breadcrumbs.get(current_id)
+            if cached is not None:
+                prefix = cached
+                break
             visited.add(current_id)
+            chain.append(current_id)
+            current_id = hierarchy[current_id].get("parent_id")
+        
+        breadcrumb = prefix
+        for node_id in reversed(chain):
+            node = hierarchy[node_id]
+            breadcrumb = breadcrumb + [{
+                "id": node_id,
+                "title": node.get("title", "<unknown>"),
+                "path": node.get("path", "")
+            }]
+            self._breadcrumbs[node_id] = breadcrumb
+        return breadcrumb
+    
+    def get_placements(self, content_ids: List[str], breadcrumbs: bool = True) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the path, parent and breadcrumb of several items at once.
+
+        Args:
+            content_ids: IDs of the content items
+            breadcrumbs: Whether to compute breadcrumbs
+
+        Returns:
+            Dictionary mapping each ID found in the hierarchy to a dictionary
+            with path, parent_id and, if requested, breadcrumb
+        """
+        with self._lock:
+            hierarchy = self._load_hierarchy_index()
+            placements = {}
+            for content_id in content_ids:
+                entry = hierarchy.get(content_id)
+                if not isinstance(entry, dict):
+                    continue
+                placement = {"path": entry.get("path", ""), "parent_id": entry.get("parent_id")}
+                if breadcrumbs:
+                    placement["breadcrumb"] = [dict(crumb) for crumb in self._breadcrumb(hierarchy, content_id)]
+                placements[content_id] = placement
+            return placements
+
+    def get_tree_page(
+        self,
+        folder_id: Optional[str] = None,
+        depth: int = 1,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        max_nodes: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Get part of the folder tree, for clients that expand it lazily.
+        
+        The folder's children are listed up to ``depth`` levels down,
+        breadth first, at most ``limit`` per folder and ``max_nodes`` in
+        total, in title order. A folder whose listing was cut short has a
+        ``next_cursor``; an item whose children were not listed has an
+        ``expand`` token. Passing either token as ``cursor`` returns the
+        next part, so the whole tree is never built at once.
+        
+        Args:
+            folder_id: ID of the folder (None for the root); ignored when a
+                cursor is given
+            depth: Number of levels to list
+            limit: Maximum number of children listed per folder
+            cursor: A next_cursor or expand token from an earlier page
+            max_nodes: Maximum number of items listed in total
             
-            if current_id not in hierarchy:
-                break
+        Returns:
+            The folder's summary with id, title, path, type and
+            child_count, plus children (summaries, nested the same way)
+            and next_cursor
+            
+        Raises:
+            NotFoundError: If the folder doesn't exist
+            ValidationError: If the cursor is invalid or a bound is below 1
+        """
+        if depth < 1 or limit < 1 or max_nodes < 1:
+            raise ValidationError("depth, limit and max_nodes must be at least 1")
+        
+        after = None
+        if cursor is not None:
+            folder_id, after = self._decode_cursor(cursor)
+        
+        with self._lock:
+            hierarchy = self._load_hierarchy_index()
+            if folder_id is None:
+                folder_id = hierarchy.get("root")
+            if not isinstance(hierarchy.get(folder_id), dict):
+                raise NotFoundError(f"Folder not found: {folder_id}")
+            
+            page = self._tree_item(hierarchy, folder_id)
+            budget = max_nodes
+            queue = deque([(page, after, 1)])
+            while queue:
+                item, after, level = queue.popleft()
+                entries = self._children_in_order(hierarchy, item["id"])
+                start = bisect.bisect_right(entries, after) if after else 0
+                if budget <= 0 and start < len(entries):
+                    item["expand"] = self._encode_cursor(item["id"], after)
+                    continue
                 
-            current_item = hierarchy[current_id]
-            breadcrumb.insert(0, {
-                "id": current_id,
-                "title": current_item.get("title", "<unknown>"),
-                "path": current_item.get("path", "")
-            })
+                listed = entries[start:start + min(limit, budget)]
+                budget -= len(listed)
+                item["children"] = []
+                for _, child_id in listed:
+                    child = self._tree_item(hierarchy, child_id)
+                    item["children"].append(child)
+                    if child["child_count"]:
+                        if level < depth:
+                            queue.append((child, None, level + 1))
+                        else:
+                            child["expand"] = self._encode_cursor(child_id, None)
+                
+                more = start + len(listed) < len(entries)
+                item["next_cursor"] = self._encode_cursor(item["id"], listed[-1]) if more else None
+            
+            return page
+    
+    def iter_tree(self, folder_id: Optional[str] = None, max_depth: int = -1) -> Iterator[Dict[str, Any]]:
+        """
+        Walk the folder tree one item at a time, in title order.
+        
+        Items are produced depth first, parents before children, so they
+        can be streamed as they are read; each carries its parent_id and
+        depth instead of being nested.
+        
+        Args:
+            folder_id: ID of the folder to start from (None for the root)
+            max_depth: Maximum depth below the folder (-1 for unlimited)
             
-            # Move up to parent
-            current_id = current_item.get("parent_id")
+        Returns:
+            Iterator of item summaries with id, parent_id, title, path,
+            type, depth and child_count
             
-            # Stop if we reach root or a cycle
-            if current_id is None or current_id in visited:
-                break
+        Raises:
+            NotFoundError: If the folder doesn't exist
+        """
+        with self._lock:
+            hierarchy = self._load_hierarchy_index()
+            if folder_id is None:
+                folder_id = hierarchy.get("root")
+            if not isinstance(hierarchy.get(folder_id), dict):
+                raise NotFoundError(f"Folder not found: {folder_id}")
+        return self._walk_tree(folder_id, max_depth)
+    
+    def _walk_tree(self, folder_id: str, max_depth: int) -> Iterator[Dict[str, Any]]:
+        """Produce the items of iter_tree, holding the lock for one item at a time."""
+        stack = [(folder_id, 0)]
+        while stack:
+            node_id, depth = stack.pop()
+            with self._lock:
+                hierarchy = self._load_hierarchy_index()
+                item = self._tree_item(hierarchy, node_id)
+                node = hierarchy.get(node_id)
+                item["parent_id"] = node.get("parent_id") if isinstance(node, dict) else None
+                item["depth"] = depth
+                entries = []
+                if item["child_count"] and (max_depth < 0 or depth < max_depth):
+                    entries = self._children_in_order(hierarchy, node_id)
+            yield item
+            stack.extend((child_id, depth + 1) for _, child_id in reversed(entries))
+    
+    def _children_in_order(self, hierarchy: Dict[str, Any], folder_id: str) -> List[Tuple[str, str]]:
+        """
+        Get a folder's children as (sort key, ID) pairs sorted by title.
         
-        return breadcrumb
+        Sorted lists are memoised until the hierarchy changes, so paging
+        through a large folder sorts it once. The returned list is shared
+        and must not be modified.
+        """
+        if self._sorted_generation != self._generation:
+            self._sorted_children = {}
+            self._sorted_generation = self._generation
+        
+        entries = self._sorted_children.get(folder_id)
+        if entries is None:
+            entries = []
+            for child_id in dict.fromkeys(hierarchy[folder_id].get("children", [])):
+                child = hierarchy.get(child_id)
+                title = child.get("title", "") if isinstance(child, dict) else ""
+                entries.append((title.casefold(), child_id))
+            entries.sort()
+            self._sorted_children[folder_id] = entries
+        return entries
+    
+    @staticmethod
+    def _tree_item(hierarchy: Dict[str, Any], node_id: str) -> Dict[str, Any]:
+        """Summarise a node for tree listings."""
+        node = hierarchy.get(node_id)
+        if not isinstance(node, dict):
+            # Child is likely a content item that is not indexed in the hierarchy
+            return {"id": node_id, "title": "<unknown>", "path": "", "type": "content", "child_count": 0}
+        children = node.get("children", [])
+        return {
+            "id": node_id,
+            "title": node.get("title", "<unknown>"),
+            "path": node.get("path", ""),
+            # Nodes written before types were recorded are folders if they have children
+            "type": node.get("type") or ("folder" if children else "content"),
+            "child_count": len(children)
+        }
+    
+    @staticmethod
+    def _encode_cursor(folder_id: str, after: Optional[Tuple[str, str]]) -> str:
+        """Encode a position in a folder's sorted children as an opaque token."""
+        raw = json.dumps([folder_id, list(after) if after else None], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+    
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, Optional[Tuple[str, str]]]:
+        """Decode a token made by _encode_cursor."""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            folder_id, after = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            if not isinstance(folder_id, str):
+                raise ValueError("folder ID is not a string")
+            if after is None:
+                return folder_id, None
+            if len(after) != 2 or not all(isinstance(part, str) for part in after):
+                raise ValueError("position is not a (key, ID) pair")
+            return folder_id, (after[0], after[1])
+        except (ValueError, TypeError) as e:
+            raise ValidationError(f"Invalid cursor: {cursor}") from e
     
     def build_folder_tree(self, folder_id: Optional[str] = None, max_depth: int = -1) -> Dict[str, Any]:
         """
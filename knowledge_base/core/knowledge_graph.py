@@ -6,20 +6,26 @@ Implements knowledge graph functionality for visualizing and exploring content r
 import json
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Any, Tuple, Union
-from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Tuple, Union
 from collections import defaultdict
 
 from knowledge_base.content_types import RelationshipType
 from knowledge_base.utils.helpers import (
-    KnowledgeBaseError, NotFoundError, StorageError, ValidationError
+    KnowledgeBaseError, StorageError, ValidationError
 )
 from knowledge_base.core.relationship_manager import RelationshipManager
 from knowledge_base.core.hierarchy_manager import HierarchyManager
 from knowledge_base.core.content_manager import ContentManager
+from knowledge_base.core.graph_engine import GraphEngine, TYPE_VALUES
+from knowledge_base.core.graph_communities import CommunityIndex
+from knowledge_base.core.graph_metrics import GraphMetrics
+from knowledge_base.core.graph_summary import GraphSummarizer, SUMMARY_VERSION
 
 logger = logging.getLogger(__name__)
 
+# Content fields read for graph nodes
+NODE_FIELDS = ["title", "_content_type", "path", "category", "tags"]
+
 
 class KnowledgeGraph:
     """
@@ -62,6 +68,15 @@ class KnowledgeGraph:
             relationship_manager=self.relationship_manager,
             hierarchy_manager=self.hierarchy_manager
         )
+        
+        # Resident adjacency, kept in step with the relationship manager.
+        # Derived graph data lives with the other indexes, out of the search
+        # index's way.
+        graph_dir = self.base_path / "data" / "index" / "graph"
+        self.engine = GraphEngine(self.relationship_manager)
+        self.communities = CommunityIndex(self.engine, graph_dir / "communities.json")
+        self.metrics = GraphMetrics(self.engine, graph_dir / "metrics.npz")
+        self.summarizer = GraphSummarizer(self.engine, self.communities, self.metrics)
     
     def build_graph(
         self, 
@@ -72,56 +87,65 @@ class KnowledgeGraph:
         """
         Build a graph representation of the knowledge base content and relationships.
         
+        Without root_ids every related content item is a root, so the whole
+        related graph is returned and max_depth only matters when it is 0,
+        which leaves out the edges.
+        
         Args:
             root_ids: Optional list of content IDs to use as root nodes (None for all)
-            max_depth: Maximum depth to traverse from root nodes
+            max_depth: Maximum depth to traverse from the given root nodes
             relationship_types: Optional filter by relationship types
             
         Returns:
             Dictionary representing the graph
         """
-        # Convert string relationship types to enum
-        if relationship_types:
-            enum_types = []
-            for rel_type in relationship_types:
-                if isinstance(rel_type, str):
-                    try:
-                        enum_types.append(RelationshipType(rel_type))
-                    except ValueError:
-                        logger.warning(f"Invalid relationship type: {rel_type}")
-                else:
-                    enum_types.append(rel_type)
-            relationship_types = enum_types
-        
-        # Build nodes and edges
         nodes = []
         edges = []
-        visited = set()
         
-        # If no root IDs specified, get all relationships
+        # If no root IDs specified, start from every related content item
         if not root_ids:
-            # Load all relationships
-            index = self.relationship_manager._load_index()
+            root_ids = self.engine.node_ids()
+        
+        # Breadth first, one level at a time, so content is read in batches
+        visited = set(root_ids)
+        seen_edges = set()
+        frontier = list(dict.fromkeys(root_ids))
+        depth = 0
+        while frontier:
+            # Content that can't be found is left out and not expanded
+            contents = self.content_manager.get_contents(frontier, fields=NODE_FIELDS)
+            found = [content_id for content_id in frontier if content_id in contents]
+            nodes.extend(self._graph_node(content_id, contents[content_id]) for content_id in found)
             
-            # Extract unique content IDs
-            content_ids = set()
-            for rel_id, rel_data in index.items():
-                content_ids.add(rel_data.get("source_id"))
-                content_ids.add(rel_data.get("target_id"))
+            if depth >= max_depth:
+                break
             
-            root_ids = list(content_ids)
-        
-        # Process each root node and its relationships
-        for root_id in root_ids:
-            self._build_graph_node(
-                root_id, 
-                nodes, 
-                edges, 
-                visited, 
-                0, 
-                max_depth, 
-                relationship_types
+            level_edges = [
+                edge for edge in self.engine.edges(found, relationship_types)
+                if edge[0] != edge[1] and edge[:2] not in seen_edges
+            ]
+            seen_edges.update(edge[:2] for edge in level_edges)
+            relationships = self.relationship_manager.get_relationships_for_pairs(
+                [edge[:2] for edge in level_edges]
             )
+            
+            frontier = []
+            for (source_id, target_id, rel_type), relationship in zip(level_edges, relationships):
+                edges.append({
+                    "source": source_id,
+                    "target": target_id,
+                    "label": rel_type,
+                    "data": {
+                        "description": relationship.description if relationship else "",
+                        "type": rel_type,
+                        "created": relationship.created if relationship else None
+                    }
+                })
+                for next_id in (source_id, target_id):
+                    if next_id not in visited:
+                        visited.add(next_id)
+                        frontier.append(next_id)
+            depth += 1
         
         # Combine nodes and edges into graph
         return {
@@ -129,209 +153,148 @@ class KnowledgeGraph:
             "edges": edges
         }
     
-    def _build_graph_node(
-        self,
-        content_id: str,
-        nodes: List[Dict[str, Any]],
-        edges: List[Dict[str, Any]],
-        visited: Set[str],
-        depth: int,
-        max_depth: int,
-        relationship_types: Optional[List[RelationshipType]] = None
-    ) -> None:
+    @staticmethod
+    def _graph_node(content_id: str, content: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Recursively build graph nodes and edges.
+        Build a graph node for a content item.
         
         Args:
-            content_id: ID of the current content
-            nodes: List to append nodes to
-            edges: List to append edges to
-            visited: Set of already visited content IDs
-            depth: Current depth in the graph
-            max_depth: Maximum depth to traverse
-            relationship_types: Optional filter by relationship types
-        """
-        # Skip if already visited or max depth reached
-        if content_id in visited or depth > max_depth:
-            return
-        
-        # Mark as visited
-        visited.add(content_id)
-        
-        try:
-            # Get content data
-            content = self.content_manager.get_content(content_id)
+            content_id: ID of the content
+            content: Content data with the NODE_FIELDS fields
             
-            # Create node
-            node = {
-                "id": content_id,
-                "label": content.get("title", "Untitled"),
-                "type": content.get("_content_type", "unknown"),
-                "data": {
-                    "path": content.get("path", ""),
-                    "category": content.get("category", ""),
-                    "tags": content.get("tags", [])
-                }
+        Returns:
+            Graph node dictionary
+        """
+        return {
+            "id": content_id,
+            "label": content.get("title", "Untitled"),
+            "type": content.get("_content_type", "unknown"),
+            "data": {
+                "path": content.get("path", ""),
+                "category": content.get("category", ""),
+                "tags": content.get("tags", [])
             }
-            
-            # Add node to list
-            nodes.append(node)
-            
-            # Skip relationship traversal if at max depth
-            if depth >= max_depth:
-                return
-            
-            # Get relationships
-            relationships = self.relationship_manager.get_relationships(content_id)
-            
-            # Filter by relationship types if specified
-            if relationship_types:
-                relationships = [
-                    r for r in relationships 
-                    if r.relationship_type in relationship_types
-                ]
-            
-            # Process each relationship
-            for relationship in relationships:
-                # Determine the target
-                target_id = relationship.target_id if relationship.source_id == content_id else relationship.source_id
-                
-                # Skip self-relationships
-                if target_id == content_id:
-                    continue
-                
-                # Create edge
-                edge = {
-                    "source": relationship.source_id,
-                    "target": relationship.target_id,
-                    "label": relationship.relationship_type.value,
-                    "data": {
-                        "description": relationship.description,
-                        "type": relationship.relationship_type.value,
-                        "created": relationship.created
-                    }
-                }
-                
-                # Add edge to list
-                edges.append(edge)
-                
-                # Recursively process target
-                self._build_graph_node(
-                    target_id,
-                    nodes,
-                    edges,
-                    visited,
-                    depth + 1,
-                    max_depth,
-                    relationship_types
-                )
-                
-        except NotFoundError:
-            # Skip content that can't be found
-            return
-        except Exception as e:
-            logger.error(f"Error building graph node for {content_id}: {e}")
-            return
+        }
     
     def find_path(
         self,
         source_id: str,
         target_id: str,
-        max_depth: int = 5
+        max_depth: int = 5,
+        weighted: bool = False,
+        relationship_types: Optional[List[Union[RelationshipType, str]]] = None,
+        max_cost: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """
         Find a path between two content items.
         
+        By default this is the path with the fewest hops. A weighted search
+        instead finds the cheapest path, where close relationships such as
+        continuations cost less than general ones and a "weight" in a
+        relationship's metadata sets its cost.
+        
         Args:
             source_id: ID of the source content
             target_id: ID of the target content
-            max_depth: Maximum path length to consider
+            max_depth: Maximum path length to consider (unweighted search)
+            weighted: Whether to find the cheapest path instead of the shortest
+            relationship_types: Optional filter by relationship types
+            max_cost: Maximum path cost to consider (weighted search)
             
         Returns:
             List of nodes and edges in the path, or empty list if no path found
         """
-        # Breadth-first search to find shortest path
-        queue = [(source_id, [])]
-        visited = {source_id}
+        if weighted:
+            found = self.engine.weighted_path(
+                source_id, target_id, relationship_types,
+                max_cost=max_cost if max_cost is not None else float("inf")
+            )
+            path = found[0] if found else None
+        else:
+            path = self.engine.shortest_path(source_id, target_id, max_depth, relationship_types)
+        if path is None:
+            return []
+        return self._build_path_result(path, relationship_types)
+    
+    def find_paths(
+        self,
+        source_id: str,
+        target_id: str,
+        k: int = 3,
+        weighted: bool = True,
+        relationship_types: Optional[List[Union[RelationshipType, str]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find several alternative paths between two content items.
         
-        while queue:
-            node_id, path = queue.pop(0)
-            
-            # Check if we reached target
-            if node_id == target_id:
-                return self._build_path_result(path + [node_id])
-            
-            # Check if we reached max depth
-            if len(path) >= max_depth:
-                continue
-            
-            # Get relationships
-            relationships = self.relationship_manager.get_relationships(node_id)
+        Args:
+            source_id: ID of the source content
+            target_id: ID of the target content
+            k: Maximum number of paths to return
+            weighted: Whether to rank paths by cost (see find_path) or hops
+            relationship_types: Optional filter by relationship types
             
-            # Process each relationship
-            for relationship in relationships:
-                # Determine the next node
-                next_id = relationship.target_id if relationship.source_id == node_id else relationship.source_id
-                
-                # Skip if already visited
-                if next_id in visited:
-                    continue
-                
-                # Mark as visited
-                visited.add(next_id)
-                
-                # Add to queue
-                queue.append((next_id, path + [node_id]))
-        
-        # No path found
-        return []
+        Returns:
+            List of paths, best first, each with its cost, length in hops
+            and the nodes and edges along it
+        """
+        paths = self.engine.k_shortest_paths(
+            source_id, target_id, k, relationship_types, weighted=weighted
+        )
+        return [
+            {
+                "cost": cost,
+                "length": len(path) - 1,
+                "path": self._build_path_result(path, relationship_types)
+            }
+            for path, cost in paths
+        ]
     
-    def _build_path_result(self, path: List[str]) -> List[Dict[str, Any]]:
+    def _build_path_result(
+        self,
+        path: List[str],
+        relationship_types: Optional[List[Union[RelationshipType, str]]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Build path result from list of content IDs.
         
         Args:
             path: List of content IDs in the path
+            relationship_types: Relationship types the path was limited to
             
         Returns:
             List of nodes and edges in the path
         """
         result = []
+        contents = self.content_manager.get_contents(path, fields=["title", "_content_type"])
         
         for i, content_id in enumerate(path):
-            try:
-                # Add node
-                content = self.content_manager.get_content(content_id)
+            # Skip content that can't be found
+            content = contents.get(content_id)
+            if content is None:
+                continue
+            
+            # Add node
+            result.append({
+                "type": "node",
+                "id": content_id,
+                "label": content.get("title", "Untitled"),
+                "content_type": content.get("_content_type", "unknown")
+            })
+            
+            # Add edge if not last node
+            if i < len(path) - 1:
+                edge = self.engine.edge_between(content_id, path[i + 1], relationship_types)
+                if edge is None:
+                    continue
+                relationship = self.relationship_manager.get_relationships_for_pairs([edge[:2]])[0]
                 result.append({
-                    "type": "node",
-                    "id": content_id,
-                    "label": content.get("title", "Untitled"),
-                    "content_type": content.get("_content_type", "unknown")
+                    "type": "edge",
+                    "source": edge[0],
+                    "target": edge[1],
+                    "label": edge[2],
+                    "description": relationship.description if relationship else ""
                 })
-                
-                # Add edge if not last node
-                if i < len(path) - 1:
-                    next_id = path[i + 1]
-                    
-                    # Find relationship
-                    relationships = self.relationship_manager.get_relationships(content_id)
-                    for relationship in relationships:
-                        if (relationship.source_id == content_id and relationship.target_id == next_id) or \
-                           (relationship.source_id == next_id and relationship.target_id == content_id):
-                            result.append({
-                                "type": "edge",
-                                "source": relationship.source_id,
-                                "target": relationship.target_id,
-                                "label": relationship.relationship_type.value,
-                                "description": relationship.description
-                            })
-                            break
-            except NotFoundError:
-                # Skip content that can't be found
-                continue
-            except Exception as e:
-                logger.error(f"Error building path result for {content_id}: {e}")
-                continue
         
         return result
     
@@ -342,7 +305,11 @@ class KnowledgeGraph:
         min_cluster_size: int = 3
     ) -> List[Dict[str, Any]]:
         """
-        Find clusters of related content.
+        Find clusters of related content around a content item.
+        
+        Items within max_depth of the content are grouped by the
+        communities found across the whole graph, so a neighbourhood that
+        spans several topics comes back as several clusters.
         
         Args:
             content_id: ID of the starting content
@@ -350,56 +317,71 @@ class KnowledgeGraph:
             min_cluster_size: Minimum size for a cluster
             
         Returns:
-            List of clusters (groups of related content)
+            List of clusters (groups of related content), the content's own
+            community first and then by size
         """
-        # Build graph starting from content
-        graph = self.build_graph([content_id], max_depth=max_depth)
+        nearby = self.engine.bfs([content_id], max_depth)
+        if not nearby:
+            return []
         
-        # Extract nodes and edges
-        nodes = {node["id"]: node for node in graph["nodes"]}
+        groups = defaultdict(list)
+        for node_id, community in self.communities.communities_of(nearby).items():
+            groups[community].append(node_id)
         
-        # Build adjacency list
-        adjacency = defaultdict(set)
-        for edge in graph["edges"]:
-            adjacency[edge["source"]].add(edge["target"])
-            adjacency[edge["target"]].add(edge["source"])
+        wanted = [node_id for members in groups.values() if len(members) >= min_cluster_size for node_id in members]
+        contents = self.content_manager.get_contents(wanted, fields=NODE_FIELDS)
         
-        # Find connected components (clusters)
+        # Content that can't be found is left out
         clusters = []
-        visited = set()
-        
-        for node_id in nodes:
-            if node_id in visited:
-                continue
-            
-            # BFS to find connected component
-            cluster = []
-            queue = [node_id]
-            component_visited = {node_id}
-            
-            while queue:
-                current = queue.pop(0)
-                cluster.append(nodes[current])
-                visited.add(current)
-                
-                for neighbor in adjacency[current]:
-                    if neighbor not in component_visited:
-                        component_visited.add(neighbor)
-                        queue.append(neighbor)
-            
-            # Add cluster if it meets minimum size
+        own_community = self.communities.community_of(content_id)
+        for community, members in groups.items():
+            cluster = [self._graph_node(node_id, contents[node_id]) for node_id in members if node_id in contents]
             if len(cluster) >= min_cluster_size:
                 clusters.append({
+                    "community_id": community,
                     "size": len(cluster),
                     "nodes": cluster
                 })
         
+        clusters.sort(key=lambda cluster: (cluster["community_id"] != own_community, -cluster["size"]))
         return clusters
     
+    def get_content_community(self, content_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the community and connected component of a content item.
+        
+        Args:
+            content_id: ID of the content
+            
+        Returns:
+            Dictionary with community_id, community_size and component_id,
+            or None if the content has no relationships
+        """
+        community = self.communities.community_of(content_id)
+        if community is None:
+            return None
+        return {
+            "community_id": community,
+            "community_size": len(self.communities.members(community)),
+            "component_id": self.communities.component_of(content_id)
+        }
+    
+    def refresh_communities(self, background: bool = True) -> None:
+        """
+        Recompute communities over the whole graph.
+        
+        Args:
+            background: Run on a background thread
+        """
+        self.communities.recompute(background=background)
+    
     def get_content_graph_metrics(self, content_id: str) -> Dict[str, Any]:
         """
         Get graph metrics for a content item.
         
+        Degree and relationship counts are read from the resident graph;
+        centrality metrics come from the precomputed metrics table.
+        
         Args:
             content_id: ID of the content
             
@@ -407,32 +389,23 @@ class KnowledgeGraph:
             Dictionary of graph metrics
         """
         try:
-            # Get relationships
-            relationships = self.relationship_manager.get_relationships(content_id)
-            
-            # Count relationships by type
-            relationship_counts = defaultdict(int)
-            for relationship in relationships:
-                relationship_counts[relationship.relationship_type.value] += 1
-            
-            # Get related content IDs
-            related_ids = self.relationship_manager.get_related_content_ids(content_id)
-            
-            # Get path to root
-            path_to_root = self.hierarchy_manager.get_breadcrumb(content_id)
-            
-            # Calculate metrics
+            centrality = self.metrics.get(content_id) or {}
             metrics = {
-                "degree": len(related_ids),
-                "relationship_counts": dict(relationship_counts),
-                "hierarchy_depth": len(path_to_root),
-                "is_folder": False
+                "degree": len(self.engine.neighbors(content_id)),
+                "relationship_counts": self.engine.type_counts(content_id),
+                "hierarchy_depth": len(self.hierarchy_manager.get_breadcrumb(content_id)),
+                "is_folder": False,
+                "in_degree": centrality.get("in_degree", 0),
+                "out_degree": centrality.get("out_degree", 0),
+                "pagerank": centrality.get("pagerank", 0.0),
+                "betweenness": centrality.get("betweenness", 0.0),
+                "ego_size": centrality.get("ego_size", 0)
             }
             
-            # Check if it's a folder
+            # Check if it's a folder (index lookup, no content file read)
             try:
-                content = self.content_manager.get_content(content_id)
-                if content.get("_content_type") == "folder":
+                location = self.content_manager.content_index.lookup(content_id)
+                if location and location[0] == "folder":
                     metrics["is_folder"] = True
                     metrics["child_count"] = len(self.hierarchy_manager.get_children(content_id))
             except Exception:
@@ -449,6 +422,45 @@ class KnowledgeGraph:
                 "is_folder": False
             }
     
+    def get_important_content(
+        self,
+        metric: str = "pagerank",
+        limit: int = 10,
+        content_ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the content items that rank highest by a graph metric.
+        
+        Args:
+            metric: Metric to rank by (pagerank, betweenness, ego_size,
+                degree, in_degree or out_degree)
+            limit: Maximum number of items to return
+            content_ids: Optional IDs to rank among instead of all items
+            
+        Returns:
+            Graph nodes with a "score" field, highest first; content that
+            can't be found is left out
+            
+        Raises:
+            ValidationError: If the metric is unknown
+        """
+        ranked = self.metrics.top(metric, limit, content_ids)
+        contents = self.content_manager.get_contents([node_id for node_id, _ in ranked], fields=NODE_FIELDS)
+        return [
+            {**self._graph_node(node_id, contents[node_id]), "score": score}
+            for node_id, score in ranked
+            if node_id in contents
+        ]
+    
+    def refresh_metrics(self, background: bool = True) -> None:
+        """
+        Recompute graph metrics over the whole graph.
+        
+        Args:
+            background: Run on a background thread
+        """
+        self.metrics.recompute(background=background)
+    
     def generate_visualization_data(
         self,
         root_ids: Optional[List[str]] = None,
@@ -458,9 +470,13 @@ class KnowledgeGraph:
         """
         Generate visualization data for the knowledge graph.
         
+        Every node and edge within max_depth of root_ids is included. Without
+        root_ids that is the whole related graph (see build_graph); for
+        whole-graph views use generate_visualization_summary instead.
+        
         Args:
             root_ids: Optional list of content IDs to use as root nodes
-            max_depth: Maximum depth to traverse
+            max_depth: Maximum depth to traverse from the given root nodes
             include_hierarchy: Include hierarchical relationships
             
         Returns:
@@ -504,4 +520,74 @@ class KnowledgeGraph:
             }
         }
         
-        return visualization 
\ No newline at end of file
+        return visualization
+    
+    def generate_visualization_summary(
+        self,
+        expanded: Optional[List[int]] = None,
+        focus_ids: Optional[List[str]] = None,
+        max_nodes: int = 300,
+        max_members: int = 100,
+        max_edges: int = 1500,
+        include_hierarchy: bool = True,
+        expanded_groups: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Generate a level-of-detail view of the whole knowledge graph.
+        
+        Communities are collapsed into cluster nodes unless expanded, or
+        into groups of linked communities when there are too many to show,
+        and edges between the same two nodes are bundled with a count. The
+        result is columnar: every node field is a list with one entry per
+        node, and edges refer to nodes by their position in those lists.
+        
+        Args:
+            expanded: Community IDs to show member by member
+            focus_ids: Content IDs to show individually
+            max_nodes: Maximum number of nodes, not counting the nodes that
+                stand for the unlisted rest of an expanded community
+            max_members: Maximum members shown per expanded community
+            max_edges: Maximum number of edge bundles
+            include_hierarchy: Include hierarchical relationships
+            expanded_groups: Community group numbers to show community by
+                community
+            
+        Returns:
+            Dictionary with "version", "generation", "nodes" columns (kind,
+            content_id, community, size, score, label, type), "edges"
+            columns (source, target, count, type), the "node_kinds",
+            "content_types" and "relationship_types" the integer columns
+            index, and "statistics"
+        """
+        rel_types = None if include_hierarchy else [
+            rt for rt in RelationshipType if rt != RelationshipType.PARENT_CHILD
+        ]
+        summary = self.summarizer.summarize(
+            expanded, focus_ids, rel_types, max_nodes, max_members, max_edges, expanded_groups
+        )
+        
+        nodes = summary["nodes"]
+        contents = self.content_manager.get_contents(
+            [content_id for content_id in nodes["content_id"] if content_id is not None],
+            fields=["title", "_content_type"]
+        )
+        content_types: Dict[str, int] = {}
+        labels = []
+        types = []
+        for content_id, size in zip(nodes["content_id"], nodes["size"]):
+            content = contents.get(content_id, {}) if content_id is not None else {}
+            labels.append(content.get("title", "Untitled") if content_id is not None else f"{size} more")
+            types.append(content_types.setdefault(content.get("_content_type", "unknown"), len(content_types)))
+        nodes["label"] = labels
+        nodes["type"] = types
+        
+        return {
+            "version": SUMMARY_VERSION,
+            "generation": summary["generation"],
+            "nodes": nodes,
+            "edges": summary["edges"],
+            "node_kinds": ["item", "cluster", "rest", "group"],
+            "content_types": list(content_types),
+            "relationship_types": TYPE_VALUES,
+            "statistics": summary["statistics"]
+        }
@@ -0,0 +1,288 @@
+"""
+Postings
+Compact, memory-mapped postings lists for the search index.
+"""
+
+import os
+import bisect
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple, Iterable
+
+import numpy as np
+
+from knowledge_base.utils.helpers import StorageError
+
+logger = logging.getLogger(__name__)
+
+# Blocks stored for every term, in file order
+BODY, POSITIONS, TITLE, TAGS = range(4)
+BLOCKS_PER_TERM = 4
+
+# Probe the longer list with binary searches once it is this many times longer
+GALLOP_RATIO = 8
+
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+
+def encode_varints(values: np.ndarray) -> Tuple[bytes, np.ndarray]:
+    """
+    Encode non-negative integers as LEB128 varints.
+
+    Args:
+        values: Integers to encode
+
+    Returns:
+        Tuple of (encoded bytes, number of bytes used by each value)
+    """
+    values = np.asarray(values, dtype=np.uint64)
+    lengths = np.ones(values.shape, dtype=np.int64)
+    remaining = values >> np.uint64(7)
+    while remaining.any():
+        lengths += remaining > 0
+        remaining >>= np.uint64(7)
+
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    out = np.zeros(int(lengths.sum()), dtype=np.uint8)
+    for k in range(int(lengths.max(initial=0))):
+        selected = lengths > k
+        chunk = (values[selected] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (lengths[selected] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[selected] + k] = (chunk | more).astype(np.uint8)
+    return out.tobytes(), lengths
+
+
+def decode_varints(buffer: np.ndarray) -> np.ndarray:
+    """
+    Decode a run of LEB128 varints.
+
+    Args:
+        buffer: uint8 array holding whole varints
+
+    Returns:
+        Decoded integers
+    """
+    if buffer.size == 0:
+        return _EMPTY
+    buffer = np.asarray(buffer, dtype=np.uint8)
+    ends = buffer < 0x80
+    # Each byte belongs to the value whose terminating byte comes next
+    value_index = np.concatenate(([0], np.cumsum(ends)[:-1]))
+    value_starts = np.concatenate(([0], np.flatnonzero(ends)[:-1] + 1))
+    shift = (np.arange(buffer.size) - value_starts[value_index]) * 7
+    payload = (buffer & 0x7F).astype(np.int64) << shift
+    return np.bincount(value_index, weights=payload, minlength=int(ends.sum())).astype(np.int64)
+
+
+def undelta_runs(deltas: np.ndarray, counts: np.ndarray) -> np.ndarray:
+    """
+    Undo delta encoding separately within consecutive runs.
+
+    Args:
+        deltas: Values whose first element in each run is absolute
+        counts: Length of each run
+
+    Returns:
+        Decoded values
+    """
+    if deltas.size == 0:
+        return _EMPTY
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+    running = np.cumsum(deltas)
+    return running - np.repeat(running[starts] - deltas[starts], counts)
+
+
+def intersect_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Intersect two sorted arrays of unique doc IDs.
+
+    When one list is much shorter, its IDs are located in the longer one by
+    binary search (a galloping merge), so the cost grows with the shorter
+    list rather than with both.
+
+    Args:
+        a: Sorted doc IDs
+        b: Sorted doc IDs
+
+    Returns:
+        Sorted doc IDs present in both
+    """
+    if a.size > b.size:
+        a, b = b, a
+    if a.size == 0:
+        return _EMPTY
+    if a.size * GALLOP_RATIO < b.size:
+        found = np.searchsorted(b, a)
+        found[found == b.size] = 0
+        return a[b[found] == a]
+    return np.intersect1d(a, b, assume_unique=True)
+
+
+class PostingsSegment:
+    """
+    Immutable postings for every term of the base segment.
+
+    Each term has four blocks in one binary file, all varint encoded:
+
+    - body: doc ID deltas, then the number of positions in each doc
+    - positions: body positions of each doc, delta encoded per doc
+    - title and tags: doc ID deltas, then the term frequency in each doc
+
+    The lexicon (sorted terms, block offsets and document frequencies) is
+    kept in memory; the blocks are memory-mapped and decoded on demand, so
+    the resident size is dominated by the lexicon.
+    """
+
+    def __init__(self, path: Path, terms: List[str], offsets: np.ndarray, df: np.ndarray):
+        """
+        Open a postings file.
+
+        Args:
+            path: Binary postings file
+            terms: Sorted terms
+            offsets: Byte offset of each block, plus the end of the last one
+            df: Number of documents containing each term in any field
+        """
+        self.path = Path(path)
+        self.terms = terms
+        self.offsets = offsets
+        self.df_counts = df
+        try:
+            self._blob = np.memmap(self.path, dtype=np.uint8, mode='r')
+        except Exception as e:
+            logger.error(f"Error mapping search postings: {e}")
+            raise StorageError(f"Failed to map search postings: {e}")
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def lookup(self, term: str) -> Optional[int]:
+        """Get the index of a term in the lexicon."""
+        i = bisect.bisect_left(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            return i
+        return None
+
+    def df(self, term: str) -> int:
+        """Get the number of documents containing a term."""
+        i = self.lookup(term)
+        return 0 if i is None else int(self.df_counts[i])
+
+    def terms_with_prefix(self, prefix: str) -> List[str]:
+        """Get the terms starting with a prefix."""
+        start = bisect.bisect_left(self.terms, prefix)
+        end = bisect.bisect_left(self.terms, prefix + "\U0010ffff", start)
+        return self.terms[start:end]
+
+    def field(self, term: str, block: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the postings of a term in the body, title or tags.
+
+        Args:
+            term: Term to look up
+            block: BODY, TITLE or TAGS
+
+        Returns:
+            Tuple of (sorted doc IDs, term frequency in each doc)
+        """
+        i = self.lookup(term)
+        if i is None:
+            return _EMPTY, _EMPTY
+        values = self._block(i, block)
+        half = values.size // 2
+        return np.cumsum(values[:half]), values[half:]
+
+    def docs(self, term: str) -> np.ndarray:
+        """Get the sorted IDs of documents whose body contains a term."""
+        return self.field(term, BODY)[0]
+
+    def positions(self, term: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the body positions of a term.
+
+        Args:
+            term: Term to look up
+
+        Returns:
+            Tuple of (sorted doc IDs, number of positions in each doc, all
+            positions concatenated in doc order)
+        """
+        i = self.lookup(term)
+        if i is None:
+            return _EMPTY, _EMPTY, _EMPTY
+        values = self._block(i, BODY)
+        half = values.size // 2
+        counts = values[half:]
+        deltas = self._block(i, POSITIONS)
+        return np.cumsum(values[:half]), counts, undelta_runs(deltas, counts)
+
+    def _block(self, term_index: int, block: int) -> np.ndarray:
+        """Decode one block of a term."""
+        k = term_index * BLOCKS_PER_TERM + block
+        return decode_varints(self._blob[self.offsets[k]:self.offsets[k + 1]])
+
+    @staticmethod
+    def write(
+        path: Path,
+        postings: Iterable[Tuple[str, Dict[int, Any]]]
+    ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        """
+        Write a postings file.
+
+        Args:
+            path: Binary postings file to create
+            postings: (term, blocks) pairs in sorted term order, where blocks
+                maps BODY to (doc IDs, number of positions in each doc,
+                all positions concatenated) and TITLE and TAGS to (doc IDs, term
+                frequencies), with doc IDs sorted
+
+        Returns:
+            Tuple of (terms, block offsets, document frequencies) for the lexicon
+        """
+        terms: List[str] = []
+        df: List[int] = []
+        chunks: List[np.ndarray] = []
+        block_sizes: List[int] = []
+
+        for term, blocks in postings:
+            body_docs, counts, flat = blocks.get(BODY, (_EMPTY, _EMPTY, _EMPTY))
+            position_deltas = np.diff(flat, prepend=0)
+            if flat.size:
+                # Each doc's first position is stored as-is
+                starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+                position_deltas[starts] = flat[starts]
+
+            term_chunks = [
+                np.concatenate((np.diff(body_docs, prepend=0), counts)),
+                position_deltas
+            ]
+            field_docs = [body_docs]
+            for block in (TITLE, TAGS):
+                docs, tf = blocks.get(block, (_EMPTY, _EMPTY))
+                term_chunks.append(np.concatenate((np.diff(docs, prepend=0), tf)))
+                field_docs.append(docs)
+
+            terms.append(term)
+            df.append(len(np.unique(np.concatenate(field_docs))))
+            for chunk in term_chunks:
+                chunks.append(np.asarray(chunk, dtype=np.int64))
+                block_sizes.append(len(chunk))
+
+        values = np.concatenate(chunks) if chunks else _EMPTY
+        data, lengths = encode_varints(values)
+        # Byte offset of each block: the encoded size of the values before it
+        value_ends = np.cumsum(block_sizes, dtype=np.int64)
+        byte_ends = np.concatenate(([0], np.cumsum(lengths)))[value_ends] if block_sizes else _EMPTY
+        # A leading pad byte keeps the file mappable when it has no postings
+        offsets = np.concatenate(([0], byte_ends)).astype(np.int64) + 1
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(b"\0")
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Error writing search postings: {e}")
+            raise StorageError(f"Failed to write search postings: {e}")
+        return terms, offsets, np.asarray(df, dtype=np.int64)
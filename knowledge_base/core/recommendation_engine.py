@@ -17,6 +17,8 @@ from knowledge_base.utils.helpers import (
 from knowledge_base.core.content_manager import ContentManager
 from knowledge_base.core.semantic_search import SemanticSearch
 from knowledge_base.core.relationship_manager import RelationshipManager
+from knowledge_base.core.suggestion_index import SuggestionIndex
+from knowledge_base.core.graph_metrics import GraphMetrics
 from knowledge_base.content_types import RelationshipType
 
 logger = logging.getLogger(__name__)
@@ -38,7 +40,9 @@ class RecommendationEngine:
         base_path: str = ".",
         content_manager: Optional[ContentManager] = None,
         semantic_search: Optional[SemanticSearch] = None,
-        relationship_manager: Optional[RelationshipManager] = None
+        relationship_manager: Optional[RelationshipManager] = None,
+        suggestion_index: Optional[SuggestionIndex] = None,
+        graph_metrics: Optional[GraphMetrics] = None
     ):
         """
         Initialize the recommendation engine.
@@ -48,6 +52,10 @@ class RecommendationEngine:
             content_manager: Optional content manager instance
             semantic_search: Optional semantic search instance
             relationship_manager: Optional relationship manager instance
+            suggestion_index: Optional suggestion index whose popularity
+                weights follow the recorded interactions
+            graph_metrics: Optional graph metrics; equally scored items are
+                ranked by PageRank
         """
         self.base_path = Path(base_path)
         
@@ -65,6 +73,11 @@ class RecommendationEngine:
         
         # Initialize user interactions file if needed
         self._ensure_interactions_file()
+        
+        self.suggestion_index = suggestion_index
+        self._sync_suggestion_popularity()
+        
+        self.graph_metrics = graph_metrics
     
     def _ensure_interactions_file(self) -> None:
         """Ensure the user interactions file exists."""
@@ -78,6 +91,16 @@ class RecommendationEngine:
                 "interactions": []
             })
     
+    def _sync_suggestion_popularity(self) -> None:
+        """Seed the suggestion index with the interaction count of each content item."""
+        if self.suggestion_index is None:
+            return
+        try:
+            interactions = self._load_interactions()["interactions"]
+            self.suggestion_index.set_popularity(Counter(i["content_id"] for i in interactions))
+        except Exception as e:
+            logger.warning(f"Error loading suggestion popularity: {e}")
+    
     def _load_interactions(self) -> Dict[str, Any]:
         """Load user interactions."""
         try:
@@ -154,13 +177,20 @@ class RecommendationEngine:
             interactions_data["metadata"]["last_updated"] = datetime.now(timezone.utc).isoformat()
             
             # Limit the size of the interactions list (keep most recent 1000)
-            if len(interactions_data["interactions"]) > 1000:
+            dropped = interactions_data["interactions"][:-1000]
+            if dropped:
                 interactions_data["interactions"] = interactions_data["interactions"][-1000:]
                 interactions_data["metadata"]["count"] = len(interactions_data["interactions"])
             
             # Save interactions
             self._save_interactions(interactions_data)
             
+            # Keep suggestion popularity in step with the stored interactions
+            if self.suggestion_index is not None:
+                self.suggestion_index.record_interaction(content_id)
+                for old in dropped:
+                    self.suggestion_index.record_interaction(old["content_id"], -1)
+            
         except Exception as e:
             logger.error(f"Error recording interaction for {content_id}: {e}")
     
@@ -248,9 +278,10 @@ class RecommendationEngine:
                         results[item_id]["score"] = max(results[item_id]["score"], item["score"])
                         results[item_id]["reason"] += f", {item['reason']}"
             
-            # Convert results to list and sort by score
+            # Convert results to list and sort by score, then importance
             result_list = list(results.values())
-            result_list.sort(key=lambda x: x["score"], reverse=True)
+            importance = self._importance(results)
+            result_list.sort(key=lambda x: (x["score"], importance.get(x["content_id"], 0.0)), reverse=True)
             
             # Take top items
             result_list = result_list[:max_items]
@@ -279,6 +310,24 @@ class RecommendationEngine:
             logger.error(f"Error getting related items for {content_id}: {e}")
             raise KnowledgeBaseError(f"Failed to get related items: {e}")
     
+    def _importance(self, content_ids) -> Dict[str, float]:
+        """
+        Get the PageRank of content items from the precomputed graph metrics.
+        
+        Args:
+            content_ids: IDs of the content items
+            
+        Returns:
+            Dictionary mapping IDs to PageRank; empty without graph metrics
+        """
+        if self.graph_metrics is None:
+            return {}
+        try:
+            return self.graph_metrics.scores(content_ids, "pagerank")
+        except Exception as e:
+            logger.warning(f"Could not read graph metrics for ranking: {e}")
+            return {}
+    
     def _get_related_from_relationships(self, content_id: str) -> List[Dict[str, Any]]:
         """
         Get related items based on explicit relationships.
@@ -743,6 +792,7 @@ class RecommendationEngine:
             
             # Save interactions
             self._save_interactions(interactions_data)
+            self._sync_suggestion_popularity()
             
             return cleared_count
             
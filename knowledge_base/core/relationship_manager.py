@@ -5,6 +5,7 @@ Manages relationships between content items in the knowledge base.
 
 import json
 import logging
+import threading
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple, Any, Union
 from enum import Enum
@@ -12,11 +13,15 @@ from datetime import datetime, timezone
 
 from knowledge_base.content_types import Relationship, RelationshipType, BaseContent
 from knowledge_base.utils.helpers import (
-    KnowledgeBaseError, NotFoundError, StorageError, ValidationError
+    KnowledgeBaseError, NotFoundError, StorageError, ValidationError,
+    atomic_write_json
 )
 
 logger = logging.getLogger(__name__)
 
+# Changes kept for incremental consumers before they must rebuild instead
+MAX_LOGGED_CHANGES = 100000
+
 
 class RelationshipManager:
     """
@@ -42,6 +47,25 @@ class RelationshipManager:
         self.relationships_dir = self.base_path / storage_dir
         self.relationships_dir.mkdir(parents=True, exist_ok=True)
         self.relationships_index_path = self.relationships_dir / "relationships_index.json"
+        
+        # Resident copy of the index, invalidated when the file changes on disk
+        self._index: Optional[Dict[str, Dict[str, Any]]] = None
+        self._index_signature: Optional[Tuple[int, int]] = None
+        self._lock = threading.RLock()
+        
+        # Secondary adjacency indexes over the primary "source_target" keys.
+        # Inner dicts are used as insertion-ordered sets of relationship keys.
+        self._out_edges: Dict[str, Dict[str, None]] = {}
+        self._in_edges: Dict[str, Dict[str, None]] = {}
+        self._type_edges: Dict[str, Dict[str, Dict[str, None]]] = {}
+        
+        # Edge changes since the adjacency maps were last rebuilt, so derived
+        # structures can follow along instead of rebuilding. Entries are
+        # ("add" or "remove", key, (source, target, type, weight)).
+        self._generation = 0
+        self._changes: List[Tuple[str, str, Tuple[str, str, str, Any]]] = []
+        self._changes_start = 0
+        
         self._ensure_index_exists()
         
     def _ensure_index_exists(self) -> None:
@@ -50,33 +74,177 @@ class RelationshipManager:
             # Create empty index
             self._save_index({})
     
-    def _load_index(self) -> Dict[str, Dict[str, Any]]:
-        """Load the relationships index."""
+    def _index_file_signature(self) -> Optional[Tuple[int, int]]:
+        """Get a (mtime, size) signature of the index file, or None if missing."""
         try:
-            with open(self.relationships_index_path, 'r') as f:
-                return json.load(f)
+            stat = self.relationships_index_path.stat()
+            return stat.st_mtime_ns, stat.st_size
         except FileNotFoundError:
-            return {}
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid relationships index JSON: {e}")
-            # If corrupted, create a backup and start with empty index
-            if self.relationships_index_path.exists():
-                backup_path = self.relationships_index_path.with_suffix('.json.bak')
-                self.relationships_index_path.rename(backup_path)
-                logger.info(f"Corrupted index backed up to {backup_path}")
-            return {}
-        except Exception as e:
-            logger.error(f"Error loading relationships index: {e}")
-            raise StorageError(f"Failed to load relationships index: {e}")
+            return None
+    
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load the relationships index.
+        
+        The parsed index is kept resident and only re-read when the file's
+        modification time or size changes. The returned dictionary is the
+        resident copy; callers that modify it must pass it to _save_index.
+        """
+        with self._lock:
+            signature = self._index_file_signature()
+            if self._index is not None and signature == self._index_signature:
+                return self._index
+            
+            try:
+                with open(self.relationships_index_path, 'r') as f:
+                    index = json.load(f)
+            except FileNotFoundError:
+                index = {}
+            except json.JSONDecodeError as e:
+                logger.error(f"Invalid relationships index JSON: {e}")
+                # If corrupted, create a backup and start with empty index
+                if self.relationships_index_path.exists():
+                    backup_path = self.relationships_index_path.with_suffix('.json.bak')
+                    self.relationships_index_path.rename(backup_path)
+                    logger.info(f"Corrupted index backed up to {backup_path}")
+                index = {}
+                signature = self._index_file_signature()
+            except Exception as e:
+                logger.error(f"Error loading relationships index: {e}")
+                raise StorageError(f"Failed to load relationships index: {e}")
+            
+            self._index = index
+            self._index_signature = signature
+            self._build_adjacency(index)
+            return index
     
     def _save_index(self, index: Dict[str, Dict[str, Any]]) -> None:
-        """Save the relationships index."""
-        try:
-            with open(self.relationships_index_path, 'w') as f:
-                json.dump(index, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving relationships index: {e}")
-            raise StorageError(f"Failed to save relationships index: {e}")
+        """Write the relationships index through to disk atomically."""
+        with self._lock:
+            try:
+                atomic_write_json(self.relationships_index_path, index)
+            except Exception as e:
+                # The resident copy may no longer match the file
+                self._index = None
+                self._index_signature = None
+                logger.error(f"Error saving relationships index: {e}")
+                raise StorageError(f"Failed to save relationships index: {e}")
+            
+            if index is not self._index:
+                self._build_adjacency(index)
+            self._index = index
+            self._index_signature = self._index_file_signature()
+    
+    def _build_adjacency(self, index: Dict[str, Dict[str, Any]]) -> None:
+        """Rebuild the out-edge, in-edge and per-type adjacency maps."""
+        self._out_edges = {}
+        self._in_edges = {}
+        self._type_edges = {}
+        for rel_id, rel_data in index.items():
+            self._add_adjacency(rel_id, rel_data, log=False)
+        
+        # Earlier changes no longer lead to this state
+        self._generation += 1
+        self._changes = []
+        self._changes_start = self._generation
+    
+    def _add_adjacency(self, rel_id: str, rel_data: Dict[str, Any], log: bool = True) -> None:
+        """Add one relationship to the adjacency maps."""
+        source_id = rel_data.get("source_id")
+        target_id = rel_data.get("target_id")
+        self._out_edges.setdefault(source_id, {})[rel_id] = None
+        self._in_edges.setdefault(target_id, {})[rel_id] = None
+        
+        by_node = self._type_edges.setdefault(rel_data.get("relationship_type"), {})
+        by_node.setdefault(source_id, {})[rel_id] = None
+        by_node.setdefault(target_id, {})[rel_id] = None
+        if log:
+            self._log_change("add", rel_id, self._edge(rel_data))
+    
+    def _remove_adjacency(self, rel_id: str, rel_data: Dict[str, Any]) -> None:
+        """Remove one relationship from the adjacency maps."""
+        source_id = rel_data.get("source_id")
+        target_id = rel_data.get("target_id")
+        self._discard(self._out_edges, source_id, rel_id)
+        self._discard(self._in_edges, target_id, rel_id)
+        
+        by_node = self._type_edges.get(rel_data.get("relationship_type"))
+        if by_node is not None:
+            self._discard(by_node, source_id, rel_id)
+            self._discard(by_node, target_id, rel_id)
+        self._log_change("remove", rel_id, self._edge(rel_data))
+    
+    @staticmethod
+    def _edge(rel_data: Dict[str, Any]) -> Tuple[str, str, str, Any]:
+        """Get (source, target, type, weight) of an index entry; weight is metadata["weight"] if set."""
+        metadata = rel_data.get("metadata") or {}
+        return (
+            rel_data.get("source_id"),
+            rel_data.get("target_id"),
+            rel_data.get("relationship_type"),
+            metadata.get("weight") if isinstance(metadata, dict) else None
+        )
+    
+    def _log_change(self, op: str, rel_id: str, edge: Tuple[str, str, str, Any]) -> None:
+        """Record an adjacency change for changes_since."""
+        self._generation += 1
+        if len(self._changes) >= MAX_LOGGED_CHANGES:
+            # Consumers this far behind rebuild from a snapshot
+            self._changes = []
+            self._changes_start = self._generation
+            return
+        self._changes.append((op, rel_id, edge))
+    
+    @staticmethod
+    def _discard(adjacency: Dict[str, Dict[str, None]], content_id: str, rel_id: str) -> None:
+        """Remove a relationship key from a node's edge set, dropping empty sets."""
+        edges = adjacency.get(content_id)
+        if edges is not None:
+            edges.pop(rel_id, None)
+            if not edges:
+                del adjacency[content_id]
+    
+    def _edge_keys(
+        self,
+        content_id: str,
+        relationship_type: Optional[RelationshipType] = None,
+        as_source: bool = True,
+        as_target: bool = True
+    ) -> List[str]:
+        """
+        Get the keys of relationships touching a content item.
+        
+        Must be called with the lock held and the index loaded.
+        """
+        if relationship_type is not None:
+            candidates = self._type_edges.get(relationship_type.value, {}).get(content_id, {})
+            if as_source and as_target:
+                return list(candidates)
+            index = self._index
+            return [
+                rel_id for rel_id in candidates
+                if (as_source and index[rel_id].get("source_id") == content_id)
+                or (as_target and index[rel_id].get("target_id") == content_id)
+            ]
+        
+        keys: Dict[str, None] = {}
+        if as_source:
+            keys.update(self._out_edges.get(content_id, {}))
+        if as_target:
+            keys.update(self._in_edges.get(content_id, {}))
+        return list(keys)
+    
+    @staticmethod
+    def _to_relationship(rel_data: Dict[str, Any]) -> Relationship:
+        """Convert an index entry to a Relationship object."""
+        return Relationship(
+            source_id=rel_data.get("source_id"),
+            target_id=rel_data.get("target_id"),
+            relationship_type=RelationshipType(rel_data.get("relationship_type")),
+            description=rel_data.get("description", ""),
+            created=rel_data.get("created"),
+            metadata=rel_data.get("metadata", {})
+        )
     
     def create_relationship(
         self,
@@ -124,6 +292,60 @@ class RelationshipManager:
         
         return relationship
     
+    def create_relationships(
+        self,
+        pairs: List[Tuple[str, str]],
+        relationship_type: Union[RelationshipType, str] = RelationshipType.RELATED,
+        description: str = "",
+        metadata: Dict[str, Any] = None
+    ) -> List[Relationship]:
+        """
+        Create relationships of one type between several pairs of items.
+        
+        The index is written once for the whole batch.
+        
+        Args:
+            pairs: (source ID, target ID) pairs
+            relationship_type: Type of the relationships
+            description: Optional description of the relationships
+            metadata: Additional metadata for each relationship
+            
+        Returns:
+            The created Relationship objects
+        """
+        if isinstance(relationship_type, str):
+            try:
+                relationship_type = RelationshipType(relationship_type)
+            except ValueError:
+                logger.warning(f"Invalid relationship type: {relationship_type}. Using RELATED.")
+                relationship_type = RelationshipType.RELATED
+        
+        relationships = [
+            Relationship(
+                source_id=source_id,
+                target_id=target_id,
+                relationship_type=relationship_type,
+                description=description,
+                metadata=dict(metadata or {})
+            )
+            for source_id, target_id in pairs
+        ]
+        if not relationships:
+            return relationships
+        
+        with self._lock:
+            index = self._load_index()
+            for relationship in relationships:
+                rel_id = relationship.source_id + "_" + relationship.target_id
+                if rel_id in index:
+                    self._remove_adjacency(rel_id, index[rel_id])
+                relationship_dict = relationship.to_dict()
+                index[rel_id] = relationship_dict
+                self._add_adjacency(rel_id, relationship_dict)
+            self._save_index(index)
+        
+        return relationships
+    
     def _save_relationship(self, relationship: Relationship) -> None:
         """
         Save a relationship to the index and update related content items.
@@ -131,12 +353,18 @@ class RelationshipManager:
         Args:
             relationship: Relationship object to save
         """
-        index = self._load_index()
-        relationship_dict = relationship.to_dict()
-        index[relationship.source_id + "_" + relationship.target_id] = relationship_dict
-        
-        # Update the index
-        self._save_index(index)
+        with self._lock:
+            index = self._load_index()
+            rel_id = relationship.source_id + "_" + relationship.target_id
+            if rel_id in index:
+                self._remove_adjacency(rel_id, index[rel_id])
+            
+            relationship_dict = relationship.to_dict()
+            index[rel_id] = relationship_dict
+            self._add_adjacency(rel_id, relationship_dict)
+            
+            # Update the index
+            self._save_index(index)
         
         # Note: Content items would be updated separately by the calling code
         # through the content manager or knowledge base manager
@@ -160,9 +388,6 @@ class RelationshipManager:
         Returns:
             List of relationships involving the content item
         """
-        index = self._load_index()
-        relationships = []
-        
         # Convert string to enum if needed
         if isinstance(relationship_type, str):
             try:
@@ -171,31 +396,10 @@ class RelationshipManager:
                 logger.warning(f"Invalid relationship type filter: {relationship_type}")
                 return []
         
-        for rel_id, rel_data in index.items():
-            rel_type = rel_data.get("relationship_type")
-            
-            # Check if type matches filter
-            if relationship_type and rel_type != relationship_type.value:
-                continue
-                
-            # Check if content is involved in this relationship
-            source_matches = as_source and rel_data.get("source_id") == content_id
-            target_matches = as_target and rel_data.get("target_id") == content_id
-            
-            if source_matches or target_matches:
-                # Convert back to enum
-                rel_enum_type = RelationshipType(rel_data.get("relationship_type"))
-                relationship = Relationship(
-                    source_id=rel_data.get("source_id"),
-                    target_id=rel_data.get("target_id"),
-                    relationship_type=rel_enum_type,
-                    description=rel_data.get("description", ""),
-                    created=rel_data.get("created"),
-                    metadata=rel_data.get("metadata", {})
-                )
-                relationships.append(relationship)
-        
-        return relationships
+        with self._lock:
+            index = self._load_index()
+            rel_ids = self._edge_keys(content_id, relationship_type, as_source, as_target)
+            return [self._to_relationship(index[rel_id]) for rel_id in rel_ids]
     
     def get_related_content_ids(
         self, 
@@ -216,19 +420,23 @@ class RelationshipManager:
         Returns:
             Set of related content IDs
         """
-        relationships = self.get_relationships(
-            content_id, 
-            relationship_type=relationship_type,
-            as_source=as_source,
-            as_target=as_target
-        )
-        
-        related_ids = set()
-        for relationship in relationships:
-            if relationship.source_id == content_id:
-                related_ids.add(relationship.target_id)
-            else:
-                related_ids.add(relationship.source_id)
+        # Convert string to enum if needed
+        if isinstance(relationship_type, str):
+            try:
+                relationship_type = RelationshipType(relationship_type)
+            except ValueError:
+                logger.warning(f"Invalid relationship type filter: {relationship_type}")
+                return set()
+        
+        with self._lock:
+            index = self._load_index()
+            related_ids = set()
+            for rel_id in self._edge_keys(content_id, relationship_type, as_source, as_target):
+                rel_data = index[rel_id]
+                if rel_data.get("source_id") == content_id:
+                    related_ids.add(rel_data.get("target_id"))
+                else:
+                    related_ids.add(rel_data.get("source_id"))
         
         return related_ids
     
@@ -256,49 +464,45 @@ class RelationshipManager:
         Raises:
             NotFoundError: If the relationship doesn't exist
         """
-        index = self._load_index()
-        rel_id = source_id + "_" + target_id
-        
-        if rel_id not in index:
-            raise NotFoundError(f"Relationship not found: {rel_id}")
-        
-        rel_data = index[rel_id]
-        
-        # Update fields if provided
-        if description is not None:
-            rel_data["description"] = description
+        with self._lock:
+            index = self._load_index()
+            rel_id = source_id + "_" + target_id
             
-        if relationship_type is not None:
-            if isinstance(relationship_type, str):
-                try:
-                    relationship_type = RelationshipType(relationship_type)
-                except ValueError:
-                    logger.warning(f"Invalid relationship type: {relationship_type}. Not updating.")
+            if rel_id not in index:
+                raise NotFoundError(f"Relationship not found: {rel_id}")
+            
+            # Validate before touching the resident index
+            if metadata is not None and not isinstance(metadata, dict):
+                raise ValidationError("Metadata must be a dictionary")
+            
+            rel_data = index[rel_id]
+            self._remove_adjacency(rel_id, rel_data)
+            
+            # Update fields if provided
+            if description is not None:
+                rel_data["description"] = description
+            
+            if relationship_type is not None:
+                if isinstance(relationship_type, str):
+                    try:
+                        relationship_type = RelationshipType(relationship_type)
+                    except ValueError:
+                        logger.warning(f"Invalid relationship type: {relationship_type}. Not updating.")
+                    else:
+                        rel_data["relationship_type"] = relationship_type.value
                 else:
                     rel_data["relationship_type"] = relationship_type.value
-            else:
-                rel_data["relationship_type"] = relationship_type.value
-        
-        if metadata is not None:
-            if not isinstance(metadata, dict):
-                raise ValidationError("Metadata must be a dictionary")
-            rel_data["metadata"] = metadata
-        
-        # Save updated index
-        self._save_index(index)
-        
+            
+            if metadata is not None:
+                rel_data["metadata"] = metadata
+            
+            self._add_adjacency(rel_id, rel_data)
+            
+            # Save updated index
+            self._save_index(index)
+            
         # Convert data back to Relationship object
-        rel_enum_type = RelationshipType(rel_data.get("relationship_type"))
-        updated_relationship = Relationship(
-            source_id=rel_data.get("source_id"),
-            target_id=rel_data.get("target_id"),
-            relationship_type=rel_enum_type,
-            description=rel_data.get("description", ""),
-            created=rel_data.get("created"),
-            metadata=rel_data.get("metadata", {})
-        )
-        
-        return updated_relationship
+        return self._to_relationship(rel_data)
     
     def delete_relationship(self, source_id: str, target_id: str) -> bool:
         """
@@ -311,15 +515,16 @@ class RelationshipManager:
         Returns:
             True if the relationship was deleted, False if it doesn't exist
         """
-        index = self._load_index()
-        rel_id = source_id + "_" + target_id
-        
-        if rel_id in index:
-            del index[rel_id]
-            self._save_index(index)
-            return True
-        
-        return False
+        with self._lock:
+            index = self._load_index()
+            rel_id = source_id + "_" + target_id
+            
+            if rel_id in index:
+                self._remove_adjacency(rel_id, index.pop(rel_id))
+                self._save_index(index)
+                return True
+            
+            return False
     
     def delete_all_relationships(self, content_id: str) -> int:
         """
@@ -331,22 +536,68 @@ class RelationshipManager:
         Returns:
             Number of relationships deleted
         """
-        index = self._load_index()
-        relationships_to_delete = []
-        
-        # Find all relationships involving the content item
-        for rel_id, rel_data in index.items():
-            if rel_data["source_id"] == content_id or rel_data["target_id"] == content_id:
-                relationships_to_delete.append(rel_id)
-        
-        # Delete the relationships
-        for rel_id in relationships_to_delete:
-            del index[rel_id]
+        with self._lock:
+            index = self._load_index()
+            
+            # Find all relationships involving the content item
+            relationships_to_delete = self._edge_keys(content_id)
+            
+            # Delete the relationships
+            for rel_id in relationships_to_delete:
+                self._remove_adjacency(rel_id, index.pop(rel_id))
+            
+            # Save the updated index
+            if relationships_to_delete:
+                self._save_index(index)
+            
+            return len(relationships_to_delete)
+    
+    def delete_relationships(self, pairs: List[Tuple[str, str]]) -> int:
+        """
+        Delete the relationships between several pairs of items.
         
-        # Save the updated index
-        self._save_index(index)
+        Args:
+            pairs: (source ID, target ID) pairs
+            
+        Returns:
+            Number of relationships deleted
+        """
+        with self._lock:
+            index = self._load_index()
+            deleted = 0
+            for source_id, target_id in pairs:
+                rel_id = source_id + "_" + target_id
+                if rel_id in index:
+                    self._remove_adjacency(rel_id, index.pop(rel_id))
+                    deleted += 1
+            
+            if deleted:
+                self._save_index(index)
+            
+            return deleted
+    
+    def delete_all_relationships_for(self, content_ids: List[str]) -> int:
+        """
+        Delete all relationships involving any of several content items.
         
-        return len(relationships_to_delete)
+        Args:
+            content_ids: IDs of the content items
+            
+        Returns:
+            Number of relationships deleted
+        """
+        with self._lock:
+            index = self._load_index()
+            deleted = 0
+            for content_id in content_ids:
+                for rel_id in self._edge_keys(content_id):
+                    self._remove_adjacency(rel_id, index.pop(rel_id))
+                    deleted += 1
+            
+            if deleted:
+                self._save_index(index)
+            
+            return deleted
     
     def get_relationship_count(self, content_id: str) -> int:
         """
@@ -358,7 +609,9 @@ class RelationshipManager:
         Returns:
             Number of relationships
         """
-        return len(self.get_relationships(content_id))
+        with self._lock:
+            self._load_index()
+            return len(self._edge_keys(content_id))
     
     def exists(self, source_id: str, target_id: str) -> bool:
         """
@@ -371,6 +624,93 @@ class RelationshipManager:
         Returns:
             True if the relationship exists, False otherwise
         """
-        index = self._load_index()
-        rel_id = source_id + "_" + target_id
-        return rel_id in index 
\ No newline at end of file
+        with self._lock:
+            index = self._load_index()
+            rel_id = source_id + "_" + target_id
+            return rel_id in index
+    
+    def get_relationships_for_pairs(self, pairs: List[Tuple[str, str]]) -> List[Optional[Relationship]]:
+        """
+        Get the relationships between several pairs of items.
+        
+        Args:
+            pairs: (source ID, target ID) pairs
+            
+        Returns:
+            The relationship for each pair, or None where there is none
+        """
+        with self._lock:
+            index = self._load_index()
+            results = []
+            for source_id, target_id in pairs:
+                rel_data = index.get(source_id + "_" + target_id)
+                results.append(self._to_relationship(rel_data) if rel_data else None)
+            return results
+    
+    @property
+    def generation(self) -> int:
+        """Counter that changes whenever a relationship is added or removed."""
+        with self._lock:
+            self._load_index()
+            return self._generation
+    
+    def index_signature(self) -> Tuple[int, Optional[Tuple[int, int]]]:
+        """
+        Get the current generation with the signature of the index file.
+        
+        Derived data saved with the signature can be trusted by a later
+        process if the file still has the same signature.
+        
+        Returns:
+            The generation and the (mtime, size) signature of the index file
+        """
+        with self._lock:
+            self._load_index()
+            return self._generation, self._index_signature
+    
+    def edge_snapshot(self) -> Tuple[int, List[Tuple[str, str, str, str, Any]]]:
+        """
+        Get every relationship as a plain edge, for building derived graphs.
+        
+        Returns:
+            The generation of the snapshot and a list of (key, source ID,
+            target ID, relationship type, weight) tuples, where the weight
+            is the "weight" metadata value or None
+        """
+        with self._lock:
+            index = self._load_index()
+            edges = [(rel_id,) + self._edge(rel_data) for rel_id, rel_data in index.items()]
+            return self._generation, edges
+    
+    def changes_since(
+        self,
+        generation: int
+    ) -> Tuple[int, Optional[List[Tuple[str, str, Tuple[str, str, str, Any]]]]]:
+        """
+        Get the relationship changes made after a generation.
+        
+        Args:
+            generation: Generation of an earlier snapshot or call
+            
+        Returns:
+            The current generation and the ("add" or "remove", key, (source
+            ID, target ID, type, weight)) changes in order, or None
+            instead of the changes if they are no longer known, in which case
+            the caller must take a new snapshot
+        """
+        with self._lock:
+            self._load_index()
+            if generation < self._changes_start or generation > self._generation:
+                return self._generation, None
+            return self._generation, self._changes[generation - self._changes_start:]
+    
+    def get_all_content_ids(self) -> Set[str]:
+        """
+        Get IDs of all content items that take part in a relationship.
+        
+        Returns:
+            Set of content IDs
+        """
+        with self._lock:
+            self._load_index()
+            return set(self._out_edges) | set(self._in_edges) 
\ No newline at end of file
@@ -0,0 +1,1654 @@
+"""
+Search Index
+Inverted index over the files in the knowledge base data directory.
+"""
+
+import os
+import json
+import atexit
+import bisect
+import codecs
+import heapq
+import logging
+import math
+import pickle
+import re
+import itertools
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Any, Tuple, Callable, Iterable, Iterator, Union
+
+import numpy as np
+
+from knowledge_base.core.postings import (
+    BODY, TITLE, TAGS, PostingsSegment, intersect_sorted
+)
+from knowledge_base.core.suggestion_index import SuggestionIndex
+from knowledge_base.core.fuzzy_index import TrigramIndex
+from knowledge_base.utils.helpers import StorageError
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'\w+')
+_PHRASE_RE = re.compile(r'"([^"]*)"')
+
+# Bumped whenever the pickled layout changes; older indexes are rebuilt
+INDEX_VERSION = 6
+
+# Words left out of ranked queries; substring queries match them exactly
+STOP_WORDS = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by'}
+
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+# Indexes whose background merges are finished before the interpreter exits
+_open_indexes: "weakref.WeakSet[SearchIndex]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_indexes() -> None:
+    """Wait for the background merges of every open index."""
+    for index in list(_open_indexes):
+        index.close()
+
+
+def read_file_text(file_path: Path) -> str:
+    """
+    Read a data file as searchable text.
+
+    JSON files are normalised by re-serialising them with an indent of 2,
+    which is the form search_content has always matched against.
+
+    Args:
+        file_path: File to read
+
+    Returns:
+        Text of the file
+    """
+    if file_path.suffix == '.json':
+        with open(file_path, 'r') as f:
+            return json.dumps(json.load(f), indent=2)
+    with open(file_path, 'r') as f:
+        return f.read()
+
+
+def tokenize(text: str) -> List[str]:
+    """Split lower-cased text into word tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def reciprocal_rank_fusion(
+    rankings: List[List[str]],
+    weights: Optional[List[float]] = None,
+    k: int = 60
+) -> List[Tuple[str, float]]:
+    """
+    Fuse several rankings of the same items with reciprocal rank fusion.
+
+    Each item scores the sum over the rankings of weight / (k + rank), with
+    ranks starting at 1. Only ranks are used, so rankings with incomparable
+    scores (BM25F and cosine similarity) can be combined.
+
+    Args:
+        rankings: Item keys of each ranking, best first
+        weights: Optional weight of each ranking; all 1 by default
+        k: Damping constant; larger values flatten the rank differences
+
+    Returns:
+        List of (key, fused score) pairs, best first; ties keep the order in
+        which the items were first seen
+    """
+    if weights is None:
+        weights = [1.0] * len(rankings)
+    scores: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, key in enumerate(ranking, 1):
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+class SearchIndex:
+    """
+    Inverted index over the files under ``data/``.
+
+    Every file is tokenised into lower-case word tokens, and each token maps
+    to the documents containing it. Documents are identified by integer IDs;
+    each keeps its path relative to the data directory, its top level
+    directory (the "type" reported by search_content), the stat signature it
+    was indexed at, a text preview and the metadata used for ranked search.
+
+    refresh() brings the index up to date by re-listing only directories
+    whose modification time changed, so an unchanged tree costs one stat per
+    directory. Edits that rewrite a file in place do not touch its
+    directory, so writers report them with update_file() and remove_file().
+    A full refresh also compares the (mtime, size) signature of every
+    indexed file, which picks up in-place edits made outside the app; it
+    runs on the first refresh and then at most every FULL_REFRESH_INTERVAL
+    seconds, or when asked for.
+
+    The index is persisted as segments in ``data/index``. The base segment
+    is a pickled document table (``search_index.pkl``) and a postings file
+    (``search_postings.<generation>.bin``) of delta and varint encoded doc
+    IDs and positions, which is memory-mapped and decoded per term on demand
+    (see PostingsSegment). Changes are appended to delta segments
+    (``search_delta.<generation>.log``) as pickled document, tombstone and
+    directory records, and the documents they add keep in-memory "live"
+    postings. Once the deltas grow past a fraction of the index they are
+    merged into a new base segment on a background thread, or right away
+    while there is no base segment yet. close() waits for a running merge;
+    open indexes are closed when the interpreter exits. Doc IDs only
+    grow, so live documents always sort after base documents; removed base
+    documents are masked out of the base postings.
+
+    Ranked search uses BM25F over three fields: the title and tags from the
+    file's metadata, and the body (the whole file text). Body postings keep
+    the positions of each term so that quoted phrases can be matched without
+    reading files.
+
+    Fuzzy lookups go through trigram indexes over the term vocabulary and
+    the tag names (see TrigramIndex). They are built on first use and grow
+    with the live postings; search(fuzzy=True) uses them to expand
+    misspelled query words before ranking. find_substring() also looks up
+    the terms a query's edge tokens may be the end or middle of in the term
+    trigram index, and its prefix tokens in the sorted vocabulary.
+
+    The index also maintains a SuggestionIndex for search-as-you-type:
+    titles and tags follow every indexed and removed document, and the
+    frequent terms are refreshed whenever refresh() finds changes and after
+    every merge.
+
+    Internal index directories (``data/index`` and ``data/embeddings``) are
+    not indexed, and neither are binary files.
+    """
+
+    SKIP_DIRS = {"index", "embeddings"}
+    PREVIEW_LENGTH = 200
+    # Bytes read to tell text files from binary ones
+    SNIFF_BYTES = 8192
+
+    # BM25F parameters: per-field weight and length normalisation, and the
+    # saturation constant applied to the combined term frequency
+    FIELDS = ("title", "tags", "body")
+    FIELD_WEIGHTS = {"title": 3.0, "tags": 2.0, "body": 1.0}
+    FIELD_B = {"title": 0.5, "tags": 0.5, "body": 0.75}
+    K1 = 1.2
+
+    # Seconds between the per-file signature sweeps of refresh()
+    FULL_REFRESH_INTERVAL = 300
+
+    # Merge the deltas once they hold this many records and more than a
+    # MERGE_RATIO fraction of the number of documents
+    MERGE_MIN_RECORDS = 1000
+    MERGE_RATIO = 0.25
+
+    # Number of frequent terms offered as suggestions, the number of
+    # documents a term needs, and the share of documents above which a term
+    # is too common to be useful
+    SUGGESTED_TERMS = 5000
+    SUGGESTION_MIN_DF = 2
+    SUGGESTION_MAX_DF_RATIO = 0.5
+    # Rebuild the suggestions outright when a batch changes more documents
+    SUGGESTION_BULK_THRESHOLD = 500
+
+    # Close terms a misspelled query word expands to, and the factor that
+    # scales an expansion's score for every edit it is away from the word
+    FUZZY_EXPANSIONS = 3
+    FUZZY_DISCOUNT = 0.7
+
+    # Document fields that only live documents carry
+    _LIVE_KEYS = ("body", "title", "tag_terms")
+
+    def __init__(
+        self,
+        base_path: str = ".",
+        reader: Optional[Callable[[Path], str]] = None,
+        suggestions: Optional[SuggestionIndex] = None
+    ):
+        """
+        Initialize the search index.
+
+        Args:
+            base_path: Root path of the knowledge base
+            reader: Function reading a file as searchable text
+            suggestions: Suggestion index to maintain; one is created if not
+                provided. Its entries are replaced, its popularity is kept.
+        """
+        self.base_path = Path(base_path)
+        self.data_dir = self.base_path / "data"
+        self.index_dir = self.data_dir / "index"
+        self.index_path = self.index_dir / "search_index.pkl"
+        self._reader = reader or read_file_text
+        self.suggestions = suggestions if suggestions is not None else SuggestionIndex()
+        self.suggestions.clear()
+
+        self._docs: Dict[int, Dict[str, Any]] = {}
+        self._paths: Dict[str, int] = {}
+        self._tag_docs: Dict[str, Set[int]] = {}
+        self._type_docs: Dict[str, Set[int]] = {}
+        self._kind_docs: Dict[str, Set[int]] = {}
+        self._dirs: Dict[str, Dict[str, Any]] = {}
+        self._last_full_refresh: Optional[float] = None
+        self._next_id = 0
+        self._field_totals: Dict[str, int] = dict.fromkeys(self.FIELDS, 0)
+        # Token count of each field by doc ID, in FIELDS order
+        self._lengths = np.zeros((0, len(self.FIELDS)), dtype=np.float32)
+
+        # Base segment: postings of the documents below _base_limit
+        self._segment: Optional[PostingsSegment] = None
+        self._base_limit = 0
+        self._dead = np.zeros(0, dtype=bool)
+
+        # Live segment: term -> doc ID -> body positions, and term -> doc ID
+        # -> term frequency for the title and tags fields
+        self._postings: Dict[str, Dict[int, List[int]]] = {}
+        self._field_postings: Dict[str, Dict[str, Dict[int, int]]] = {"title": {}, "tags": {}}
+        self._sorted_terms: Optional[List[str]] = None
+        # Trigram indexes over the terms and tag names, built on first use
+        self._term_fuzzy: Optional[TrigramIndex] = None
+        self._tag_fuzzy: Optional[TrigramIndex] = None
+
+        # Paths and tags whose suggestions are brought up to date after a batch
+        self._suggestion_batch: Optional[Tuple[Set[str], Set[str]]] = None
+
+        self._pending: List[Tuple] = []
+        self._generation = 1
+        self._delta_records = 0
+        self._merge_thread: Optional[threading.Thread] = None
+        self._merge_lock = threading.Lock()
+        self._lock = threading.RLock()
+
+        self._load()
+        _open_indexes.add(self)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # Maintenance
+
+    def refresh(self, full: Optional[bool] = None) -> bool:
+        """
+        Re-index files that changed since the last refresh.
+
+        Args:
+            full: Also check the signature of every indexed file in an
+                unchanged directory. By default this happens on the first
+                refresh and once FULL_REFRESH_INTERVAL seconds have passed
+                since the last full refresh.
+
+        Returns:
+            True if the index changed
+        """
+        with self._lock:
+            if not self.data_dir.exists():
+                return False
+            now = time.monotonic()
+            if full is None:
+                full = (self._last_full_refresh is None
+                        or now - self._last_full_refresh >= self.FULL_REFRESH_INTERVAL)
+            if full:
+                self._last_full_refresh = now
+            self._begin_suggestions()
+            try:
+                self._scan(full)
+            finally:
+                self._end_suggestions()
+            changed = self._flush()
+            if changed:
+                self._update_term_suggestions()
+            return changed
+
+    def rebuild(self) -> None:
+        """Rebuild the whole index from the data directory."""
+        with self._merge_lock:
+            with self._lock:
+                self._clear()
+                self._begin_suggestions()
+                try:
+                    if self.data_dir.exists():
+                        self._scan()
+                finally:
+                    self._end_suggestions()
+                self._update_term_suggestions()
+                # The new base segment holds everything; no deltas are needed
+                self._pending = []
+                snapshot = self._seal()
+            self._merge_snapshot(snapshot)
+
+    def merge(self, background: bool = False) -> None:
+        """
+        Fold the live documents and delta segments into a new base segment.
+
+        Args:
+            background: Merge on a background thread; does nothing if a
+                merge is already running
+        """
+        if background:
+            if not self._merge_lock.acquire(blocking=False):
+                return
+            try:
+                with self._lock:
+                    self._flush(merge=False)
+                    snapshot = self._seal()
+                self._merge_thread = threading.Thread(
+                    target=self._run_merge, args=(snapshot,), name="search-index-merge", daemon=True
+                )
+                self._merge_thread.start()
+            except BaseException:
+                self._merge_lock.release()
+                raise
+            return
+
+        with self._merge_lock:
+            with self._lock:
+                self._flush(merge=False)
+                snapshot = self._seal()
+            self._merge_snapshot(snapshot)
+
+    def close(self) -> None:
+        """Wait for a running background merge to write its base segment."""
+        thread = self._merge_thread
+        if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+            thread.join()
+
+    def update_file(self, file_path: Path) -> bool:
+        """
+        Re-index one file after it was written.
+
+        Args:
+            file_path: Path of the file
+
+        Returns:
+            True if the file is indexed afterwards
+        """
+        with self._lock:
+            rel_path = self._relative(file_path)
+            if rel_path is None:
+                return False
+            indexed = self._index_path(rel_path) and rel_path in self._paths
+            if indexed:
+                self._track_file(rel_path, True)
+            self._flush()
+            return indexed
+
+    def remove_file(self, file_path: Path) -> bool:
+        """
+        Remove one file from the index.
+
+        Args:
+            file_path: Path of the file
+
+        Returns:
+            True if the file was indexed
+        """
+        with self._lock:
+            rel_path = self._relative(file_path)
+            removed = rel_path is not None and self._remove_doc(rel_path)
+            if removed:
+                self._track_file(rel_path, False)
+            self._flush()
+            return removed
+
+    def index_file(self, file_path: Path) -> bool:
+        """
+        Index a single file.
+
+        Args:
+            file_path: Path of the file
+
+        Returns:
+            True if the file was indexed
+        """
+        return self.update_file(file_path)
+
+    # Queries
+
+    def find_substring(
+        self,
+        query: str,
+        top_dir: Optional[str] = None,
+        fuzzy: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Find files whose text contains the query, ignoring case.
+
+        Candidates come from the postings of the query's tokens: tokens inside
+        the query must occur as whole words, while the first and last token
+        may be the end or the start of a longer word. Candidates are then
+        verified against the file text unless the query is a single word, in
+        which case the postings alone are exact.
+
+        Args:
+            query: Text to look for
+            top_dir: Optional top-level data directory to restrict the search
+                to; files directly in the data directory are only matched when
+                it is "", as search_content only ever searched subdirectories
+            fuzzy: If nothing matches, retry with misspelled words replaced by
+                the closest indexed terms
+
+        Returns:
+            List of results with file, type and content_preview, ordered by
+            path; results of a corrected query also carry ``matched_query``
+        """
+        results = self._find_substring(query, top_dir)
+        if results or not fuzzy:
+            return results
+
+        with self._lock:
+            corrected = self._corrected_query(query.lower())
+        if corrected is None:
+            return []
+        results = self._find_substring(corrected, top_dir)
+        for result in results:
+            result["matched_query"] = corrected
+        return results
+
+    def similar_terms(self, word: str, max_distance: Optional[int] = None, limit: int = 5) -> List[Tuple[str, int]]:
+        """
+        Find indexed terms within a small edit distance of a word.
+
+        Args:
+            word: Word to look up
+            max_distance: Largest number of edits; by default one for words
+                of four to seven letters, two for longer words and none for
+                shorter ones
+            limit: Maximum number of terms
+
+        Returns:
+            List of (term, distance) pairs, closest and then most frequent
+            first, including the word itself if it is indexed
+        """
+        with self._lock:
+            return self._similar_terms(word.lower(), max_distance)[:limit]
+
+    def expand_terms(self, terms: List[str]) -> Dict[str, float]:
+        """
+        Expand query terms with the indexed terms their misspellings may mean.
+
+        Indexed terms are kept as they are. Terms that are not indexed are
+        replaced by up to FUZZY_EXPANSIONS close terms, each weighted by
+        FUZZY_DISCOUNT per edit.
+
+        Args:
+            terms: Lower-cased query terms
+
+        Returns:
+            Dictionary of term to score weight, in query order
+        """
+        with self._lock:
+            weights: Dict[str, float] = {}
+            for term in terms:
+                if self._has_term(term):
+                    weights[term] = 1.0
+                    continue
+                for match, distance in self._similar_terms(term, None)[:self.FUZZY_EXPANSIONS]:
+                    weight = self.FUZZY_DISCOUNT ** distance
+                    weights[match] = max(weights.get(match, 0.0), weight)
+            return weights
+
+    def _find_substring(self, query: str, top_dir: Optional[str]) -> List[Dict[str, Any]]:
+        """Find the files containing a query exactly; see find_substring()."""
+        needle = query.lower()
+        with self._lock:
+            candidates = self._substring_candidates(needle)
+            if top_dir is not None:
+                candidates = intersect_sorted(candidates, self._id_array(self._type_docs.get(top_dir, ())))
+            elif "" in self._type_docs:
+                candidates = np.setdiff1d(candidates, self._id_array(self._type_docs[""]), assume_unique=True)
+            exact = _TOKEN_RE.fullmatch(needle) is not None
+            docs = sorted((self._docs[doc_id] for doc_id in candidates.tolist()), key=lambda d: d["path"])
+
+        results = []
+        for doc in docs:
+            preview = doc["preview"]
+            if not exact:
+                text = self._read(doc["path"])
+                if text is None or needle not in text.lower():
+                    continue
+                preview = self._preview(text)
+            results.append({
+                "file": str(self.data_dir / doc["path"]),
+                "type": doc["type"],
+                "content_preview": preview
+            })
+        return results
+
+    def search(
+        self,
+        query: str,
+        content_type: Union[str, List[str], None] = None,
+        limit: int = 50,
+        fuzzy: bool = False,
+        top_dirs: Optional[Iterable[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search the indexed content, ranked by BM25F.
+
+        Words outside quotes are optional and ranked; each quoted phrase must
+        occur in the body with its words adjacent and in order.
+
+        Args:
+            query: Search query, optionally with quoted phrases
+            content_type: Filter by content type, or by any of several
+            limit: Maximum results to return
+            fuzzy: Expand misspelled words with close indexed terms (see
+                expand_terms()); phrases still match exactly
+            top_dirs: Only rank files under these top-level data directories
+
+        Returns:
+            List of search results, best first
+        """
+        phrases = [tokenize(phrase) for phrase in _PHRASE_RE.findall(query)]
+        phrases = [phrase for phrase in phrases if phrase]
+        query_terms = self._extract_words(_PHRASE_RE.sub(" ", query))
+        query_terms.extend(term for phrase in phrases for term in phrase)
+        if limit <= 0:
+            return []
+
+        with self._lock:
+            allowed: Optional[np.ndarray] = None
+            if content_type:
+                kinds = [content_type] if isinstance(content_type, str) else content_type
+                allowed = self._id_array(itertools.chain.from_iterable(self._kind_docs.get(kind, ()) for kind in kinds))
+            if top_dirs is not None:
+                under = self._id_array(itertools.chain.from_iterable(self._type_docs.get(d, ()) for d in top_dirs))
+                allowed = under if allowed is None else intersect_sorted(allowed, under)
+            for phrase in phrases:
+                matches = self._phrase_docs(phrase)
+                allowed = matches if allowed is None else intersect_sorted(allowed, matches)
+            if allowed is not None and allowed.size == 0:
+                return []
+
+            terms = list(dict.fromkeys(query_terms))
+            weights = self.expand_terms(terms) if fuzzy else None
+            docs, scores = self._bm25f(list(weights) if weights is not None else terms, allowed, weights)
+            if docs.size > limit:
+                # Cut the candidates down to the top k before ordering them
+                best = np.argpartition(-scores, limit - 1)[:limit]
+                docs, scores = docs[best], scores[best]
+            top = heapq.nlargest(limit, zip(scores.tolist(), (-docs).tolist()))
+
+            results = []
+            for score, neg_id in top:
+                doc = self._docs[-neg_id]
+                metadata = doc["metadata"]
+                results.append({
+                    "file": doc["path"],
+                    "content_id": metadata.get('id'),
+                    "title": metadata.get('title', Path(doc["path"]).name),
+                    "type": metadata.get('type', 'unknown'),
+                    "tags": metadata.get('tags', []),
+                    "created": metadata.get('created', ''),
+                    "score": score
+                })
+            return results
+
+    def search_by_tag(self, tag: str, fuzzy: bool = False) -> List[Dict[str, Any]]:
+        """
+        Search for content with specific tag.
+
+        Args:
+            tag: Tag to look for
+            fuzzy: If no document has the tag, use the tags within a small
+                edit distance of it
+
+        Returns:
+            List of matching content, ordered by doc ID
+        """
+        with self._lock:
+            tag = tag.lower()
+            doc_ids: Set[int] = set(self._tag_docs.get(tag, ()))
+            if fuzzy and not doc_ids:
+                if self._tag_fuzzy is None:
+                    self._tag_fuzzy = TrigramIndex(self._tag_docs)
+                for close, _ in self._tag_fuzzy.lookup(tag, exists=self._tag_docs.__contains__):
+                    doc_ids.update(self._tag_docs[close])
+
+            results = []
+            for doc_id in sorted(doc_ids):
+                doc = self._docs[doc_id]
+                metadata = doc["metadata"]
+                results.append({
+                    "file": doc["path"],
+                    "title": metadata.get('title', ''),
+                    "type": metadata.get('type', 'unknown'),
+                    "tags": metadata.get('tags', []),
+                    "created": metadata.get('created', '')
+                })
+            return results
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get index statistics."""
+        with self._lock:
+            base_terms = len(self._segment) if self._segment is not None else 0
+            live_terms = sum(
+                1 for term in self._postings
+                if self._segment is None or self._segment.lookup(term) is None
+            )
+            files_by_type = {kind: len(docs) for kind, docs in self._kind_docs.items()}
+            return {
+                "total_files": len(self._docs),
+                "total_words": base_terms + live_terms,
+                "total_tags": len(self._tag_docs),
+                "files_by_type": files_by_type,
+                "most_common_tags": self._get_most_common_tags(10)
+            }
+
+    # Indexing internals
+
+    def _scan(self, full: bool = False) -> None:
+        """
+        Sync every changed directory and forget the ones that are gone.
+
+        Args:
+            full: Also re-index changed files in unchanged directories
+        """
+        # Create the index directory up front so saving does not touch data/
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+        seen: Set[str] = set()
+        stack = [""]
+        while stack:
+            rel_dir = stack.pop()
+            seen.add(rel_dir)
+            entry = self._sync_dir(rel_dir, full)
+            stack.extend(f"{rel_dir}/{name}" if rel_dir else name for name in entry["dirs"])
+
+        for rel_dir in [d for d in self._dirs if d not in seen]:
+            self._drop_dir(rel_dir)
+
+    def _sync_dir(self, rel_dir: str, full: bool = False) -> Dict[str, Any]:
+        """
+        Re-list a directory if its modification time changed.
+
+        Rewriting a file in place leaves its directory's modification time
+        alone, so on a full refresh the indexed files of an unchanged
+        directory are checked against their stat signatures instead.
+        """
+        abs_dir = self.data_dir / rel_dir if rel_dir else self.data_dir
+        try:
+            mtime = abs_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {"mtime": None, "dirs": [], "files": []}
+
+        entry = self._dirs.get(rel_dir)
+        if entry is not None and entry["mtime"] == mtime:
+            if not full:
+                return entry
+            failed = False
+            for name in entry["files"]:
+                rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                if rel_path in self._paths and not self._index_path(rel_path):
+                    failed = True
+            if failed:
+                # Leave the directory stale so that unreadable files are retried
+                entry = dict(entry, mtime=None)
+                self._dirs[rel_dir] = entry
+                self._pending.append(("dir", rel_dir, entry))
+            return entry
+
+        dirs, files = [], []
+        with os.scandir(abs_dir) as it:
+            for dir_entry in it:
+                if dir_entry.name.startswith('.'):
+                    continue
+                if dir_entry.is_dir():
+                    if rel_dir or dir_entry.name not in self.SKIP_DIRS:
+                        dirs.append(dir_entry.name)
+                elif dir_entry.is_file() and not dir_entry.name.endswith('.tmp'):
+                    files.append(dir_entry.name)
+
+        old_files = set(entry["files"]) if entry else set()
+        for name in old_files - set(files):
+            self._remove_doc(f"{rel_dir}/{name}" if rel_dir else name)
+        failed = False
+        for name in files:
+            if not self._index_path(f"{rel_dir}/{name}" if rel_dir else name):
+                failed = True
+
+        # Leave the directory stale so that unreadable files are retried
+        entry = {"mtime": None if failed else mtime, "dirs": sorted(dirs), "files": sorted(files)}
+        if entry != self._dirs.get(rel_dir):
+            self._dirs[rel_dir] = entry
+            self._pending.append(("dir", rel_dir, entry))
+        return entry
+
+    def _track_file(self, rel_path: str, present: bool) -> None:
+        """
+        Keep a reported file in its directory's listing.
+
+        refresh() only removes the files that drop out of a directory's last
+        listing, so files indexed through update_file() have to be added to
+        it. A directory that was never listed gets a stale entry, which the
+        next refresh() replaces with a full listing.
+        """
+        rel_dir, _, name = rel_path.rpartition("/")
+        entry = self._dirs.get(rel_dir) or {"mtime": None, "dirs": [], "files": []}
+        files = set(entry["files"])
+        if (name in files) == present:
+            return
+        if present:
+            files.add(name)
+        else:
+            files.discard(name)
+        entry = dict(entry, files=sorted(files))
+        self._dirs[rel_dir] = entry
+        self._pending.append(("dir", rel_dir, entry))
+
+    def _drop_dir(self, rel_dir: str) -> None:
+        """Forget a directory that no longer exists and its files."""
+        entry = self._dirs.pop(rel_dir)
+        for name in entry["files"]:
+            self._remove_doc(f"{rel_dir}/{name}" if rel_dir else name)
+        self._pending.append(("dir", rel_dir, None))
+
+    def _index_path(self, rel_path: str) -> bool:
+        """
+        Index a file if it is new or changed since it was indexed.
+
+        Binary files are left out of the index; they are looked at again only
+        when their directory changes or they are reported with update_file().
+
+        Returns:
+            False if the file could not be read and should be retried
+        """
+        file_path = self.data_dir / rel_path
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            self._remove_doc(rel_path)
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        doc_id = self._paths.get(rel_path)
+        if doc_id is not None and self._docs[doc_id]["signature"] == signature:
+            return True
+
+        if not self._is_text(file_path):
+            logger.debug(f"Not indexing binary file {file_path}")
+            self._remove_doc(rel_path)
+            return True
+
+        try:
+            text = self._reader(file_path)
+        except Exception as e:
+            logger.error(f"Error indexing {file_path}: {e}")
+            self._remove_doc(rel_path)
+            return False
+
+        doc_id = self._next_id
+
+        metadata = self._extract_metadata(text, file_path)
+        top_dir = rel_path.split("/", 1)[0] if "/" in rel_path else ""
+        tags = [str(tag).lower() for tag in metadata.get("tags", []) or []]
+
+        body_tokens = tokenize(text)
+        body: Dict[str, List[int]] = {}
+        for position, term in enumerate(body_tokens):
+            body.setdefault(term, []).append(position)
+        title_tokens = tokenize(str(metadata.get("title", "")))
+        tag_tokens = tokenize(" ".join(tags))
+
+        doc = {
+            "path": rel_path,
+            "type": top_dir,
+            "signature": signature,
+            "preview": self._preview(text),
+            "metadata": metadata,
+            "tags": tags,
+            "lengths": {"title": len(title_tokens), "tags": len(tag_tokens), "body": len(body_tokens)},
+            "body": body,
+            "title": self._term_counts(title_tokens),
+            "tag_terms": self._term_counts(tag_tokens)
+        }
+        self._put_doc(doc_id, doc)
+        self._pending.append(("put", doc_id, doc))
+        return True
+
+    @classmethod
+    def _is_text(cls, file_path: Path) -> bool:
+        """Check whether a file's first block is NUL-free UTF-8 text."""
+        try:
+            with open(file_path, 'rb') as f:
+                block = f.read(cls.SNIFF_BYTES)
+        except OSError:
+            # Leave the error to the reader, which is retried
+            return True
+        if b"\0" in block:
+            return False
+        try:
+            codecs.getincrementaldecoder("utf-8")().decode(block, final=False)
+        except UnicodeDecodeError:
+            return False
+        return True
+
+    def _put_doc(self, doc_id: int, doc: Dict[str, Any]) -> None:
+        """Insert a document, replacing any document with the same path."""
+        self._drop_doc(doc["path"])
+        self._docs[doc_id] = doc
+        self._paths[doc["path"]] = doc_id
+        self._next_id = max(self._next_id, doc_id + 1)
+
+        if doc_id >= self._lengths.shape[0]:
+            grown = np.zeros((max(doc_id + 1, 2 * self._lengths.shape[0], 64), len(self.FIELDS)), dtype=np.float32)
+            grown[:self._lengths.shape[0]] = self._lengths
+            self._lengths = grown
+        for column, field in enumerate(self.FIELDS):
+            self._lengths[doc_id, column] = doc["lengths"][field]
+            self._field_totals[field] += doc["lengths"][field]
+        for tag in doc["tags"]:
+            if tag not in self._tag_docs:
+                self._tag_docs[tag] = set()
+                if self._tag_fuzzy is not None:
+                    self._tag_fuzzy.add(tag)
+            self._tag_docs[tag].add(doc_id)
+        self._type_docs.setdefault(doc["type"], set()).add(doc_id)
+        self._kind_docs.setdefault(doc["metadata"].get("type", "unknown"), set()).add(doc_id)
+
+        self._suggest(doc["path"], doc["tags"])
+
+        if doc_id >= self._base_limit:
+            self._add_live_postings(doc_id, doc)
+
+    def _add_live_postings(self, doc_id: int, doc: Dict[str, Any]) -> None:
+        """Add a live document's terms to the in-memory postings."""
+        for term, positions in doc["body"].items():
+            postings = self._postings.get(term)
+            if postings is None:
+                self._postings[term] = postings = {}
+                self._sorted_terms = None
+                if self._term_fuzzy is not None:
+                    self._term_fuzzy.add(term)
+            postings[doc_id] = positions
+        for field, counts in (("title", doc["title"]), ("tags", doc["tag_terms"])):
+            field_postings = self._field_postings[field]
+            for term, count in counts.items():
+                postings = field_postings.get(term)
+                if postings is None:
+                    field_postings[term] = postings = {}
+                    if self._term_fuzzy is not None:
+                        self._term_fuzzy.add(term)
+                postings[doc_id] = count
+
+    @staticmethod
+    def _term_counts(tokens: List[str]) -> Dict[str, int]:
+        """Count the occurrences of each token."""
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        return counts
+
+    def _remove_doc(self, rel_path: str) -> bool:
+        """Remove a document and record a tombstone for it."""
+        if not self._drop_doc(rel_path):
+            return False
+        self._pending.append(("del", rel_path))
+        return True
+
+    def _drop_doc(self, rel_path: str) -> bool:
+        """Remove a document from the live postings or mask it in the base."""
+        doc_id = self._paths.pop(rel_path, None)
+        if doc_id is None:
+            return False
+        doc = self._docs.pop(doc_id)
+
+        if doc_id < self._base_limit:
+            self._dead[doc_id] = True
+        else:
+            for term in doc["body"]:
+                self._discard(self._postings, term, doc_id)
+            for term in doc["title"]:
+                self._discard(self._field_postings["title"], term, doc_id)
+            for term in doc["tag_terms"]:
+                self._discard(self._field_postings["tags"], term, doc_id)
+
+        for field in self.FIELDS:
+            self._field_totals[field] -= doc["lengths"][field]
+        for tag in doc["tags"]:
+            self._discard(self._tag_docs, tag, doc_id)
+        self._discard(self._type_docs, doc["type"], doc_id)
+        self._suggest(rel_path, doc["tags"])
+        self._discard(self._kind_docs, doc["metadata"].get("type", "unknown"), doc_id)
+        return True
+
+    def _discard(self, index: Dict[str, Any], key: str, doc_id: int) -> None:
+        """Remove a document from one postings set or dict, dropping it when empty."""
+        postings = index.get(key)
+        if postings is None:
+            return
+        if isinstance(postings, set):
+            postings.discard(doc_id)
+        else:
+            postings.pop(doc_id, None)
+        if not postings:
+            del index[key]
+            if index is self._postings:
+                self._sorted_terms = None
+
+    def _relative(self, file_path: Path) -> Optional[str]:
+        """Get a file's path relative to the data directory, if it is indexable."""
+        try:
+            rel_path = Path(file_path).resolve().relative_to(self.data_dir.resolve())
+        except ValueError:
+            return None
+        parts = rel_path.parts
+        if not parts or parts[0] in self.SKIP_DIRS or any(p.startswith('.') for p in parts):
+            return None
+        return rel_path.as_posix()
+
+    def _read(self, rel_path: str) -> Optional[str]:
+        """Read a document's text, re-indexing it if it changed on disk."""
+        file_path = self.data_dir / rel_path
+        try:
+            text = self._reader(file_path)
+        except Exception as e:
+            logger.error(f"Error reading {file_path}: {e}")
+            return None
+        with self._lock:
+            self._index_path(rel_path)
+        return text
+
+    def _preview(self, text: str) -> str:
+        """Build the preview shown in search_content results."""
+        return text[:self.PREVIEW_LENGTH] + "..." if len(text) > self.PREVIEW_LENGTH else text
+
+
+    # Query internals
+
+    @staticmethod
+    def _id_array(doc_ids: Iterable[int]) -> np.ndarray:
+        """Turn doc IDs into a sorted array."""
+        return np.sort(np.fromiter(doc_ids, dtype=np.int64))
+
+    def _alive(self, docs: np.ndarray) -> np.ndarray:
+        """Get a mask of the doc IDs that have not been removed."""
+        keep = np.ones(docs.size, dtype=bool)
+        base = docs < self._base_limit
+        keep[base] = ~self._dead[docs[base]]
+        return keep
+
+    def _field_arrays(self, term: str, field: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the sorted doc IDs and term frequencies of a term in one field."""
+        if field == "body":
+            live = {doc_id: len(positions) for doc_id, positions in self._postings.get(term, {}).items()}
+            block = BODY
+        else:
+            live = self._field_postings[field].get(term, {})
+            block = TITLE if field == "title" else TAGS
+
+        docs, tf = self._segment.field(term, block) if self._segment is not None else (_EMPTY, _EMPTY)
+        if docs.size:
+            keep = self._alive(docs)
+            docs, tf = docs[keep], tf[keep]
+        if live:
+            live_ids = sorted(live)
+            docs = np.concatenate((docs, np.asarray(live_ids, dtype=np.int64)))
+            tf = np.concatenate((tf, np.asarray([live[doc_id] for doc_id in live_ids], dtype=np.int64)))
+        return docs, tf
+
+    def _positions(self, term: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the sorted doc IDs, position counts and concatenated body positions of a term."""
+        if self._segment is not None:
+            docs, counts, flat = self._segment.positions(term)
+        else:
+            docs, counts, flat = _EMPTY, _EMPTY, _EMPTY
+        if docs.size:
+            keep = self._alive(docs)
+            flat = flat[np.repeat(keep, counts)]
+            docs, counts = docs[keep], counts[keep]
+
+        live = self._postings.get(term)
+        if live:
+            live_ids = sorted(live)
+            docs = np.concatenate((docs, np.asarray(live_ids, dtype=np.int64)))
+            counts = np.concatenate((counts, np.asarray([len(live[i]) for i in live_ids], dtype=np.int64)))
+            flat = np.concatenate([flat] + [np.asarray(live[i], dtype=np.int64) for i in live_ids])
+        return docs, counts, flat
+
+    def _body_docs(self, terms: Iterable[str]) -> np.ndarray:
+        """Get the sorted IDs of documents whose body contains any of the terms."""
+        arrays = []
+        for term in terms:
+            if self._segment is not None:
+                arrays.append(self._segment.docs(term))
+            live = self._postings.get(term)
+            if live:
+                arrays.append(np.fromiter(live, dtype=np.int64, count=len(live)))
+        if not arrays:
+            return _EMPTY
+        docs = np.unique(np.concatenate(arrays))
+        return docs[self._alive(docs)]
+
+    def _substring_candidates(self, needle: str) -> np.ndarray:
+        """Get the sorted IDs of documents that may contain a lower-cased substring."""
+        matches = list(_TOKEN_RE.finditer(needle))
+        if not matches:
+            return self._id_array(self._docs)
+
+        candidates: Optional[np.ndarray] = None
+        for match in sorted(matches, key=lambda m: -len(m.group())):
+            token = match.group()
+            open_left = match.start() == 0
+            open_right = match.end() == len(needle)
+            if open_left:
+                # Infixes and suffixes come from the trigram lists, not a vocabulary scan
+                terms: Iterable[str] = self._term_trigrams().containing(token, suffix=not open_right)
+            elif open_right:
+                terms = self._terms_with_prefix(token)
+                if self._segment is not None:
+                    terms = terms + self._segment.terms_with_prefix(token)
+            else:
+                terms = [token]
+
+            docs = self._body_docs(terms)
+            candidates = docs if candidates is None else intersect_sorted(candidates, docs)
+            if not candidates.size:
+                break
+        return candidates
+
+    def _terms_with_prefix(self, prefix: str) -> List[str]:
+        """Get the live terms starting with a prefix."""
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        start = bisect.bisect_left(self._sorted_terms, prefix)
+        terms = []
+        for term in self._sorted_terms[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def _has_term(self, term: str) -> bool:
+        """Check whether a term occurs in any field of any document."""
+        return (
+            term in self._postings
+            or term in self._field_postings["title"]
+            or term in self._field_postings["tags"]
+            or (self._segment is not None and self._segment.lookup(term) is not None)
+        )
+
+    def _term_df(self, term: str) -> int:
+        """Get the approximate number of documents containing a term."""
+        df = self._segment.df(term) if self._segment is not None else 0
+        return df + len(self._postings.get(term, ()))
+
+    def _similar_terms(self, word: str, max_distance: Optional[int]) -> List[Tuple[str, int]]:
+        """Find the terms close to a lower-cased word; see similar_terms()."""
+        matches = self._term_trigrams().lookup(word, max_distance, exists=self._has_term)
+        return sorted(matches, key=lambda match: (match[1], -self._term_df(match[0]), match[0]))
+
+    def _term_trigrams(self) -> TrigramIndex:
+        """Get the trigram index over the terms of every field, building it on first use."""
+        if self._term_fuzzy is None:
+            self._term_fuzzy = TrigramIndex(itertools.chain(
+                self._segment.terms if self._segment is not None else (),
+                self._postings, self._field_postings["title"], self._field_postings["tags"]
+            ))
+        return self._term_fuzzy
+
+    def _corrected_query(self, needle: str) -> Optional[str]:
+        """Replace the unknown words of a lower-cased query by their closest terms."""
+        pieces = []
+        last = 0
+        changed = False
+        for match in _TOKEN_RE.finditer(needle):
+            word = match.group()
+            replacement = word
+            if not self._has_term(word):
+                close = self._similar_terms(word, None)
+                if close:
+                    replacement = close[0][0]
+                    changed = True
+            pieces.append(needle[last:match.start()])
+            pieces.append(replacement)
+            last = match.end()
+        pieces.append(needle[last:])
+        return "".join(pieces) if changed else None
+
+    def _phrase_docs(self, phrase: List[str]) -> np.ndarray:
+        """Get the sorted IDs of documents whose body contains the phrase's words in sequence."""
+        if len(phrase) == 1:
+            return self._body_docs(phrase)
+
+        postings = [self._positions(term) for term in phrase]
+        candidates = postings[0][0]
+        for docs, _, _ in sorted(postings[1:], key=lambda p: p[0].size):
+            candidates = intersect_sorted(candidates, docs)
+        if not candidates.size:
+            return _EMPTY
+
+        # Locate each candidate's run of positions in every term's postings
+        runs = []
+        for docs, counts, flat in postings:
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            index = np.searchsorted(docs, candidates)
+            runs.append((starts[index], counts[index], flat))
+
+        matches = []
+        for i, doc_id in enumerate(candidates.tolist()):
+            first_start, first_count, first_flat = runs[0]
+            starts = first_flat[first_start[i]:first_start[i] + first_count[i]]
+            for offset, (run_start, run_count, flat) in enumerate(runs[1:], 1):
+                positions = flat[run_start[i]:run_start[i] + run_count[i]] - offset
+                starts = np.intersect1d(starts, positions, assume_unique=True)
+                if not starts.size:
+                    break
+            if starts.size:
+                matches.append(doc_id)
+        return np.asarray(matches, dtype=np.int64)
+
+    def _bm25f(
+        self,
+        terms: List[str],
+        allowed: Optional[np.ndarray],
+        weights: Optional[Dict[str, float]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score the documents matching any of the terms with BM25F.
+
+        Args:
+            terms: Query terms
+            allowed: Optional sorted doc IDs to restrict the results to
+            weights: Optional factor applied to each term's scores
+
+        Returns:
+            Tuple of (doc IDs, scores)
+        """
+        total = len(self._docs)
+        if total == 0:
+            return _EMPTY, np.zeros(0)
+        averages = [(self._field_totals[field] / total) or 1.0 for field in self.FIELDS]
+
+        term_docs, term_scores = [], []
+        for term in terms:
+            field_docs, field_tf = [], []
+            for column, field in enumerate(self.FIELDS):
+                docs, tf = self._field_arrays(term, field)
+                if not docs.size:
+                    continue
+                b = self.FIELD_B[field]
+                norm = 1 - b + b * self._lengths[docs, column] / averages[column]
+                field_docs.append(docs)
+                field_tf.append(self.FIELD_WEIGHTS[field] * tf / norm)
+            if not field_docs:
+                continue
+
+            docs, inverse = np.unique(np.concatenate(field_docs), return_inverse=True)
+            weighted_tf = np.bincount(inverse, weights=np.concatenate(field_tf))
+            idf = math.log(1 + (total - docs.size + 0.5) / (docs.size + 0.5))
+            if weights is not None:
+                idf *= weights.get(term, 1.0)
+            term_docs.append(docs)
+            term_scores.append(idf * weighted_tf * (self.K1 + 1) / (self.K1 + weighted_tf))
+
+        if not term_docs:
+            return _EMPTY, np.zeros(0)
+        docs, inverse = np.unique(np.concatenate(term_docs), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(term_scores))
+        if allowed is not None:
+            keep = np.isin(docs, allowed, assume_unique=True)
+            docs, scores = docs[keep], scores[keep]
+        return docs, scores
+
+    def _extract_metadata(self, content: str, file_path: Path) -> Dict[str, Any]:
+        """Extract metadata from file content."""
+        metadata = {
+            "file_path": str(file_path),
+            "file_name": file_path.name,
+            "file_type": file_path.suffix,
+            "title": file_path.stem
+        }
+
+        try:
+            if file_path.suffix == '.json':
+                data = json.loads(content)
+                if isinstance(data, dict):
+                    metadata.update({
+                        "id": data.get("id"),
+                        "type": data.get("type") or data.get("content_type") or "unknown",
+                        "title": data.get("title", file_path.stem),
+                        "tags": data.get("tags", []),
+                        "created": data.get("created", ""),
+                        "priority": data.get("priority", "")
+                    })
+            elif content.startswith('---'):
+                # Extract YAML frontmatter
+                parts = content.split('---', 2)
+                if len(parts) >= 3:
+                    import yaml
+                    frontmatter = yaml.safe_load(parts[1])
+                    if isinstance(frontmatter, dict):
+                        metadata.update(frontmatter)
+        except Exception:
+            pass
+
+        if not isinstance(metadata.get("tags"), list):
+            metadata["tags"] = []
+        return metadata
+
+    def _extract_words(self, text: str) -> List[str]:
+        """Extract the words of a ranked query."""
+        return [word for word in tokenize(text) if len(word) > 2 and word not in STOP_WORDS]
+
+    def _get_most_common_tags(self, limit: int) -> List[Tuple[str, int]]:
+        """Get most commonly used tags."""
+        tag_counts = [(tag, len(docs)) for tag, docs in self._tag_docs.items()]
+        tag_counts.sort(key=lambda x: (-x[1], x[0]))
+        return tag_counts[:limit]
+
+    def _suggest(self, rel_path: str, tags: List[str]) -> None:
+        """Bring the suggestions for a document and its tags up to date."""
+        if self._suggestion_batch is not None:
+            self._suggestion_batch[0].add(rel_path)
+            self._suggestion_batch[1].update(tags)
+            return
+        self._apply_suggestions({rel_path}, set(tags))
+
+    def _begin_suggestions(self) -> None:
+        """Collect suggestion changes instead of applying them one at a time."""
+        self._suggestion_batch = (set(), set())
+
+    def _end_suggestions(self) -> None:
+        """Apply the suggestion changes collected since _begin_suggestions()."""
+        paths, tags = self._suggestion_batch
+        self._suggestion_batch = None
+        if len(paths) > self.SUGGESTION_BULK_THRESHOLD:
+            self.suggestions.load(
+                [self._suggestion_fields(path, self._docs[doc_id]) for path, doc_id in self._paths.items()],
+                {tag: len(docs) for tag, docs in self._tag_docs.items()}
+            )
+        else:
+            self._apply_suggestions(paths, tags)
+
+    def _apply_suggestions(self, paths: Set[str], tags: Set[str]) -> None:
+        """Update the suggestions of some documents and tags."""
+        for rel_path in paths:
+            doc_id = self._paths.get(rel_path)
+            if doc_id is None:
+                self.suggestions.remove_content(rel_path)
+            else:
+                self.suggestions.set_content(*self._suggestion_fields(rel_path, self._docs[doc_id]))
+        for tag in tags:
+            self.suggestions.set_tag(tag, len(self._tag_docs.get(tag, ())))
+
+    def _suggestion_fields(self, rel_path: str, doc: Dict[str, Any]) -> Tuple[str, str, Optional[str], str, str]:
+        """Get the arguments of SuggestionIndex.set_content() for a document."""
+        metadata = doc["metadata"]
+        return (rel_path, str(metadata.get("title", "")), metadata.get("id"), doc["type"], str(self.data_dir / rel_path))
+
+    def _update_term_suggestions(self) -> None:
+        """Offer the most frequent body terms as suggestions."""
+        df: Dict[str, int] = {}
+        if self._segment is not None and len(self._segment):
+            counts = self._segment.df_counts
+            # Leave room for the stop words and short terms filtered below
+            wanted = min(counts.size, self.SUGGESTED_TERMS + len(STOP_WORDS) + 100)
+            for i in np.argpartition(-counts, wanted - 1)[:wanted].tolist():
+                df[self._segment.terms[i]] = int(counts[i])
+        for term, postings in self._postings.items():
+            df[term] = df.get(term, 0) + len(postings)
+
+        max_df = max(self.SUGGESTION_MIN_DF, self.SUGGESTION_MAX_DF_RATIO * len(self._docs))
+        candidates = [
+            (count, term) for term, count in df.items()
+            if self.SUGGESTION_MIN_DF <= count <= max_df
+            and len(term) > 2 and term not in STOP_WORDS and not term.isdigit()
+        ]
+        self.suggestions.set_terms({
+            term: count for count, term in heapq.nlargest(self.SUGGESTED_TERMS, candidates)
+        })
+
+    # Persistence
+
+    def _clear(self) -> None:
+        """Empty the in-memory index."""
+        self._docs.clear()
+        self._paths.clear()
+        self._tag_docs.clear()
+        self._type_docs.clear()
+        self._kind_docs.clear()
+        self._dirs.clear()
+        self._next_id = 0
+        self._field_totals = dict.fromkeys(self.FIELDS, 0)
+        self._lengths = np.zeros((0, len(self.FIELDS)), dtype=np.float32)
+        self._segment = None
+        self._base_limit = 0
+        self._dead = np.zeros(0, dtype=bool)
+        self._postings.clear()
+        for field_postings in self._field_postings.values():
+            field_postings.clear()
+        self._sorted_terms = None
+        self._term_fuzzy = None
+        self._tag_fuzzy = None
+        self.suggestions.clear()
+
+    def _light(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Strip the per-document term maps that the base postings replace."""
+        return {key: value for key, value in doc.items() if key not in self._LIVE_KEYS}
+
+    def _seal(self) -> Dict[str, Any]:
+        """Close the active delta and capture what a merge folds into the next base."""
+        generation = self._generation
+        self._generation += 1
+        self._delta_records = 0
+        return {
+            "generation": generation,
+            "segment": self._segment,
+            "dead": self._dead.copy(),
+            "live": [(doc_id, doc) for doc_id, doc in self._docs.items() if doc_id >= self._base_limit],
+            "docs": {
+                doc_id: doc if doc_id < self._base_limit else self._light(doc)
+                for doc_id, doc in self._docs.items()
+            },
+            "dirs": dict(self._dirs),
+            "next_id": self._next_id
+        }
+
+    def _run_merge(self, snapshot: Dict[str, Any]) -> None:
+        """Merge on the background thread."""
+        try:
+            self._merge_snapshot(snapshot)
+        except Exception as e:
+            logger.error(f"Background search index merge failed: {e}")
+        finally:
+            self._merge_lock.release()
+
+    def _merge_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        """Write a base segment from a sealed snapshot and switch to it."""
+        generation = snapshot["generation"]
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        postings_path = self.index_dir / f"search_postings.{generation:06d}.bin"
+        terms, offsets, df = PostingsSegment.write(postings_path, self._merged_postings(snapshot))
+        segment = PostingsSegment(postings_path, terms, offsets, df)
+
+        self._write_base({
+            "version": INDEX_VERSION,
+            "generation": generation,
+            "docs": snapshot["docs"],
+            "dirs": snapshot["dirs"],
+            "next_id": snapshot["next_id"],
+            "postings": {"file": postings_path.name, "terms": terms, "offsets": offsets, "df": df}
+        })
+
+        with self._lock:
+            self._segment = segment
+            self._base_limit = snapshot["next_id"]
+            # Mask the merged documents that were removed while merging
+            self._dead = np.zeros(self._base_limit, dtype=bool)
+            merged = np.fromiter(snapshot["docs"], dtype=np.int64, count=len(snapshot["docs"]))
+            if merged.size:
+                self._dead[merged] = [doc_id not in self._docs for doc_id in merged.tolist()]
+
+            self._postings.clear()
+            for field_postings in self._field_postings.values():
+                field_postings.clear()
+            self._sorted_terms = None
+            for doc_id, doc in self._docs.items():
+                if doc_id < self._base_limit:
+                    self._docs[doc_id] = snapshot["docs"][doc_id]
+                else:
+                    self._add_live_postings(doc_id, doc)
+            self._update_term_suggestions()
+
+    def _merged_postings(self, snapshot: Dict[str, Any]) -> Iterator[Tuple[str, Dict[int, Any]]]:
+        """Combine the surviving base postings with the live documents, term by term."""
+        segment, dead = snapshot["segment"], snapshot["dead"]
+
+        # term -> ([doc IDs], [values]) for the live documents, in doc ID order
+        live_body: Dict[str, Tuple[List[int], List[List[int]]]] = {}
+        live_fields: Dict[int, Dict[str, Tuple[List[int], List[int]]]] = {TITLE: {}, TAGS: {}}
+        for doc_id, doc in sorted(snapshot["live"], key=lambda item: item[0]):
+            for term, positions in doc["body"].items():
+                entry = live_body.get(term)
+                if entry is None:
+                    live_body[term] = entry = ([], [])
+                entry[0].append(doc_id)
+                entry[1].append(positions)
+            for block, key in ((TITLE, "title"), (TAGS, "tag_terms")):
+                for term, count in doc[key].items():
+                    entry = live_fields[block].setdefault(term, ([], []))
+                    entry[0].append(doc_id)
+                    entry[1].append(count)
+
+        terms = set(live_body).union(live_fields[TITLE], live_fields[TAGS])
+        if segment is not None:
+            terms.update(segment.terms)
+
+        for term in sorted(terms):
+            if segment is not None:
+                docs, counts, flat = segment.positions(term)
+                if docs.size:
+                    keep = ~dead[docs]
+                    flat = flat[np.repeat(keep, counts)]
+                    docs, counts = docs[keep], counts[keep]
+            else:
+                docs, counts, flat = _EMPTY, _EMPTY, _EMPTY
+            entry = live_body.get(term)
+            if entry is not None:
+                live_ids, live_positions = entry
+                docs = np.concatenate((docs, np.asarray(live_ids, dtype=np.int64)))
+                counts = np.concatenate((counts, np.fromiter(map(len, live_positions), dtype=np.int64)))
+                flat = np.concatenate((flat, np.fromiter(itertools.chain.from_iterable(live_positions), dtype=np.int64)))
+            blocks: Dict[int, Any] = {BODY: (docs, counts, flat)}
+
+            for block in (TITLE, TAGS):
+                field_docs, tf = segment.field(term, block) if segment is not None else (_EMPTY, _EMPTY)
+                if field_docs.size:
+                    keep = ~dead[field_docs]
+                    field_docs, tf = field_docs[keep], tf[keep]
+                entry = live_fields[block].get(term)
+                if entry is not None:
+                    field_docs = np.concatenate((field_docs, np.asarray(entry[0], dtype=np.int64)))
+                    tf = np.concatenate((tf, np.asarray(entry[1], dtype=np.int64)))
+                blocks[block] = (field_docs, tf)
+
+            if any(blocks[block][0].size for block in (BODY, TITLE, TAGS)):
+                yield term, blocks
+
+    def _load(self) -> None:
+        """Load the base segment and replay the delta segments after it."""
+        self._begin_suggestions()
+        try:
+            self._load_segments()
+        finally:
+            self._end_suggestions()
+        self._update_term_suggestions()
+
+    def _load_segments(self) -> None:
+        """Read the base segment and the deltas into the empty index."""
+        state = None
+        discarded = False
+        try:
+            with open(self.index_path, 'rb') as f:
+                state = pickle.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Discarding unreadable search index {self.index_path}: {e}")
+            discarded = True
+
+        base_generation = 0
+        if state is not None and state.get("version") != INDEX_VERSION:
+            logger.info(f"Search index {self.index_path} has an old format; rebuilding it")
+            discarded = True
+        elif state is not None:
+            postings = state["postings"]
+            try:
+                self._segment = PostingsSegment(
+                    self.index_dir / postings["file"], postings["terms"], postings["offsets"], postings["df"]
+                )
+            except StorageError as e:
+                logger.warning(f"Discarding search index with unreadable postings: {e}")
+                discarded = True
+            else:
+                base_generation = state["generation"]
+                self._base_limit = state["next_id"]
+                self._dead = np.zeros(self._base_limit, dtype=bool)
+                self._dirs = state["dirs"]
+                for doc_id, doc in state["docs"].items():
+                    self._put_doc(doc_id, doc)
+
+        self._generation = base_generation + 1
+        for generation, path in self._delta_segments():
+            if generation <= base_generation:
+                continue
+            if discarded:
+                # Deltas on top of a discarded base cannot be replayed
+                path.unlink()
+                continue
+            self._generation = max(self._generation, generation)
+            self._delta_records += self._replay(path)
+
+    def _replay(self, path: Path) -> int:
+        """Apply the records of one delta segment; returns how many were read."""
+        count = 0
+        offset = 0
+        with open(path, 'r+b') as f:
+            while True:
+                try:
+                    record = pickle.load(f)
+                except EOFError:
+                    break
+                except Exception:
+                    # A torn final record from an interrupted append
+                    logger.warning(f"Truncating invalid search index record in {path}")
+                    f.truncate(offset)
+                    break
+                offset = f.tell()
+                count += 1
+                if record[0] == "put":
+                    self._put_doc(record[1], record[2])
+                elif record[0] == "del":
+                    self._drop_doc(record[1])
+                elif record[0] == "dir":
+                    if record[2] is None:
+                        self._dirs.pop(record[1], None)
+                    else:
+                        self._dirs[record[1]] = record[2]
+        return count
+
+    def _delta_segments(self) -> List[Tuple[int, Path]]:
+        """List the delta segment files by generation."""
+        segments = []
+        for path in self.index_dir.glob("search_delta.*.log"):
+            try:
+                segments.append((int(path.name.split(".")[1]), path))
+            except ValueError:
+                continue
+        return sorted(segments)
+
+    def _delta_path(self, generation: int) -> Path:
+        """Get the path of the delta segment of a generation."""
+        return self.index_dir / f"search_delta.{generation:06d}.log"
+
+    def _flush(self, merge: bool = True) -> bool:
+        """
+        Append pending records to the active delta segment.
+
+        Args:
+            merge: Start a background merge if the deltas grew large enough
+
+        Returns:
+            True if there were changes to write
+        """
+        if not self._pending:
+            return False
+        records, self._pending = self._pending, []
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            data = b"".join(pickle.dumps(r, protocol=pickle.HIGHEST_PROTOCOL) for r in records)
+            with open(self._delta_path(self._generation), 'ab') as f:
+                f.write(data)
+        except Exception as e:
+            logger.error(f"Error writing search index delta: {e}")
+            raise StorageError(f"Failed to write search index delta: {e}")
+        self._delta_records += len(records)
+
+        threshold = max(self.MERGE_MIN_RECORDS, self.MERGE_RATIO * len(self._docs))
+        if merge and self._delta_records > threshold:
+            if self._segment is None:
+                self._merge_now()
+            else:
+                self.merge(background=True)
+        return True
+
+    def _merge_now(self) -> None:
+        """
+        Merge on the calling thread while the deltas are the whole index.
+
+        Without a base segment a short-lived process that exits before a
+        background merge finishes leaves every later start replaying all of
+        the deltas. The caller holds the index lock, so this only merges if
+        no background merge holds the merge lock.
+        """
+        if not self._merge_lock.acquire(blocking=False):
+            return
+        try:
+            self._merge_snapshot(self._seal())
+        finally:
+            self._merge_lock.release()
+
+    def _write_base(self, state: Dict[str, Any]) -> None:
+        """Write a base segment atomically and delete the files it supersedes."""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.index_dir, prefix=".search_index.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self.index_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            for generation, path in self._delta_segments():
+                if generation <= state["generation"]:
+                    path.unlink()
+            for path in self.index_dir.glob("search_postings.*.bin"):
+                if path.name != state["postings"]["file"]:
+                    path.unlink()
+        except Exception as e:
+            logger.error(f"Error saving search index: {e}")
+            raise StorageError(f"Failed to save search index: {e}")
+        logger.info(f"Merged search index segments into generation {state['generation']}")
+
+
+def main():
+    """Command line interface for search index."""
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python search_index.py <command>")
+        print("Commands: rebuild, search <query>, stats")
+        return
+
+    index = SearchIndex()
+    command = sys.argv[1]
+
+    if command == "rebuild":
+        index.rebuild()
+        print("Index rebuilt successfully.")
+
+    elif command == "search" and len(sys.argv) > 2:
+        index.refresh()
+        query = " ".join(sys.argv[2:])
+        results = index.search(query)
+        print(f"Found {len(results)} results for '{query}':")
+        for result in results[:10]:  # Show top 10
+            print(f"  {result['title']} ({result['type']}) - Score: {result['score']:.1f}")
+
+    elif command == "stats":
+        index.refresh()
+        stats = index.get_statistics()
+        print("Search Index Statistics:")
+        print(f"  Total files: {stats['total_files']}")
+        print(f"  Total words indexed: {stats['total_words']}")
+        print(f"  Total tags: {stats['total_tags']}")
+        print(f"  Files by type: {stats['files_by_type']}")
+        print(f"  Most common tags: {stats['most_common_tags'][:5]}")
+
+    else:
+        print("Invalid command or missing arguments.")
+
+
+if __name__ == "__main__":
+    main()
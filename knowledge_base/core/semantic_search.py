@@ -3,30 +3,35 @@ Semantic Search
 Implements semantic search functionality using vector embeddings.
 """
 
-import json
+import hashlib
 import logging
 import os
-import math
 import re
+import threading
+import time
 import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Any, Tuple, Union
-from datetime import datetime, timezone
 import heapq
 
-try:
-    import sklearn.metrics.pairwise as pw
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
-
 from knowledge_base.utils.helpers import (
-    KnowledgeBaseError, NotFoundError, StorageError, ValidationError
+    KnowledgeBaseError, NotFoundError, ValidationError
 )
+from knowledge_base.utils.config import Config
 from knowledge_base.core.content_manager import ContentManager
+from knowledge_base.core.embeddings import EmbeddingBackend, MockEmbeddingBackend, create_embedding_backend
+from knowledge_base.core.embedding_store import EmbeddingStore, migrate_json_index
+from knowledge_base.core.ann_index import IVFIndex
 
 logger = logging.getLogger(__name__)
 
+# Content fields answered from the embedding metadata without reading files
+METADATA_FIELDS = frozenset({
+    "id", "title", "content_type", "_content_type", "category", "tags", "created", "last_modified"
+})
+
 
 class SemanticSearch:
     """
@@ -44,7 +49,13 @@ class SemanticSearch:
         base_path: str = ".", 
         content_manager: Optional[ContentManager] = None,
         embedding_dimension: int = 768,
-        use_mock_embeddings: bool = False
+        use_mock_embeddings: bool = False,
+        ann_nprobe: int = 8,
+        ann_min_size: int = 2048,
+        batch_size: int = 64,
+        max_workers: int = 4,
+        embedding_backend: Optional[EmbeddingBackend] = None,
+        config: Optional[Dict[str, Any]] = None
     ):
         """
         Initialize the semantic search engine.
@@ -54,81 +65,81 @@ class SemanticSearch:
             content_manager: Optional content manager instance
             embedding_dimension: Dimension of the embedding vectors
             use_mock_embeddings: Use mock embeddings for testing (no external dependencies)
+            ann_nprobe: ANN cells scanned per query; higher is slower with better recall
+            ann_min_size: Number of embeddings below which searches are exact
+            batch_size: Content items per batch in batch_create_embeddings
+            max_workers: Worker threads preparing batches of embeddings
+            embedding_backend: Backend to generate embeddings with; defaults to
+                the backend named in the ``embeddings`` config section
+            config: Loaded configuration; read from base_path if not given
         """
         self.base_path = Path(base_path)
         self.content_manager = content_manager or ContentManager(base_path)
         self.embedding_dimension = embedding_dimension
         self.use_mock_embeddings = use_mock_embeddings
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        
+        # Progress and throughput of the current or last batch run
+        self._pipeline_lock = threading.Lock()
+        self._pipeline_stats: Dict[str, Any] = self._new_pipeline_stats(0, 0)
+        self._refresh_summary: Optional[Dict[str, Any]] = None
         
         # Directory for storing embeddings
         self.embeddings_dir = self.base_path / "data" / "embeddings"
         self.embeddings_dir.mkdir(parents=True, exist_ok=True)
         
-        # Embeddings index file
-        self.embeddings_index_path = self.embeddings_dir / "embeddings_index.json"
-        
-        # Check if sklearn is available for cosine similarity
-        if not SKLEARN_AVAILABLE and not use_mock_embeddings:
-            logger.warning("scikit-learn not available. Falling back to mock embeddings.")
-            self.use_mock_embeddings = True
-        
-        # Initialize or load embeddings index
-        self._ensure_index_exists()
-        
-    def _ensure_index_exists(self) -> None:
-        """Ensure the embeddings index file exists."""
-        if not self.embeddings_index_path.exists():
-            # Create empty index
-            self._save_index({
-                "metadata": {
-                    "created": datetime.now(timezone.utc).isoformat(),
-                    "embedding_dimension": self.embedding_dimension,
-                    "count": 0
-                },
-                "embeddings": {}
-            })
-    
-    def _load_index(self) -> Dict[str, Any]:
-        """Load the embeddings index."""
-        try:
-            with open(self.embeddings_index_path, 'r') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {
-                "metadata": {
-                    "created": datetime.now(timezone.utc).isoformat(),
-                    "embedding_dimension": self.embedding_dimension,
-                    "count": 0
-                },
-                "embeddings": {}
-            }
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid embeddings index JSON: {e}")
-            # If corrupted, create a backup and start with empty index
-            if self.embeddings_index_path.exists():
-                backup_path = self.embeddings_index_path.with_suffix('.json.bak')
-                self.embeddings_index_path.rename(backup_path)
-                logger.info(f"Corrupted index backed up to {backup_path}")
-            return {
-                "metadata": {
-                    "created": datetime.now(timezone.utc).isoformat(),
-                    "embedding_dimension": self.embedding_dimension,
-                    "count": 0
-                },
-                "embeddings": {}
-            }
-        except Exception as e:
-            logger.error(f"Error loading embeddings index: {e}")
-            raise StorageError(f"Failed to load embeddings index: {e}")
+        # Memory-mapped vector store; replaces the legacy JSON index
+        self.legacy_index_path = self.embeddings_dir / "embeddings_index.json"
+        self._vector_store = EmbeddingStore(self.embeddings_dir, embedding_dimension)
+        self.embedding_dimension = self._vector_store.dimension
+        
+        # Embedding backend, behind the persistent embedding cache
+        if embedding_backend is not None:
+            self.embedding_backend = embedding_backend
+        elif use_mock_embeddings:
+            self.embedding_backend = MockEmbeddingBackend(self.embedding_dimension)
+        else:
+            if config is None:
+                config = Config(self.base_path).load_config()
+            self.embedding_backend = create_embedding_backend(
+                config.get("embeddings"),
+                self.embedding_dimension,
+                cache_path=self.embeddings_dir / "embedding_cache.sqlite3"
+            )
+        if self.embedding_backend.dimension != self.embedding_dimension:
+            logger.warning(
+                f"Embedding backend dimension {self.embedding_backend.dimension} "
+                f"does not match store dimension {self.embedding_dimension}"
+            )
+        
+        # A legacy JSON index is only moved over by migrate_legacy_index()
+        if self.legacy_index_path.exists():
+            logger.info(
+                f"Legacy embeddings index {self.legacy_index_path} is not in use; "
+                f"run the migrate-embeddings command to move it into the vector store"
+            )
+        
+        # Approximate nearest-neighbour index over the store
+        self.ann_index = IVFIndex(
+            self._vector_store,
+            self.embeddings_dir / "ivf_centroids.npy",
+            nprobe=ann_nprobe,
+            min_train_size=ann_min_size
+        )
     
-    def _save_index(self, index: Dict[str, Any]) -> None:
-        """Save the embeddings index."""
-        try:
-            with open(self.embeddings_index_path, 'w') as f:
-                json.dump(index, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error saving embeddings index: {e}")
-            raise StorageError(f"Failed to save embeddings index: {e}")
+    def _get_vector_store(self) -> EmbeddingStore:
+        """
+        Get the vector store, reloading it if another process changed it.
+        
+        Returns:
+            EmbeddingStore holding every stored embedding
+        """
+        if self._vector_store.reload_if_changed():
+            self.ann_index.rebuild()
+        else:
+            self.ann_index.refresh()
+        return self._vector_store
     
     def _generate_embedding(self, text: str) -> List[float]:
         """
@@ -140,36 +151,21 @@ class SemanticSearch:
         Returns:
             Embedding vector as a list of floats
         """
-        if self.use_mock_embeddings:
-            # For testing, generate a deterministic mock embedding
-            # based on the text content (hash-based)
-            import hashlib
-            
-            hash_obj = hashlib.md5(text.encode())
-            hash_bytes = hash_obj.digest()
-            
-            # Use hash to seed a random generator for deterministic output
-            import random
-            random.seed(hash_bytes)
-            
-            # Generate a mock embedding vector
-            mock_embedding = [
-                random.uniform(-1, 1) for _ in range(self.embedding_dimension)
-            ]
-            
-            # Normalize the vector to unit length
-            norm = math.sqrt(sum(x*x for x in mock_embedding))
-            if norm > 0:
-                mock_embedding = [x/norm for x in mock_embedding]
-                
-            return mock_embedding
-        else:
-            # In a real implementation, this would call an embedding service or library
-            # For example, using sentence-transformers or an OpenAI API
+        return self._generate_embeddings([text])[0]
+    
+    def _generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embedding vectors for a batch of texts.
+        
+        Args:
+            texts: Texts to generate embeddings for
             
-            # Placeholder - should be replaced with actual embedding generation
-            logger.warning("External embedding service not configured. Using mock embedding.")
-            return self._generate_embedding(text)
+        Returns:
+            Embedding vectors in the same order as the texts
+        """
+        if not texts:
+            return []
+        return self.embedding_backend.embed(texts)
     
     def create_content_embedding(self, content_id: str) -> bool:
         """
@@ -272,47 +268,207 @@ class SemanticSearch:
             embedding: Embedding vector
             content: Content data for metadata
         """
-        # Load current index
-        index = self._load_index()
-        
-        # Add or update embedding
-        index["embeddings"][content_id] = {
-            "vector": embedding,
-            "metadata": {
-                "title": content.get("title", ""),
-                "content_type": content.get("_content_type", ""),
-                "category": content.get("category", ""),
-                "tags": content.get("tags", []),
-                "path": content.get("path", ""),
-                "created": content.get("created", ""),
-                "last_modified": content.get("last_modified", "")
-            }
-        }
+        metadata = self._embedding_metadata(content)
+        
+        # Writes one vector row and one metadata record
+        row = self._get_vector_store().add(content_id, embedding, metadata)
+        self.ann_index.add(row)
+    
+    def _embedding_metadata(self, content: Dict[str, Any], text: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build the metadata stored alongside an embedding.
         
-        # Update metadata
-        index["metadata"]["count"] = len(index["embeddings"])
-        index["metadata"]["last_updated"] = datetime.now(timezone.utc).isoformat()
+        Besides the fields used for filters and results, this records the
+        modification time of the content file and a fingerprint of the
+        embedded text, which refresh_embeddings uses to skip unchanged items.
         
-        # Save index
-        self._save_index(index)
+        Args:
+            content: Content data
+            text: Text the embedding was generated from, if already extracted
+            
+        Returns:
+            Metadata dictionary used for filters and results
+        """
+        if text is None:
+            text = self._extract_text_for_embedding(content)
+        return {
+            "title": content.get("title", ""),
+            "content_type": content.get("_content_type", ""),
+            "category": content.get("category", ""),
+            "tags": content.get("tags", []),
+            "path": content.get("path", ""),
+            "created": content.get("created", ""),
+            "last_modified": content.get("last_modified", ""),
+            "source_mtime": self._file_mtime(content.get("_filepath")),
+            "fingerprint": self._text_fingerprint(text)
+        }
+    
+    @staticmethod
+    def _text_fingerprint(text: str) -> str:
+        """Hash the text an embedding is generated from."""
+        return hashlib.sha1(text.encode()).hexdigest()
+    
+    @staticmethod
+    def _file_mtime(filepath: Optional[str]) -> Optional[float]:
+        """Get the modification time of a content file, if it exists."""
+        if not filepath:
+            return None
+        try:
+            return os.stat(filepath).st_mtime
+        except OSError:
+            return None
     
-    def batch_create_embeddings(self, content_ids: List[str]) -> Dict[str, bool]:
+    def batch_create_embeddings(
+        self,
+        content_ids: List[str],
+        batch_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[Any] = None
+    ) -> Dict[str, bool]:
         """
         Create embeddings for multiple content items.
         
+        Batches are prepared on a worker pool (content fetch, text extraction
+        and embedding generation) and committed to the store one batch at a
+        time, in order, from the calling thread. Only a bounded number of
+        batches is in flight at once.
+        
         Args:
             content_ids: List of content IDs
+            batch_size: Content items per batch (defaults to self.batch_size)
+            max_workers: Worker threads (defaults to self.max_workers)
+            progress_callback: Optional callable receiving the pipeline stats
+                after each committed batch
             
         Returns:
             Dictionary mapping content IDs to success status
         """
-        results = {}
+        batch_size = max(1, batch_size or self.batch_size)
+        max_workers = max(1, max_workers or self.max_workers)
+        content_ids = list(dict.fromkeys(content_ids))
+        batches = [content_ids[i:i + batch_size] for i in range(0, len(content_ids), batch_size)]
         
-        for content_id in content_ids:
-            results[content_id] = self.create_content_embedding(content_id)
+        with self._pipeline_lock:
+            self._pipeline_stats = self._new_pipeline_stats(len(content_ids), len(batches))
+        
+        results: Dict[str, bool] = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="embedding") as pool:
+                pending = deque()
+                next_batch = 0
+                while next_batch < len(batches) or pending:
+                    # Keep the workers busy without preparing the whole run up front
+                    while next_batch < len(batches) and len(pending) < 2 * max_workers:
+                        pending.append(pool.submit(self._prepare_batch, batches[next_batch]))
+                        next_batch += 1
+                    
+                    batch_results, entries = pending.popleft().result()
+                    results.update(batch_results)
+                    self._commit_batch(entries, results)
+                    
+                    with self._pipeline_lock:
+                        stats = self._pipeline_stats
+                        stats["batches_done"] += 1
+                        stats["processed"] += len(batch_results)
+                        stats["succeeded"] = sum(1 for ok in results.values() if ok)
+                        stats["failed"] = len(results) - stats["succeeded"]
+                    
+                    if progress_callback is not None:
+                        progress_callback(self.get_pipeline_stats())
+        finally:
+            with self._pipeline_lock:
+                self._pipeline_stats["running"] = False
+                self._pipeline_stats["finished"] = time.time()
         
         return results
     
+    def _prepare_batch(self, content_ids: List[str]) -> Tuple[Dict[str, bool], List[Tuple[str, List[float], Dict[str, Any]]]]:
+        """
+        Fetch content and generate embeddings for one batch.
+        
+        Args:
+            content_ids: IDs in the batch
+            
+        Returns:
+            Tuple of (status per ID, store entries for the IDs that succeeded)
+        """
+        results = {content_id: False for content_id in content_ids}
+        try:
+            contents = self.content_manager.get_contents(content_ids)
+            for content_id in content_ids:
+                if content_id not in contents:
+                    logger.warning(f"Content not found for embedding: {content_id}")
+            
+            found = list(contents)
+            texts = [self._extract_text_for_embedding(contents[content_id]) for content_id in found]
+            embeddings = self._generate_embeddings(texts)
+            entries = [
+                (content_id, embedding, self._embedding_metadata(contents[content_id], text))
+                for content_id, embedding, text in zip(found, embeddings, texts)
+            ]
+        except Exception as e:
+            logger.error(f"Error preparing embedding batch: {e}")
+            return results, []
+        
+        for content_id, _, _ in entries:
+            results[content_id] = True
+        return results, entries
+    
+    def _commit_batch(
+        self,
+        entries: List[Tuple[str, List[float], Dict[str, Any]]],
+        results: Dict[str, bool]
+    ) -> None:
+        """
+        Write one batch of embeddings to the store and the ANN index.
+        
+        Args:
+            entries: (content_id, embedding, metadata) tuples
+            results: Status per ID, updated if the write fails
+        """
+        if not entries:
+            return
+        try:
+            rows = self._get_vector_store().add_many(entries)
+        except Exception as e:
+            logger.error(f"Error storing embedding batch: {e}")
+            for content_id, _, _ in entries:
+                results[content_id] = False
+            return
+        for row in rows:
+            self.ann_index.add(row)
+    
+    @staticmethod
+    def _new_pipeline_stats(total: int, batches: int) -> Dict[str, Any]:
+        """Create the counters for a batch run."""
+        return {
+            "running": total > 0,
+            "total": total,
+            "processed": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "batches_total": batches,
+            "batches_done": 0,
+            "started": time.time(),
+            "finished": None
+        }
+    
+    def get_pipeline_stats(self) -> Dict[str, Any]:
+        """
+        Get progress and throughput of the current or last batch run.
+        
+        Returns:
+            Dictionary of counters, elapsed seconds and items per second
+        """
+        with self._pipeline_lock:
+            stats = dict(self._pipeline_stats)
+        end = stats["finished"] or time.time()
+        stats["elapsed_seconds"] = max(0.0, end - stats["started"])
+        stats["items_per_second"] = (
+            stats["processed"] / stats["elapsed_seconds"] if stats["elapsed_seconds"] > 0 else 0.0
+        )
+        return stats
+    
     def search(
         self, 
         query: str, 
@@ -320,7 +476,9 @@ class SemanticSearch:
         content_types: Optional[List[str]] = None,
         categories: Optional[List[str]] = None,
         tags: Optional[List[str]] = None,
-        min_similarity: float = 0.0
+        min_similarity: float = 0.0,
+        fields: Optional[List[str]] = None,
+        hydrate: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Perform a semantic search.
@@ -332,87 +490,132 @@ class SemanticSearch:
             categories: Optional filter by categories
             tags: Optional filter by tags
             min_similarity: Minimum similarity score (0.0 - 1.0)
+            fields: Optional content fields to return (see hydrate_results)
+            hydrate: Whether to read the content of the results. If False,
+                each content is built from the embedding metadata only, and
+                hydrate_results can fetch the bodies later
             
         Returns:
             List of search results with content and similarity scores
         """
         try:
-            # Generate query embedding
-            query_embedding = self._generate_embedding(query)
-            
-            # Load embeddings
-            index = self._load_index()
-            embeddings = index["embeddings"]
+            hits = self.search_hits(query, top_k, content_types, categories, tags, min_similarity)
+            store = self._vector_store
             
-            if not embeddings:
-                logger.warning("No embeddings available for search")
-                return []
-            
-            # Calculate similarities and filter by criteria
-            results = []
-            
-            for content_id, embedding_data in embeddings.items():
-                # Get embedding vector and metadata
-                vector = embedding_data["vector"]
-                metadata = embedding_data["metadata"]
-                
-                # Filter by content type if specified
-                if content_types and metadata["content_type"] not in content_types:
-                    continue
-                
-                # Filter by category if specified
-                if categories and metadata["category"] not in categories:
-                    continue
-                
-                # Filter by tags if specified
-                if tags:
-                    # Check if any specified tag is in the content tags
-                    content_tags = metadata["tags"]
-                    if not any(tag in content_tags for tag in tags):
-                        continue
-                
-                # Calculate similarity
-                similarity = self._calculate_similarity(query_embedding, vector)
-                
-                # Filter by minimum similarity
-                if similarity < min_similarity:
-                    continue
-                
-                # Add to results
-                results.append({
+            results = [
+                {
                     "content_id": content_id,
                     "similarity": similarity,
-                    "metadata": metadata
-                })
+                    "metadata": store.get_metadata(content_id)
+                }
+                for content_id, similarity in hits
+            ]
             
-            # Sort by similarity (descending)
-            results.sort(key=lambda x: x["similarity"], reverse=True)
+            if hydrate:
+                self.hydrate_results(results, fields)
+            else:
+                for result in results:
+                    result["content"] = self._metadata_content(result["content_id"], result["metadata"], fields)
             
-            # Take top k
-            results = results[:top_k]
+            return results
             
-            # Fetch full content for results
-            for result in results:
-                try:
-                    result["content"] = self.content_manager.get_content(result["content_id"])
-                except NotFoundError:
-                    # Content not found, use metadata only
-                    result["content"] = {
-                        "id": result["content_id"],
-                        "title": result["metadata"]["title"],
-                        "content_type": result["metadata"]["content_type"],
-                        "_not_found": True
-                    }
-                except Exception as e:
-                    logger.error(f"Error fetching content for {result['content_id']}: {e}")
-                    result["content"] = {
-                        "id": result["content_id"],
-                        "title": result["metadata"]["title"],
-                        "content_type": result["metadata"]["content_type"],
-                        "_error": str(e)
-                    }
+        except Exception as e:
+            logger.error(f"Error performing semantic search: {e}")
+            raise KnowledgeBaseError(f"Semantic search failed: {e}")
+    
+    def hydrate_results(
+        self,
+        results: List[Dict[str, Any]],
+        fields: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Fill in the content of search results with one batched read.
+        
+        Fields kept in the embedding metadata (see METADATA_FIELDS) are
+        served from it; content files are only read when other fields are
+        requested, and the hierarchy only for hierarchy fields.
+        
+        Args:
+            results: Results with content_id and metadata, updated in place
+            fields: Optional content fields to return; all by default
             
+        Returns:
+            The same results
+        """
+        if fields is not None and set(fields) <= METADATA_FIELDS:
+            for result in results:
+                result["content"] = self._metadata_content(result["content_id"], result["metadata"], fields)
             return results
+        
+        error = None
+        try:
+            contents = self.content_manager.get_contents([result["content_id"] for result in results], fields)
+        except Exception as e:
+            logger.error(f"Error fetching content for search results: {e}")
+            contents, error = {}, str(e)
+        
+        for result in results:
+            content = contents.get(result["content_id"])
+            if content is None:
+                # Content not found, use metadata only
+                content = self._metadata_content(result["content_id"], result["metadata"])
+                if error is None:
+                    content["_not_found"] = True
+                else:
+                    content["_error"] = error
+            result["content"] = content
+        return results
+    
+    @staticmethod
+    def _metadata_content(
+        content_id: str,
+        metadata: Dict[str, Any],
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Build a content stub from embedding metadata."""
+        content = {"id": content_id}
+        for field in fields if fields is not None else ("title", "content_type", "category", "tags"):
+            if field in METADATA_FIELDS and field != "id":
+                content[field] = metadata.get(field.lstrip("_"), "")
+        return content
+    
+    def search_hits(
+        self,
+        query: str,
+        top_k: int = 10,
+        content_types: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None,
+        min_similarity: float = 0.0
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank content against a query without fetching any content.
+        
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            content_types: Optional filter by content types
+            categories: Optional filter by categories
+            tags: Optional filter by tags
+            min_similarity: Minimum similarity score (0.0 - 1.0)
+            
+        Returns:
+            List of (content ID, similarity) pairs, most similar first
+        """
+        try:
+            # Generate query embedding
+            query_embedding = self._generate_embedding(query)
+            
+            # Load embeddings
+            store = self._get_vector_store()
+            
+            if not len(store):
+                logger.warning("No embeddings available for search")
+                return []
+            
+            # Filters are applied as a row mask over the ANN candidates
+            mask = store.filter_mask(content_types, categories, tags)
+            return self.ann_index.search(query_embedding, top_k, mask=mask, min_similarity=min_similarity)
             
         except Exception as e:
             logger.error(f"Error performing semantic search: {e}")
@@ -429,30 +632,19 @@ class SemanticSearch:
         Returns:
             Similarity score (0.0 - 1.0)
         """
-        if SKLEARN_AVAILABLE:
-            # Use sklearn's cosine similarity
-            similarity = float(pw.cosine_similarity([vec1], [vec2])[0][0])
-            
-            # Ensure the result is in [0, 1]
-            similarity = max(0.0, min(1.0, similarity))
-            
-            return similarity
-        else:
-            # Manual cosine similarity calculation
-            dot_product = sum(a * b for a, b in zip(vec1, vec2))
-            
-            norm_a = math.sqrt(sum(a * a for a in vec1))
-            norm_b = math.sqrt(sum(b * b for b in vec2))
-            
-            if norm_a == 0 or norm_b == 0:
-                return 0.0
-                
-            similarity = dot_product / (norm_a * norm_b)
-            
-            # Ensure the result is in [0, 1]
-            similarity = max(0.0, min(1.0, similarity))
-            
-            return similarity
+        a = np.asarray(vec1, dtype=np.float32)
+        b = np.asarray(vec2, dtype=np.float32)
+        
+        norm_a = float(np.linalg.norm(a))
+        norm_b = float(np.linalg.norm(b))
+        
+        if norm_a == 0 or norm_b == 0:
+            return 0.0
+        
+        similarity = float(np.dot(a, b)) / (norm_a * norm_b)
+        
+        # Ensure the result is in [0, 1]
+        return max(0.0, min(1.0, similarity))
     
     def similar_content(
         self, 
@@ -473,72 +665,34 @@ class SemanticSearch:
         """
         try:
             # Load embeddings
-            index = self._load_index()
-            embeddings = index["embeddings"]
+            store = self._get_vector_store()
             
-            if content_id not in embeddings:
+            if content_id not in store:
                 # Content not in embedding index, create embedding
                 if not self.create_content_embedding(content_id):
                     logger.warning(f"Could not create embedding for {content_id}")
                     return []
                 
                 # Reload embeddings
-                index = self._load_index()
-                embeddings = index["embeddings"]
-            
-            # Get content embedding
-            content_embedding = embeddings[content_id]["vector"]
-            
-            # Calculate similarities
-            similarities = []
-            
-            for other_id, embedding_data in embeddings.items():
-                # Skip self
-                if other_id == content_id:
-                    continue
-                
-                # Calculate similarity
-                similarity = self._calculate_similarity(content_embedding, embedding_data["vector"])
-                
-                # Filter by minimum similarity
-                if similarity >= min_similarity:
-                    similarities.append((other_id, similarity, embedding_data["metadata"]))
-            
-            # Sort by similarity (descending)
-            similarities.sort(key=lambda x: x[1], reverse=True)
-            
-            # Take top k
-            similarities = similarities[:top_k]
-            
-            # Build results
-            results = []
-            
-            for other_id, similarity, metadata in similarities:
-                try:
-                    content = self.content_manager.get_content(other_id)
-                    results.append({
-                        "content_id": other_id,
-                        "similarity": similarity,
-                        "content": content,
-                        "metadata": metadata
-                    })
-                except NotFoundError:
-                    # Content not found, use metadata only
-                    results.append({
-                        "content_id": other_id,
-                        "similarity": similarity,
-                        "content": {
-                            "id": other_id,
-                            "title": metadata["title"],
-                            "content_type": metadata["content_type"],
-                            "_not_found": True
-                        },
-                        "metadata": metadata
-                    })
-                except Exception as e:
-                    logger.error(f"Error fetching content for {other_id}: {e}")
+                store = self._get_vector_store()
+            
+            # Rank other items against the content's stored vector
+            hits = self.ann_index.search(
+                store.get_vector(content_id),
+                top_k,
+                min_similarity=min_similarity,
+                exclude={content_id}
+            )
+            results = [
+                {
+                    "content_id": other_id,
+                    "similarity": similarity,
+                    "metadata": store.get_metadata(other_id)
+                }
+                for other_id, similarity in hits
+            ]
             
-            return results
+            return self.hydrate_results(results)
             
         except Exception as e:
             logger.error(f"Error finding similar content: {e}")
@@ -552,40 +706,99 @@ class SemanticSearch:
         """
         Refresh embeddings for content items.
         
+        Only new and changed items are re-embedded. An item whose content file
+        has the modification time recorded in its embedding metadata is
+        skipped without being read. If the file changed but the embedded text
+        did not, only the stored metadata is updated. Embeddings whose content
+        no longer exists, including content deleted outside the manager, are
+        deleted. A summary of the run is available from get_refresh_summary().
+        
         Args:
-            content_ids: List of content IDs (None for all)
-            force: Force refresh even if embedding exists
+            content_ids: List of content IDs (None for all content except folders)
+            force: Re-embed every item even if it is unchanged
             
         Returns:
             Dictionary mapping content IDs to success status
         """
         try:
-            # Load current index
-            index = self._load_index()
-            embeddings = index["embeddings"]
+            started = time.time()
+            store = self._get_vector_store()
+            content_index = self.content_manager.content_index
             
-            # Get all content IDs if not specified
+            # Locate the content files without reading them, picking up
+            # files added or removed outside the manager first
             if content_ids is None:
-                # Load all content IDs from content manager
-                # This is a simplified approximation - real implementation would need
-                # a method to get all content IDs from the content manager
-                content_ids = []
-                
-                # Extract existing content IDs from embeddings
-                existing_ids = set(embeddings.keys())
-                content_ids = list(existing_ids)
-            
-            # Track results
-            results = {}
+                content_index.refresh()
+                entries = {
+                    content_id: entry for content_id, entry in content_index.items()
+                    if entry["type"] != "folder"
+                }
+                content_ids = list(entries)
+                orphans = [content_id for content_id in store.ids() if content_id not in entries]
+            else:
+                entries = {content_id: content_index.get_entry(content_id) for content_id in content_ids}
+                orphans = [cid for cid in content_ids if entries[cid] is None and cid in store]
+            
+            results: Dict[str, bool] = {}
+            summary = {"checked": len(content_ids), "added": [], "updated": [], "metadata_updated": [],
+                       "unchanged": 0, "removed": [], "failed": []}
+            to_embed = []
+            to_check = []
             
             for content_id in content_ids:
-                # Skip if embedding exists and not forcing refresh
-                if not force and content_id in embeddings:
+                entry = entries.get(content_id)
+                metadata = store.get_metadata(content_id)
+                if entry is None:
+                    results[content_id] = False
+                elif force or metadata is None:
+                    to_embed.append(content_id)
+                elif metadata.get("source_mtime") == self._file_mtime(entry["filepath"]):
                     results[content_id] = True
+                    summary["unchanged"] += 1
+                else:
+                    to_check.append(content_id)
+            
+            # The file changed; re-embed only if the embedded text changed
+            contents = self.content_manager.get_contents(to_check)
+            for content_id in to_check:
+                content = contents.get(content_id)
+                if content is None:
+                    results[content_id] = False
+                    if self._is_gone(content_id):
+                        orphans.append(content_id)
                     continue
-                
-                # Create or refresh embedding
-                results[content_id] = self.create_content_embedding(content_id)
+                text = self._extract_text_for_embedding(content)
+                if self._text_fingerprint(text) != store.get_metadata(content_id).get("fingerprint"):
+                    to_embed.append(content_id)
+                    continue
+                store.add(content_id, store.get_vector(content_id).copy(), self._embedding_metadata(content, text))
+                results[content_id] = True
+                summary["metadata_updated"].append(content_id)
+            
+            # Create or refresh embeddings in batches
+            existing = {content_id for content_id in to_embed if content_id in store}
+            for content_id, ok in self.batch_create_embeddings(to_embed).items():
+                results[content_id] = ok
+                if ok:
+                    summary["updated" if content_id in existing else "added"].append(content_id)
+                elif content_id in existing and self._is_gone(content_id):
+                    orphans.append(content_id)
+            
+            for content_id in orphans:
+                if self.delete_embedding(content_id):
+                    summary["removed"].append(content_id)
+            orphan_ids = set(orphans)
+            summary["failed"] = [
+                content_id for content_id, ok in results.items() if not ok and content_id not in orphan_ids
+            ]
+            
+            summary["elapsed_seconds"] = time.time() - started
+            self._refresh_summary = summary
+            logger.info(
+                f"Refreshed embeddings: {len(summary['added'])} added, {len(summary['updated'])} updated, "
+                f"{len(summary['metadata_updated'])} metadata updated, {summary['unchanged']} unchanged, "
+                f"{len(summary['removed'])} removed, {len(summary['failed'])} failed"
+            )
             
             return results
             
@@ -593,6 +806,26 @@ class SemanticSearch:
             logger.error(f"Error refreshing embeddings: {e}")
             raise KnowledgeBaseError(f"Embedding refresh failed: {e}")
     
+    def _is_gone(self, content_id: str) -> bool:
+        """
+        Check whether content that could not be read no longer exists.
+        
+        A file deleted behind the content index's back is dropped from it
+        by the failed read; a file that exists but cannot be parsed stays.
+        """
+        return self.content_manager.content_index.lookup(content_id) is None
+    
+    def get_refresh_summary(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the summary of the last refresh_embeddings run.
+        
+        Returns:
+            Dictionary with the IDs that were added, updated, metadata-updated,
+            removed or failed, the number of unchanged and checked items, and
+            the elapsed time; None if no refresh has run
+        """
+        return self._refresh_summary
+    
     def get_embedding_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the embeddings.
@@ -601,9 +834,7 @@ class SemanticSearch:
             Dictionary of statistics
         """
         try:
-            # Load current index
-            index = self._load_index()
-            embeddings = index["embeddings"]
+            store = self._get_vector_store()
             
             # Calculate stats
             content_type_counts = {}
@@ -611,9 +842,7 @@ class SemanticSearch:
             newest_embedding = None
             oldest_embedding = None
             
-            for content_id, embedding_data in embeddings.items():
-                metadata = embedding_data["metadata"]
-                
+            for content_id, metadata in store.items():
                 # Count by content type
                 content_type = metadata["content_type"]
                 content_type_counts[content_type] = content_type_counts.get(content_type, 0) + 1
@@ -643,12 +872,12 @@ class SemanticSearch:
             
             # Build stats
             stats = {
-                "total_embeddings": len(embeddings),
+                "total_embeddings": len(store),
                 "by_content_type": content_type_counts,
                 "by_category": category_counts,
                 "newest_embedding": newest_embedding,
                 "oldest_embedding": oldest_embedding,
-                "metadata": index["metadata"]
+                "metadata": store.info()
             }
             
             return stats
@@ -657,6 +886,27 @@ class SemanticSearch:
             logger.error(f"Error getting embedding stats: {e}")
             raise KnowledgeBaseError(f"Failed to get embedding stats: {e}")
             
+    def migrate_legacy_index(self) -> int:
+        """
+        Move the embeddings of a legacy ``embeddings_index.json`` into the store.
+        
+        This is a one-shot step run on request; the JSON file is renamed to
+        ``embeddings_index.json.migrated`` afterwards.
+        
+        Returns:
+            Number of embeddings migrated
+        """
+        try:
+            store = self._get_vector_store()
+            count = migrate_json_index(self.legacy_index_path, store)
+            if count:
+                self.ann_index.refresh()
+            return count
+            
+        except Exception as e:
+            logger.error(f"Error migrating embeddings index: {e}")
+            raise KnowledgeBaseError(f"Failed to migrate embeddings index: {e}")
+            
     def delete_embedding(self, content_id: str) -> bool:
         """
         Delete an embedding for a content item.
@@ -668,24 +918,11 @@ class SemanticSearch:
             True if deleted, False if not found or error
         """
         try:
-            # Load current index
-            index = self._load_index()
-            embeddings = index["embeddings"]
-            
-            # Check if embedding exists
-            if content_id not in embeddings:
+            store = self._get_vector_store()
+            row = store.get_row(content_id)
+            if not store.remove(content_id):
                 return False
-            
-            # Remove embedding
-            del embeddings[content_id]
-            
-            # Update metadata
-            index["metadata"]["count"] = len(embeddings)
-            index["metadata"]["last_updated"] = datetime.now(timezone.utc).isoformat()
-            
-            # Save index
-            self._save_index(index)
-            
+            self.ann_index.remove(row)
             return True
             
         except Exception as e:
@@ -0,0 +1,505 @@
+"""
+Suggestion Index
+Prefix completion over titles, tags and frequent terms for search suggestions.
+"""
+
+import math
+import heapq
+import logging
+import threading
+from typing import Dict, List, Optional, Any, Set, Tuple, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class _Node:
+    """Radix trie node: an edge label, children by first character and cached best keys."""
+
+    __slots__ = ("label", "children", "key", "top")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.children: Dict[str, "_Node"] = {}
+        # Key ending at this node, if any
+        self.key: Optional[str] = None
+        # Best (-weight, key) pairs in this subtree, best first
+        self.top: List[Tuple[float, str]] = []
+
+
+class CompletionTrie:
+    """
+    Compressed (radix) trie of weighted keys.
+
+    Every node caches the ``top_k`` heaviest keys below it, so completing a
+    prefix costs one walk down the trie and does not depend on how many keys
+    share the prefix. Setting or removing a key refreshes the caches on its
+    path only.
+    """
+
+    def __init__(self, top_k: int = 20):
+        """
+        Initialize an empty trie.
+
+        Args:
+            top_k: Number of best keys cached at each node
+        """
+        self.top_k = top_k
+        self._root = _Node("")
+        self._weights: Dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._weights)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._weights
+
+    def weight(self, key: str) -> Optional[float]:
+        """Get the weight of a key, or None if it is not in the trie."""
+        return self._weights.get(key)
+
+    def set(self, key: str, weight: float) -> None:
+        """
+        Insert a key or change its weight.
+
+        Args:
+            key: Key to set
+            weight: Weight of the key; heavier keys complete first
+        """
+        if self._weights.get(key) == weight:
+            return
+        path = self._insert(key)
+        path[-1].key = key
+        self._weights[key] = weight
+        self._update_tops(path)
+
+    def remove(self, key: str) -> bool:
+        """
+        Remove a key.
+
+        Args:
+            key: Key to remove
+
+        Returns:
+            True if the key was in the trie
+        """
+        if self._weights.pop(key, None) is None:
+            return False
+        path = self._path(key)
+        path[-1].key = None
+
+        # Drop emptied leaves and fold keyless single-child nodes into their child
+        while len(path) > 1:
+            node, parent = path[-1], path[-2]
+            if node.key is not None:
+                break
+            if not node.children:
+                del parent.children[node.label[0]]
+                path.pop()
+                continue
+            if len(node.children) == 1:
+                (child,) = node.children.values()
+                child.label = node.label + child.label
+                parent.children[child.label[0]] = child
+                path[-1] = child
+            break
+        self._update_tops(path)
+        return True
+
+    def build(self, items: Iterable[Tuple[str, float]]) -> None:
+        """
+        Replace every key at once.
+
+        Faster than setting keys one by one, since each node's cache is
+        computed once after all keys are in place.
+
+        Args:
+            items: (key, weight) pairs
+        """
+        self.clear()
+        for key, weight in items:
+            path = self._insert(key)
+            path[-1].key = key
+            self._weights[key] = weight
+
+        # Children before parents
+        order = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.children.values())
+        for node in reversed(order):
+            self._update_tops([node])
+
+    def clear(self) -> None:
+        """Remove every key."""
+        self._root = _Node("")
+        self._weights.clear()
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Get the heaviest keys starting with a prefix.
+
+        Args:
+            prefix: Prefix to complete
+            limit: Maximum number of keys
+
+        Returns:
+            List of (key, weight) pairs, heaviest first
+        """
+        node = self._find(prefix)
+        if node is None or limit <= 0:
+            return []
+        if limit <= self.top_k:
+            best = node.top[:limit]
+        else:
+            best = heapq.nsmallest(limit, self._subtree(node))
+        return [(key, -negative) for negative, key in best]
+
+    def _insert(self, key: str) -> List[_Node]:
+        """Get the path of nodes to a key, creating and splitting nodes as needed."""
+        node = self._root
+        path = [node]
+        i = 0
+        while i < len(key):
+            child = node.children.get(key[i])
+            if child is None:
+                child = _Node(key[i:])
+                node.children[key[i]] = child
+                path.append(child)
+                return path
+
+            label = child.label
+            common = 0
+            limit = min(len(label), len(key) - i)
+            while common < limit and label[common] == key[i + common]:
+                common += 1
+            if common < len(label):
+                # Split the edge where the key leaves it
+                middle = _Node(label[:common])
+                child.label = label[common:]
+                middle.children[child.label[0]] = child
+                middle.top = list(child.top)
+                node.children[key[i]] = middle
+                child = middle
+
+            path.append(child)
+            node = child
+            i += common
+        return path
+
+    def _path(self, key: str) -> List[_Node]:
+        """Get the path of nodes to a key that is in the trie."""
+        node = self._root
+        path = [node]
+        i = 0
+        while i < len(key):
+            node = node.children[key[i]]
+            path.append(node)
+            i += len(node.label)
+        return path
+
+    def _find(self, prefix: str) -> Optional[_Node]:
+        """Get the node whose subtree holds exactly the keys starting with a prefix."""
+        node = self._root
+        i = 0
+        while i < len(prefix):
+            child = node.children.get(prefix[i])
+            if child is None:
+                return None
+            rest = prefix[i:]
+            if rest.startswith(child.label):
+                i += len(child.label)
+                node = child
+            elif child.label.startswith(rest):
+                return child
+            else:
+                return None
+        return node
+
+    def _update_tops(self, path: List[_Node]) -> None:
+        """Recompute the cached best keys along a path, deepest node first."""
+        for node in reversed(path):
+            candidates = [(-self._weights[node.key], node.key)] if node.key is not None else []
+            for child in node.children.values():
+                candidates.extend(child.top)
+            node.top = heapq.nsmallest(self.top_k, candidates)
+
+    def _subtree(self, node: _Node) -> List[Tuple[float, str]]:
+        """Collect every (-weight, key) pair below a node."""
+        found = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.key is not None:
+                found.append((-self._weights[current.key], current.key))
+            stack.extend(current.children.values())
+        return found
+
+
+class SuggestionIndex:
+    """
+    Search-as-you-type suggestions for the knowledge base.
+
+    Suggestions come from three sources, ranked together in one
+    CompletionTrie:
+
+    - content titles, boosted by how often the content was interacted with
+    - tags, weighted by the number of documents carrying them
+    - frequent body terms, weighted by document frequency
+
+    Titles and tags are kept up to date by the SearchIndex as documents are
+    indexed and removed, term weights are replaced in bulk, and interaction
+    counts are pushed by the RecommendationEngine.
+    """
+
+    # Base weight of each kind of suggestion, scaled by 1 + log(1 + count)
+    KIND_WEIGHTS = {"content": 4.0, "tag": 2.0, "term": 1.0}
+
+    def __init__(self, top_k: int = 20):
+        """
+        Initialize an empty suggestion index.
+
+        Args:
+            top_k: Number of suggestions that are answered from the cache
+        """
+        self._trie = CompletionTrie(top_k)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._title_keys: Dict[str, str] = {}
+        self._content_keys: Dict[str, Set[str]] = {}
+        self._popularity: Dict[str, int] = {}
+        self._terms: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._trie)
+
+    def suggest(self, prefix: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Get the best suggestions for a partial query.
+
+        Args:
+            prefix: Partial query as typed
+            limit: Maximum number of suggestions
+
+        Returns:
+            List of suggestions, best first, each with a ``type`` (content,
+            tag or term), ``title`` and ``score``; content suggestions also
+            carry ``content_type``, ``file`` and ``content_id``
+        """
+        normalized = self._normalize(prefix)
+        if not normalized:
+            return []
+        if prefix[-1:].isspace():
+            normalized += " "
+
+        with self._lock:
+            # Tags and terms with the same text are only suggested once
+            matches = self._trie.complete(normalized, limit * 2)
+            suggestions = []
+            seen: Set[str] = set()
+            for key, weight in matches:
+                entry = self._entries[key]
+                if entry["type"] != "content":
+                    if entry["title"] in seen:
+                        continue
+                    seen.add(entry["title"])
+                suggestions.append(dict(entry, score=round(weight, 4)))
+                if len(suggestions) >= limit:
+                    break
+        return suggestions
+
+    def set_content(
+        self,
+        doc_key: str,
+        title: str,
+        content_id: Optional[str] = None,
+        content_type: str = "",
+        file: str = ""
+    ) -> None:
+        """
+        Add or replace the title suggestion of a document.
+
+        Args:
+            doc_key: Unique key of the document, such as its relative path
+            title: Title to suggest
+            content_id: Content ID that interactions are recorded against
+            content_type: Content type shown with the suggestion
+            file: File path of the document
+        """
+        with self._lock:
+            self._remove_content(doc_key)
+            key = self._add_content(doc_key, title, content_id, content_type, file)
+            if key is not None:
+                self._trie.set(key, self._weight("content", self._popularity.get(content_id, 0)))
+
+    def load(self, contents: Iterable[Tuple[str, str, Optional[str], str, str]], tags: Dict[str, int]) -> None:
+        """
+        Replace all title and tag suggestions at once.
+
+        Args:
+            contents: (doc key, title, content ID, content type, file) for
+                every document, as passed to set_content()
+            tags: Number of documents carrying each tag
+        """
+        with self._lock:
+            self._title_keys.clear()
+            self._content_keys.clear()
+            self._entries = {key: entry for key, entry in self._entries.items() if entry["type"] == "term"}
+            for doc_key, title, content_id, content_type, file in contents:
+                self._add_content(doc_key, title, content_id, content_type, file)
+            for tag, count in tags.items():
+                normalized = self._normalize(tag)
+                if normalized and count > 0:
+                    self._entries[f"{normalized}\0tag"] = {"type": "tag", "title": normalized, "count": count}
+
+            weights = []
+            for key, entry in self._entries.items():
+                if entry["type"] == "content":
+                    weights.append((key, self._weight("content", self._popularity.get(entry["content_id"], 0))))
+                else:
+                    weights.append((key, self._weight(entry["type"], entry["count"])))
+            self._trie.build(weights)
+
+    def remove_content(self, doc_key: str) -> None:
+        """
+        Remove the title suggestion of a document.
+
+        Args:
+            doc_key: Key the document was added with
+        """
+        with self._lock:
+            self._remove_content(doc_key)
+
+    def set_tag(self, tag: str, count: int) -> None:
+        """
+        Set the number of documents carrying a tag.
+
+        Args:
+            tag: Tag name
+            count: Number of documents; zero removes the tag
+        """
+        with self._lock:
+            normalized = self._normalize(tag)
+            if not normalized:
+                return
+            key = f"{normalized}\0tag"
+            if count <= 0:
+                self._entries.pop(key, None)
+                self._trie.remove(key)
+                return
+            self._entries[key] = {"type": "tag", "title": normalized, "count": count}
+            self._trie.set(key, self._weight("tag", count))
+
+    def set_terms(self, counts: Dict[str, int]) -> None:
+        """
+        Replace the frequent term suggestions.
+
+        Only terms whose count changed touch the trie.
+
+        Args:
+            counts: Document frequency of each term to suggest
+        """
+        with self._lock:
+            for term in set(self._terms) - set(counts):
+                key = f"{term}\0term"
+                self._entries.pop(key, None)
+                self._trie.remove(key)
+            for term, count in counts.items():
+                if self._terms.get(term) == count:
+                    continue
+                key = f"{term}\0term"
+                self._entries[key] = {"type": "term", "title": term, "count": count}
+                self._trie.set(key, self._weight("term", count))
+            self._terms = dict(counts)
+
+    def record_interaction(self, content_id: str, count: int = 1) -> None:
+        """
+        Adjust the popularity of a content item.
+
+        Args:
+            content_id: ID of the content item
+            count: Number of interactions to add; negative to forget old ones
+        """
+        with self._lock:
+            popularity = max(0, self._popularity.get(content_id, 0) + count)
+            if popularity:
+                self._popularity[content_id] = popularity
+            else:
+                self._popularity.pop(content_id, None)
+            self._reweigh(content_id)
+
+    def set_popularity(self, counts: Dict[str, int]) -> None:
+        """
+        Replace all interaction counts.
+
+        Args:
+            counts: Number of interactions with each content ID
+        """
+        with self._lock:
+            changed = set(self._popularity) | set(counts)
+            self._popularity = {content_id: count for content_id, count in counts.items() if count > 0}
+            for content_id in changed:
+                self._reweigh(content_id)
+
+    def clear(self) -> None:
+        """Remove every suggestion, keeping the interaction counts."""
+        with self._lock:
+            self._trie.clear()
+            self._entries.clear()
+            self._title_keys.clear()
+            self._content_keys.clear()
+            self._terms.clear()
+
+    def _add_content(
+        self,
+        doc_key: str,
+        title: str,
+        content_id: Optional[str],
+        content_type: str,
+        file: str
+    ) -> Optional[str]:
+        """Register the title entry of a document and return its key; the lock must be held."""
+        normalized = self._normalize(title)
+        if not normalized:
+            return None
+        key = f"{normalized}\0content\0{doc_key}"
+        self._entries[key] = {
+            "type": "content",
+            "title": title,
+            "content_type": content_type,
+            "file": file,
+            "content_id": content_id
+        }
+        self._title_keys[doc_key] = key
+        if content_id:
+            self._content_keys.setdefault(content_id, set()).add(key)
+        return key
+
+    def _remove_content(self, doc_key: str) -> None:
+        """Remove the title of a document; the lock must be held."""
+        key = self._title_keys.pop(doc_key, None)
+        if key is None:
+            return
+        entry = self._entries.pop(key)
+        self._trie.remove(key)
+        keys = self._content_keys.get(entry["content_id"])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._content_keys[entry["content_id"]]
+
+    def _reweigh(self, content_id: str) -> None:
+        """Update the weights of the titles of a content item; the lock must be held."""
+        weight = self._weight("content", self._popularity.get(content_id, 0))
+        for key in self._content_keys.get(content_id, ()):
+            self._trie.set(key, weight)
+
+    def _weight(self, kind: str, count: int) -> float:
+        """Get the weight of a suggestion from its kind and count."""
+        return self.KIND_WEIGHTS[kind] * (1.0 + math.log1p(max(count, 0)))
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Lowercase text and collapse its whitespace."""
+        return " ".join(str(text).lower().split())
@@ -0,0 +1,316 @@
+"""
+Vector Store
+Matrix-backed storage and scoring of embedding vectors.
+"""
+
+import logging
+from typing import Dict, List, Optional, Set, Any, Tuple, Iterable
+
+import numpy as np
+
+from knowledge_base.utils.helpers import ValidationError
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStore:
+    """
+    In-memory store of embeddings as one contiguous float32 matrix.
+
+    Rows are normalised to unit length when they are added, so cosine
+    similarity against a query is a single matrix-vector product. Each row
+    keeps a content ID and a metadata dictionary; content type, category and
+    tags are also kept as columns so that search filters can be applied as
+    boolean masks without touching the metadata dictionaries.
+
+    Rows never move once assigned: removing an ID frees its row for the next
+    add. Subclasses can change where the matrix lives by overriding
+    _allocate_matrix, _grow_matrix and _write_row.
+    """
+
+    def __init__(self, dimension: int, initial_capacity: int = 64):
+        """
+        Initialize the vector store.
+
+        Args:
+            dimension: Dimension of the embedding vectors
+            initial_capacity: Number of rows to preallocate
+        """
+        self.dimension = dimension
+        self._matrix = self._allocate_matrix(max(initial_capacity, 1))
+        self._size = 0
+
+        # ID <-> row mapping; removed rows are kept as free slots for reuse
+        self._ids: List[Optional[str]] = []
+        self._rows: Dict[str, int] = {}
+        self._metadata: List[Optional[Dict[str, Any]]] = []
+        self._free_rows: List[int] = []
+        self._live = np.zeros(self._matrix.shape[0], dtype=bool)
+
+        # Filter columns
+        self._codes: Dict[str, Dict[str, int]] = {"content_type": {}, "category": {}}
+        self._columns: Dict[str, np.ndarray] = {
+            "content_type": np.zeros(self._matrix.shape[0], dtype=np.int32),
+            "category": np.zeros(self._matrix.shape[0], dtype=np.int32)
+        }
+        self._tag_rows: Dict[str, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, content_id: str) -> bool:
+        return content_id in self._rows
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """View of the rows of the matrix that have been used, including free rows."""
+        return self._matrix[:self._size]
+
+    def ids(self) -> List[str]:
+        """Get the stored content IDs."""
+        return list(self._rows)
+
+    def get_vector(self, content_id: str) -> Optional[np.ndarray]:
+        """Get the normalised vector for a content ID."""
+        row = self._rows.get(content_id)
+        return None if row is None else self._matrix[row]
+
+    def get_row(self, content_id: str) -> Optional[int]:
+        """Get the matrix row holding a content ID."""
+        return self._rows.get(content_id)
+
+    def get_metadata(self, content_id: str) -> Optional[Dict[str, Any]]:
+        """Get the metadata stored for a content ID."""
+        row = self._rows.get(content_id)
+        return None if row is None else self._metadata[row]
+
+    def items(self) -> Iterable[Tuple[str, Dict[str, Any]]]:
+        """Iterate over (content_id, metadata) pairs."""
+        return ((content_id, self._metadata[row]) for content_id, row in self._rows.items())
+
+    @staticmethod
+    def normalize(vector: Any) -> np.ndarray:
+        """Convert a vector to a unit-length float32 array."""
+        array = np.asarray(vector, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(array))
+        if norm > 0:
+            array = array / norm
+        return array
+
+    def add(self, content_id: str, vector: Any, metadata: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Add or replace the vector for a content ID.
+
+        Args:
+            content_id: ID of the content item
+            vector: Embedding vector
+            metadata: Metadata used for filtering and results
+
+        Returns:
+            Row of the vector in the matrix
+        """
+        array = self.normalize(vector)
+        if array.shape[0] != self.dimension:
+            raise ValidationError(
+                f"Embedding dimension {array.shape[0]} does not match store dimension {self.dimension}"
+            )
+        metadata = metadata or {}
+
+        row = self._rows.get(content_id)
+        if row is None:
+            row = self._allocate_row()
+            self._rows[content_id] = row
+        else:
+            self._unindex_row(row)
+
+        self._write_row(row, array)
+        self._place(row, content_id, metadata)
+        return row
+
+    def remove(self, content_id: str) -> bool:
+        """
+        Remove the vector for a content ID.
+
+        The row is marked free and reused by a later add, so the rows of other
+        IDs never move.
+
+        Args:
+            content_id: ID of the content item
+
+        Returns:
+            True if the ID was present, False otherwise
+        """
+        row = self._rows.pop(content_id, None)
+        if row is None:
+            return False
+
+        self._unindex_row(row)
+        self._ids[row] = None
+        self._metadata[row] = None
+        self._live[row] = False
+        self._free_rows.append(row)
+        return True
+
+    def filter_mask(
+        self,
+        content_types: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        tags: Optional[List[str]] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Build a boolean row mask for metadata filters.
+
+        Args:
+            content_types: Keep rows with one of these content types
+            categories: Keep rows with one of these categories
+            tags: Keep rows with at least one of these tags
+
+        Returns:
+            Boolean array over the rows, or None if no filter was given
+        """
+        if not content_types and not categories and not tags:
+            return None
+
+        mask = np.ones(self._size, dtype=bool)
+        for field, values in (("content_type", content_types), ("category", categories)):
+            if values:
+                codes = [self._codes[field][v] for v in values if v in self._codes[field]]
+                mask &= np.isin(self._columns[field][:self._size], codes)
+
+        if tags:
+            tag_mask = np.zeros(self._size, dtype=bool)
+            for tag in tags:
+                rows = self._tag_rows.get(tag)
+                if rows:
+                    tag_mask[list(rows)] = True
+            mask &= tag_mask
+
+        return mask
+
+    def search(
+        self,
+        query_vector: Any,
+        top_k: int = 10,
+        mask: Optional[np.ndarray] = None,
+        min_similarity: float = 0.0,
+        exclude: Optional[Set[str]] = None,
+        rows: Optional[np.ndarray] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the rows most similar to a query vector.
+
+        Args:
+            query_vector: Query embedding
+            top_k: Number of results to return
+            mask: Optional boolean row mask from filter_mask
+            min_similarity: Minimum similarity score (0.0 - 1.0)
+            exclude: Content IDs to leave out of the results
+            rows: Optional candidate rows to score instead of the whole matrix
+
+        Returns:
+            List of (content_id, similarity) pairs, most similar first
+        """
+        if not self._rows or top_k <= 0:
+            return []
+
+        query = self.normalize(query_vector)
+        excluded = [self._rows[cid] for cid in exclude or () if cid in self._rows]
+
+        if rows is None:
+            scores = np.clip(self.matrix @ query, 0.0, 1.0)
+            eligible = (scores >= min_similarity) & self._live[:self._size]
+            if mask is not None:
+                eligible &= mask
+            eligible[excluded] = False
+            candidates = np.flatnonzero(eligible)
+            return self._top_k(candidates, scores[candidates], top_k)
+
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[self._live[rows]]
+        if mask is not None:
+            rows = rows[mask[rows]]
+        if excluded:
+            rows = rows[~np.isin(rows, excluded)]
+        scores = np.clip(self._matrix[rows] @ query, 0.0, 1.0)
+        keep = scores >= min_similarity
+        return self._top_k(rows[keep], scores[keep], top_k)
+
+    def _top_k(self, rows: np.ndarray, scores: np.ndarray, top_k: int) -> List[Tuple[str, float]]:
+        """Select the top-k rows by score using argpartition."""
+        if rows.size == 0:
+            return []
+        if rows.size > top_k:
+            part = np.argpartition(-scores, top_k - 1)[:top_k]
+            rows, scores = rows[part], scores[part]
+        order = np.argsort(-scores, kind="stable")
+        return [(self._ids[rows[i]], float(scores[i])) for i in order]
+
+    def _allocate_matrix(self, capacity: int) -> np.ndarray:
+        """Allocate backing storage for a matrix of the given number of rows."""
+        return np.zeros((capacity, self.dimension), dtype=np.float32)
+
+    def _write_row(self, row: int, array: np.ndarray) -> None:
+        """Write a normalised vector into a row of the matrix."""
+        self._matrix[row] = array
+
+    def _allocate_row(self) -> int:
+        """Take a free row, or the next unused row after growing if needed."""
+        if self._free_rows:
+            return self._free_rows.pop()
+        row = self._size
+        self._ensure_capacity(row + 1)
+        self._size += 1
+        return row
+
+    def _place(self, row: int, content_id: str, metadata: Dict[str, Any]) -> None:
+        """Attach an ID and metadata to a row and add it to the filter columns."""
+        while len(self._ids) <= row:
+            self._ids.append(None)
+            self._metadata.append(None)
+        self._ids[row] = content_id
+        self._metadata[row] = metadata
+        self._live[row] = True
+        self._index_row(row)
+
+    def _ensure_capacity(self, rows: int) -> None:
+        """Grow the matrix and filter columns geometrically."""
+        capacity = self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2)
+
+        self._matrix = self._grow_matrix(new_capacity)
+        new_capacity = self._matrix.shape[0]
+
+        for field, column in self._columns.items():
+            grown = np.zeros(new_capacity, dtype=np.int32)
+            grown[:self._size] = column[:self._size]
+            self._columns[field] = grown
+
+        live = np.zeros(new_capacity, dtype=bool)
+        live[:self._size] = self._live[:self._size]
+        self._live = live
+
+    def _grow_matrix(self, capacity: int) -> np.ndarray:
+        """Return a matrix of the given capacity holding the current rows."""
+        matrix = self._allocate_matrix(capacity)
+        matrix[:self._size] = self._matrix[:self._size]
+        return matrix
+
+    def _index_row(self, row: int) -> None:
+        """Record a row's metadata in the filter columns."""
+        metadata = self._metadata[row]
+        for field, codes in self._codes.items():
+            value = metadata.get(field, "")
+            self._columns[field][row] = codes.setdefault(value, len(codes))
+        for tag in metadata.get("tags", []) or []:
+            self._tag_rows.setdefault(tag, set()).add(row)
+
+    def _unindex_row(self, row: int) -> None:
+        """Remove a row from the tag postings."""
+        for tag in self._metadata[row].get("tags", []) or []:
+            rows = self._tag_rows.get(tag)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self._tag_rows[tag]
@@ -12,8 +12,9 @@ import re
 import logging
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple, Union
+from typing import Dict, List, Any, Optional, Tuple, Union, Iterator
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 from knowledge_base.content_types import Note, Todo, CalendarEvent, RelationshipType
 from knowledge_base.utils.config import Config
@@ -42,6 +43,7 @@ from knowledge_base.core.content_manager import ContentManager
 from knowledge_base.core.relationship_manager import RelationshipManager
 from knowledge_base.core.hierarchy_manager import HierarchyManager
 from knowledge_base.core.semantic_search import SemanticSearch
+from knowledge_base.core.search_index import SearchIndex, reciprocal_rank_fusion
 from knowledge_base.core.recommendation_engine import RecommendationEngine
 from knowledge_base.core.knowledge_graph import KnowledgeGraph
 
@@ -79,10 +81,11 @@ class KnowledgeBaseManager:
             # Initialize core managers first
             self.relationship_manager = RelationshipManager(self.base_path)
             self.hierarchy_manager = HierarchyManager(self.base_path, relationship_manager=self.relationship_manager)
-            self.content_manager = ContentManager(self.base_path, relationship_manager=self.relationship_manager, hierarchy_manager=self.hierarchy_manager)
-            self.semantic_search_engine = SemanticSearch(self.base_path, content_manager=self.content_manager)
-            self.recommendation_engine = RecommendationEngine(self.base_path, content_manager=self.content_manager, semantic_search=self.semantic_search_engine, relationship_manager=self.relationship_manager)
+            self._search_index = SearchIndex(self.base_path, reader=lambda path: self._read_file_content(path))
+            self.content_manager = ContentManager(self.base_path, relationship_manager=self.relationship_manager, hierarchy_manager=self.hierarchy_manager, search_index=self._search_index)
+            self.semantic_search_engine = SemanticSearch(self.base_path, content_manager=self.content_manager, config=self.config)
             self.knowledge_graph = KnowledgeGraph(self.base_path, content_manager=self.content_manager, relationship_manager=self.relationship_manager, hierarchy_manager=self.hierarchy_manager)
+            self.recommendation_engine = RecommendationEngine(self.base_path, content_manager=self.content_manager, semantic_search=self.semantic_search_engine, relationship_manager=self.relationship_manager, suggestion_index=self._search_index.suggestions, graph_metrics=self.knowledge_graph.metrics)
             
             # Initialize legacy privacy components
             self.privacy_engine = PrivacyEngine(self.config.get("privacy", {}))
@@ -969,6 +972,10 @@ class KnowledgeBaseManager:
                     with open(filepath, 'w') as f:
                         f.write(content_data)
             
+            # Journal entries and same-second notes overwrite an existing
+            # file, which leaves its directory unchanged
+            self._update_search_index(filepath)
+            
             logger.info(f"Content saved successfully: {filepath}")
             return str(filepath)
             
@@ -979,13 +986,25 @@ class KnowledgeBaseManager:
             logger.error(f"Error saving content: {e}")
             raise StorageError(f"Unknown error while saving content: {e}")
     
-    def search_content(self, query: str, content_type: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Search across all content in the knowledge base."""
+    def search_content(self, query: str, content_type: Optional[str] = None, fuzzy: bool = False) -> List[Dict[str, Any]]:
+        """
+        Search across all content in the knowledge base.
+        
+        Matches are case-insensitive substrings of the file text, served from
+        the inverted index in ``data/index`` rather than by reading every file.
+        
+        Args:
+            query: Text to look for
+            content_type: Optional data subdirectory to restrict the search to
+            fuzzy: If nothing matches, retry with misspelled words corrected
+                to the closest indexed terms
+            
+        Returns:
+            List of results with file, type and content_preview
+        """
         if not query:
             logger.warning("Empty search query provided")
             return []
-            
-        results = []
         
         try:
             data_dir = self.base_path / "data"
@@ -994,35 +1013,174 @@ class KnowledgeBaseManager:
                 logger.warning(f"Data directory does not exist: {data_dir}")
                 return []
             
-            search_dirs = []
             if content_type:
                 search_dir = data_dir / content_type
                 if not search_dir.exists():
                     logger.warning(f"Content type directory does not exist: {search_dir}")
                     return []
-                search_dirs = [search_dir]
-            else:
-                search_dirs = [d for d in data_dir.iterdir() if d.is_dir()]
-            
-            for search_dir in search_dirs:
-                for file_path in search_dir.rglob("*"):
-                    if file_path.is_file():
-                        try:
-                            content = self._read_file_content(file_path)
-                            if query.lower() in content.lower():
-                                results.append({
-                                    "file": str(file_path),
-                                    "type": search_dir.name,
-                                    "content_preview": content[:200] + "..." if len(content) > 200 else content
-                                })
-                        except Exception as e:
-                            logger.error(f"Error reading {file_path}: {e}")
-            
-            return results
+            
+            search_index = self._get_search_index()
+            search_index.refresh()
+            return search_index.find_substring(query, content_type, fuzzy=fuzzy)
             
         except Exception as e:
             logger.error(f"Error searching content: {e}")
             raise ContentProcessingError(f"Search failed: {e}")
+
+    def search_hybrid(
+        self,
+        query: str,
+        top_k: int = 10,
+        content_types: Optional[List[str]] = None,
+        lexical_weight: float = 1.0,
+        semantic_weight: float = 1.0,
+        fuzzy: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Search with the lexical index and the embeddings at once.
+        
+        The BM25F query on the search index and the vector query run
+        concurrently, each for a few times top_k candidates. The lexical side
+        only keeps content items: files in the content type directories that
+        carry a content ID, which leaves out bookkeeping files such as
+        ``hierarchy/hierarchy_index.json``. The rankings are fused with
+        reciprocal rank fusion, and only the final top_k items are read, in
+        one batch. If one side fails the other is used alone.
+        
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            content_types: Optional filter by content types
+            lexical_weight: Weight of the lexical ranking in the fusion
+            semantic_weight: Weight of the semantic ranking in the fusion
+            fuzzy: Expand misspelled words in the lexical query
+            
+        Returns:
+            List of results, best first, each with content_id, score, title,
+            file, lexical_rank and lexical_score, semantic_rank and
+            similarity (None where a side did not rank the item), and the
+            content (None if it could not be read)
+        """
+        if not query or not query.strip() or top_k <= 0:
+            return []
+        candidates = max(top_k * 3, 30)
+        
+        def semantic():
+            return self.semantic_search_engine.search_hits(query, candidates, content_types)
+        
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            semantic_future = executor.submit(semantic)
+            lexical_hits, lexical_error = [], None
+            try:
+                search_index = self._get_search_index()
+                search_index.refresh()
+                lexical_hits = search_index.search(
+                    query, content_types, candidates, fuzzy=fuzzy,
+                    top_dirs=[content_dir.name for content_dir in self.content_manager.content_dirs.values()]
+                )
+            except Exception as e:
+                lexical_error = e
+                logger.warning(f"Lexical part of hybrid search failed: {e}")
+            semantic_hits, semantic_error = [], None
+            try:
+                semantic_hits = semantic_future.result()
+            except Exception as e:
+                semantic_error = e
+                logger.warning(f"Semantic part of hybrid search failed: {e}")
+        
+        if lexical_error is not None and semantic_error is not None:
+            raise ContentProcessingError(f"Hybrid search failed: {lexical_error}; {semantic_error}")
+        
+        # Items are keyed by content ID; files without one are not content
+        lexical = {}
+        for hit in lexical_hits:
+            if hit["content_id"] and hit["content_id"] not in lexical:
+                lexical[hit["content_id"]] = (len(lexical) + 1, hit)
+        semantic = {content_id: (rank, similarity) for rank, (content_id, similarity) in enumerate(semantic_hits, 1)}
+        
+        fused = reciprocal_rank_fusion(
+            [list(lexical), list(semantic)], [lexical_weight, semantic_weight]
+        )[:top_k]
+        contents = self.content_manager.get_contents([key for key, _ in fused])
+        
+        results = []
+        for key, score in fused:
+            lexical_rank, hit = lexical.get(key, (None, None))
+            semantic_rank, similarity = semantic.get(key, (None, None))
+            content = contents.get(key)
+            if content is None and hit is None:
+                # An embedding left behind by deleted content
+                continue
+            title = content.get("title", "") if content else (hit["title"] if hit else "")
+            if hit is not None:
+                file = str(self.base_path / "data" / hit["file"])
+            else:
+                file = content.get("_filepath") if content else None
+            results.append({
+                "content_id": key,
+                "score": score,
+                "title": title,
+                "file": file,
+                "lexical_rank": lexical_rank,
+                "lexical_score": hit["score"] if hit else None,
+                "semantic_rank": semantic_rank,
+                "similarity": similarity,
+                "content": content
+            })
+        return results
+
+    def get_search_suggestions(self, query: str, max_suggestions: int = 5) -> List[Dict[str, Any]]:
+        """
+        Get search-as-you-type suggestions for a partial query.
+
+        Suggestions are answered from the in-memory suggestion index, which
+        content writes keep current, so no files are read or re-listed.
+
+        Args:
+            query: Partial search query
+            max_suggestions: Maximum number of suggestions
+
+        Returns:
+            List of content, tag and term suggestions, best first
+        """
+        if not query or not query.strip():
+            return []
+
+        try:
+            search_index = self._get_search_index()
+            if not len(search_index):
+                # Nothing indexed yet, e.g. files written before the first search
+                search_index.refresh()
+            return search_index.suggestions.suggest(query, max_suggestions)
+
+        except Exception as e:
+            logger.error(f"Error getting search suggestions: {e}")
+            raise ContentProcessingError(f"Search suggestions failed: {e}")
+
+    def _update_search_index(self, filepath: Path) -> None:
+        """
+        Push a written file to the search index.
+        
+        A failure here only delays the change until the index's next
+        refresh, so it is logged rather than raised.
+        
+        Args:
+            filepath: Path of the written file
+        """
+        try:
+            self._get_search_index().update_file(filepath)
+        except Exception as e:
+            logger.warning(f"Failed to update search index for {filepath}: {e}")
+    
+    def _get_search_index(self) -> SearchIndex:
+        """Get the search index for the current base path."""
+        if self._search_index.base_path != self.base_path:
+            self._search_index = SearchIndex(
+                self.base_path,
+                reader=lambda path: self._read_file_content(path),
+                suggestions=self._search_index.suggestions
+            )
+        return self._search_index
     
     def _read_file_content(self, file_path: Path) -> str:
         """Read content from file, handling both JSON and text files."""
@@ -1289,6 +1447,10 @@ class KnowledgeBaseManager:
         """Delete a content item."""
         return self.content_manager.delete_content(content_id)
 
+    def delete_contents(self, content_ids: List[str]) -> Tuple[List[str], Dict[str, KnowledgeBaseError]]:
+        """Delete several content items, writing each index once."""
+        return self.content_manager.delete_contents(content_ids)
+
     # Folder helpers
     def create_folder(self, title: str, parent_id: Optional[str] = None, description: str = "", icon: str = "folder") -> Dict[str, Any]:
         """Create a new folder in the hierarchy."""
@@ -1298,6 +1460,14 @@ class KnowledgeBaseManager:
         """Get a tree representation of folders."""
         return self.content_manager.get_folder_tree(folder_id, max_depth)
 
+    def get_folder_tree_page(self, folder_id: Optional[str] = None, depth: int = 1, limit: int = 100, cursor: Optional[str] = None, max_nodes: int = 1000) -> Dict[str, Any]:
+        """Get part of the folder tree, with tokens to expand the rest lazily."""
+        return self.content_manager.get_folder_tree_page(folder_id, depth, limit, cursor, max_nodes)
+
+    def iter_folder_tree(self, folder_id: Optional[str] = None, max_depth: int = -1) -> Iterator[Dict[str, Any]]:
+        """Walk the folder tree one flat item at a time."""
+        return self.content_manager.iter_folder_tree(folder_id, max_depth)
+
     def list_folder_contents(self, folder_id: str) -> List[Dict[str, Any]]:
         """List contents of a folder."""
         return self.content_manager.list_folder_contents(folder_id)
@@ -1306,6 +1476,10 @@ class KnowledgeBaseManager:
         """Move content into a different folder."""
         return self.content_manager.move_content_to_folder(content_id, folder_id)
 
+    def move_contents_to_folder(self, content_ids: List[str], folder_id: str) -> Tuple[Dict[str, str], Dict[str, KnowledgeBaseError]]:
+        """Move several content items, with their subtrees, into a folder."""
+        return self.content_manager.move_contents_to_folder(content_ids, folder_id)
+
     # Relationship helpers
     def create_relationship(self, source_id: str, target_id: str, relationship_type: Union[RelationshipType, str] = RelationshipType.RELATED, description: str = "", metadata: Optional[Dict[str, Any]] = None):
         """Create a relationship between two content items."""
@@ -1320,9 +1494,9 @@ class KnowledgeBaseManager:
         return self.relationship_manager.delete_relationship(source_id, target_id)
 
     # Semantic search
-    def search_semantic(self, query: str, top_k: int = 10, content_types: Optional[List[str]] = None, categories: Optional[List[str]] = None, tags: Optional[List[str]] = None, min_similarity: float = 0.0):
+    def search_semantic(self, query: str, top_k: int = 10, content_types: Optional[List[str]] = None, categories: Optional[List[str]] = None, tags: Optional[List[str]] = None, min_similarity: float = 0.0, fields: Optional[List[str]] = None, hydrate: bool = True):
         """Perform a semantic search across the knowledge base."""
-        return self.semantic_search_engine.search(query, top_k, content_types, categories, tags, min_similarity)
+        return self.semantic_search_engine.search(query, top_k, content_types, categories, tags, min_similarity, fields=fields, hydrate=hydrate)
 
     def similar_content(self, content_id: str, top_k: int = 5, min_similarity: float = 0.7):
         """Find content similar to the specified item."""
@@ -1340,4 +1514,12 @@ class KnowledgeBaseManager:
     # Knowledge Graph
     def build_knowledge_graph(self, root_ids: Optional[List[str]] = None, max_depth: int = 2, relationship_types: Optional[List[Union[RelationshipType, str]]] = None):
         """Build a graph representation of content relationships."""
-        return self.knowledge_graph.build_graph(root_ids, max_depth, relationship_types) 
\ No newline at end of file
+        return self.knowledge_graph.build_graph(root_ids, max_depth, relationship_types)
+
+    def get_important_content(self, metric: str = "pagerank", limit: int = 10, content_ids: Optional[List[str]] = None):
+        """Get the content items that rank highest by a precomputed graph metric."""
+        return self.knowledge_graph.get_important_content(metric, limit, content_ids)
+
+    def get_graph_summary(self, expanded: Optional[List[int]] = None, focus_ids: Optional[List[str]] = None, max_nodes: int = 300, max_edges: int = 1500, include_hierarchy: bool = True, expanded_groups: Optional[List[int]] = None):
+        """Get a level-of-detail view of the whole knowledge graph."""
+        return self.knowledge_graph.generate_visualization_summary(expanded, focus_ids, max_nodes, max_edges=max_edges, include_hierarchy=include_hierarchy, expanded_groups=expanded_groups) 
\ No newline at end of file
@@ -12,7 +12,8 @@ from knowledge_base.utils.helpers import (
     parse_date_string,
     detect_content_type,
     format_filename,
-    sanitize_filename
+    sanitize_filename,
+    atomic_write_json
 )
 
 __all__ = [
@@ -24,5 +25,6 @@ __all__ = [
     'parse_date_string',
     'detect_content_type',
     'format_filename',
-    'sanitize_filename'
+    'sanitize_filename',
+    'atomic_write_json'
 ] 
\ No newline at end of file
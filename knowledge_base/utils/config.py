@@ -69,6 +69,11 @@ class Config:
                 config["storage"] = {}
             config["storage"]["data_path"] = os.environ.get("KB_DATA_PATH")
         
+        if os.environ.get("KB_EMBEDDING_BACKEND"):
+            if "embeddings" not in config:
+                config["embeddings"] = {}
+            config["embeddings"]["backend"] = os.environ.get("KB_EMBEDDING_BACKEND")
+        
         return config
     
     def _get_default_config(self) -> Dict[str, Any]:
@@ -96,6 +101,10 @@ class Config:
             },
             "storage": {
                 "data_path": "data"
+            },
+            "embeddings": {
+                "backend": "hashing",
+                "cache_size": 100000
             }
         }
     
@@ -3,15 +3,24 @@ Helper Functions
 Utility functions for the Knowledge Base system.
 """
 
+import os
+import json
 import uuid
 import logging
+import tempfile
 from datetime import datetime, timezone
-from typing import Dict, List, Any, Optional
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Union
 import re
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# The umask can only be read by setting it, which affects every thread, so it
+# is read once at import rather than on each write
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
 class KnowledgeBaseError(Exception):
     """Base exception class for all Knowledge Base errors."""
     def __init__(self, message="An error occurred in the knowledge base system"):
@@ -223,4 +232,45 @@ def sanitize_filename(filename: str) -> str:
     """
     # Replace invalid characters
     invalid_chars = r'[<>:"/\\|?*]'
-    return re.sub(invalid_chars, '_', filename) 
\ No newline at end of file
+    return re.sub(invalid_chars, '_', filename)
+
+
+def _replacement_mode(path: Path) -> int:
+    """Get the permission bits a file written over path should have."""
+    try:
+        return path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def atomic_write_json(path: Union[str, Path], data: Any, indent: Optional[int] = None) -> None:
+    """
+    Write JSON to a file atomically.
+    
+    The data is written to a temporary file in the same directory and then
+    renamed over the destination, so readers never observe a partial file.
+    The file keeps the permissions of the file it replaces; a new file gets
+    the usual permissions for the process umask, as read at import.
+    
+    Args:
+        path: Destination file path
+        data: JSON-serializable data
+        indent: Optional indentation passed to json.dump
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            if indent is None:
+                json.dump(data, f, separators=(',', ':'))
+            else:
+                json.dump(data, f, indent=indent)
+        # mkstemp creates the file with mode 0600, which os.replace would keep
+        os.chmod(tmp_path, _replacement_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
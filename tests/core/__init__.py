@@ -0,0 +1,3 @@
+"""
+Unit tests for core knowledge base modules.
+"""
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the IVFIndex approximate nearest-neighbour index.
+"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from knowledge_base.core.ann_index import IVFIndex
+from knowledge_base.core.vector_store import VectorStore
+from knowledge_base.core.semantic_search import SemanticSearch
+
+
+@pytest.fixture
+def store():
+    """Create a store of clustered random vectors."""
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(20, 16))
+    store = VectorStore(16)
+    for i in range(2000):
+        vector = centers[i % 20] + 0.3 * rng.normal(size=16)
+        store.add(f"id{i}", vector, {"content_type": "note" if i % 2 else "todo"})
+    return store
+
+
+def _recall(index, store, queries, top_k=10):
+    """Fraction of exact top-k results that the index returns."""
+    found = 0
+    for query in queries:
+        exact = {cid for cid, _ in store.search(query, top_k)}
+        approx = {cid for cid, _ in index.search(query, top_k)}
+        found += len(exact & approx)
+    return found / (top_k * len(queries))
+
+
+class TestIVFIndex:
+    """Test suite for the IVFIndex class."""
+
+    def test_small_collections_are_exact(self):
+        """Test that the index falls back to exact search below its training size."""
+        store = VectorStore(4)
+        store.add("a", [1, 0, 0, 0])
+        store.add("b", [0, 1, 0, 0])
+        index = IVFIndex(store, min_train_size=10)
+        assert not index.trained
+        assert index.search([1, 0.1, 0, 0], 1) == store.search([1, 0.1, 0, 0], 1)
+
+    def test_recall_grows_with_nprobe(self, store):
+        """Test that scanning more cells trades latency for recall."""
+        index = IVFIndex(store, min_train_size=100, nprobe=1)
+        assert index.trained
+        queries = [store.get_vector(f"id{i}") + 0.1 for i in range(0, 2000, 97)]
+
+        low = _recall(index, store, queries)
+        index.nprobe = 8
+        high = _recall(index, store, queries)
+        index.nprobe = len(index._lists)
+        assert low <= high
+        assert high >= 0.9
+        assert _recall(index, store, queries) == 1.0
+
+    def test_incremental_add_and_remove(self, store):
+        """Test that inserts and deletes are reflected in search results."""
+        index = IVFIndex(store, min_train_size=100)
+        target = np.ones(16)
+
+        row = store.add("new", target, {})
+        index.add(row)
+        assert index.search(target, 1)[0][0] == "new"
+
+        index.remove(store.get_row("new"))
+        store.remove("new")
+        assert "new" not in [cid for cid, _ in index.search(target, 10)]
+
+    def test_filters_and_exclude(self, store):
+        """Test that masks and excluded IDs apply to the candidates."""
+        index = IVFIndex(store, min_train_size=100)
+        query = store.get_vector("id1")
+        mask = store.filter_mask(content_types=["note"])
+
+        hits = index.search(query, 5, mask=mask, exclude={"id1"})
+        assert "id1" not in [cid for cid, _ in hits]
+        assert all(store.get_metadata(cid)["content_type"] == "note" for cid, _ in hits)
+
+    def test_centroids_persist(self, store):
+        """Test that a new index reuses saved centroids instead of retraining."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "centroids.npy"
+            first = IVFIndex(store, path, min_train_size=100)
+            second = IVFIndex(store, path, min_train_size=100)
+            assert path.exists()
+            assert np.array_equal(first._centroids, second._centroids)
+
+
+class TestSemanticSearchANN:
+    """Test that SemanticSearch keeps its ANN index in step with the store."""
+
+    def test_store_and_delete_update_index(self):
+        """Test that embeddings are routed through the ANN index."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            search = SemanticSearch(temp_dir, embedding_dimension=8, use_mock_embeddings=True, ann_min_size=4)
+            rng = np.random.default_rng(0)
+            for i in range(8):
+                search._store_embedding(f"id{i}", rng.normal(size=8).tolist(), {"title": f"T{i}"})
+            assert search.ann_index.trained
+
+            vector = search._vector_store.get_vector("id3")
+            assert search.ann_index.search(vector, 1, nprobe=100)[0][0] == "id3"
+
+            assert search.delete_embedding("id3")
+            assert all(cid != "id3" for cid, _ in search.ann_index.search(vector, 8, nprobe=100))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the ContentIndex class and its use by ContentManager.
+"""
+
+import json
+import tempfile
+import pytest
+from pathlib import Path
+
+from knowledge_base.core.content_index import ContentIndex
+from knowledge_base.core.content_manager import ContentManager
+from knowledge_base.utils.helpers import NotFoundError
+
+
+@pytest.fixture
+def content_manager():
+    """Create a ContentManager in a temporary directory."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield ContentManager(temp_dir)
+
+
+class TestContentIndex:
+    """Test suite for the ContentIndex class."""
+
+    def test_create_records_location(self, content_manager):
+        """Test that saved content is recorded in the index."""
+        note = content_manager.create_content({"title": "Indexed", "content": "body"}, "note")
+
+        entry = content_manager.content_index.get_entry(note["id"])
+        assert entry["type"] == "note"
+        assert str(entry["filepath"]) == note["_filepath"]
+        assert entry["mtime"] > 0
+
+        fetched = content_manager.get_content(note["id"])
+        assert fetched["title"] == "Indexed"
+        assert fetched["_content_type"] == "note"
+
+    def test_delete_removes_entry(self, content_manager):
+        """Test that deleted content is dropped from the index."""
+        note = content_manager.create_content({"title": "Gone"}, "note")
+        assert content_manager.delete_content(note["id"]) is True
+
+        assert content_manager.content_index.lookup(note["id"]) is None
+        with pytest.raises(NotFoundError):
+            content_manager.get_content(note["id"])
+
+    def test_index_persists_across_instances(self, content_manager):
+        """Test that a new index replays the persisted log."""
+        todo = content_manager.create_content({"title": "Persisted"}, "todo")
+        content_manager.update_content(todo["id"], {"title": "Renamed"})
+
+        index = ContentIndex(content_manager.data_dir, content_manager.content_dirs)
+        content_type, filepath = index.lookup(todo["id"])
+        assert content_type == "todo"
+        assert str(filepath) == todo["_filepath"]
+
+    def test_external_file_is_picked_up(self, content_manager):
+        """Test that files written outside the manager are found after a rescan."""
+        content_id = "external-item"
+        filepath = content_manager.content_dirs["reference"] / f"reference-2025-01-01-000000-{content_id}.json"
+        with open(filepath, "w") as f:
+            json.dump({"id": content_id, "title": "External"}, f)
+
+        fetched = content_manager.get_content(content_id)
+        assert fetched["title"] == "External"
+        assert fetched["_content_type"] == "reference"
+
+    def test_external_file_survives_manager_write(self, content_manager):
+        """Test that a manager write does not hide files added or renamed behind its back."""
+        notes_dir = content_manager.content_dirs["note"]
+        external = notes_dir / "note-2025-01-01-000000-external-item.json"
+        with open(external, "w") as f:
+            json.dump({"id": "external-item", "title": "External"}, f)
+        content_manager.create_content({"title": "Managed"}, "note")
+
+        assert content_manager.get_content("external-item")["title"] == "External"
+
+        note = content_manager.create_content({"title": "Renamed"}, "note")
+        renamed = notes_dir / "note-2025-01-02-000000-renamed-item.json"
+        Path(note["_filepath"]).rename(renamed)
+        content_manager.delete_content(content_manager.create_content({"title": "Other"}, "note")["id"])
+
+        with pytest.raises(NotFoundError):
+            content_manager.get_content(note["id"])
+        assert content_manager.get_content("renamed-item")["title"] == "Renamed"
+
+    def test_external_delete_is_detected(self, content_manager):
+        """Test that files removed outside the manager raise NotFoundError."""
+        note = content_manager.create_content({"title": "Removed"}, "note")
+        Path(note["_filepath"]).unlink()
+
+        with pytest.raises(NotFoundError):
+            content_manager.get_content(note["id"])
+        assert note["id"] not in content_manager.content_index.ids()
+
+    def test_rebuild_and_compaction(self, content_manager):
+        """Test that rebuilding produces a compact log of current entries."""
+        ids = [content_manager.create_content({"title": f"Note {i}"}, "note")["id"] for i in range(5)]
+        content_manager.delete_content(ids[0])
+
+        index = content_manager.content_index
+        index.rebuild()
+
+        assert sorted(index.ids("note")) == sorted(ids[1:])
+        with open(index.index_path) as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        assert lines[0]["op"] == "dirs"
+        assert len(lines) == len(index) + 1
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for the ContentManager batch operations.
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from knowledge_base.core.content_manager import ContentManager
+from knowledge_base.utils.helpers import NotFoundError, ValidationError
+
+
+@pytest.fixture
+def content_manager():
+    """Create a ContentManager in a temporary directory."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield ContentManager(temp_dir)
+
+
+def _stored(content):
+    """Read the file a content item is stored in."""
+    with open(content["_filepath"]) as f:
+        return json.load(f)
+
+
+class TestBatchOperations:
+    """Test suite for delete_contents and move_contents_to_folder."""
+
+    def test_delete_refuses_non_empty_folder(self, content_manager):
+        """Test that a non-empty folder is refused and left intact."""
+        folder = content_manager.create_folder("Projects")
+        note = content_manager.create_content({"title": "Plan"}, "note", parent_id=folder["id"])
+
+        deleted, errors = content_manager.delete_contents([folder["id"]])
+
+        assert deleted == []
+        assert isinstance(errors[folder["id"]], ValidationError)
+        assert Path(folder["_filepath"]).exists()
+        assert content_manager.get_content(folder["id"])["title"] == "Projects"
+        assert content_manager.hierarchy_manager.get_children(folder["id"]) == [note["id"]]
+        assert content_manager.hierarchy_manager.get_path(note["id"]) == "/Projects/Plan"
+
+    def test_delete_mixed_batch(self, content_manager):
+        """Test that a missing ID is reported while the rest are deleted."""
+        folder = content_manager.create_folder("Archive")
+        note = content_manager.create_content({"title": "Old"}, "note", parent_id=folder["id"])
+        todo = content_manager.create_content({"title": "Loose end"}, "todo")
+
+        deleted, errors = content_manager.delete_contents([folder["id"], "missing", note["id"], todo["id"]])
+
+        assert sorted(deleted) == sorted([folder["id"], note["id"], todo["id"]])
+        assert list(errors) == ["missing"]
+        assert isinstance(errors["missing"], NotFoundError)
+        for item in (folder, note, todo):
+            assert not Path(item["_filepath"]).exists()
+            with pytest.raises(NotFoundError):
+                content_manager.get_content(item["id"])
+
+    def test_move_subtree(self, content_manager):
+        """Test that a moved folder records its new place and its descendants follow it."""
+        source = content_manager.create_folder("Inbox")
+        target = content_manager.create_folder("Work")
+        subfolder = content_manager.create_folder("Meetings", parent_id=source["id"])
+        note = content_manager.create_content({"title": "Standup"}, "note", parent_id=subfolder["id"])
+        todo = content_manager.create_content({"title": "Call"}, "todo", parent_id=source["id"])
+
+        moved, errors = content_manager.move_contents_to_folder(
+            [subfolder["id"], todo["id"], "missing"], target["id"]
+        )
+
+        assert moved == {subfolder["id"]: "/Work/Meetings", todo["id"]: "/Work/Call"}
+        assert list(errors) == ["missing"]
+        stored = _stored(content_manager.get_content(subfolder["id"]))
+        assert stored["path"] == "/Work/Meetings"
+        assert stored["parent_id"] == target["id"]
+        assert _stored(content_manager.get_content(todo["id"]))["parent_id"] == target["id"]
+
+        hierarchy = content_manager.hierarchy_manager
+        assert hierarchy.get_path(note["id"]) == "/Work/Meetings/Standup"
+        assert hierarchy.get_children(source["id"]) == []
+        assert sorted(hierarchy.get_children(target["id"])) == sorted([subfolder["id"], todo["id"]])
+
+    def test_move_to_non_folder(self, content_manager):
+        """Test that the destination must be a folder."""
+        note = content_manager.create_content({"title": "Target"}, "note")
+        todo = content_manager.create_content({"title": "Item"}, "todo")
+
+        with pytest.raises(ValidationError):
+            content_manager.move_contents_to_folder([todo["id"]], note["id"])
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for the batched embedding pipeline in SemanticSearch.
+"""
+
+import os
+import json
+import tempfile
+
+import pytest
+
+from knowledge_base.core.semantic_search import SemanticSearch
+
+
+@pytest.fixture
+def search():
+    """Create a semantic search engine with some content."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        search = SemanticSearch(
+            temp_dir, embedding_dimension=16, use_mock_embeddings=True, batch_size=3, max_workers=2
+        )
+        for i in range(10):
+            search.content_manager.create_content(
+                {"title": f"Note {i}", "content": f"body {i}", "tags": [f"t{i % 2}"]}, "note"
+            )
+        yield search
+
+
+class TestEmbeddingPipeline:
+    """Test suite for batch_create_embeddings."""
+
+    def test_batch_creates_embeddings(self, search):
+        """Test that every found item is embedded and missing IDs fail."""
+        content_ids = search.content_manager.content_index.ids("note")
+        results = search.batch_create_embeddings(content_ids + ["missing"])
+
+        assert results["missing"] is False
+        assert all(results[content_id] for content_id in content_ids)
+        store = search._get_vector_store()
+        assert sorted(store.ids()) == sorted(content_ids)
+        assert store.get_metadata(content_ids[0])["content_type"] == "note"
+
+    def test_matches_single_item_embeddings(self, search):
+        """Test that batched embeddings equal those created one at a time."""
+        content_ids = search.content_manager.content_index.ids("note")
+        search.batch_create_embeddings(content_ids)
+        batched = search._get_vector_store().get_vector(content_ids[4]).copy()
+
+        assert search.create_content_embedding(content_ids[4])
+        assert search._get_vector_store().get_vector(content_ids[4]) == pytest.approx(batched)
+
+    def test_progress_and_throughput(self, search):
+        """Test the pipeline counters and the progress callback."""
+        content_ids = search.content_manager.content_index.ids("note")
+        progress = []
+        search.batch_create_embeddings(content_ids, progress_callback=progress.append)
+
+        assert [p["batches_done"] for p in progress] == [1, 2, 3, 4]
+        stats = search.get_pipeline_stats()
+        assert stats["running"] is False
+        assert stats["processed"] == stats["succeeded"] == stats["total"] == 10
+        assert stats["failed"] == 0
+        assert stats["items_per_second"] > 0
+
+    def test_refresh_uses_batches(self, search):
+        """Test that forced refresh re-embeds every item through the pipeline."""
+        content_ids = search.content_manager.content_index.ids("note")
+        search.batch_create_embeddings(content_ids[:5])
+
+        results = search.refresh_embeddings(force=True)
+        assert sorted(results) == sorted(content_ids)
+        assert search.get_pipeline_stats()["total"] == 10
+        assert len(search.get_refresh_summary()["updated"]) == 5
+
+
+class TestIncrementalRefresh:
+    """Test suite for mtime- and fingerprint-aware refresh_embeddings."""
+
+    def test_refresh_scales_with_churn(self, search):
+        """Test that a refresh only touches new, changed and deleted items."""
+        manager = search.content_manager
+        content_ids = manager.content_index.ids("note")
+
+        search.refresh_embeddings()
+        summary = search.get_refresh_summary()
+        assert sorted(summary["added"]) == sorted(content_ids)
+
+        search.refresh_embeddings()
+        summary = search.get_refresh_summary()
+        assert summary["unchanged"] == 10
+        assert summary["added"] == summary["updated"] == summary["removed"] == []
+        assert search.get_pipeline_stats()["total"] == 0
+
+        changed, deleted = content_ids[0], content_ids[1]
+        manager.update_content(changed, {"content": "rewritten body"})
+        manager.delete_content(deleted)
+        new = manager.create_content({"title": "Fresh", "content": "new"}, "note")["id"]
+
+        results = search.refresh_embeddings()
+        summary = search.get_refresh_summary()
+        assert summary["updated"] == [changed]
+        assert summary["added"] == [new]
+        assert summary["removed"] == [deleted]
+        assert summary["unchanged"] == 8
+        assert deleted not in results
+        assert deleted not in search._get_vector_store()
+
+    def test_refresh_sees_changes_outside_the_manager(self, search):
+        """Test that files added or deleted by hand are embedded or removed."""
+        manager = search.content_manager
+        content_ids = manager.content_index.ids("note")
+        search.refresh_embeddings()
+
+        external = manager.content_dirs["note"] / "note-2025-01-01-000000-external-item.json"
+        with open(external, "w") as f:
+            json.dump({"id": "external-item", "title": "External", "content": "by hand"}, f)
+        deleted, missing = content_ids[0], content_ids[1]
+        manager.content_index.get_entry(deleted)["filepath"].unlink()
+
+        search.refresh_embeddings()
+        summary = search.get_refresh_summary()
+        assert summary["added"] == ["external-item"]
+        assert summary["removed"] == [deleted]
+        assert summary["failed"] == []
+
+        # A listed item whose file vanished is removed rather than failed
+        manager.content_index.get_entry(missing)["filepath"].unlink()
+        search.refresh_embeddings([missing])
+        summary = search.get_refresh_summary()
+        assert summary["removed"] == [missing]
+        assert summary["failed"] == []
+        assert missing not in search._get_vector_store()
+
+    def test_unchanged_text_only_updates_metadata(self, search):
+        """Test that a touched file with the same text is not re-embedded."""
+        content_id = search.content_manager.content_index.ids("note")[0]
+        search.refresh_embeddings([content_id])
+        filepath = search.content_manager.content_index.get_entry(content_id)["filepath"]
+        stat = filepath.stat()
+        os.utime(filepath, (stat.st_atime, stat.st_mtime + 10))
+
+        assert search.refresh_embeddings([content_id]) == {content_id: True}
+        assert search.get_refresh_summary()["metadata_updated"] == [content_id]
+        assert search._get_vector_store().get_metadata(content_id)["source_mtime"] == stat.st_mtime + 10
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped EmbeddingStore and the JSON index migration.
+"""
+
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from knowledge_base.core.embedding_store import EmbeddingStore, migrate_json_index
+from knowledge_base.core.semantic_search import SemanticSearch
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary embeddings directory."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir)
+
+
+class TestEmbeddingStore:
+    """Test suite for the EmbeddingStore class."""
+
+    def test_reopen_maps_persisted_vectors(self, temp_dir):
+        """Test that vectors and metadata survive reopening the store."""
+        store = EmbeddingStore(temp_dir, 4, initial_capacity=2)
+        store.add("a", [2, 0, 0, 0], {"content_type": "note", "tags": ["x"]})
+        store.add("b", [0, 3, 0, 0], {"content_type": "todo", "tags": []})
+
+        reopened = EmbeddingStore(temp_dir, 4)
+        assert isinstance(reopened.matrix, np.memmap)
+        assert reopened.ids() == ["a", "b"]
+        assert np.allclose(reopened.get_vector("b"), [0, 1, 0, 0])
+        assert reopened.get_metadata("a")["content_type"] == "note"
+        mask = reopened.filter_mask(tags=["x"])
+        assert [cid for cid, _ in reopened.search([1, 1, 0, 0], 10, mask=mask)] == ["a"]
+
+    def test_add_writes_one_row_and_one_record(self, temp_dir):
+        """Test that adding costs one row of vector bytes and one log line."""
+        store = EmbeddingStore(temp_dir, 8, initial_capacity=4)
+        store.add("a", np.ones(8))
+        vectors_size = store.vectors_path.stat().st_size
+        log_lines = store.metadata_path.read_text().count("\n")
+
+        store.add("b", np.ones(8))
+        assert store.vectors_path.stat().st_size == vectors_size
+        assert store.metadata_path.read_text().count("\n") == log_lines + 1
+
+    def test_growth_and_row_reuse(self, temp_dir):
+        """Test that the file grows past its capacity and freed rows are reused."""
+        store = EmbeddingStore(temp_dir, 4, initial_capacity=1)
+        for i in range(5):
+            store.add(f"id{i}", np.eye(4)[i % 4] + i, {})
+        assert store.vectors_path.stat().st_size >= 5 * 4 * 4
+
+        assert store.remove("id1") is True
+        assert store.add("new", [0, 0, 0, 1], {}) == 1
+
+        reopened = EmbeddingStore(temp_dir, 4)
+        assert "id1" not in reopened
+        assert set(reopened.ids()) == {"id0", "id2", "id3", "id4", "new"}
+        assert np.allclose(reopened.get_vector("new"), [0, 0, 0, 1])
+
+    def test_reload_if_changed(self, temp_dir):
+        """Test that a store sees writes made through another instance."""
+        first = EmbeddingStore(temp_dir, 4)
+        second = EmbeddingStore(temp_dir, 4)
+        first.add("a", [1, 0, 0, 0], {})
+
+        assert "a" not in second
+        assert second.reload_if_changed() is True
+        assert "a" in second
+        assert second.reload_if_changed() is False
+
+    def test_stored_dimension_wins(self, temp_dir):
+        """Test that an existing store keeps the dimension from its manifest."""
+        EmbeddingStore(temp_dir, 4)
+        assert EmbeddingStore(temp_dir, 16).dimension == 4
+
+
+class TestJsonMigration:
+    """Test migration of the legacy JSON embeddings index."""
+
+    def test_semantic_search_migrates_once(self, temp_dir):
+        """Test that SemanticSearch moves a JSON index into the store on request."""
+        embeddings_dir = temp_dir / "data" / "embeddings"
+        embeddings_dir.mkdir(parents=True)
+        legacy = embeddings_dir / "embeddings_index.json"
+        legacy.write_text(json.dumps({
+            "metadata": {"embedding_dimension": 4, "count": 1},
+            "embeddings": {
+                "x": {
+                    "vector": [0.5, 0.5, 0, 0],
+                    "metadata": {"title": "X", "content_type": "note", "category": "",
+                                 "tags": [], "last_modified": ""}
+                }
+            }
+        }, indent=2))
+
+        search = SemanticSearch(str(temp_dir), embedding_dimension=4, use_mock_embeddings=True)
+        assert legacy.exists()
+        assert search.get_embedding_stats()["total_embeddings"] == 0
+
+        assert search.migrate_legacy_index() == 1
+        assert not legacy.exists()
+        assert (embeddings_dir / "embeddings_index.json.migrated").exists()
+        assert search.get_embedding_stats()["total_embeddings"] == 1
+        assert search.migrate_legacy_index() == 0
+
+        again = SemanticSearch(str(temp_dir), embedding_dimension=4, use_mock_embeddings=True)
+        assert again._get_vector_store().ids() == ["x"]
+
+    def test_invalid_json_is_backed_up(self, temp_dir):
+        """Test that an unreadable JSON index is set aside."""
+        legacy = temp_dir / "embeddings_index.json"
+        legacy.write_text("{not json")
+
+        assert migrate_json_index(legacy, EmbeddingStore(temp_dir, 4)) == 0
+        assert (temp_dir / "embeddings_index.json.bak").exists()
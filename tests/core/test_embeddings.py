@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for embedding backends and the embedding cache.
+"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from knowledge_base.core.embeddings import (
+    CachedEmbeddingBackend, EmbeddingCache, HashingEmbeddingBackend,
+    MockEmbeddingBackend, create_embedding_backend
+)
+from knowledge_base.core.semantic_search import SemanticSearch
+from knowledge_base.utils.helpers import ValidationError
+
+
+@pytest.fixture
+def temp_dir():
+    """Create a temporary directory."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir)
+
+
+class CountingBackend:
+    """Backend that records how many texts it embedded."""
+
+    name = "counting"
+    dimension = 8
+
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, texts):
+        self.calls.append(list(texts))
+        return MockEmbeddingBackend(self.dimension).embed(texts)
+
+
+class TestBackends:
+    """Test suite for the built-in embedding backends."""
+
+    def test_hashing_backend_is_deterministic_and_lexical(self):
+        """Test that shared vocabulary gives higher similarity."""
+        backend = HashingEmbeddingBackend(256)
+        a, b, c = (np.array(v) for v in backend.embed([
+            "weekly project status meeting", "project status meeting notes", "grocery list apples"
+        ]))
+        assert np.allclose(a, backend.embed(["weekly project status meeting"])[0])
+        assert np.linalg.norm(a) == pytest.approx(1.0)
+        assert a @ b > a @ c
+
+    def test_mock_backend_dimension(self):
+        """Test that mock vectors have the requested dimension and unit length."""
+        vector = MockEmbeddingBackend(12).embed(["text"])[0]
+        assert len(vector) == 12
+        assert np.linalg.norm(vector) == pytest.approx(1.0)
+
+    def test_unknown_backend(self):
+        """Test that an unknown backend name is rejected."""
+        with pytest.raises(ValidationError):
+            create_embedding_backend({"backend": "nope"}, 8)
+
+
+class TestEmbeddingCache:
+    """Test suite for the EmbeddingCache and CachedEmbeddingBackend."""
+
+    def test_repeated_texts_are_served_from_cache(self, temp_dir):
+        """Test that only cache misses reach the backend, across reopening."""
+        inner = CountingBackend()
+        backend = CachedEmbeddingBackend(inner, EmbeddingCache(temp_dir / "cache.sqlite3"))
+        first = backend.embed(["a", "b", "a"])
+        backend.embed(["b", "c"])
+        assert inner.calls == [["a", "b"], ["c"]]
+
+        reopened = CachedEmbeddingBackend(inner, EmbeddingCache(temp_dir / "cache.sqlite3"))
+        assert np.allclose(reopened.embed(["a"])[0], first[0])
+        assert len(inner.calls) == 2
+        assert reopened.cache.stats()["hits"] == 1
+
+    def test_lru_eviction(self, temp_dir):
+        """Test that the least recently used entries are evicted first."""
+        backend = CountingBackend()
+        cache = EmbeddingCache(temp_dir / "cache.sqlite3", max_entries=10)
+        keys = [EmbeddingCache.key(backend, str(i)) for i in range(10)]
+        cache.put_many({key: [float(i)] * 8 for i, key in enumerate(keys)})
+        cache.get_many(keys[:5])
+
+        cache.put_many({EmbeddingCache.key(backend, "new"): [1.0] * 8})
+        assert len(cache) == 9
+        assert keys[5] not in cache.get_many([keys[5]])
+        assert len(cache.get_many(keys[:5])) == 5
+
+    def test_hits_are_written_back_in_batches(self, temp_dir):
+        """Test that lookups leave the database alone until the recency is flushed."""
+        backend = CountingBackend()
+        cache = EmbeddingCache(temp_dir / "cache.sqlite3", max_entries=10)
+        keys = [EmbeddingCache.key(backend, str(i)) for i in range(10)]
+        cache.put_many({key: [float(i)] * 8 for i, key in enumerate(keys)})
+
+        changes = cache._conn.total_changes
+        cache.get_many(keys[:5])
+        assert cache._conn.total_changes == changes
+        cache.close()
+
+        # The recency written back on close decides the eviction after reopening
+        reopened = EmbeddingCache(temp_dir / "cache.sqlite3", max_entries=10)
+        reopened.put_many({EmbeddingCache.key(backend, "new"): [1.0] * 8})
+        assert len(reopened.get_many(keys[:5])) == 5
+        assert keys[5] not in reopened.get_many([keys[5]])
+
+
+class TestSemanticSearchBackend:
+    """Test backend selection and caching in SemanticSearch."""
+
+    def test_config_selects_cached_backend(self, temp_dir):
+        """Test that the configured backend is used behind the cache."""
+        search = SemanticSearch(
+            str(temp_dir), embedding_dimension=64, config={"embeddings": {"backend": "hashing"}}
+        )
+        assert search.embedding_backend.name == "hashing"
+        cache = search.embedding_backend.cache
+
+        search.search("project meeting")
+        search.search("project meeting")
+        assert cache.hits == 1
+
+        note = search.content_manager.create_content({"title": "Project meeting"}, "note")
+        assert search.create_content_embedding(note["id"])
+        search.refresh_embeddings(force=True)
+        assert cache.hits == 2
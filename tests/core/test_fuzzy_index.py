@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the trigram fuzzy index.
+"""
+
+import random
+
+from knowledge_base.core.fuzzy_index import TrigramIndex, default_max_distance, edit_distance
+
+
+class TestEditDistance:
+    """Test suite for the bounded edit distance."""
+
+    def test_distances(self):
+        """Test edits, transpositions and the distance bound."""
+        assert edit_distance("garden", "garden", 2) == 0
+        assert edit_distance("garden", "gardne", 2) == 1
+        assert edit_distance("garden", "gardens", 2) == 1
+        assert edit_distance("garden", "warden", 2) == 1
+        assert edit_distance("garden", "gdn", 2) is None
+        assert edit_distance("kitten", "sitting", 3) == 3
+        assert edit_distance("kitten", "sitting", 2) is None
+
+
+class TestTrigramIndex:
+    """Test suite for the TrigramIndex class."""
+
+    def test_matches_brute_force(self):
+        """Test that trigram candidates miss no term within the default distances."""
+        rng = random.Random(3)
+        vocabulary = {"".join(rng.choice("abcde") for _ in range(rng.randint(3, 9))) for _ in range(3000)}
+        index = TrigramIndex(sorted(vocabulary))
+
+        for word in ["abcde", "eddab", "aabbccdd", "cabbage", "deadbeef"]:
+            for distance in {1, default_max_distance(word)}:
+                expected = sorted(
+                    (term, d) for term in vocabulary
+                    for d in [edit_distance(word, term, distance)] if d is not None
+                )
+                assert sorted(index.lookup(word, distance)) == expected, (word, distance)
+
+    def test_added_and_removed_terms(self):
+        """Test that added terms are found and removed ones filtered out."""
+        index = TrigramIndex(["compost", "garden"])
+        index.add("gardening")
+        assert index.lookup("gardenign") == [("gardening", 1)]
+        assert index.lookup("compots") == [("compost", 1)]
+        assert index.lookup("compots", exists=lambda term: term != "compost") == []
+        assert index.lookup("cat") == []
+
+    def test_containing_matches_brute_force(self):
+        """Test that substring and suffix lookups find exactly the matching terms."""
+        rng = random.Random(5)
+        vocabulary = sorted({"".join(rng.choice("abcde") for _ in range(rng.randint(1, 8))) for _ in range(2000)})
+        index = TrigramIndex(vocabulary)
+
+        for fragment in ["a", "cd", "abc", "eedd", "abcdeabc", "x"]:
+            assert sorted(index.containing(fragment)) == [t for t in vocabulary if fragment in t], fragment
+            assert sorted(index.containing(fragment, suffix=True)) == [
+                t for t in vocabulary if t.endswith(fragment)
+            ], fragment
+        assert index.containing("ab", exists=lambda term: term != "ab") == [
+            t for t in vocabulary if "ab" in t and t != "ab"
+        ]
+
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for whole-graph community detection.
+"""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from knowledge_base.core.graph_communities import CommunityIndex, connected_components, label_propagation
+from knowledge_base.core.graph_engine import GraphEngine
+from knowledge_base.core.relationship_manager import RelationshipManager
+
+
+def _two_triangles(manager: RelationshipManager) -> None:
+    """Relate two triangles joined by one bridge, plus a separate pair."""
+    manager.create_relationships([
+        ("a1", "a2"), ("a2", "a3"), ("a3", "a1"),
+        ("b1", "b2"), ("b2", "b3"), ("b3", "b1"),
+        ("a1", "b1"), ("p", "q")
+    ])
+
+
+@pytest.fixture
+def base_dir():
+    """Create a temporary knowledge base directory."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield Path(temp_dir)
+
+
+class TestCommunityAlgorithms:
+    """Test suite for the array algorithms."""
+
+    def test_connected_components(self):
+        """Test that components are labelled by their smallest node."""
+        src = np.array([4, 1, 2, 6])
+        dst = np.array([3, 2, 0, 6])
+        assert connected_components(7, src, dst).tolist() == [0, 0, 0, 3, 3, 5, 6]
+
+    def test_label_propagation(self):
+        """Test that densely linked groups end up as separate communities."""
+        src = np.array([0, 1, 2, 3, 4, 5, 0])
+        dst = np.array([1, 2, 0, 4, 5, 3, 3])
+        labels = label_propagation(6, src, dst, np.ones(7))
+        assert labels[0] == labels[1] == labels[2]
+        assert labels[3] == labels[4] == labels[5]
+        assert labels[0] != labels[3]
+
+
+class TestCommunityIndex:
+    """Test suite for the CommunityIndex class."""
+
+    def test_lookups(self, base_dir):
+        """Test community and component lookups over the whole graph."""
+        manager = RelationshipManager(base_dir)
+        _two_triangles(manager)
+        index = CommunityIndex(GraphEngine(manager), base_dir / "communities.json")
+
+        assert index.community_of("a2") == index.community_of("a3") != index.community_of("b2")
+        assert index.component_of("a2") == index.component_of("b3") != index.component_of("p")
+        assert sorted(index.members(index.community_of("b1"))) == ["b1", "b2", "b3"]
+        assert index.community_of("missing") is None
+        assert index.stats()["components"] == 2
+
+    def test_incremental_updates(self, base_dir):
+        """Test that new edges are applied without a recomputation."""
+        manager = RelationshipManager(base_dir)
+        _two_triangles(manager)
+        index = CommunityIndex(GraphEngine(manager))
+        index.community_of("a1")
+
+        with patch.object(index, "recompute", side_effect=AssertionError("recomputed")):
+            manager.create_relationship("q", "b2")
+            manager.create_relationship("new", "a3")
+            assert index.component_of("p") == index.component_of("a1")
+            assert index.community_of("new") == index.community_of("a3")
+            assert index.stats()["pending_changes"] == 2
+
+    def test_persisted_labels_are_reused(self, base_dir):
+        """Test that a later process loads saved labels instead of recomputing."""
+        manager = RelationshipManager(base_dir)
+        _two_triangles(manager)
+        path = base_dir / "communities.json"
+        community = CommunityIndex(GraphEngine(manager), path).community_of("a1")
+        assert path.exists()
+
+        other = RelationshipManager(base_dir)
+        index = CommunityIndex(GraphEngine(other), path)
+        with patch.object(index, "_recompute", side_effect=AssertionError("recomputed")):
+            assert index.community_of("a1") == community
+        assert index._generation is not None
+
+    def test_stale_labels_are_recomputed_in_background(self, base_dir):
+        """Test that labels saved for another graph are used until replaced."""
+        manager = RelationshipManager(base_dir)
+        _two_triangles(manager)
+        path = base_dir / "communities.json"
+        CommunityIndex(GraphEngine(manager), path).community_of("a1")
+        manager.delete_relationship("p", "q")
+
+        index = CommunityIndex(GraphEngine(RelationshipManager(base_dir)), path)
+        assert index.community_of("p") is not None
+        index._job_thread.join()
+        assert index.community_of("p") is None
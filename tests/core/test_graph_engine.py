@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Tests for the GraphEngine CSR adjacency.
+"""
+
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from knowledge_base.content_types import RelationshipType
+from knowledge_base.core.graph_engine import GraphEngine, type_mask, ALL_TYPES, OUT, IN
+from knowledge_base.core.relationship_manager import RelationshipManager
+
+
+@pytest.fixture
+def relationship_manager():
+    """Create a relationship manager with a small graph: a-b-c-d and a->e."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = RelationshipManager(temp_dir)
+        manager.create_relationships([("a", "b"), ("b", "c"), ("c", "d")], RelationshipType.RELATED)
+        manager.create_relationship("a", "e", RelationshipType.REFERENCE)
+        yield manager
+
+
+class TestGraphEngine:
+    """Test suite for the GraphEngine class."""
+
+    def test_type_mask(self):
+        """Test building filter masks from types."""
+        assert type_mask() == ALL_TYPES
+        assert bin(type_mask([RelationshipType.RELATED, "reference"])).count("1") == 2
+        assert type_mask(["unknown"]) == ALL_TYPES
+
+    def test_traversals(self, relationship_manager):
+        """Test neighbour, reachability and path queries."""
+        engine = GraphEngine(relationship_manager)
+
+        assert engine.neighbors("a") == ["b", "e"]
+        assert engine.neighbors("b", direction=OUT) == ["c"]
+        assert engine.neighbors("b", direction=IN) == ["a"]
+        assert engine.neighbors("a", [RelationshipType.REFERENCE]) == ["e"]
+        assert engine.neighbors("missing") == []
+
+        assert engine.bfs(["a"], max_depth=2) == {"a": 0, "b": 1, "e": 1, "c": 2}
+        assert engine.shortest_path("e", "d") == ["e", "a", "b", "c", "d"]
+        assert engine.shortest_path("e", "d", max_depth=3) is None
+        assert engine.shortest_path("d", "a", direction=OUT) is None
+        assert engine.shortest_path("a", "d", relationship_types=["reference"]) is None
+
+        assert engine.edge_between("b", "a") == ("a", "b", "related")
+        assert engine.edges(["a", "b"]) == [("a", "b", "related"), ("a", "e", "reference"), ("b", "c", "related")]
+        assert engine.type_counts("a") == {"reference": 1, "related": 1}
+        assert sorted(engine.node_ids()) == ["a", "b", "c", "d", "e"]
+
+    def test_follows_changes_without_rebuilding(self, relationship_manager):
+        """Test that relationship changes are applied incrementally."""
+        engine = GraphEngine(relationship_manager)
+        engine.refresh()
+
+        with patch.object(engine, "_rebuild", side_effect=AssertionError("rebuilt")):
+            relationship_manager.create_relationship("d", "f")
+            relationship_manager.delete_relationship("b", "c")
+            relationship_manager.update_relationship("a", "e", relationship_type=RelationshipType.DEPENDENCY)
+
+            assert engine.neighbors("d") == ["f", "c"]
+            assert engine.shortest_path("a", "d") is None
+            assert engine.type_counts("e") == {"dependency": 1}
+            assert engine.edge_count() == 4
+
+    def test_compaction_and_external_changes(self, relationship_manager):
+        """Test that compaction keeps the graph and other writers are picked up."""
+        engine = GraphEngine(relationship_manager)
+        engine.refresh()
+
+        with patch("knowledge_base.core.graph_engine.MIN_COMPACTION", 1):
+            relationship_manager.delete_relationship("a", "b")
+            relationship_manager.create_relationship("e", "c")
+            assert engine.shortest_path("a", "d") == ["a", "e", "c", "d"]
+        assert engine._csr_edges == engine.edge_count() == 4
+
+        RelationshipManager(relationship_manager.base_path).create_relationship("d", "g")
+        assert engine.neighbors("g") == ["d"]
+
+
+class TestPathSearch:
+    """Test suite for unweighted, weighted and k-shortest path searches."""
+
+    @pytest.fixture
+    def engine(self):
+        """Create a graph with a short related route and a longer continuation route."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manager = RelationshipManager(temp_dir)
+            manager.create_relationships([("s", "a"), ("a", "t")], RelationshipType.RELATED)
+            manager.create_relationships([("s", "x"), ("x", "y"), ("y", "t")], RelationshipType.CONTINUATION)
+            manager.create_relationship("s", "z", RelationshipType.REFERENCE, metadata={"weight": 0.1})
+            manager.create_relationship("z", "t", RelationshipType.REFERENCE, metadata={"weight": 5})
+            yield GraphEngine(manager)
+
+    def test_bidirectional_bfs(self, engine):
+        """Test that the fewest-hop path is found from either end."""
+        assert engine.shortest_path("s", "t") in (["s", "a", "t"], ["s", "z", "t"])
+        assert engine.shortest_path("x", "t") == ["x", "y", "t"]
+        assert engine.shortest_path("x", "t", max_depth=1) is None
+        assert engine.shortest_path("t", "x", direction=OUT) is None
+        assert engine.shortest_path("t", "x", direction=IN) == ["t", "y", "x"]
+
+    def test_weighted_path(self, engine):
+        """Test that type and metadata weights decide the cheapest path."""
+        path, cost = engine.weighted_path("s", "t")
+        assert path == ["s", "x", "y", "t"] and cost == pytest.approx(1.5)
+        assert engine.weighted_path("s", "t", max_cost=1.0) is None
+        assert engine.weighted_path("s", "t", heuristic=lambda content_id: 0.0) == (path, cost)
+        assert engine.weighted_path("s", "t", ["related"])[1] == pytest.approx(3.0)
+        assert engine.edge_between("s", "z") == ("s", "z", "reference")
+
+    def test_k_shortest_paths(self, engine):
+        """Test that alternative paths come cheapest first without repeats."""
+        paths = engine.k_shortest_paths("s", "t", k=5)
+        assert [path for path, _ in paths] == [["s", "x", "y", "t"], ["s", "a", "t"], ["s", "z", "t"]]
+        assert [cost for _, cost in paths] == pytest.approx([1.5, 3.0, 5.1])
+
+        hops = engine.k_shortest_paths("s", "t", k=2, weighted=False)
+        assert [cost for _, cost in hops] == [2.0, 2.0]
+        assert engine.k_shortest_paths("s", "missing") == []
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for precomputed graph centrality metrics.
+"""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from knowledge_base.core.graph_engine import GraphEngine
+from knowledge_base.core.graph_metrics import (
+    GraphMetrics, pagerank, undirected_adjacency, approximate_betweenness, ego_sizes
+)
+from knowledge_base.core.relationship_manager import RelationshipManager
+from knowledge_base.utils.helpers import ValidationError
+
+
+@pytest.fixture
+def relationship_manager():
+    """Create a star around "hub" with a tail: a, b, c -> hub -> d -> e."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = RelationshipManager(temp_dir)
+        manager.create_relationships([("a", "hub"), ("b", "hub"), ("c", "hub"), ("hub", "d"), ("d", "e")])
+        yield manager
+
+
+class TestMetricFunctions:
+    """Test suite for the whole-graph metric computations."""
+
+    def test_pagerank(self):
+        """Test that rank sums to one and collects where edges point."""
+        src, dst = np.array([0, 1, 2]), np.array([3, 3, 3])
+        ranks = pagerank(4, src, dst, np.ones(3))
+        assert ranks.sum() == pytest.approx(1.0)
+        assert ranks.argmax() == 3
+        assert ranks[0] == pytest.approx(ranks[1])
+
+        # Cheaper edges pass on more rank
+        ranks = pagerank(3, np.array([0, 0]), np.array([1, 2]), np.array([0.5, 1.5]))
+        assert ranks[1] > ranks[2]
+
+    def test_betweenness_of_a_path(self):
+        """Test exact betweenness when every node is sampled."""
+        offsets, neighbours = undirected_adjacency(4, np.array([0, 1, 2, 2]), np.array([1, 2, 3, 1]))
+        scores = approximate_betweenness(4, offsets, neighbours, samples=4)
+        # On a path 0-1-2-3 the middle nodes each sit between two of three pairs
+        assert scores == pytest.approx([0.0, 2 / 3, 2 / 3, 0.0])
+
+    def test_ego_sizes(self):
+        """Test exact and estimated two-hop neighbourhood sizes."""
+        src = np.array([0, 1, 2, 3, 0])
+        dst = np.array([1, 2, 3, 4, 0])
+        offsets, neighbours = undirected_adjacency(6, src, dst)
+        assert ego_sizes(6, offsets, neighbours).tolist() == [2, 3, 4, 3, 2, 0]
+
+        estimated = ego_sizes(6, offsets, neighbours, exact_work=0)
+        assert (estimated >= np.diff(offsets)).all()
+        assert estimated[5] == 0
+
+
+class TestGraphMetrics:
+    """Test suite for the GraphMetrics table."""
+
+    def test_metrics_and_ranking(self, relationship_manager):
+        """Test per-item metrics and top lists."""
+        metrics = GraphMetrics(GraphEngine(relationship_manager))
+
+        hub = metrics.get("hub")
+        assert hub["in_degree"] == 3 and hub["out_degree"] == 1 and hub["degree"] == 4
+        assert hub["ego_size"] == 5
+        assert metrics.get("missing") is None
+
+        assert metrics.top("betweenness", 1)[0][0] == "hub"
+        assert [node_id for node_id, _ in metrics.top("pagerank", 2)] == ["e", "d"]
+        assert [node_id for node_id, _ in metrics.top("degree", 5, ["a", "d", "missing"])] == ["d", "a"]
+        assert metrics.scores(["a", "missing"], "out_degree") == {"a": 1, "missing": 0}
+        with pytest.raises(ValidationError):
+            metrics.top("unknown")
+
+    def test_follows_changes(self, relationship_manager):
+        """Test that degrees follow changes and recomputation waits for the threshold."""
+        metrics = GraphMetrics(GraphEngine(relationship_manager))
+        metrics.recompute()
+
+        with patch.object(metrics, "recompute", side_effect=AssertionError("recomputed")):
+            relationship_manager.delete_relationship("a", "hub")
+            relationship_manager.create_relationship("e", "f")
+            assert metrics.get("hub")["in_degree"] == 2
+            assert metrics.get("f") == {
+                "in_degree": 1, "out_degree": 0, "pagerank": 0.0, "betweenness": 0.0, "ego_size": 0, "degree": 1
+            }
+            assert metrics.stats() == {"nodes": 7, "pending_changes": 2}
+
+        with patch.object(GraphMetrics, "MIN_RECOMPUTE", 1):
+            relationship_manager.create_relationship("f", "g")
+            metrics.get("g")
+            metrics._job_thread.join()
+        assert metrics.stats()["pending_changes"] == 0
+        assert metrics.get("f")["ego_size"] == 3
+
+    def test_persistence(self, relationship_manager):
+        """Test that a saved table is reused while the relationships are unchanged."""
+        path = Path(relationship_manager.base_path) / "metrics.npz"
+        GraphMetrics(GraphEngine(relationship_manager), path).recompute()
+        assert path.exists()
+
+        reloaded = GraphMetrics(GraphEngine(RelationshipManager(relationship_manager.base_path)), path)
+        with patch.object(reloaded, "_recompute", side_effect=AssertionError("recomputed")):
+            assert reloaded.get("hub")["degree"] == 4
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for level-of-detail graph summaries.
+"""
+
+import json
+import tempfile
+
+import numpy as np
+import pytest
+
+from knowledge_base.core.graph_summary import bundle_edges, ITEM, CLUSTER, REST, GROUP
+from knowledge_base.core.knowledge_graph import KnowledgeGraph
+
+
+@pytest.fixture
+def knowledge_graph():
+    """Create four linked groups of four items each: a1-a4, b1-b4, c1-c4, d1-d4."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        graph = KnowledgeGraph(temp_dir)
+        edges = []
+        for group in "abcd":
+            edges += [(group + "1", group + "2"), (group + "2", group + "3"), (group + "3", group + "1"),
+                      (group + "3", group + "4"), (group + "4", group + "1")]
+        edges += [("a1", "b1"), ("a2", "b3"), ("b2", "c2"), ("c3", "d3")]
+        graph.relationship_manager.create_relationships(edges)
+        yield graph
+
+
+def test_bundle_edges():
+    """Test that parallel edges are counted once with their most common type."""
+    bundles = bundle_edges(np.array([0, 0, 0, 1, 2]), np.array([1, 1, 1, 0, 1]), np.array([4, 1, 1, 4, 2]), 2)
+    assert bundles["source"].tolist() == [0, 1]
+    assert bundles["target"].tolist() == [1, 0]
+    assert bundles["count"].tolist() == [3, 1]
+    assert bundles["type"].tolist() == [1, 4]
+    assert bundle_edges(np.array([]), np.array([]), np.array([]), 10)["count"].tolist() == []
+
+
+class TestGraphSummary:
+    """Test suite for generate_visualization_summary."""
+
+    def test_overview(self, knowledge_graph):
+        """Test that communities become clusters joined by counted bundles."""
+        summary = knowledge_graph.generate_visualization_summary()
+        nodes, edges = summary["nodes"], summary["edges"]
+
+        assert nodes["kind"] == [CLUSTER] * 4
+        assert nodes["size"] == [4, 4, 4, 4]
+        assert nodes["label"] == ["Untitled"] * 4
+        assert summary["content_types"] == ["unknown"]
+        assert sorted(zip(edges["source"], edges["target"], edges["count"])) == [(0, 1, 2), (1, 2, 1), (2, 3, 1)]
+        assert summary["statistics"]["internal_edges"] == 20
+        assert summary["statistics"]["hidden_nodes"] == 0
+
+        # Columns refer to nodes by position, so the payload stays compact
+        assert all(isinstance(value, int) for value in edges["source"] + edges["target"])
+        json.dumps(summary)
+
+    def test_expansion_and_focus(self, knowledge_graph):
+        """Test that expanded communities list their top members and fold the rest."""
+        community = knowledge_graph.communities.community_of("a1")
+        summary = knowledge_graph.generate_visualization_summary(
+            expanded=[community], focus_ids=["d4", "missing"], max_members=2
+        )
+        nodes = summary["nodes"]
+
+        assert nodes["kind"] == [ITEM, ITEM, ITEM, REST, CLUSTER, CLUSTER, CLUSTER]
+        assert nodes["content_id"][:4] == ["d4", "a1", "a2", None]
+        assert nodes["label"][3] == "2 more"
+        assert nodes["size"] == [1, 1, 1, 2, 4, 4, 3]
+        assert summary["statistics"]["shown_nodes"] == 16
+
+    def test_groups_when_communities_do_not_fit(self, knowledge_graph):
+        """Test that linked communities are grouped to fit the node budget."""
+        summary = knowledge_graph.generate_visualization_summary(max_nodes=2)
+        assert summary["nodes"]["kind"] == [GROUP, GROUP]
+        assert summary["nodes"]["size"] == [8, 8]
+
+        summary = knowledge_graph.generate_visualization_summary(max_nodes=3)
+        assert sorted(summary["nodes"]["kind"]) == [CLUSTER, CLUSTER, GROUP]
+
+        group = summary["nodes"]["community"][summary["nodes"]["kind"].index(GROUP)]
+        opened = knowledge_graph.generate_visualization_summary(max_nodes=3, expanded_groups=[group])
+        assert sorted(opened["nodes"]["kind"]) == [CLUSTER, CLUSTER, GROUP]
+        assert opened["nodes"]["community"][opened["nodes"]["kind"].index(GROUP)] != group
+        assert opened["statistics"]["shown_nodes"] == 16
+
+        summary = knowledge_graph.generate_visualization_summary(max_nodes=1)
+        assert summary["statistics"]["shown_nodes"] + summary["statistics"]["hidden_nodes"] == 16
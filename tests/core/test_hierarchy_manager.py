@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Tests for the resident hierarchy index of HierarchyManager.
+"""
+
+import json
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from knowledge_base.core.hierarchy_manager import HierarchyManager
+from knowledge_base.utils.helpers import NotFoundError, ValidationError
+
+
+@pytest.fixture
+def hierarchy_manager():
+    """Create a hierarchy manager over a temporary knowledge base."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield HierarchyManager(temp_dir)
+
+
+class TestHierarchyIndex:
+    """Test suite for the resident hierarchy index."""
+
+    def test_reads_do_not_reload_the_file(self, hierarchy_manager):
+        """Test that lookups are answered from memory."""
+        work = hierarchy_manager.create_folder("Work")
+        hierarchy_manager.add_content_to_folder("note-1", work.id)
+        hierarchy_manager.update_content_path("note-1", "Plan")
+
+        with patch("builtins.open", side_effect=AssertionError("index re-read")):
+            assert hierarchy_manager.get_path("note-1") == "/Work/Plan"
+            assert hierarchy_manager.get_parent_id("note-1") == work.id
+            assert hierarchy_manager.get_children(work.id) == ["note-1"]
+            assert hierarchy_manager.get_folder_by_path("/Work") == work.id
+            assert hierarchy_manager.get_content_by_path("/Work/Plan") == "note-1"
+            assert [c["title"] for c in hierarchy_manager.get_breadcrumb("note-1")] == ["Root", "Work", "Plan"]
+
+    def test_path_index_follows_moves_and_deletes(self, hierarchy_manager):
+        """Test that path lookups stay correct as items change."""
+        work = hierarchy_manager.create_folder("Work")
+        home = hierarchy_manager.create_folder("Home")
+        hierarchy_manager.add_content_to_folder("note-1", work.id)
+        hierarchy_manager.update_content_path("note-1", "Plan")
+        before = hierarchy_manager.get_breadcrumb("note-1")
+
+        assert hierarchy_manager.move_content("note-1", home.id) == "/Home/Plan"
+        assert hierarchy_manager.get_content_by_path("/Work/Plan") is None
+        assert hierarchy_manager.get_content_by_path("/Home/Plan") == "note-1"
+        assert [c["title"] for c in hierarchy_manager.get_breadcrumb("note-1")] == ["Root", "Home", "Plan"]
+        assert [c["title"] for c in before] == ["Root", "Work", "Plan"]
+
+        assert hierarchy_manager.delete_folder(work.id)
+        assert hierarchy_manager.get_folder_by_path("/Work") is None
+        assert hierarchy_manager.get_folder_by_path("/Home") == home.id
+
+    def test_external_changes_are_picked_up(self, hierarchy_manager):
+        """Test that a rewrite by another process invalidates the resident copy."""
+        work = hierarchy_manager.create_folder("Work")
+        generation = hierarchy_manager.generation
+
+        other = HierarchyManager(hierarchy_manager.base_path)
+        other.create_folder("Archive", work.id)
+
+        archive = hierarchy_manager.get_folder_by_path("/Work/Archive")
+        assert archive is not None
+        assert hierarchy_manager.get_children(work.id) == [archive]
+        assert hierarchy_manager.generation != generation
+
+    def test_index_is_saved_atomically(self, hierarchy_manager):
+        """Test that saves leave no temporary files and a valid index."""
+        hierarchy_manager.create_folder("Work")
+        files = [p.name for p in hierarchy_manager.hierarchy_dir.iterdir()]
+        assert files == ["hierarchy_index.json"]
+        with open(hierarchy_manager.hierarchy_index_path) as f:
+            saved = json.load(f)
+        assert saved[saved["root"]]["path"] == "/"
+
+
+class TestSubtreeOperations:
+    """Test suite for subtree moves and bulk deletes."""
+
+    def test_move_rewrites_descendant_paths(self, hierarchy_manager):
+        """Test that moving a folder moves everything below it."""
+        work = hierarchy_manager.create_folder("Work")
+        projects = hierarchy_manager.create_folder("Projects", work.id)
+        archive = hierarchy_manager.create_folder("Archive")
+        hierarchy_manager.add_content_to_folder("note-1", projects.id)
+        hierarchy_manager.update_content_path("note-1", "Plan")
+
+        with patch.object(hierarchy_manager, "_save_hierarchy_index",
+                          wraps=hierarchy_manager._save_hierarchy_index) as save:
+            assert hierarchy_manager.move_content(work.id, archive.id) == "/Archive/Work"
+            assert save.call_count == 1
+
+        assert hierarchy_manager.get_path(projects.id) == "/Archive/Work/Projects"
+        assert hierarchy_manager.get_content_by_path("/Archive/Work/Projects/Plan") == "note-1"
+        assert hierarchy_manager.get_folder_by_path("/Work/Projects") is None
+        assert [c["title"] for c in hierarchy_manager.get_breadcrumb("note-1")] == [
+            "Root", "Archive", "Work", "Projects", "Plan"
+        ]
+        assert hierarchy_manager.relationship_manager.exists(archive.id, work.id)
+        assert not hierarchy_manager.relationship_manager.exists(hierarchy_manager.get_parent_id(archive.id), work.id)
+
+    def test_move_many_reports_per_item_errors(self, hierarchy_manager):
+        """Test that invalid items are skipped while the rest are moved."""
+        work = hierarchy_manager.create_folder("Work")
+        projects = hierarchy_manager.create_folder("Projects", work.id)
+        for i in range(3):
+            hierarchy_manager.add_content_to_folder(f"note-{i}", work.id)
+
+        moved, errors = hierarchy_manager.move_many(["note-0", "note-1", work.id, "missing"], projects.id)
+
+        assert set(moved) == {"note-0", "note-1"}
+        assert set(errors) == {work.id, "missing"}
+        assert hierarchy_manager.get_children(work.id) == [projects.id, "note-2"]
+        assert hierarchy_manager.get_children(projects.id) == ["note-0", "note-1"]
+        with pytest.raises(ValidationError):
+            hierarchy_manager.move_content(work.id, work.id)
+
+    def test_delete_many(self, hierarchy_manager):
+        """Test recursive and non-recursive bulk deletes."""
+        work = hierarchy_manager.create_folder("Work")
+        projects = hierarchy_manager.create_folder("Projects", work.id)
+        home = hierarchy_manager.create_folder("Home")
+        hierarchy_manager.add_content_to_folder("note-1", projects.id)
+        hierarchy_manager.add_content_to_folder("note-2", home.id)
+
+        # Work keeps a child that is not deleted with it
+        deleted, errors = hierarchy_manager.delete_many([work.id, projects.id])
+        assert deleted == []
+        assert isinstance(errors[work.id], ValidationError)
+        assert isinstance(errors[projects.id], ValidationError)
+
+        deleted, errors = hierarchy_manager.delete_many([home.id, "note-2"])
+        assert set(deleted) == {home.id, "note-2"} and errors == {}
+
+        deleted, errors = hierarchy_manager.delete_many([work.id], recursive=True)
+        assert set(deleted) == {work.id, projects.id, "note-1"}
+        assert hierarchy_manager.get_path("note-1") == ""
+        assert hierarchy_manager.get_folder_by_path("/Work/Projects") is None
+        root_id = hierarchy_manager.get_folder_by_path("/")
+        assert hierarchy_manager.get_children(root_id) == []
+        assert hierarchy_manager.relationship_manager.get_relationship_count(projects.id) == 0
+        assert hierarchy_manager.delete_folder("missing") is False
+        with pytest.raises(ValidationError):
+            hierarchy_manager.delete_folder(root_id)
+
+
+class TestTreePages:
+    """Test suite for paginated and streamed folder trees."""
+
+    def test_pages_follow_title_order(self, hierarchy_manager):
+        """Test that next_cursor pages through a folder without gaps."""
+        work = hierarchy_manager.create_folder("Work")
+        for title in ["delta", "Alpha", "charlie", "Bravo", "echo"]:
+            hierarchy_manager.create_folder(title, work.id)
+
+        titles = []
+        page = hierarchy_manager.get_tree_page(work.id, limit=2)
+        while True:
+            titles.extend(child["title"] for child in page["children"])
+            if not page["next_cursor"]:
+                break
+            page = hierarchy_manager.get_tree_page(cursor=page["next_cursor"], limit=2)
+
+        assert titles == ["Alpha", "Bravo", "charlie", "delta", "echo"]
+        assert page["id"] == work.id
+
+    def test_expand_tokens_and_node_budget(self, hierarchy_manager):
+        """Test that unlisted subtrees are left behind expand tokens."""
+        work = hierarchy_manager.create_folder("Work")
+        projects = hierarchy_manager.create_folder("Projects", work.id)
+        hierarchy_manager.add_content_to_folder("note-1", projects.id, "note")
+        hierarchy_manager.add_content_to_folder("note-2", work.id, "note")
+        hierarchy_manager.update_content_path("note-2", "Reading list")
+
+        page = hierarchy_manager.get_tree_page()
+        [work_item] = page["children"]
+        assert work_item["type"] == "folder" and work_item["child_count"] == 2
+        assert "children" not in work_item
+
+        page = hierarchy_manager.get_tree_page(cursor=work_item["expand"], depth=2)
+        assert [c["id"] for c in page["children"]] == [projects.id, "note-2"]
+        assert page["children"][0]["children"][0]["type"] == "note"
+
+        page = hierarchy_manager.get_tree_page(work.id, depth=2, max_nodes=2)
+        assert [c["id"] for c in page["children"]] == [projects.id, "note-2"]
+        projects_item = page["children"][0]
+        assert "children" not in projects_item
+        assert hierarchy_manager.get_tree_page(cursor=projects_item["expand"])["children"][0]["id"] == "note-1"
+
+    def test_invalid_requests(self, hierarchy_manager):
+        """Test that bad cursors and bounds are rejected."""
+        with pytest.raises(ValidationError):
+            hierarchy_manager.get_tree_page(cursor="not-a-cursor")
+        with pytest.raises(ValidationError):
+            hierarchy_manager.get_tree_page(limit=0)
+        with pytest.raises(NotFoundError):
+            hierarchy_manager.get_tree_page("missing")
+        with pytest.raises(NotFoundError):
+            hierarchy_manager.iter_tree("missing")
+
+    def test_iter_tree_is_pre_order(self, hierarchy_manager):
+        """Test that streamed items come parents first, in title order."""
+        work = hierarchy_manager.create_folder("Work")
+        projects = hierarchy_manager.create_folder("Projects", work.id)
+        archive = hierarchy_manager.create_folder("Archive")
+        hierarchy_manager.add_content_to_folder("note-1", projects.id)
+
+        items = list(hierarchy_manager.iter_tree())
+        assert [item["id"] for item in items[1:]] == [archive.id, work.id, projects.id, "note-1"]
+        assert [item["depth"] for item in items] == [0, 1, 1, 2, 3]
+        assert items[3]["parent_id"] == work.id
+
+        assert [item["id"] for item in hierarchy_manager.iter_tree(work.id, max_depth=1)] == [work.id, projects.id]
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for the compact postings storage.
+"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from knowledge_base.core.postings import (
+    BODY, TITLE, TAGS, PostingsSegment, encode_varints, decode_varints, intersect_sorted
+)
+
+
+class TestVarints:
+    """Test suite for the varint codec."""
+
+    def test_roundtrip(self):
+        """Test that values of every byte length decode to themselves."""
+        values = np.array([0, 1, 127, 128, 300, 16383, 16384, 2 ** 40], dtype=np.int64)
+        data, lengths = encode_varints(values)
+        assert lengths.tolist() == [1, 1, 1, 2, 2, 2, 3, 6]
+        assert len(data) == lengths.sum()
+        assert decode_varints(np.frombuffer(data, dtype=np.uint8)).tolist() == values.tolist()
+
+    def test_intersect_sorted(self):
+        """Test the merge and galloping intersections."""
+        a = np.array([2, 5, 9, 40], dtype=np.int64)
+        b = np.arange(0, 1000, dtype=np.int64)
+        assert intersect_sorted(a, b).tolist() == [2, 5, 9, 40]
+        assert intersect_sorted(b, a).tolist() == [2, 5, 9, 40]
+        assert intersect_sorted(a, np.array([5, 6, 40], dtype=np.int64)).tolist() == [5, 40]
+        assert intersect_sorted(np.array([1000], dtype=np.int64), b).tolist() == []
+
+
+class TestPostingsSegment:
+    """Test suite for writing and reading a postings file."""
+
+    def test_write_and_read(self):
+        """Test that postings read back from the mapped file unchanged."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "postings.bin"
+            postings = [
+                ("apple", {
+                    BODY: (np.array([1, 4, 200]), np.array([2, 1, 3]), np.array([0, 9, 5, 3, 150, 900])),
+                    TITLE: (np.array([4]), np.array([1]))
+                }),
+                ("pear", {TAGS: (np.array([7, 8]), np.array([1, 1]))})
+            ]
+            terms, offsets, df = PostingsSegment.write(path, postings)
+            segment = PostingsSegment(path, terms, offsets, df)
+
+            docs, counts, flat = segment.positions("apple")
+            assert docs.tolist() == [1, 4, 200]
+            assert counts.tolist() == [2, 1, 3]
+            assert flat.tolist() == [0, 9, 5, 3, 150, 900]
+            assert [a.tolist() for a in segment.field("apple", TITLE)] == [[4], [1]]
+            assert segment.docs("pear").tolist() == []
+            assert segment.field("pear", TAGS)[0].tolist() == [7, 8]
+            assert segment.df("apple") == 3 and segment.df("pear") == 2 and segment.df("plum") == 0
+            assert segment.terms_with_prefix("ap") == ["apple"]
+
+    def test_empty_segment(self):
+        """Test that a segment without terms can be mapped."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "postings.bin"
+            segment = PostingsSegment(path, *PostingsSegment.write(path, []))
+            assert len(segment) == 0
+            assert segment.docs("apple").tolist() == []
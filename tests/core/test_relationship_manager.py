@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the RelationshipManager class.
+"""
+
+import json
+import os
+import tempfile
+import pytest
+from unittest.mock import patch
+
+from knowledge_base.content_types import RelationshipType
+from knowledge_base.core.relationship_manager import RelationshipManager
+from knowledge_base.utils.helpers import NotFoundError, ValidationError
+
+
+@pytest.fixture
+def relationship_manager():
+    """Create a RelationshipManager in a temporary directory."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield RelationshipManager(temp_dir)
+
+
+class TestRelationshipIndexCache:
+    """Test suite for the resident relationships index."""
+
+    def test_index_is_parsed_once(self, relationship_manager):
+        """Test that reads reuse the resident index instead of re-parsing the file."""
+        relationship_manager.create_relationship("a", "b")
+
+        with patch("knowledge_base.core.relationship_manager.json.load") as mock_load:
+            assert relationship_manager.exists("a", "b")
+            assert relationship_manager.get_relationship_count("a") == 1
+            assert len(relationship_manager.get_relationships("b")) == 1
+            mock_load.assert_not_called()
+
+    def test_external_change_invalidates_cache(self, relationship_manager):
+        """Test that a change to the index file on disk is picked up."""
+        relationship_manager.create_relationship("a", "b")
+        other = RelationshipManager(relationship_manager.base_path)
+        other.create_relationship("c", "d")
+
+        # Force a distinct mtime in case both writes land in the same tick
+        stat = os.stat(relationship_manager.relationships_index_path)
+        os.utime(relationship_manager.relationships_index_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+
+        assert relationship_manager.exists("c", "d")
+
+    def test_save_is_atomic_and_written_through(self, relationship_manager):
+        """Test that mutations are flushed to disk without leaving temp files."""
+        relationship_manager.create_relationship("a", "b", RelationshipType.REFERENCE)
+        relationship_manager.update_relationship("a", "b", description="updated")
+
+        with open(relationship_manager.relationships_index_path) as f:
+            on_disk = json.load(f)
+        assert on_disk["a_b"]["description"] == "updated"
+        assert sorted(os.listdir(relationship_manager.relationships_dir)) == ["relationships_index.json"]
+
+    def test_invalid_update_leaves_index_untouched(self, relationship_manager):
+        """Test that a rejected update does not modify the resident index."""
+        relationship_manager.create_relationship("a", "b", description="original")
+
+        with pytest.raises(ValidationError):
+            relationship_manager.update_relationship("a", "b", description="changed", metadata="bad")
+
+        assert relationship_manager.get_relationships("a")[0].description == "original"
+
+    def test_delete_relationships(self, relationship_manager):
+        """Test deleting single and all relationships for an item."""
+        relationship_manager.create_relationship("a", "b")
+        relationship_manager.create_relationship("c", "a")
+        relationship_manager.create_relationship("c", "d")
+
+        assert relationship_manager.delete_relationship("a", "b") is True
+        assert relationship_manager.delete_relationship("a", "b") is False
+        assert relationship_manager.delete_all_relationships("c") == 2
+        assert relationship_manager._load_index() == {}
+
+        with pytest.raises(NotFoundError):
+            relationship_manager.update_relationship("c", "d", description="missing")
+
+
+class TestRelationshipAdjacency:
+    """Test suite for the adjacency indexes behind relationship lookups."""
+
+    def test_directional_lookups(self, relationship_manager):
+        """Test out-edge and in-edge filtering."""
+        relationship_manager.create_relationship("a", "b", RelationshipType.REFERENCE)
+        relationship_manager.create_relationship("c", "a", RelationshipType.DEPENDENCY)
+
+        outgoing = relationship_manager.get_relationships("a", as_target=False)
+        incoming = relationship_manager.get_relationships("a", as_source=False)
+
+        assert [(r.source_id, r.target_id) for r in outgoing] == [("a", "b")]
+        assert [(r.source_id, r.target_id) for r in incoming] == [("c", "a")]
+        assert relationship_manager.get_related_content_ids("a") == {"b", "c"}
+        assert relationship_manager.get_relationship_count("a") == 2
+
+    def test_type_lookups_follow_updates(self, relationship_manager):
+        """Test that per-type adjacency is maintained when a type changes."""
+        relationship_manager.create_relationship("a", "b", RelationshipType.REFERENCE)
+        relationship_manager.create_relationship("a", "c", "dependency")
+
+        assert relationship_manager.get_related_content_ids("a", RelationshipType.REFERENCE) == {"b"}
+        assert relationship_manager.get_related_content_ids("a", "dependency") == {"c"}
+
+        relationship_manager.update_relationship("a", "b", relationship_type=RelationshipType.DEPENDENCY)
+
+        assert relationship_manager.get_related_content_ids("a", RelationshipType.REFERENCE) == set()
+        assert relationship_manager.get_related_content_ids("a", RelationshipType.DEPENDENCY) == {"b", "c"}
+        assert relationship_manager.get_related_content_ids("a", "not-a-type") == set()
+
+    def test_recreate_replaces_adjacency(self, relationship_manager):
+        """Test that re-creating a relationship does not duplicate its edges."""
+        relationship_manager.create_relationship("a", "b", RelationshipType.REFERENCE)
+        relationship_manager.create_relationship("a", "b", RelationshipType.RELATED)
+
+        relationships = relationship_manager.get_relationships("b")
+        assert len(relationships) == 1
+        assert relationships[0].relationship_type == RelationshipType.RELATED
+        assert relationship_manager.get_relationships("a", RelationshipType.REFERENCE) == []
+
+    def test_delete_all_uses_adjacency(self, relationship_manager):
+        """Test that deleting all relationships clears every adjacency entry."""
+        relationship_manager.create_relationship("a", "b")
+        relationship_manager.create_relationship("b", "c")
+        relationship_manager.create_relationship("d", "b")
+
+        assert relationship_manager.delete_all_relationships("b") == 3
+        assert relationship_manager.get_all_content_ids() == set()
+        assert relationship_manager._type_edges.get("related", {}) == {}
+
+    def test_adjacency_rebuilt_on_reload(self, relationship_manager):
+        """Test that a fresh manager rebuilds adjacency from the stored index."""
+        relationship_manager.create_relationship("a", "b")
+        relationship_manager.create_relationship("b", "c", RelationshipType.CONTINUATION)
+
+        reloaded = RelationshipManager(relationship_manager.base_path)
+        assert reloaded.get_related_content_ids("b") == {"a", "c"}
+        assert reloaded.get_all_content_ids() == {"a", "b", "c"}
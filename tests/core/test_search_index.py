@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Tests for the SearchIndex inverted index.
+"""
+
+import os
+import json
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from knowledge_base.core.search_index import SearchIndex, reciprocal_rank_fusion
+
+
+def _write(path: Path, data) -> None:
+    """Write a JSON data file, creating its directory."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+@pytest.fixture
+def base_dir():
+    """Create a knowledge base with a few data files."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = Path(temp_dir) / "data"
+        _write(data_dir / "notes" / "meeting.json",
+               {"title": "Project meeting", "content": "Discussed the roadmap", "tags": ["work"]})
+        _write(data_dir / "notes" / "ideas.json",
+               {"title": "Ideas", "content": "Roadmapping workshop", "tags": ["ideas"]})
+        _write(data_dir / "todos" / "call.json",
+               {"title": "Call the client", "content": "About the meeting notes", "type": "todo"})
+        _write(data_dir / "embeddings" / "skip.json", {"content": "roadmap"})
+        yield Path(temp_dir)
+
+
+class TestSearchIndex:
+    """Test suite for the SearchIndex class."""
+
+    def test_find_substring_matches_linear_scan(self, base_dir):
+        """Test that indexed substring search matches a scan of every file."""
+        index = SearchIndex(base_dir)
+        index.refresh()
+
+        queries = ["roadmap", "Meeting", "the road", "oadmap", "ject meet", '"title": "Ideas"', "missing",
+                   "dm", "p", "ing work", "lient"]
+        for merged in (False, True):
+            if merged:
+                index.merge()
+            for query in queries:
+                expected = []
+                for path in sorted((base_dir / "data").rglob("*.json")):
+                    if path.parts[-2] == "embeddings":
+                        continue
+                    text = json.dumps(json.loads(path.read_text()), indent=2)
+                    if query.lower() in text.lower():
+                        expected.append(str(path))
+                assert [r["file"] for r in index.find_substring(query)] == expected, (query, merged)
+
+    def test_content_type_filter(self, base_dir):
+        """Test that results can be restricted to a top-level directory."""
+        index = SearchIndex(base_dir)
+        index.refresh()
+        results = index.find_substring("meeting", "todos")
+        assert [r["type"] for r in results] == ["todos"]
+
+    def test_data_root_files_are_left_out(self, base_dir):
+        """Test that files directly under data/ only match when asked for."""
+        _write(base_dir / "data" / "stray.json", {"roadmap": ["a", "b"]})
+        index = SearchIndex(base_dir)
+        index.refresh()
+
+        assert len(index.find_substring("roadmap")) == 2
+        assert [r["type"] for r in index.find_substring("roadmap", "")] == [""]
+        assert len(index.search("roadmap")) == 2
+        assert [r["file"] for r in index.search("roadmap", top_dirs=["notes", "todos"])] == ["notes/meeting.json"]
+
+    def test_refresh_picks_up_changes(self, base_dir):
+        """Test that new, rewritten and deleted files are reflected after refresh."""
+        index = SearchIndex(base_dir)
+        index.refresh()
+        assert not index.refresh()
+
+        _write(base_dir / "data" / "notes" / "new.json", {"content": "quarterly review"})
+        meeting = base_dir / "data" / "notes" / "meeting.json"
+        meeting.unlink()
+        assert index.refresh()
+        assert len(index.find_substring("quarterly")) == 1
+        assert len(index.find_substring("discussed")) == 0
+
+        # An in-place rewrite does not change the directory, so it is reported
+        ideas = base_dir / "data" / "notes" / "ideas.json"
+        _write(ideas, {"content": "budget planning"})
+        os.utime(ideas, ns=(1, 1))
+        index.update_file(ideas)
+        assert [r["file"] for r in index.find_substring("budget")] == [str(ideas)]
+
+    def test_full_refresh_picks_up_in_place_rewrites(self, base_dir):
+        """Test that a file rewritten in place is re-indexed on a full refresh only."""
+        index = SearchIndex(base_dir)
+        index.refresh()
+
+        def rewrite(path, data):
+            dir_stat = path.parent.stat()
+            _write(path, data)
+            os.utime(path, ns=(1, 1))
+            os.utime(path.parent, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+
+        ideas = base_dir / "data" / "notes" / "ideas.json"
+        rewrite(ideas, {"content": "budget planning"})
+        assert not index.refresh()
+        assert index.find_substring("budget") == []
+
+        assert index.refresh(full=True)
+        assert [r["file"] for r in index.find_substring("budget")] == [str(ideas)]
+        assert len(index.find_substring("workshop")) == 0
+        assert not index.refresh(full=True)
+
+        # Plain refreshes sweep the files again once the interval has passed
+        index.FULL_REFRESH_INTERVAL = 0
+        rewrite(ideas, {"content": "harvest festival"})
+        assert index.refresh()
+        assert len(index.find_substring("harvest")) == 1
+
+    def test_refresh_drops_deleted_reported_files(self, base_dir):
+        """Test that a file reported with update_file and then deleted is dropped on refresh."""
+        index = SearchIndex(base_dir)
+        index.refresh()
+
+        for path in [base_dir / "data" / "notes" / "new.json", base_dir / "data" / "drafts" / "new.json"]:
+            _write(path, {"content": "quarterly review"})
+            index.update_file(path)
+            assert [r["file"] for r in index.find_substring("quarterly")] == [str(path)]
+
+            path.unlink()
+            index.refresh()
+            assert index.find_substring("quarterly") == []
+            assert index.search("quarterly") == []
+            assert SearchIndex(base_dir).find_substring("quarterly") == []
+
+    def test_index_persists(self, base_dir):
+        """Test that a new instance loads the saved index without reading files."""
+        SearchIndex(base_dir).refresh()
+
+        def fail(path):
+            raise AssertionError(f"unexpected read of {path}")
+
+        index = SearchIndex(base_dir, reader=fail)
+        assert not index.refresh()
+        assert len(index.find_substring("roadmap")) == 2
+
+    def test_ranked_search_and_tags(self, base_dir):
+        """Test the ranked search and tag lookups."""
+        index = SearchIndex(base_dir)
+        index.refresh()
+        results = index.search("meeting")
+        assert results[0]["title"] == "Project meeting"
+        assert [r["file"] for r in index.search_by_tag("work")] == ["notes/meeting.json"]
+        assert index.get_statistics()["total_files"] == 3
+
+
+class TestRankedSearch:
+    """Test suite for BM25F ranking and phrase queries."""
+
+    @pytest.fixture
+    def index(self):
+        """Create an index over notes with known term statistics."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            notes = Path(temp_dir) / "data" / "notes"
+            _write(notes / "short.json", {"title": "Garden", "content": "compost and soil"})
+            _write(notes / "long.json", {"title": "Diary", "content": "compost " + "filler words " * 50})
+            _write(notes / "titled.json", {"title": "Compost guide", "content": "how to start"})
+            _write(notes / "tagged.json", {"title": "Misc", "content": "notes on soil", "tags": ["compost"]})
+            _write(notes / "phrase.json", {"title": "Kitchen", "content": "the compost bin is full", "type": "todo"})
+            _write(notes / "reversed.json", {"title": "Shed", "content": "a bin for compost"})
+            index = SearchIndex(temp_dir)
+            index.refresh()
+            yield index
+
+    def test_fields_and_length_are_weighted(self, index):
+        """Test that title matches and short documents rank higher."""
+        ranked = [r["file"] for r in index.search("compost")]
+        assert ranked[0] == "notes/titled.json"
+        assert ranked.index("notes/short.json") < ranked.index("notes/long.json")
+        assert ranked.index("notes/tagged.json") < ranked.index("notes/long.json")
+
+    def test_rare_terms_weigh_more(self, index):
+        """Test that a rare query term outweighs a common one."""
+        assert index.search("compost start")[0]["file"] == "notes/titled.json"
+        assert index.search("compost diary")[0]["file"] == "notes/long.json"
+
+    def test_phrase_query(self, index):
+        """Test that quoted phrases require adjacent words in order."""
+        assert [r["file"] for r in index.search('"compost bin"')] == ["notes/phrase.json"]
+        assert [r["file"] for r in index.search('"bin compost"')] == []
+        assert [r["file"] for r in index.search('soil "compost and soil"')] == ["notes/short.json"]
+
+    def test_limit_and_content_type(self, index):
+        """Test that the limit and content type filter apply."""
+        assert len(index.search("compost", limit=2)) == 2
+        assert [r["file"] for r in index.search("compost", content_type="todo")] == ["notes/phrase.json"]
+        assert len(index.search("compost", content_type=["todo", "unknown"])) == 6
+
+    def test_reciprocal_rank_fusion(self):
+        """Test that items ranked well by both rankings come first."""
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "d"]])
+        assert [key for key, _ in fused] == ["b", "c", "a", "d"]
+        assert fused[0][1] == pytest.approx(1 / 62 + 1 / 61)
+        weighted = reciprocal_rank_fusion([["a", "b"], ["b", "a"]], weights=[2.0, 1.0])
+        assert [key for key, _ in weighted] == ["a", "b"]
+
+
+class TestSegments:
+    """Test suite for the base and delta segment storage."""
+
+    def test_changes_append_deltas(self, base_dir):
+        """Test that updates are appended as deltas and replayed on load."""
+        index = SearchIndex(base_dir)
+        index.refresh()
+        index.merge()
+        base_size = index.index_path.stat().st_size
+
+        _write(base_dir / "data" / "notes" / "new.json", {"content": "harvest festival"})
+        index.update_file(base_dir / "data" / "notes" / "new.json")
+        index.remove_file(base_dir / "data" / "notes" / "meeting.json")
+        assert index.index_path.stat().st_size == base_size
+        assert len(index._delta_segments()) == 1
+
+        reloaded = SearchIndex(base_dir)
+        assert len(reloaded.find_substring("harvest")) == 1
+        assert reloaded.find_substring("discussed") == []
+
+    def test_merge_folds_deltas_into_base(self, base_dir):
+        """Test that merging writes a base segment and drops the deltas."""
+        index = SearchIndex(base_dir)
+        index.refresh()
+        assert index._delta_segments()
+
+        index.merge()
+        assert index._delta_segments() == []
+        assert len(SearchIndex(base_dir)) == 3
+
+    def test_first_merge_is_synchronous(self, base_dir):
+        """Test that large deltas without a base segment are merged before refresh returns."""
+        index = SearchIndex(base_dir)
+        index.MERGE_MIN_RECORDS = 2
+        index.refresh()
+        assert index._merge_thread is None
+        assert index.index_path.exists()
+        assert index._delta_segments() == []
+        assert len(SearchIndex(base_dir)) == 3
+
+    def test_background_merge_threshold(self, base_dir):
+        """Test that large deltas are merged on a background thread once a base exists."""
+        index = SearchIndex(base_dir)
+        index.refresh()
+        index.merge()
+        index.MERGE_MIN_RECORDS = 2
+        for name in ("a", "b", "c"):
+            path = base_dir / "data" / "notes" / f"{name}.json"
+            _write(path, {"content": f"harvest {name}"})
+            index.update_file(path)
+        assert index._merge_thread is not None
+
+        index.close()
+        assert not index._merge_thread.is_alive()
+        assert len(SearchIndex(base_dir)) == 6
+
+    def test_merge_preserves_results(self, base_dir):
+        """Test that queries give the same answers from live and mapped postings."""
+        index = SearchIndex(base_dir)
+        index.refresh()
+        queries = ["meeting", "roadmap notes", '"meeting notes"', "oadmap"]
+        before = [index.search(q) for q in queries] + [index.find_substring(q) for q in queries]
+
+        index.merge()
+        assert index._segment is not None and index._postings == {}
+        after = [index.search(q) for q in queries] + [index.find_substring(q) for q in queries]
+        assert after == before
+
+        # A removed base document is masked until the next merge
+        index.remove_file(base_dir / "data" / "notes" / "meeting.json")
+        assert index.search("discussed") == []
+        assert SearchIndex(base_dir).search("discussed") == []
+
+    def test_torn_delta_record_is_dropped(self, base_dir):
+        """Test that a partially written record does not break loading."""
+        index = SearchIndex(base_dir)
+        index.refresh()
+        _, path = index._delta_segments()[-1]
+        with open(path, 'ab') as f:
+            f.write(b"\x80\x05\x95garbage")
+
+        reloaded = SearchIndex(base_dir)
+        assert len(reloaded) == 3
+        reloaded.remove_file(base_dir / "data" / "notes" / "ideas.json")
+        assert len(SearchIndex(base_dir)) == 2
+
+
+class TestContentManagerPush:
+    """Test that ContentManager pushes its writes to the search index."""
+
+    def test_create_update_delete(self):
+        """Test that content changes are searchable without a refresh."""
+        from knowledge_base.core.content_manager import ContentManager
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            index = SearchIndex(temp_dir)
+            manager = ContentManager(temp_dir, search_index=index)
+
+            note = manager.create_content({"title": "Pond", "content": "frogspawn in spring"}, "note")
+            assert [r["file"] for r in index.find_substring("frogspawn")] == [note["_filepath"]]
+
+            manager.update_content(note["id"], {"content": "tadpoles in summer"})
+            assert index.find_substring("frogspawn") == []
+            assert len(index.find_substring("tadpoles")) == 1
+
+            manager.delete_content(note["id"])
+            assert index.find_substring("tadpoles") == []
+            assert len(SearchIndex(temp_dir)) == 0
+
+
+class TestFuzzySearch:
+    """Test suite for typo-tolerant lookups."""
+
+    def test_similar_terms(self, base_dir):
+        """Test that misspelled words find the indexed terms they mean."""
+        index = SearchIndex(base_dir)
+        index.refresh()
+        assert index.similar_terms("raodmap")[0] == ("roadmap", 1)
+        assert index.similar_terms("roadmap")[0] == ("roadmap", 0)
+        assert index.expand_terms(["meeting", "wrokshop"]) == {"meeting": 1.0, "workshop": 0.7}
+
+        # Terms of documents indexed later are found too
+        _write(base_dir / "data" / "notes" / "new.json", {"content": "greenhouse"})
+        index.update_file(base_dir / "data" / "notes" / "new.json")
+        assert index.similar_terms("grenhouse") == [("greenhouse", 1)]
+
+    def test_fuzzy_search_and_substring(self, base_dir):
+        """Test fuzzy ranked search, substring fallback and tag lookup."""
+        index = SearchIndex(base_dir)
+        index.refresh()
+        index.merge()
+
+        assert index.search("wrokshop") == []
+        assert [r["file"] for r in index.search("wrokshop", fuzzy=True)] == ["notes/ideas.json"]
+
+        assert index.find_substring("discused the") == []
+        results = index.find_substring("discused the", fuzzy=True)
+        assert [r["matched_query"] for r in results] == ["discussed the"]
+
+        assert index.search_by_tag("idaes") == []
+        assert [r["file"] for r in index.search_by_tag("idaes", fuzzy=True)] == ["notes/ideas.json"]
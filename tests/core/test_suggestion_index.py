@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the prefix completion trie and search suggestions.
+"""
+
+import json
+import random
+import tempfile
+from pathlib import Path
+
+from knowledge_base.core.search_index import SearchIndex
+from knowledge_base.core.suggestion_index import CompletionTrie, SuggestionIndex
+
+
+def _write(path: Path, data) -> None:
+    """Write a JSON data file, creating its directory."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+class TestCompletionTrie:
+    """Test suite for the CompletionTrie class."""
+
+    def test_matches_brute_force(self):
+        """Test that cached completions match sorting every matching key."""
+        rng = random.Random(7)
+        trie = CompletionTrie(top_k=5)
+        weights = {}
+        for _ in range(2000):
+            key = "".join(rng.choice("abc") for _ in range(rng.randint(1, 6)))
+            if rng.random() < 0.3 and key in weights:
+                trie.remove(key)
+                del weights[key]
+            else:
+                weights[key] = rng.randint(0, 50)
+                trie.set(key, weights[key])
+
+        built = CompletionTrie(top_k=5)
+        built.build(weights.items())
+
+        assert len(trie) == len(weights)
+        for prefix in ["", "a", "ab", "abc", "cab", "b", "ccccccc"]:
+            for limit in (3, 5, 12):
+                matches = [(k, w) for k, w in weights.items() if k.startswith(prefix)]
+                expected = sorted(matches, key=lambda item: (-item[1], item[0]))[:limit]
+                assert trie.complete(prefix, limit) == expected, (prefix, limit)
+                assert built.complete(prefix, limit) == expected, (prefix, limit)
+
+    def test_remove_merges_nodes(self):
+        """Test that removing keys leaves the remaining keys reachable."""
+        trie = CompletionTrie()
+        for key in ["romane", "romanus", "romulus", "rubens"]:
+            trie.set(key, 1.0)
+        assert trie.remove("romanus")
+        assert not trie.remove("romanus")
+        trie.remove("romulus")
+        assert trie.complete("rom") == [("romane", 1.0)]
+        assert trie.complete("roma") == [("romane", 1.0)]
+        assert trie.complete("romu") == []
+
+
+class TestSuggestionIndex:
+    """Test suite for the SuggestionIndex class."""
+
+    def test_kinds_and_popularity(self):
+        """Test that titles, tags and terms are ranked and popularity boosts titles."""
+        index = SuggestionIndex()
+        index.set_content("notes/a.json", "Garden plan", "a", "notes")
+        index.set_content("notes/b.json", "Garden log", "b", "notes")
+        index.set_tag("gardening", 1)
+        index.set_terms({"garden": 4, "gardener": 2})
+
+        results = index.suggest("gard", 10)
+        assert [r["title"] for r in results[:2]] == ["Garden log", "Garden plan"]
+        assert {r["type"] for r in results} == {"content", "tag", "term"}
+
+        index.record_interaction("b", -1)
+        index.record_interaction("a")
+        assert index.suggest("garden ")[0]["title"] == "Garden plan"
+        assert [r["title"] for r in index.suggest("garden l")] == ["Garden log"]
+
+        index.set_tag("gardening", 0)
+        index.remove_content("notes/a.json")
+        assert "Garden plan" not in [r["title"] for r in index.suggest("gard", 10)]
+        assert "gardening" not in [r["title"] for r in index.suggest("gard", 10)]
+
+    def test_search_index_keeps_suggestions_current(self):
+        """Test that indexed and removed files update the suggestions."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            notes = Path(temp_dir) / "data" / "notes"
+            _write(notes / "a.json", {"id": "a", "title": "Beekeeping basics", "content": "hive hive", "tags": ["bees"]})
+            _write(notes / "b.json", {"id": "b", "title": "Hive inspection", "content": "the hive"})
+            _write(notes / "c.json", {"id": "c", "title": "Other", "content": "nothing"})
+            index = SearchIndex(temp_dir)
+            index.refresh()
+
+            assert index.suggestions.suggest("bee")[0]["content_id"] == "a"
+            assert [r["type"] for r in index.suggestions.suggest("hive")] == ["content", "term"]
+            assert index.suggestions.suggest("bees")[0] == {"type": "tag", "title": "bees", "count": 1, "score": 3.3863}
+
+            index.remove_file(notes / "a.json")
+            assert index.suggestions.suggest("bee") == []
+
+            # A reloaded index and a merged one suggest the same
+            index.merge()
+            reloaded = SearchIndex(temp_dir)
+            assert reloaded.suggestions.suggest("h") == index.suggestions.suggest("h")
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Tests for the VectorStore class and its use by SemanticSearch.
+"""
+
+import tempfile
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from knowledge_base.core.vector_store import VectorStore
+from knowledge_base.core.semantic_search import SemanticSearch
+from knowledge_base.utils.helpers import ValidationError
+
+
+def _unit(index, dimension=4):
+    """Create a unit basis vector."""
+    vector = np.zeros(dimension, dtype=np.float32)
+    vector[index] = 1.0
+    return vector
+
+
+@pytest.fixture
+def store():
+    """Create a small populated vector store."""
+    store = VectorStore(4, initial_capacity=2)
+    store.add("a", [1, 0, 0, 0], {"content_type": "note", "category": "work", "tags": ["x"]})
+    store.add("b", [1, 1, 0, 0], {"content_type": "todo", "category": "work", "tags": ["y"]})
+    store.add("c", [0, 0, 1, 0], {"content_type": "note", "category": "home", "tags": ["x", "y"]})
+    return store
+
+
+class TestVectorStore:
+    """Test suite for the VectorStore class."""
+
+    def test_rows_are_normalised(self, store):
+        """Test that stored rows have unit length."""
+        norms = np.linalg.norm(store.matrix, axis=1)
+        assert np.allclose(norms, 1.0)
+        assert store.matrix.dtype == np.float32
+
+    def test_search_orders_by_similarity(self, store):
+        """Test that search returns the top-k rows in descending order."""
+        hits = store.search(_unit(0), top_k=2)
+        assert [content_id for content_id, _ in hits] == ["a", "b"]
+        assert hits[0][1] == pytest.approx(1.0)
+        assert hits[1][1] == pytest.approx(1 / np.sqrt(2))
+
+    def test_filters_apply_as_masks(self, store):
+        """Test content type, category and tag masks."""
+        mask = store.filter_mask(content_types=["note"])
+        assert [cid for cid, _ in store.search(_unit(0), 10, mask=mask)] == ["a", "c"]
+
+        mask = store.filter_mask(categories=["work"], tags=["y"])
+        assert [cid for cid, _ in store.search(_unit(0), 10, mask=mask)] == ["b"]
+
+        mask = store.filter_mask(content_types=["unknown"])
+        assert store.search(_unit(0), 10, mask=mask) == []
+
+    def test_min_similarity_and_exclude(self, store):
+        """Test score thresholds and excluded IDs."""
+        hits = store.search(_unit(0), 10, min_similarity=0.5, exclude={"a"})
+        assert [cid for cid, _ in hits] == ["b"]
+
+    def test_remove_frees_row_for_reuse(self, store):
+        """Test that removed rows are skipped by search and reused by add."""
+        assert store.remove("a") is True
+        assert store.remove("a") is False
+        assert len(store) == 2
+        assert store.ids() == ["b", "c"]
+        assert [cid for cid, _ in store.search(_unit(0), 10)] == ["b", "c"]
+
+        mask = store.filter_mask(tags=["x"])
+        assert [cid for cid, _ in store.search(_unit(2), 10, mask=mask)] == ["c"]
+
+        assert store.add("d", _unit(3), {"tags": ["x"]}) == 0
+        assert store.matrix.shape[0] == 3
+        assert np.allclose(store.get_vector("c"), _unit(2))
+
+    def test_replace_and_dimension_check(self, store):
+        """Test replacing a vector and rejecting wrong dimensions."""
+        store.add("a", [0, 0, 0, 2], {"content_type": "note", "tags": []})
+        assert len(store) == 3
+        assert store.search(_unit(3), 1)[0][0] == "a"
+        assert store.filter_mask(tags=["x"]).tolist() == [False, False, True]
+
+        with pytest.raises(ValidationError):
+            store.add("d", [1, 0])
+
+
+class TestSemanticSearchVectorStore:
+    """Test SemanticSearch scoring through the vector store."""
+
+    def test_search_and_similar_content(self):
+        """Test that search and similar_content rank from the resident matrix."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            search = SemanticSearch(temp_dir, embedding_dimension=32, use_mock_embeddings=True)
+            manager = search.content_manager
+            first = manager.create_content({"title": "Alpha", "content": "alpha"}, "note")
+            second = manager.create_content({"title": "Beta", "description": "beta"}, "todo")
+            for item in (first, second):
+                assert search.create_content_embedding(item["id"])
+
+            query = search._extract_text_for_embedding(manager.get_content(first["id"]))
+            results = search.search(query, top_k=1)
+            assert results[0]["content_id"] == first["id"]
+            assert results[0]["similarity"] == pytest.approx(1.0, abs=1e-5)
+            assert results[0]["content"]["title"] == "Alpha"
+
+            todo_only = search.search(query, content_types=["todo"])
+            assert [r["content_id"] for r in todo_only] == [second["id"]]
+
+            similar = search.similar_content(first["id"], min_similarity=0.0)
+            assert [r["content_id"] for r in similar] == [second["id"]]
+
+            assert search.delete_embedding(second["id"])
+            assert search.similar_content(first["id"], min_similarity=0.0) == []
+
+    def test_projection_and_lazy_hydration(self):
+        """Test that results are read in one batch and only when needed."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            search = SemanticSearch(temp_dir, embedding_dimension=32, use_mock_embeddings=True)
+            manager = search.content_manager
+            folder = manager.create_folder("Work")
+            items = [
+                manager.create_content({"title": f"Item {i}", "content": f"body {i}"}, "note", folder["id"])
+                for i in range(3)
+            ]
+            for item in items:
+                assert search.create_content_embedding(item["id"])
+
+            with patch.object(manager, "get_contents", wraps=manager.get_contents) as get_contents, \
+                 patch.object(manager, "get_content", wraps=manager.get_content) as get_content:
+                full = search.search("body", top_k=3)
+                assert get_contents.call_count == 1
+                assert get_content.call_count == 0
+                assert all(r["content"]["_breadcrumb"][-2]["title"] == "Work" for r in full)
+
+                titles = search.search("body", top_k=3, fields=["title"])
+                lazy = search.search("body", top_k=3, hydrate=False)
+                assert get_contents.call_count == 1
+                assert {r["content"]["title"] for r in titles} == {"Item 0", "Item 1", "Item 2"}
+                assert set(titles[0]["content"]) == {"id", "title"}
+                assert "content" not in lazy[0]["content"]
+
+                search.hydrate_results(lazy, fields=["content", "parent_id"])
+                assert get_contents.call_count == 2
+                assert set(lazy[0]["content"]) == {"id", "content", "parent_id"}
+                assert lazy[0]["content"]["parent_id"] == folder["id"]
+
+            manager.delete_content(items[0]["id"])
+            missing = search.hydrate_results([{"content_id": items[0]["id"], "metadata": {"title": "Item 0"}}])
+            assert missing[0]["content"]["_not_found"] is True
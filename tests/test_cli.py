@@ -13,6 +13,13 @@ from io import StringIO
 from knowledge_base.cli import main
 
 
+@pytest.fixture(autouse=True)
+def temp_base_path(tmp_path, monkeypatch):
+    """Run the CLI from a temporary directory so its default base path is not the repo."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
 class TestCLI:
     """Test suite for the Knowledge Base CLI."""
     
@@ -163,6 +170,25 @@ class TestCLI:
         assert result["session_id"] == "test-session-id"
         assert result["privacy_level"] == "minimal"
     
+    @patch('knowledge_base.core.semantic_search.SemanticSearch.migrate_legacy_index')
+    @patch('sys.argv', ['knowledge_base.cli', 'migrate-embeddings'])
+    def test_migrate_embeddings_command(self, mock_migrate, capsys):
+        """Test the migrate-embeddings command."""
+        mock_migrate.return_value = 3
+        
+        # Execute the CLI
+        main()
+        
+        mock_migrate.assert_called_once_with()
+        
+        # Extract JSON from potentially log-contaminated output
+        captured = capsys.readouterr()
+        json_match = re.search(r'({.+})', captured.out, re.DOTALL)
+        assert json_match, "No JSON found in output"
+        
+        result = json.loads(json_match.group(1))
+        assert result["migrated"] == 3
+    
     @patch('knowledge_base.KnowledgeBaseManager.process_and_respond')
     @patch('knowledge_base.PrivacySessionManager.create_session')
     @patch('builtins.input', side_effect=['Test question', 'exit'])
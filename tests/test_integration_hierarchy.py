@@ -241,6 +241,34 @@ class TestHierarchicalContentIntegration:
         assert task2["id"] in node_ids
         assert note["id"] in node_ids
 
+    def test_search_after_graph_metrics(self, kb_manager, caplog):
+        """Test that the stored graph data and binary files stay out of content search."""
+        manager, temp_dir = kb_manager
+        data_dir = Path(temp_dir) / "data"
+        
+        project = manager.create_content({"title": "Project Phoenix", "description": "Main project"}, "project")
+        task = manager.create_content({"title": "Design phase", "description": "Design task"}, "todo")
+        manager.create_relationship(project["id"], task["id"], RelationshipType.DEPENDENCY)
+        (data_dir / "notes" / "diagram.png").write_bytes(b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\xff\xfe")
+        
+        assert manager.get_important_content()[0]["id"] == task["id"]
+        manager.get_graph_summary()
+        assert (data_dir / "index" / "graph" / "metrics.npz").exists()
+        assert (data_dir / "index" / "graph" / "communities.json").exists()
+        assert not (data_dir / "graph").exists()
+        
+        caplog.clear()
+        for _ in range(2):
+            results = manager.search_content("phase")
+            assert [Path(r["file"]).parent.name for r in results] == ["todos"]
+            assert manager.search_content(project["id"])
+        assert not [record for record in caplog.records if record.levelname == "ERROR"]
+        
+        # The directory holding the binary file is settled, not re-listed on every query
+        search_index = manager._get_search_index()
+        assert all(entry["mtime"] is not None for entry in search_index._dirs.values())
+        assert not search_index.refresh()
+
 
 class TestSemanticSearchIntegration:
     """Test KnowledgeBaseManager integration with semantic search features."""
@@ -303,6 +331,41 @@ class TestSemanticSearchIntegration:
         assert len(ai_results) > 0
         assert len(design_results) > 0
     
+    def test_hybrid_search(self, kb_manager):
+        """Test fusing keyword and semantic rankings."""
+        manager, content_items = kb_manager
+        project1, project2, note1, note2 = content_items
+        
+        results = manager.search_hybrid("neural networks", top_k=3)
+        
+        assert 0 < len(results) <= 3
+        # Only the lexical side matches the exact words, so it leads the fusion
+        assert results[0]["content_id"] == project1["id"]
+        assert results[0]["lexical_rank"] == 1
+        assert results[0]["content"]["title"] == "Machine Learning Project"
+        assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+    
+    def test_hybrid_search_falls_back_to_one_side(self, kb_manager):
+        """Test hybrid search when the semantic side fails."""
+        manager, content_items = kb_manager
+        project1 = content_items[0]
+        
+        # The folder's title also lands in hierarchy/hierarchy_index.json,
+        # which sits in the folder content directory
+        folder = manager.create_folder("Neural networks reading list")
+        search_index = manager._get_search_index()
+        search_index.refresh()
+        lexical_files = [hit["file"] for hit in search_index.search("neural networks")]
+        assert "hierarchy/hierarchy_index.json" in lexical_files
+        
+        manager.semantic_search_engine.search_hits = MagicMock(side_effect=RuntimeError("offline"))
+        results = manager.search_hybrid("neural networks")
+        
+        assert {r["content_id"] for r in results} == {folder["id"], project1["id"]}
+        assert [r["lexical_rank"] for r in results] == [1, 2]
+        assert all(r["semantic_rank"] is None for r in results)
+        assert all(r["content"] is not None for r in results)
+    
     def test_similar_content(self, kb_manager):
         """Test finding similar content."""
         manager, content_items = kb_manager
@@ -471,6 +471,19 @@ class TestKnowledgeBaseManager:
             assert "test-note.md" in results[0]["file"]
             assert "notes" in results[0]["type"]
         
+    def test_search_content_after_overwrite(self, kb_manager):
+        """Test that overwriting the day's journal entry updates the search results."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            kb_manager.base_path = Path(temp_dir)
+            
+            kb_manager.save_content("first entry about zebras", "journal")
+            assert len(kb_manager.search_content("zebras")) == 1
+            
+            kb_manager.save_content("second entry about giraffes", "journal")
+            assert len(kb_manager.search_content("giraffes")) == 1
+            assert len(kb_manager.search_content("about giraffes")) == 1
+            assert len(kb_manager.search_content("zebras")) == 0
+        
     def test_search_content_error_handling(self, kb_manager):
         """Test error handling in search."""
         # Test with empty query
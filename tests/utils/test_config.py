@@ -144,6 +144,14 @@ class TestConfig:
         assert loaded_config["logging"]["level"] == "DEBUG"
         assert loaded_config["storage"]["data_path"] == "/custom/path"
     
+    def test_embedding_backend_override(self, sample_config_dir, monkeypatch):
+        """Test that KB_EMBEDDING_BACKEND selects the embedding backend."""
+        monkeypatch.setenv("KB_EMBEDDING_BACKEND", "mock")
+        
+        loaded_config = Config(sample_config_dir).load_config()
+        
+        assert loaded_config["embeddings"]["backend"] == "mock"
+    
     def test_env_overrides_with_defaults(self, monkeypatch):
         """Test that environment variables create new sections in default config."""
         with tempfile.TemporaryDirectory() as temp_dir:
@@ -3,13 +3,15 @@
 Tests for helper utility functions.
 """
 
+import os
+import json
 import pytest
 import re
 from datetime import datetime, timezone, timedelta
 from knowledge_base.utils.helpers import (
     generate_id, get_timestamp, extract_hashtags, 
     extract_mentions, parse_date_string, detect_content_type,
-    format_filename, sanitize_filename,
+    format_filename, sanitize_filename, atomic_write_json,
     KnowledgeBaseError, ContentProcessingError, StorageError, 
     ConfigurationError, PrivacyError, ValidationError, NotFoundError, RecoveryError
 )
@@ -211,6 +213,20 @@ class TestHelperFunctions:
         
         for original, expected in invalid_filenames.items():
             assert sanitize_filename(original) == expected 
+    
+    def test_atomic_write_json_keeps_permissions(self, tmp_path):
+        """Test that atomic_write_json keeps the mode of the file it replaces."""
+        path = tmp_path / "index.json"
+        atomic_write_json(path, {"a": 1})
+        umask = os.umask(0)
+        os.umask(umask)
+        assert path.stat().st_mode & 0o777 == 0o666 & ~umask
+        
+        os.chmod(path, 0o640)
+        atomic_write_json(path, {"a": 2}, indent=2)
+        assert path.stat().st_mode & 0o777 == 0o640
+        assert json.loads(path.read_text()) == {"a": 2}
+        assert [p.name for p in tmp_path.iterdir()] == ["index.json"]
 
 
 class TestExceptionHierarchy:
@@ -115,6 +115,23 @@ async def get_recent_content(
         logger.error(f"Error getting recent content: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get recent content: {str(e)}")
 
+@router.get("/important-content", response_model=List[Dict[str, Any]])
+async def get_important_content(
+    metric: str = Query("pagerank", description="Graph metric to rank by"),
+    limit: int = Query(5, ge=1, le=100, description="Number of items to return"),
+    kb_service: KnowledgeBaseService = Depends(get_kb_service)
+):
+    """
+    Get the most central content in the knowledge graph.
+    """
+    try:
+        return kb_service.get_important_content(metric, limit)
+    except Exception as e:
+        if "unknown graph metric" in str(e).lower():
+            raise HTTPException(status_code=400, detail=str(e))
+        logger.error(f"Error getting important content: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get important content: {str(e)}")
+
 @router.get("/activity", response_model=List[Dict[str, Any]])
 async def get_recent_activity(
     limit: int = Query(10, description="Number of items to return"),
@@ -0,0 +1,51 @@
+"""
+Graph API
+Endpoints for exploring the knowledge graph.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Dict, List, Any, Optional
+import logging
+
+from services.kb_service import KnowledgeBaseService, get_kb_service
+
+logger = logging.getLogger(__name__)
+router = APIRouter()
+
+@router.get("/knowledge", response_model=Dict[str, Any])
+async def get_knowledge_graph(
+    root_ids: Optional[str] = Query(None, description="Comma-separated root content IDs (None for all)"),
+    max_depth: int = Query(2, ge=0, le=5, description="Maximum depth from the roots"),
+    kb_service: KnowledgeBaseService = Depends(get_kb_service)
+):
+    """
+    Get every node and edge within max_depth of the roots.
+    """
+    try:
+        roots = [root_id for root_id in root_ids.split(",") if root_id] if root_ids else None
+        return kb_service.build_knowledge_graph(roots, max_depth)
+    except Exception as e:
+        logger.error(f"Error building knowledge graph: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to build knowledge graph: {str(e)}")
+
+@router.get("/summary", response_model=Dict[str, Any])
+async def get_graph_summary(
+    expand: Optional[List[int]] = Query(None, description="Community IDs to show member by member"),
+    expand_group: Optional[List[int]] = Query(None, description="Community groups to show community by community"),
+    focus: Optional[List[str]] = Query(None, description="Content IDs to show individually"),
+    max_nodes: int = Query(300, ge=1, le=2000, description="Maximum number of nodes"),
+    max_edges: int = Query(1500, ge=0, le=10000, description="Maximum number of edge bundles"),
+    include_hierarchy: bool = Query(True, description="Include hierarchical relationships"),
+    kb_service: KnowledgeBaseService = Depends(get_kb_service)
+):
+    """
+    Get a level-of-detail view of the whole graph in columnar form.
+
+    Communities are collapsed into clusters, or groups of clusters, unless
+    expanded, and edges between the same two nodes are bundled with a count.
+    """
+    try:
+        return kb_service.get_graph_summary(expand, focus, max_nodes, max_edges, include_hierarchy, expand_group)
+    except Exception as e:
+        logger.error(f"Error summarizing knowledge graph: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to summarize knowledge graph: {str(e)}")
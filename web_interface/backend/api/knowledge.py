@@ -3,7 +3,10 @@ Knowledge Management API
 Endpoints for managing knowledge base content.
 """
 
+import json
+
 from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from fastapi.responses import StreamingResponse
 from typing import Dict, List, Any, Optional
 from pydantic import BaseModel, Field
 
@@ -126,6 +129,48 @@ async def get_folder_tree(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get folder tree: {str(e)}")
 
+@router.get("/folder/tree/page", response_model=Dict[str, Any])
+async def get_folder_tree_page(
+    folder_id: Optional[str] = Query(None, description="Folder ID (None for the root)"),
+    depth: int = Query(1, ge=1, le=5, description="Number of levels to list"),
+    limit: int = Query(100, ge=1, le=1000, description="Maximum children listed per folder"),
+    cursor: Optional[str] = Query(None, description="next_cursor or expand token from an earlier page"),
+    max_nodes: int = Query(1000, ge=1, le=5000, description="Maximum items listed in total"),
+    kb_service: KnowledgeBaseService = Depends(get_kb_service)
+):
+    """
+    Get part of a folder tree, with tokens to page through or expand the rest.
+    """
+    try:
+        return kb_service.get_folder_tree_page(folder_id, depth, limit, cursor, max_nodes)
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail=f"Folder not found: {folder_id}")
+        if "invalid cursor" in str(e).lower():
+            raise HTTPException(status_code=400, detail=str(e))
+        raise HTTPException(status_code=500, detail=f"Failed to get folder tree: {str(e)}")
+
+@router.get("/folder/tree/stream")
+async def stream_folder_tree(
+    folder_id: Optional[str] = Query(None, description="Root folder ID (None for entire tree)"),
+    max_depth: int = Query(-1, description="Maximum depth (-1 for unlimited)"),
+    kb_service: KnowledgeBaseService = Depends(get_kb_service)
+):
+    """
+    Stream a folder tree as newline-delimited JSON, one item per line.
+    """
+    try:
+        items = kb_service.iter_folder_tree(folder_id, max_depth)
+    except Exception as e:
+        if "not found" in str(e).lower():
+            raise HTTPException(status_code=404, detail=f"Folder not found: {folder_id}")
+        raise HTTPException(status_code=500, detail=f"Failed to get folder tree: {str(e)}")
+    
+    return StreamingResponse(
+        (json.dumps(item) + "\n" for item in items),
+        media_type="application/x-ndjson"
+    )
+
 @router.post("/content/{content_id}/move", response_model=ContentResponse)
 async def move_content(
     content_id: str = Path(..., description="The ID of the content"),
@@ -172,22 +217,12 @@ async def bulk_operation(
         results = {}
         
         if operation == "move" and target_id:
-            # Move content items to target folder
-            for content_id in content_ids:
-                try:
-                    result = kb_service.move_content_to_folder(content_id, target_id)
-                    results[content_id] = {"success": True}
-                except Exception as e:
-                    results[content_id] = {"success": False, "error": str(e)}
+            # Move content items to target folder, in one batch
+            results = kb_service.move_contents_to_folder(content_ids, target_id)
                     
         elif operation == "delete":
-            # Delete content items
-            for content_id in content_ids:
-                try:
-                    result = kb_service.delete_content(content_id)
-                    results[content_id] = {"success": result}
-                except Exception as e:
-                    results[content_id] = {"success": False, "error": str(e)}
+            # Delete content items, in one batch
+            results = kb_service.delete_contents(content_ids)
         
         elif operation == "tag":
             # Add tags to content items
@@ -14,13 +14,14 @@ router = APIRouter()
 async def search_content(
     query: str = Query(..., description="Search query"),
     content_type: Optional[str] = Query(None, description="Optional content type filter"),
+    fuzzy: bool = Query(False, description="Correct misspelled words if nothing matches"),
     kb_service: KnowledgeBaseService = Depends(get_kb_service)
 ):
     """
     Search content in the knowledge base using text matching.
     """
     try:
-        results = kb_service.search_content(query, content_type)
+        results = kb_service.search_content(query, content_type, fuzzy=fuzzy)
         return {"results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
@@ -33,6 +34,8 @@ async def search_semantic(
     categories: Optional[List[str]] = Query(None, description="Optional categories filter"),
     tags: Optional[List[str]] = Query(None, description="Optional tags filter"),
     min_similarity: float = Query(0.0, description="Minimum similarity score (0.0 - 1.0)"),
+    fields: Optional[List[str]] = Query(None, description="Optional content fields to return"),
+    hydrate: bool = Query(True, description="Read full content instead of stored metadata only"),
     kb_service: KnowledgeBaseService = Depends(get_kb_service)
 ):
     """
@@ -40,12 +43,33 @@ async def search_semantic(
     """
     try:
         results = kb_service.search_semantic(
-            query, top_k, content_types, categories, tags, min_similarity
+            query, top_k, content_types, categories, tags, min_similarity, fields=fields, hydrate=hydrate
         )
         return {"results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Semantic search failed: {str(e)}")
 
+@router.get("/hybrid", response_model=Dict[str, Any])
+async def search_hybrid(
+    query: str = Query(..., description="Search query"),
+    top_k: int = Query(10, description="Number of results to return"),
+    content_types: Optional[List[str]] = Query(None, description="Optional content types filter"),
+    lexical_weight: float = Query(1.0, description="Weight of the keyword ranking"),
+    semantic_weight: float = Query(1.0, description="Weight of the semantic ranking"),
+    fuzzy: bool = Query(False, description="Expand misspelled words"),
+    kb_service: KnowledgeBaseService = Depends(get_kb_service)
+):
+    """
+    Search with keywords and embeddings in one request, fused by rank.
+    """
+    try:
+        results = kb_service.search_hybrid(
+            query, top_k, content_types, lexical_weight, semantic_weight, fuzzy
+        )
+        return {"results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Hybrid search failed: {str(e)}")
+
 @router.get("/similar/{content_id}", response_model=Dict[str, Any])
 async def get_similar_content(
     content_id: str,
@@ -72,8 +96,7 @@ async def get_search_suggestions(
     Get search suggestions based on partial input.
     """
     try:
-        # Get suggestions based on content titles, tags, and categories
-        # This would typically be implemented in the KnowledgeBaseService
+        # Completed from the prefix index over titles, tags and frequent terms
         suggestions = kb_service.get_search_suggestions(query, max_suggestions)
         return {"suggestions": suggestions}
     except Exception as e:
@@ -5,7 +5,7 @@ Service layer that wraps the KnowledgeBaseManager for use in the web interface.
 
 import logging
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, Iterator
 import os
 from functools import lru_cache
 
@@ -96,6 +96,19 @@ class KnowledgeBaseService:
         """
         return self.manager.delete_content(content_id)
     
+    def delete_contents(self, content_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Delete several content items in one batch.
+        
+        Args:
+            content_ids: IDs of the content items
+            
+        Returns:
+            Dictionary mapping each ID to its result
+        """
+        deleted, errors = self.manager.delete_contents(content_ids)
+        return self._bulk_results(content_ids, deleted, errors)
+    
     # Folder Management Methods
     
     def create_folder(self, title: str, parent_id: Optional[str] = None, description: str = "", icon: str = "folder") -> Dict[str, Any]:
@@ -126,6 +139,42 @@ class KnowledgeBaseService:
         """
         return self.manager.get_folder_tree(folder_id, max_depth)
     
+    def get_folder_tree_page(
+        self,
+        folder_id: Optional[str] = None,
+        depth: int = 1,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        max_nodes: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Get part of a folder tree for lazy expansion.
+        
+        Args:
+            folder_id: ID of the folder
+            depth: Number of levels to list
+            limit: Maximum number of children listed per folder
+            cursor: Token from an earlier page
+            max_nodes: Maximum number of items listed in total
+            
+        Returns:
+            Dictionary representing the listed part of the tree
+        """
+        return self.manager.get_folder_tree_page(folder_id, depth, limit, cursor, max_nodes)
+    
+    def iter_folder_tree(self, folder_id: Optional[str] = None, max_depth: int = -1) -> Iterator[Dict[str, Any]]:
+        """
+        Walk a folder tree one item at a time.
+        
+        Args:
+            folder_id: ID of the root folder
+            max_depth: Maximum depth of the walk
+            
+        Returns:
+            Iterator of flat tree items
+        """
+        return self.manager.iter_folder_tree(folder_id, max_depth)
+    
     def list_folder_contents(self, folder_id: str) -> List[Dict[str, Any]]:
         """
         List contents of a folder.
@@ -151,20 +200,49 @@ class KnowledgeBaseService:
         """
         return self.manager.move_content_to_folder(content_id, folder_id)
     
+    def move_contents_to_folder(self, content_ids: List[str], folder_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Move several content items to a folder in one batch.
+        
+        Args:
+            content_ids: IDs of the content items
+            folder_id: ID of the destination folder
+            
+        Returns:
+            Dictionary mapping each ID to its result
+        """
+        moved, errors = self.manager.move_contents_to_folder(content_ids, folder_id)
+        results = self._bulk_results(content_ids, moved, errors)
+        for content_id, path in moved.items():
+            results[content_id]["path"] = path
+        return results
+    
+    @staticmethod
+    def _bulk_results(content_ids: List[str], done, errors: Dict[str, Exception]) -> Dict[str, Dict[str, Any]]:
+        """Build per-item results of a bulk operation."""
+        results = {}
+        for content_id in content_ids:
+            if content_id in errors:
+                results[content_id] = {"success": False, "error": str(errors[content_id])}
+            else:
+                results[content_id] = {"success": content_id in done}
+        return results
+    
     # Search Methods
     
-    def search_content(self, query: str, content_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    def search_content(self, query: str, content_type: Optional[str] = None, fuzzy: bool = False) -> List[Dict[str, Any]]:
         """
         Search content using text matching.
         
         Args:
             query: Search query
             content_type: Optional content type filter
+            fuzzy: Whether to correct misspelled words when nothing matches
             
         Returns:
             List of search results
         """
-        return self.manager.search_content(query, content_type)
+        return self.manager.search_content(query, content_type, fuzzy=fuzzy)
     
     def search_semantic(
         self,
@@ -173,7 +251,9 @@ class KnowledgeBaseService:
         content_types: Optional[List[str]] = None,
         categories: Optional[List[str]] = None,
         tags: Optional[List[str]] = None,
-        min_similarity: float = 0.0
+        min_similarity: float = 0.0,
+        fields: Optional[List[str]] = None,
+        hydrate: bool = True
     ) -> List[Dict[str, Any]]:
         """
         Perform semantic search.
@@ -185,11 +265,40 @@ class KnowledgeBaseService:
             categories: Optional filter by categories
             tags: Optional filter by tags
             min_similarity: Minimum similarity score
+            fields: Optional content fields to return
+            hydrate: Whether to read full content or use stored metadata only
             
         Returns:
             List of search results with similarity scores
         """
-        return self.manager.search_semantic(query, top_k, content_types, categories, tags, min_similarity)
+        return self.manager.search_semantic(
+            query, top_k, content_types, categories, tags, min_similarity, fields=fields, hydrate=hydrate
+        )
+    
+    def search_hybrid(
+        self,
+        query: str,
+        top_k: int = 10,
+        content_types: Optional[List[str]] = None,
+        lexical_weight: float = 1.0,
+        semantic_weight: float = 1.0,
+        fuzzy: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Perform a combined lexical and semantic search.
+        
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            content_types: Optional filter by content types
+            lexical_weight: Weight of the lexical ranking
+            semantic_weight: Weight of the semantic ranking
+            fuzzy: Whether to expand misspelled words
+            
+        Returns:
+            List of fused search results
+        """
+        return self.manager.search_hybrid(query, top_k, content_types, lexical_weight, semantic_weight, fuzzy)
     
     def similar_content(self, content_id: str, top_k: int = 5, min_similarity: float = 0.7) -> List[Dict[str, Any]]:
         """
@@ -216,25 +325,7 @@ class KnowledgeBaseService:
         Returns:
             List of search suggestions
         """
-        # This is a simplified implementation
-        # In a real app, you might use more sophisticated logic
-        suggestions = []
-        
-        # Try to find content with titles matching the query
-        results = self.search_content(query)
-        
-        for result in results[:max_suggestions]:
-            content_type = result.get("type", "")
-            title = result.get("content_preview", "").split("\n")[0][:50]
-            
-            suggestions.append({
-                "type": "content",
-                "content_type": content_type,
-                "title": title,
-                "file": result.get("file", "")
-            })
-        
-        return suggestions
+        return self.manager.get_search_suggestions(query, max_suggestions)
     
     # Privacy Methods
     
@@ -358,6 +449,45 @@ class KnowledgeBaseService:
             Graph representation
         """
         return self.manager.build_knowledge_graph(root_ids, max_depth)
+    
+    def get_important_content(self, metric: str = "pagerank", limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        Get the content items that rank highest by a graph metric.
+        
+        Args:
+            metric: Metric to rank by (pagerank, betweenness, ego_size,
+                degree, in_degree or out_degree)
+            limit: Maximum number of items to return
+            
+        Returns:
+            Graph nodes with a "score" field, highest first
+        """
+        return self.manager.get_important_content(metric, limit)
+    
+    def get_graph_summary(
+        self,
+        expanded: Optional[List[int]] = None,
+        focus_ids: Optional[List[str]] = None,
+        max_nodes: int = 300,
+        max_edges: int = 1500,
+        include_hierarchy: bool = True,
+        expanded_groups: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get a level-of-detail view of the whole knowledge graph.
+        
+        Args:
+            expanded: Community IDs to show member by member
+            focus_ids: Content IDs to show individually
+            max_nodes: Maximum number of nodes
+            max_edges: Maximum number of edge bundles
+            include_hierarchy: Include hierarchical relationships
+            expanded_groups: Community group numbers to show community by community
+            
+        Returns:
+            Columnar graph summary
+        """
+        return self.manager.get_graph_summary(expanded, focus_ids, max_nodes, max_edges, include_hierarchy, expanded_groups)
 
 
 @lru_cache
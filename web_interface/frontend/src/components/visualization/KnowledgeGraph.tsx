@@ -1,25 +1,64 @@
 import React, { useEffect, useRef, useState, useMemo } from 'react';
 import { Box, CircularProgress, Typography, Paper } from '@mui/material';
 import ForceGraph2D from 'react-force-graph-2d';
-import { GraphData, GraphNode, GraphLink } from '../../types';
+import { GraphData, GraphNode, GraphLink, GraphSummary } from '../../types';
 import api from '../../services/api';
 
+// Zoom levels at which clusters in view open up, or everything folds back
+const EXPAND_ZOOM = 2.5;
+const COLLAPSE_ZOOM = 0.6;
+
+// Most clusters opened by a single zoom
+const MAX_VIEWPORT_EXPANSIONS = 2;
+
 interface KnowledgeGraphProps {
   rootIds?: string[];
-  maxDepth?: number;
+  maxNodes?: number;
   height?: number;
   width?: number;
   onNodeClick?: (node: GraphNode) => void;
 }
 
+// Turn the columnar summary into the node and link objects the renderer uses
+const decodeSummary = (summary: GraphSummary): GraphData => {
+  const { nodes, edges } = summary;
+  const ids = nodes.kind.map((kind, i) => {
+    const kindName = summary.node_kinds[kind];
+    return kindName === 'item' ? (nodes.content_id[i] as string) : `${kindName}:${nodes.community[i]}`;
+  });
+
+  return {
+    nodes: ids.map((id, i) => {
+      const kind = summary.node_kinds[nodes.kind[i]] as GraphNode['kind'];
+      return {
+        id,
+        name: kind === 'item' || kind === 'rest' ? nodes.label[i] : `${nodes.label[i]} +${nodes.size[i] - 1}`,
+        type: kind === 'item' ? summary.content_types[nodes.type[i]] : (kind as string),
+        kind,
+        community: nodes.community[i],
+        size: nodes.size[i],
+        val: 1 + Math.log2(nodes.size[i])
+      };
+    }),
+    links: edges.source.map((source, i) => ({
+      source: ids[source],
+      target: ids[edges.target[i]],
+      type: summary.relationship_types[edges.type[i]],
+      value: edges.count[i]
+    }))
+  };
+};
+
 const KnowledgeGraph: React.FC<KnowledgeGraphProps> = ({
   rootIds,
-  maxDepth = 2,
+  maxNodes = 300,
   height = 600,
   width,
   onNodeClick
 }) => {
   const [graphData, setGraphData] = useState<GraphData | null>(null);
+  const [expanded, setExpanded] = useState<number[]>([]);
+  const [expandedGroups, setExpandedGroups] = useState<number[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const [highlightNodes, setHighlightNodes] = useState(new Set<string>());
@@ -35,7 +74,10 @@ const KnowledgeGraph: React.FC<KnowledgeGraphProps> = ({
     calendar: '#ff9800',
     folder: '#4caf50',
     category: '#9e9e9e',
-    tag: '#e91e63'
+    tag: '#e91e63',
+    cluster: '#00838f',
+    group: '#37474f',
+    rest: '#b0bec5'
   }), []);
 
   // Fetch graph data
@@ -45,9 +87,16 @@ const KnowledgeGraph: React.FC<KnowledgeGraphProps> = ({
       setError(null);
       
       try {
-        const data = await api.getKnowledgeGraph(rootIds, maxDepth);
+        const summary: GraphSummary = await api.getGraphSummary({
+          expand: expanded,
+          expandGroups: expandedGroups,
+          focus: rootIds,
+          maxNodes
+        });
         
-        if (data && data.nodes && data.links) {
+        if (summary && summary.nodes && summary.edges) {
+          const data = decodeSummary(summary);
+          
           // Process node colors based on type
           const processedData = {
             nodes: data.nodes.map((node: GraphNode) => ({
@@ -71,7 +120,7 @@ const KnowledgeGraph: React.FC<KnowledgeGraphProps> = ({
     };
     
     fetchGraphData();
-  }, [rootIds, maxDepth, nodeColors]);
+  }, [rootIds, maxNodes, expanded, expandedGroups, nodeColors]);
 
   // Handle node hover - highlight connected nodes and links
   const handleNodeHover = (node: GraphNode | null) => {
@@ -99,30 +148,59 @@ const KnowledgeGraph: React.FC<KnowledgeGraphProps> = ({
     setHighlightNodes(new Set(highlightNodes));
   };
 
-  // Handle node click
+  // Open a cluster or group in place
+  const expandNodes = (nodes: GraphNode[]) => {
+    const clusters = nodes.filter(node => node.kind === 'cluster').map(node => node.community as number);
+    const groups = nodes.filter(node => node.kind === 'group').map(node => node.community as number);
+    
+    if (clusters.length) {
+      setExpanded(current => Array.from(new Set([...current, ...clusters])));
+    }
+    if (groups.length) {
+      setExpandedGroups(current => Array.from(new Set([...current, ...groups])));
+    }
+  };
+
+  // Handle node click; clusters and groups open up, items are selected
   const handleNodeClick = (node: GraphNode) => {
+    if (node.kind === 'cluster' || node.kind === 'group') {
+      expandNodes([node]);
+      return;
+    }
+    
     setSelectedNode(node);
-    if (onNodeClick) {
+    if (onNodeClick && node.kind !== 'rest') {
       onNodeClick(node);
     }
   };
 
-  // Calculate node size based on connections
-  const getNodeSize = (node: GraphNode) => {
-    if (!graphData) return 8;
-    
-    let connectionCount = 0;
-    graphData.links.forEach(link => {
-      const source = typeof link.source === 'object' ? link.source.id : link.source;
-      const target = typeof link.target === 'object' ? link.target.id : link.target;
-      
-      if (source === node.id || target === node.id) {
-        connectionCount++;
+  // Zooming in opens the largest clusters in view; zooming out folds them back
+  const handleZoomEnd = ({ k }: { k: number }) => {
+    if (k <= COLLAPSE_ZOOM) {
+      if (expanded.length || expandedGroups.length) {
+        setExpanded([]);
+        setExpandedGroups([]);
       }
-    });
+      return;
+    }
+    
+    if (k < EXPAND_ZOOM || !graphData || !graphRef.current) return;
+    
+    const topLeft = graphRef.current.screen2GraphCoords(0, 0);
+    const bottomRight = graphRef.current.screen2GraphCoords(width ?? window.innerWidth, height);
+    const inView = graphData.nodes
+      .filter((node: any) => (node.kind === 'cluster' || node.kind === 'group')
+        && node.x >= topLeft.x && node.x <= bottomRight.x
+        && node.y >= topLeft.y && node.y <= bottomRight.y)
+      .sort((a, b) => (b.size || 0) - (a.size || 0))
+      .slice(0, MAX_VIEWPORT_EXPANSIONS);
     
-    // Base size + bonus for connections
-    return 8 + Math.min(connectionCount * 2, 12);
+    expandNodes(inView);
+  };
+
+  // Node size grows with the number of items a node stands for
+  const getNodeSize = (node: GraphNode) => {
+    return 8 + Math.min(Math.log2(node.size || 1) * 3, 24);
   };
 
   // Custom link color based on relationship type
@@ -135,6 +213,7 @@ const KnowledgeGraph: React.FC<KnowledgeGraphProps> = ({
       case 'related':
         return '#2196f3';
       case 'parent':
+      case 'parent_child':
         return '#4caf50';
       case 'reference':
         return '#ff9800';
@@ -223,13 +302,14 @@ const KnowledgeGraph: React.FC<KnowledgeGraphProps> = ({
           ctx.fill();
         }}
         linkColor={link => getLinkColor(link)}
-        linkWidth={link => highlightLinks.has(`${link.source}-${link.target}`) ? 3 : 1}
-        linkDirectionalArrowLength={link => link.type === 'parent' ? 3 : 0}
+        linkWidth={link => (highlightLinks.has(`${link.source}-${link.target}`) ? 2 : 0) + Math.min(1 + Math.log2(link.value || 1), 6)}
+        linkDirectionalArrowLength={link => link.type === 'parent' || link.type === 'parent_child' ? 3 : 0}
         linkDirectionalArrowRelPos={0.8}
         linkDirectionalParticles={link => highlightLinks.has(`${link.source}-${link.target}`) ? 4 : 0}
         linkDirectionalParticleWidth={2}
         onNodeHover={handleNodeHover}
         onNodeClick={handleNodeClick}
+        onZoomEnd={handleZoomEnd}
         cooldownTicks={100}
         d3AlphaDecay={0.02}
         d3VelocityDecay={0.1}
@@ -257,6 +337,11 @@ const KnowledgeGraph: React.FC<KnowledgeGraphProps> = ({
               <strong>Category:</strong> {selectedNode.category}
             </Typography>
           )}
+          {selectedNode.kind === 'rest' && (
+            <Typography variant="body2">
+              <strong>Items:</strong> {selectedNode.size}
+            </Typography>
+          )}
           <Typography variant="body2">
             <strong>Connections:</strong> {
               graphData.links.filter(link => {
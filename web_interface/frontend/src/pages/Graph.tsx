@@ -27,7 +27,7 @@ import api from '../services/api';
 
 const Graph: React.FC = () => {
   const [recentContent, setRecentContent] = useState<Content[]>([]);
-  const [maxDepth, setMaxDepth] = useState<number>(2);
+  const [maxNodes, setMaxNodes] = useState<number>(300);
   const [selectedRootIds, setSelectedRootIds] = useState<string[]>([]);
   const [loading, setLoading] = useState<boolean>(true);
   const [error, setError] = useState<string | null>(null);
@@ -68,8 +68,8 @@ const Graph: React.FC = () => {
     }
   };
   
-  const handleDepthChange = (_event: Event, newValue: number | number[]) => {
-    setMaxDepth(newValue as number);
+  const handleDetailChange = (_event: Event, newValue: number | number[]) => {
+    setMaxNodes(newValue as number);
   };
   
   const handleNodeClick = async (nodeId: string) => {
@@ -117,20 +117,20 @@ const Graph: React.FC = () => {
             </Typography>
             <Divider sx={{ mb: 2 }} />
             
-            {/* Depth slider */}
+            {/* Detail slider */}
             <Box sx={{ mb: 3 }}>
-              <Typography id="depth-slider" gutterBottom>
-                Exploration Depth: {maxDepth}
+              <Typography id="detail-slider" gutterBottom>
+                Detail Level: {maxNodes} nodes
               </Typography>
               <Slider
-                value={maxDepth}
-                onChange={handleDepthChange}
-                aria-labelledby="depth-slider"
+                value={maxNodes}
+                onChange={handleDetailChange}
+                aria-labelledby="detail-slider"
                 valueLabelDisplay="auto"
-                step={1}
+                step={100}
                 marks
-                min={1}
-                max={5}
+                min={100}
+                max={1000}
               />
             </Box>
             
@@ -162,7 +162,7 @@ const Graph: React.FC = () => {
                 </Box>
               ) : (
                 <Typography variant="body2" color="text.secondary">
-                  No root items selected. Showing full graph.
+                  No root items selected. Showing the whole graph by cluster; click or zoom into a cluster to open it.
                 </Typography>
               )}
             </Box>
@@ -257,7 +257,7 @@ const Graph: React.FC = () => {
             <Box sx={{ height: getGraphHeight() }}>
               <KnowledgeGraph 
                 rootIds={selectedRootIds}
-                maxDepth={maxDepth}
+                maxNodes={maxNodes}
                 height={getGraphHeight()}
                 onNodeClick={handleNodeClick}
               />
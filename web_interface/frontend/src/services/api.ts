@@ -198,6 +198,10 @@ class ApiService {
     return this.request('/dashboard/distribution');
   }
   
+  async getImportantContent(metric: string = 'pagerank', limit: number = 5) {
+    return this.request(`/dashboard/important-content?metric=${encodeURIComponent(metric)}&limit=${limit}`);
+  }
+  
   // Organization & Tagging
   
   async getFolderStructure(folderId?: string, depth: number = 2) {
@@ -210,6 +214,20 @@ class ApiService {
     return this.request(`/organization/folders?${params.toString()}`);
   }
   
+  async getFolderTreePage(options: { folderId?: string; cursor?: string; depth?: number; limit?: number } = {}) {
+    const params = new URLSearchParams();
+    if (options.cursor) {
+      // next_cursor and expand tokens carry their folder
+      params.append('cursor', options.cursor);
+    } else if (options.folderId) {
+      params.append('folder_id', options.folderId);
+    }
+    params.append('depth', (options.depth ?? 1).toString());
+    params.append('limit', (options.limit ?? 100).toString());
+    
+    return this.request(`/knowledge/folder/tree/page?${params.toString()}`);
+  }
+  
   async createFolder(title: string, parentId?: string, description?: string) {
     return this.request('/organization/folders', {
       method: 'POST',
@@ -247,6 +265,16 @@ class ApiService {
     return this.request(`/graph/knowledge?${params.toString()}`);
   }
   
+  async getGraphSummary(options: { expand?: number[]; expandGroups?: number[]; focus?: string[]; maxNodes?: number } = {}) {
+    const params = new URLSearchParams();
+    options.expand?.forEach(community => params.append('expand', community.toString()));
+    options.expandGroups?.forEach(group => params.append('expand_group', group.toString()));
+    options.focus?.forEach(id => params.append('focus', id));
+    params.append('max_nodes', (options.maxNodes ?? 300).toString());
+    
+    return this.request(`/graph/summary?${params.toString()}`);
+  }
+  
   // Voice
   
   async transcribeAudio(audioBlob: Blob) {
@@ -84,6 +84,9 @@ export interface GraphNode {
   val?: number;
   color?: string;
   category?: string;
+  kind?: 'item' | 'cluster' | 'rest' | 'group';
+  community?: number;
+  size?: number;
 }
 
 export interface GraphLink {
@@ -99,6 +102,32 @@ export interface GraphData {
   links: GraphLink[];
 }
 
+// Level-of-detail graph summary; every field is a column with one entry per
+// node or edge, and edges refer to nodes by position
+export interface GraphSummary {
+  version: number;
+  generation: number;
+  nodes: {
+    kind: number[];
+    content_id: (string | null)[];
+    community: number[];
+    size: number[];
+    score: number[];
+    label: string[];
+    type: number[];
+  };
+  edges: {
+    source: number[];
+    target: number[];
+    count: number[];
+    type: number[];
+  };
+  node_kinds: string[];
+  content_types: string[];
+  relationship_types: string[];
+  statistics: Record<string, number>;
+}
+
 // API Response Types
 export interface ApiResponse<T = any> {
   success: boolean;